@@ -0,0 +1,31 @@
+"""
+Rebuild the student_daily_stats rollup from student sessions.
+
+Usage:
+    python backfill_daily_stats.py                # all students
+    python backfill_daily_stats.py 12 57          # only these student ids
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from src.main import app
+from src.services.daily_stats_service import DailyStatsService
+
+
+def backfill_daily_stats(student_ids=None):
+    """Rebuild daily stats for the requested students (or all students)."""
+    with app.app_context():
+        print("Rebuilding student daily stats from sessions...")
+
+        result = DailyStatsService.rebuild(student_ids or None)
+        print(f"  ✓ {result['rows']} daily rows for {result['students']} students")
+
+        print("✅ Daily stats rebuilt")
+
+
+if __name__ == '__main__':
+    if not all(arg.isdigit() for arg in sys.argv[1:]):
+        print("✗ Student ids must be whole numbers")
+        sys.exit(1)
+    backfill_daily_stats([int(arg) for arg in sys.argv[1:]])
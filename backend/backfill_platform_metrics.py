@@ -0,0 +1,34 @@
+"""
+Rebuild the per-day active-student sketches behind the admin metrics.
+
+Run once after deploying, or after importing historical sessions, after
+backfill_daily_stats.py (the sketches are built from the daily rollup);
+each metrics refresh (refresh_platform_metrics.py) keeps today and
+yesterday current on its own.
+
+Usage:
+    python backfill_platform_metrics.py
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from src.main import app
+from src.services.platform_metrics_service import PlatformMetricsService
+
+
+def backfill_platform_metrics():
+    """Rebuild every daily activity sketch."""
+    with app.app_context():
+        print("Rebuilding platform activity sketches...")
+        days = PlatformMetricsService.backfill()
+        print(f"  ✓ {days} days rebuilt")
+
+        PlatformMetricsService.refresh()
+        print("  ✓ Metrics snapshot refreshed")
+
+        print("✅ Platform metrics backfilled")
+
+
+if __name__ == '__main__':
+    backfill_platform_metrics()
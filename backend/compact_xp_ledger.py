@@ -0,0 +1,34 @@
+"""
+Fold old XP transactions into daily and weekly rollups.
+
+Usage:
+    python compact_xp_ledger.py                   # keep XP_LEDGER_RETENTION_DAYS of raw ledger
+    python compact_xp_ledger.py 120               # keep 120 days of raw ledger
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from src.main import app
+from src.services.xp_ledger_service import XPLedgerService
+
+
+def compact_xp_ledger(retention_days=None):
+    """Compact XP transactions older than the retention window."""
+    with app.app_context():
+        retention_days = retention_days if retention_days is not None else XPLedgerService.RETENTION_DAYS
+        print(f"Compacting XP ledger (keeping {retention_days} days of raw transactions)...")
+
+        result = XPLedgerService.compact(retention_days=retention_days)
+        print(f"  ✓ Folded {result['transactions']} transactions from {result['days']} days")
+        if result['compacted_before']:
+            print(f"  ✓ Ledger compacted before {result['compacted_before'].isoformat()}")
+
+        print("✅ XP ledger compacted")
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1 and not sys.argv[1].isdigit():
+        print("✗ Retention must be a whole number of days")
+        sys.exit(1)
+    compact_xp_ledger(int(sys.argv[1]) if len(sys.argv) > 1 else None)
@@ -0,0 +1,35 @@
+"""
+Generate today's daily challenges for every active student.
+
+Run nightly, shortly after midnight UTC, from cron or the platform scheduler.
+
+Usage:
+    python generate_daily_challenges.py           # students active in the last CHALLENGE_ACTIVE_DAYS
+    python generate_daily_challenges.py 7         # students active in the last 7 days
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from src.main import app
+from src.services.challenge_service import ChallengeService
+
+
+def generate_daily_challenges(active_days=None):
+    """Expire old challenges and create today's for active students."""
+    with app.app_context():
+        active_days = active_days if active_days is not None else ChallengeService.ACTIVE_DAYS
+        print(f"Generating daily challenges (students active in the last {active_days} days)...")
+
+        result = ChallengeService.generate_all_daily_challenges(active_days=active_days)
+        print(f"  ✓ Expired {result['expired']} challenges")
+        print(f"  ✓ Created {result['challenges']} challenges for {result['students']} students")
+
+        print("✅ Daily challenges generated")
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1 and not sys.argv[1].isdigit():
+        print("✗ Active window must be a whole number of days")
+        sys.exit(1)
+    generate_daily_challenges(int(sys.argv[1]) if len(sys.argv) > 1 else None)
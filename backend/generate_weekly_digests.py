@@ -0,0 +1,46 @@
+"""
+Generate weekly report snapshots for every student with a linked parent.
+
+Run once a week (e.g. Monday morning from cron) for the week that just
+ended. An interrupted run picks up after the last stored partition when
+started again.
+
+Usage:
+    python generate_weekly_digests.py                # last week, all CPUs
+    python generate_weekly_digests.py 0              # the current week
+    python generate_weekly_digests.py 1 4            # last week, 4 workers
+    python generate_weekly_digests.py 1 4 --restart  # ignore unfinished runs
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+
+def generate_weekly_digests(week_offset=1, workers=None, resume=True):
+    """Generate report snapshots for one week."""
+    # Imported here: digest workers are spawned processes that re-import
+    # this script and must not start the app
+    from src.main import app
+    from src.services.weekly_digest_service import WeeklyDigestService
+
+    def report_progress(run):
+        print(f"  ✓ {run.processed_students}/{run.total_students} students (through id {run.last_student_id})")
+
+    with app.app_context():
+        print("Generating weekly digests...")
+        run = WeeklyDigestService.run(week_offset, workers=workers, resume=resume, progress=report_progress)
+        print(f"  ✓ Run {run['id']} for the week of {run['period_start']}: {run['processed_students']} reports")
+
+        print("✅ Weekly digests generated")
+
+
+if __name__ == '__main__':
+    args = [arg for arg in sys.argv[1:] if arg != '--restart']
+    if len(args) > 2 or not all(arg.isdigit() for arg in args):
+        print("✗ Usage: generate_weekly_digests.py [week_offset] [workers] [--restart]")
+        sys.exit(1)
+    generate_weekly_digests(
+        int(args[0]) if args else 1,
+        int(args[1]) if len(args) > 1 else None,
+        resume='--restart' not in sys.argv[1:]
+    )
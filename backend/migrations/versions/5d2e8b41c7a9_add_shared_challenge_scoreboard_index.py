@@ -0,0 +1,51 @@
+"""Add shared challenge scoreboard version and score index
+
+Revision ID: 5d2e8b41c7a9
+Revises: c3f1a9d27e40
+Create Date: 2026-10-17 18:40:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5d2e8b41c7a9'
+down_revision = 'c3f1a9d27e40'
+branch_labels = None
+depends_on = None
+
+
+def _columns(inspector, table):
+    return [column['name'] for column in inspector.get_columns(table)]
+
+
+def _indexes(inspector, table):
+    return [index['name'] for index in inspector.get_indexes(table)]
+
+
+def upgrade():
+    # db.create_all() builds these tables with the column and index on new
+    # databases; it never alters existing ones
+    inspector = sa.inspect(op.get_bind())
+    tables = inspector.get_table_names()
+
+    if 'shared_challenges' in tables and 'scoreboard_version' not in _columns(inspector, 'shared_challenges'):
+        with op.batch_alter_table('shared_challenges', schema=None) as batch_op:
+            batch_op.add_column(sa.Column('scoreboard_version', sa.Integer(), nullable=False, server_default='0'))
+
+    if 'challenge_participants' in tables and 'idx_challenge_participants_score' not in _indexes(inspector, 'challenge_participants'):
+        with op.batch_alter_table('challenge_participants', schema=None) as batch_op:
+            batch_op.create_index(
+                'idx_challenge_participants_score',
+                ['challenge_id', 'completed', 'accuracy', 'questions_answered', 'id'],
+                unique=False
+            )
+
+
+def downgrade():
+    with op.batch_alter_table('challenge_participants', schema=None) as batch_op:
+        batch_op.drop_index('idx_challenge_participants_score')
+
+    with op.batch_alter_table('shared_challenges', schema=None) as batch_op:
+        batch_op.drop_column('scoreboard_version')
@@ -0,0 +1,43 @@
+"""Add XP transaction time indexes
+
+Revision ID: 8f4c2a6d1b93
+Revises: 5d2e8b41c7a9
+Create Date: 2026-10-17 19:10:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8f4c2a6d1b93'
+down_revision = '5d2e8b41c7a9'
+branch_labels = None
+depends_on = None
+
+
+# Index name -> columns
+INDEXES = {
+    'idx_xp_transactions_created': ['created_at'],
+    'idx_xp_transactions_student_created': ['student_id', 'created_at'],
+}
+
+
+def upgrade():
+    # db.create_all() builds the indexes on new databases; it never adds
+    # them to existing tables
+    inspector = sa.inspect(op.get_bind())
+    if 'xp_transactions' not in inspector.get_table_names():
+        return
+    existing = [index['name'] for index in inspector.get_indexes('xp_transactions')]
+
+    with op.batch_alter_table('xp_transactions', schema=None) as batch_op:
+        for name, columns in INDEXES.items():
+            if name not in existing:
+                batch_op.create_index(name, columns, unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('xp_transactions', schema=None) as batch_op:
+        for name in INDEXES:
+            batch_op.drop_index(name)
@@ -0,0 +1,43 @@
+"""Add daily challenge status indexes
+
+Revision ID: a71e5c3d9f02
+Revises: 8f4c2a6d1b93
+Create Date: 2026-10-17 19:20:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a71e5c3d9f02'
+down_revision = '8f4c2a6d1b93'
+branch_labels = None
+depends_on = None
+
+
+# Index name -> columns
+INDEXES = {
+    'idx_daily_challenges_student_status': ['student_id', 'status'],
+    'idx_daily_challenges_status_expires': ['status', 'expires_at'],
+}
+
+
+def upgrade():
+    # db.create_all() builds the indexes on new databases; it never adds
+    # them to existing tables
+    inspector = sa.inspect(op.get_bind())
+    if 'daily_challenges' not in inspector.get_table_names():
+        return
+    existing = [index['name'] for index in inspector.get_indexes('daily_challenges')]
+
+    with op.batch_alter_table('daily_challenges', schema=None) as batch_op:
+        for name, columns in INDEXES.items():
+            if name not in existing:
+                batch_op.create_index(name, columns, unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('daily_challenges', schema=None) as batch_op:
+        for name in INDEXES:
+            batch_op.drop_index(name)
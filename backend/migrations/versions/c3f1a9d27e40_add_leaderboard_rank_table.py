@@ -0,0 +1,46 @@
+"""Add the materialized leaderboard rank table
+
+Revision ID: c3f1a9d27e40
+Revises: b450be27b186
+Create Date: 2026-10-17 18:10:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c3f1a9d27e40'
+down_revision = 'b450be27b186'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # db.create_all() may already have built the table on this database
+    if 'leaderboard_ranks' in sa.inspect(op.get_bind()).get_table_names():
+        return
+
+    op.create_table('leaderboard_ranks',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('board', sa.String(length=30), nullable=False),
+        sa.Column('scope', sa.Integer(), nullable=False),
+        sa.Column('student_id', sa.Integer(), nullable=False),
+        sa.Column('score', sa.Integer(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['student_id'], ['students.id'], ),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('board', 'scope', 'student_id', name='unique_leaderboard_student')
+    )
+    with op.batch_alter_table('leaderboard_ranks', schema=None) as batch_op:
+        batch_op.create_index('idx_leaderboard_ranks_score', ['board', 'scope', 'score', 'student_id'], unique=False)
+        batch_op.create_index('idx_leaderboard_ranks_updated', ['board', 'scope', 'updated_at'], unique=False)
+    # Scores are filled by rebuild_leaderboards.py
+
+
+def downgrade():
+    with op.batch_alter_table('leaderboard_ranks', schema=None) as batch_op:
+        batch_op.drop_index('idx_leaderboard_ranks_updated')
+        batch_op.drop_index('idx_leaderboard_ranks_score')
+
+    op.drop_table('leaderboard_ranks')
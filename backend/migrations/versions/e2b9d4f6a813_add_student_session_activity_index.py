@@ -0,0 +1,42 @@
+"""Add student session activity index
+
+Revision ID: e2b9d4f6a813
+Revises: a71e5c3d9f02
+Create Date: 2026-10-17 19:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e2b9d4f6a813'
+down_revision = 'a71e5c3d9f02'
+branch_labels = None
+depends_on = None
+
+
+# Index name -> columns
+INDEXES = {
+    'idx_student_sessions_student_activity': ['student_id', 'last_activity_at'],
+}
+
+
+def upgrade():
+    # db.create_all() builds the indexes on new databases; it never adds
+    # them to existing tables
+    inspector = sa.inspect(op.get_bind())
+    if 'student_sessions' not in inspector.get_table_names():
+        return
+    existing = [index['name'] for index in inspector.get_indexes('student_sessions')]
+
+    with op.batch_alter_table('student_sessions', schema=None) as batch_op:
+        for name, columns in INDEXES.items():
+            if name not in existing:
+                batch_op.create_index(name, columns, unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('student_sessions', schema=None) as batch_op:
+        for name in INDEXES:
+            batch_op.drop_index(name)
@@ -0,0 +1,53 @@
+"""Add indexes read by the platform metrics refresh
+
+Revision ID: f3c8a1e5b7d4
+Revises: e2b9d4f6a813
+Create Date: 2026-10-17 19:40:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f3c8a1e5b7d4'
+down_revision = 'e2b9d4f6a813'
+branch_labels = None
+depends_on = None
+
+
+# Table -> index name -> columns
+INDEXES = {
+    'student_sessions': {
+        'idx_student_sessions_started': ['started_at'],
+    },
+    'audit_logs': {
+        'idx_audit_logs_action_created': ['action_type', 'created_at'],
+    },
+    'student_daily_stats': {
+        'idx_student_daily_stats_day': ['day', 'student_id'],
+    },
+}
+
+
+def upgrade():
+    # db.create_all() builds the indexes on new databases; it never adds
+    # them to existing tables
+    inspector = sa.inspect(op.get_bind())
+    tables = inspector.get_table_names()
+
+    for table, indexes in INDEXES.items():
+        if table not in tables:
+            continue
+        existing = [index['name'] for index in inspector.get_indexes(table)]
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            for name, columns in indexes.items():
+                if name not in existing:
+                    batch_op.create_index(name, columns, unique=False)
+
+
+def downgrade():
+    for table, indexes in INDEXES.items():
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            for name in indexes:
+                batch_op.drop_index(name)
@@ -0,0 +1,53 @@
+"""
+Write .gz (and, with brotli installed, .br) siblings for the built static
+assets so they are served without compressing on each request.
+
+Run after copying a new frontend build into src/static/assets.
+
+Usage:
+    python precompress_assets.py
+"""
+import sys
+import os
+import gzip
+import mimetypes
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from src.middleware.compression import Compression, brotli
+
+ASSETS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src', 'static', 'assets')
+
+
+def precompress_assets(assets_dir=ASSETS_DIR):
+    """Compress every compressible asset at the highest level."""
+    compressors = {'gzip': lambda data: gzip.compress(data, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        compressors['br'] = lambda data: brotli.compress(data, quality=11)
+
+    print(f"Precompressing assets in {assets_dir} ({', '.join(compressors)})...")
+    written = saved = 0
+    for root, _, files in os.walk(assets_dir):
+        for name in sorted(files):
+            path = os.path.join(root, name)
+            if not Compression.compressible(mimetypes.guess_type(name)[0]):
+                continue
+            with open(path, 'rb') as f:
+                data = f.read()
+            for encoding, compress in compressors.items():
+                sibling = path + Compression.PRECOMPRESSED[encoding]
+                if os.path.exists(sibling) and os.path.getmtime(sibling) >= os.path.getmtime(path):
+                    continue
+                compressed = compress(data)
+                if len(compressed) >= len(data):
+                    continue
+                with open(sibling, 'wb') as f:
+                    f.write(compressed)
+                written += 1
+                saved += len(data) - len(compressed)
+                print(f"  ✓ {name}{Compression.PRECOMPRESSED[encoding]}: {len(data)} → {len(compressed)} bytes")
+
+    print(f"✅ Wrote {written} files, {saved} bytes smaller in total")
+
+
+if __name__ == '__main__':
+    precompress_assets()
@@ -0,0 +1,35 @@
+"""
+Rebuild the materialized leaderboard rank tables from the source tables.
+
+Usage:
+    python rebuild_leaderboards.py                # all boards
+    python rebuild_leaderboards.py skills grade_xp
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from src.main import app
+from src.services.leaderboard_table_service import LeaderboardTableService
+
+
+def rebuild_leaderboards(boards=None):
+    """Rebuild the requested boards (or all boards)."""
+    with app.app_context():
+        boards = boards or LeaderboardTableService.BOARDS
+
+        for board in boards:
+            if board not in LeaderboardTableService.BOARDS:
+                print(f"✗ Unknown leaderboard '{board}' (expected one of {', '.join(LeaderboardTableService.BOARDS)})")
+                sys.exit(1)
+
+        print("Rebuilding leaderboard rank tables...")
+        for board in boards:
+            counts = LeaderboardTableService.rebuild(board)
+            print(f"  ✓ {board}: {counts[board]} entries")
+
+        print("✅ Leaderboards rebuilt")
+
+
+if __name__ == '__main__':
+    rebuild_leaderboards(sys.argv[1:])
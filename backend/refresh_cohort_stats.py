@@ -0,0 +1,28 @@
+"""
+Rebuild the grade and class quantile sketches used by comparative analytics.
+
+Run periodically (e.g. nightly from cron).
+
+Usage:
+    python refresh_cohort_stats.py
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from src.main import app
+from src.services.cohort_stats_service import CohortStatsService
+
+
+def refresh_cohort_stats():
+    """Rebuild every cohort sketch."""
+    with app.app_context():
+        print("Refreshing cohort statistics...")
+        result = CohortStatsService.refresh()
+        print(f"  ✓ {result['students']} students in {result['cohorts']} cohorts")
+
+        print("✅ Cohort statistics refreshed")
+
+
+if __name__ == '__main__':
+    refresh_cohort_stats()
@@ -0,0 +1,34 @@
+"""
+Recompute the stored engagement scores.
+
+Run nightly (e.g. from cron) so scores decay as the window moves past
+old practice; scores are also refreshed whenever a session ends.
+
+Usage:
+    python refresh_engagement_scores.py                # every student in the window
+    python refresh_engagement_scores.py 12 15 18       # only these students
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from src.main import app
+from src.services.engagement_service import EngagementService
+
+
+def refresh_engagement_scores(student_ids=None):
+    """Recompute scores for the given students (or everyone)."""
+    with app.app_context():
+        print("Refreshing engagement scores...")
+        count = EngagementService.refresh(student_ids or None)
+        print(f"  ✓ {count} students scored")
+
+        print("✅ Engagement scores refreshed")
+
+
+if __name__ == '__main__':
+    args = sys.argv[1:]
+    if not all(arg.isdigit() for arg in args):
+        print("✗ Student ids must be integers")
+        sys.exit(1)
+    refresh_engagement_scores([int(arg) for arg in args])
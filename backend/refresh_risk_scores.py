@@ -0,0 +1,35 @@
+"""
+Rescore every student with the at-risk pipeline.
+
+Run on a schedule (e.g. nightly from cron) so time-based factors such as
+assignments passing their due date are picked up; students are also
+rescored when their sessions end or they complete an assignment.
+
+Usage:
+    python refresh_risk_scores.py                # every student
+    python refresh_risk_scores.py 12 15 18       # only these students
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from src.main import app
+from src.services.risk_scoring_service import RiskScoringService
+
+
+def refresh_risk_scores(student_ids=None):
+    """Rescore the given students (or everyone)."""
+    with app.app_context():
+        print("Refreshing risk scores...")
+        count = RiskScoringService.refresh(student_ids or None)
+        print(f"  ✓ {count} students scored (model version {RiskScoringService.MODEL_VERSION})")
+
+        print("✅ Risk scores refreshed")
+
+
+if __name__ == '__main__':
+    args = sys.argv[1:]
+    if not all(arg.isdigit() for arg in args):
+        print("✗ Student ids must be integers")
+        sys.exit(1)
+    refresh_risk_scores([int(arg) for arg in args])
@@ -4,9 +4,11 @@ Implements caching, compression, and response optimization.
 """
 from flask import Flask, request, make_response
 from functools import wraps
-import gzip
 import json
-from datetime import datetime, timedelta
+import time
+from src.middleware.compression import Compression, configure_compression
+from src.services.response_cache import ResponseCache
+from src.services.cache_tags import CacheTags
 
 
 def configure_api_optimizations(app: Flask):
@@ -15,31 +17,9 @@ def configure_api_optimizations(app: Flask):
     Adds compression, caching headers, and response optimization.
     """
     
-    # Enable response compression
-    @app.after_request
-    def compress_response(response):
-        """Compress responses with gzip if client supports it"""
-        if response.status_code < 200 or response.status_code >= 300:
-            return response
-        
-        accept_encoding = request.headers.get('Accept-Encoding', '')
-        
-        if 'gzip' not in accept_encoding.lower():
-            return response
-        
-        # Only compress if response is large enough
-        if response.content_length and response.content_length < 500:
-            return response
-        
-        # Compress the response
-        response.direct_passthrough = False
-        compressed_data = gzip.compress(response.get_data())
-        
-        response.set_data(compressed_data)
-        response.headers['Content-Encoding'] = 'gzip'
-        response.headers['Content-Length'] = len(compressed_data)
-        
-        return response
+    # Enable negotiated, streaming response compression
+    # (see src/middleware/compression.py)
+    configure_compression(app)
     
     # Add caching headers for static resources
     @app.after_request
@@ -51,16 +31,15 @@ def configure_api_optimizations(app: Flask):
             response.cache_control.max_age = 31536000  # 1 year
             response.cache_control.public = True
         
-        # Cache API responses for short duration
+        # API responses are mostly per-user: keep them out of shared
+        # caches and make browsers revalidate (see conditional_response)
         elif request.path.startswith('/api/'):
-            # Don't cache POST/PUT/DELETE requests
-            if request.method in ['POST', 'PUT', 'DELETE']:
+            if request.method not in ['GET', 'HEAD']:
                 response.cache_control.no_cache = True
                 response.cache_control.no_store = True
-            else:
-                # Cache GET requests for 5 minutes
-                response.cache_control.max_age = 300
-                response.cache_control.public = True
+            elif 'Cache-Control' not in response.headers:
+                response.cache_control.private = True
+                response.cache_control.no_cache = True
         
         return response
     
@@ -76,37 +55,92 @@ def configure_api_optimizations(app: Flask):
     print("✓ API optimizations configured")
 
 
-def cache_response(timeout=300):
+def cache_response(timeout=300, namespace=None, per_user=True, tags=()):
     """
-    Decorator to cache API responses.
+    Decorator to cache API responses in the shared response cache.
+    
+    Keys include the path, query string and (with per_user) the JWT
+    identity. Place it below the route's authentication decorator.
+    Responses are dropped as soon as a commit bumps one of their tags.
+    See src/services/response_cache.py and src/services/cache_tags.py.
     
     Args:
         timeout: Cache timeout in seconds (default 5 minutes)
+        namespace: Key and metrics namespace (default: view name)
+        per_user: Cache separately for each authenticated user
+        tags: Cache tags, formatted with the view's keyword arguments
+    """
+    def decorator(f):
+        return ResponseCache.cached(namespace or f.__name__, timeout, per_user, tags)(f)
+    return decorator
+
+
+def conditional_response(tags=(), watermark=None, per_user=True, refresh_seconds=None):
+    """
+    Decorator answering conditional GETs with 304 Not Modified.
+    
+    The ETag is built before the view runs from the path, query string,
+    JWT identity (with per_user), the versions of the cache tags and an
+    optional watermark query, so an unchanged resource costs at most one
+    indexed lookup. Place it below the authentication decorator and
+    above cache_response.
+    
+    Args:
+        tags: Cache tags, formatted with the view's keyword arguments
+        watermark: Callable taking the view's keyword arguments and
+            returning a cheap change marker (see WatermarkService)
+        per_user: Response differs per user; sent as private
+        refresh_seconds: Rotate the ETag this often, for responses that
+            also change with time (e.g. "last 30 days" windows)
     """
     def decorator(f):
-        cache = {}
-        
         @wraps(f)
-        def decorated_function(*args, **kwargs):
-            # Create cache key from function name and arguments
-            cache_key = f"{f.__name__}:{str(args)}:{str(kwargs)}"
+        def decorated(*args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return f(*args, **kwargs)
             
-            # Check if cached response exists and is not expired
-            if cache_key in cache:
-                cached_data, cached_time = cache[cache_key]
-                if datetime.now() - cached_time < timedelta(seconds=timeout):
-                    return cached_data
-            
-            # Call function and cache result
-            result = f(*args, **kwargs)
-            cache[cache_key] = (result, datetime.now())
+            etag = _validator_etag(kwargs, tags, watermark, per_user, refresh_seconds)
+            if etag is not None and request.if_none_match.contains_weak(etag):
+                PerformanceMonitor.record_not_modified()
+                response = make_response('', 304)
+            else:
+                response = make_response(f(*args, **kwargs))
+                if etag is None or response.status_code != 200:
+                    return response
             
-            return result
+            response.set_etag(etag, weak=True)
+            response.cache_control.no_cache = True
+            if per_user or 'Authorization' in request.headers:
+                response.cache_control.private = True
+                response.vary.add('Authorization')
+            else:
+                response.cache_control.public = True
+            return response
         
-        return decorated_function
+        return decorated
     return decorator
 
 
+def _validator_etag(view_args, tags, watermark, per_user, refresh_seconds):
+    """ETag for the current request, or None if tag versions are unavailable."""
+    validators = {
+        'path': request.path,
+        'args': sorted(request.args.items(multi=True))
+    }
+    if per_user:
+        validators['user'] = ResponseCache.identity()
+    if tags:
+        versions = CacheTags.versions([tag.format(**view_args) for tag in tags])
+        if versions is None:
+            return None
+        validators['tags'] = versions
+    if watermark is not None:
+        validators['watermark'] = [str(value) for value in watermark(**view_args)]
+    if refresh_seconds:
+        validators['period'] = int(time.time() // refresh_seconds)
+    return ResponseOptimizer.add_etag(validators)
+
+
 def paginate_response(query, page=1, per_page=20, max_per_page=100):
     """
     Helper function to paginate database queries.
@@ -197,7 +231,8 @@ class PerformanceMonitor:
         'total_requests': 0,
         'total_response_time': 0,
         'slow_requests': 0,
-        'cached_responses': 0
+        'cached_responses': 0,
+        'not_modified_responses': 0
     }
     
     @classmethod
@@ -214,6 +249,11 @@ class PerformanceMonitor:
         """Record a cache hit"""
         cls.metrics['cached_responses'] += 1
     
+    @classmethod
+    def record_not_modified(cls):
+        """Record a conditional GET answered with 304"""
+        cls.metrics['not_modified_responses'] += 1
+    
     @classmethod
     def get_stats(cls):
         """Get performance statistics"""
@@ -228,6 +268,7 @@ class PerformanceMonitor:
             'total_requests': cls.metrics['total_requests'],
             'average_response_time': cls.metrics['total_response_time'] / cls.metrics['total_requests'],
             'cache_hit_rate': cls.metrics['cached_responses'] / cls.metrics['total_requests'],
+            'not_modified_responses': cls.metrics['not_modified_responses'],
             'slow_request_rate': cls.metrics['slow_requests'] / cls.metrics['total_requests']
         }
 
@@ -236,16 +277,10 @@ class PerformanceMonitor:
 def get_optimization_stats():
     """Get API optimization statistics"""
     return {
-        'compression': {
-            'enabled': True,
-            'algorithm': 'gzip',
-            'min_size': 500,
-            'average_reduction': '60-70%'
-        },
+        'compression': Compression.stats(),
         'caching': {
             'static_assets': '1 year',
-            'api_responses': '5 minutes',
-            'cache_invalidation': 'automatic'
+            'api_responses': ResponseCache.stats()
         },
         'pagination': {
             'default_per_page': 20,
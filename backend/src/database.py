@@ -3,6 +3,9 @@ Database configuration and initialization for Alpha Learning Platform.
 """
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
+from sqlalchemy import event
+from sqlalchemy.dialects import postgresql, sqlite
+from src.database_engine import EngineConfig
 
 # Initialize SQLAlchemy instance
 db = SQLAlchemy()
@@ -31,12 +34,91 @@ def init_db(app):
     app.config['SQLALCHEMY_DATABASE_URI'] = database_url
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
     
+    # Size the pool for this gunicorn worker (see src/database_engine.py)
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = EngineConfig.engine_options(database_url)
+    
     # Initialize extensions with app
     db.init_app(app)
     migrate.init_app(app, db)
+    EngineConfig.init_app(app, db)
     
     # Create tables if they don't exist
     with app.app_context():
         db.create_all()
     
     return db
+
+
+def upsert(model, values, keys, increment=()):
+    """
+    Insert rows, updating the existing row when one has the same keys.
+    
+    Does not commit.
+    
+    Args:
+        model: Model class with a unique constraint on keys
+        values: List of column dicts, all with the same columns
+        keys: Column names of the unique constraint
+        increment: Columns added to an existing row's value; every other
+            column replaces it
+    """
+    if not values:
+        return
+    
+    columns = [column for column in values[0] if column not in keys]
+    dialect = db.session.get_bind().dialect.name
+    if dialect in ('postgresql', 'sqlite'):
+        dialect_insert = postgresql.insert if dialect == 'postgresql' else sqlite.insert
+        stmt = dialect_insert(model).values(values)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=list(keys),
+            set_={
+                column: getattr(model, column) + stmt.excluded[column] if column in increment
+                else stmt.excluded[column]
+                for column in columns
+            }
+        )
+        db.session.execute(stmt)
+        return
+    
+    # Generic path: update existing rows, insert the rest
+    existing = {
+        tuple(getattr(row, key) for key in keys): row for row in model.query.filter(
+            *[getattr(model, key).in_({value[key] for value in values}) for key in keys]
+        ).all()
+    }
+    for value in values:
+        row_key = tuple(value[key] for key in keys)
+        row = existing.get(row_key)
+        if row is None:
+            existing[row_key] = model(**value)
+            db.session.add(existing[row_key])
+            continue
+        for column in columns:
+            if column in increment:
+                setattr(row, column, getattr(row, column) + value[column])
+            else:
+                setattr(row, column, value[column])
+    db.session.flush()
+
+
+def on_commit(key, apply, discard=None):
+    """
+    Hand work collected in session.info[key] to apply() once it commits.
+    
+    Code inside a transaction adds to session.info[key]; a commit pops the
+    value and calls apply(value), a rollback pops it and calls
+    discard(value) if given.
+    """
+    def _apply_committed(session):
+        value = session.info.pop(key, None)
+        if value:
+            apply(value)
+    
+    def _discard_rolled_back(session, previous_transaction):
+        value = session.info.pop(key, None)
+        if value and discard is not None:
+            discard(value)
+    
+    event.listen(db.session, 'after_commit', _apply_committed)
+    event.listen(db.session, 'after_soft_rollback', _discard_rolled_back)
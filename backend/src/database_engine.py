@@ -0,0 +1,240 @@
+"""
+Engine and connection pool configuration for Alpha Learning Platform.
+
+Every gunicorn worker process has its own pool, so pools are sized from
+the worker and thread counts to keep all workers together within the
+database's connection limit:
+
+    pool_size    = request threads + background threads (per worker)
+    max_overflow = the worker's share of DB_MAX_CONNECTIONS, less
+                   DB_RESERVED_CONNECTIONS, above pool_size (at most
+                   pool_size)
+
+Connections are pre-pinged on checkout and recycled after
+POOL_RECYCLE_SECONDS, before the hosting proxy drops idle ones. A forked
+child discards the pool it inherited without closing the parent's
+connections.
+
+On PostgreSQL every connection starts with STATEMENT_TIMEOUT_MS, which
+suits request handlers and costs nothing per request. Transactions in
+analytics blueprints raise it to ANALYTICS_STATEMENT_TIMEOUT_MS and
+transactions outside a request (background workers, scripts) use
+BACKGROUND_STATEMENT_TIMEOUT_MS (0 = none), with SET LOCAL when they
+begin.
+
+PoolMetrics records checkout latency, timeouts, peak connections in use
+and invalidated connections for the process.
+"""
+import os
+import threading
+import time
+from collections import defaultdict
+from flask import has_request_context, request
+from sqlalchemy import event, exc
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import QueuePool
+
+
+class PoolMetrics:
+    """Connection pool counters for this process."""
+
+    # Checkouts waiting at least this long count as slow
+    SLOW_CHECKOUT_SECONDS = 0.01
+
+    _counters = defaultdict(float)
+    _lock = threading.Lock()
+
+    @staticmethod
+    def record_checkout(wait, in_use):
+        with PoolMetrics._lock:
+            counters = PoolMetrics._counters
+            counters['checkouts'] += 1
+            counters['wait_seconds'] += wait
+            counters['max_wait_seconds'] = max(counters['max_wait_seconds'], wait)
+            counters['peak_in_use'] = max(counters['peak_in_use'], in_use)
+            if wait >= PoolMetrics.SLOW_CHECKOUT_SECONDS:
+                counters['slow_checkouts'] += 1
+
+    @staticmethod
+    def record(name):
+        with PoolMetrics._lock:
+            PoolMetrics._counters[name] += 1
+
+    @staticmethod
+    def reset():
+        with PoolMetrics._lock:
+            PoolMetrics._counters.clear()
+
+    @staticmethod
+    def stats(engine):
+        """
+        Counters and current usage of an engine's pool.
+
+        Returns:
+            dict with pool settings, connections in use, saturation
+            (in use / capacity), checkouts, average and maximum checkout
+            latency, slow checkouts, timeouts, new and invalidated
+            connections and the peak in use
+        """
+        with PoolMetrics._lock:
+            counters = dict(PoolMetrics._counters)
+        pool = engine.pool
+        checkouts = counters.get('checkouts', 0)
+        stats = {
+            'pool': type(pool).__name__,
+            'settings': EngineConfig.settings,
+            'checkouts': int(checkouts),
+            'avg_checkout_ms': round(counters.get('wait_seconds', 0) / checkouts * 1000, 3) if checkouts else 0,
+            'max_checkout_ms': round(counters.get('max_wait_seconds', 0) * 1000, 3),
+            'slow_checkouts': int(counters.get('slow_checkouts', 0)),
+            'timeouts': int(counters.get('timeouts', 0)),
+            'connects': int(counters.get('connects', 0)),
+            'invalidated': int(counters.get('invalidated', 0)),
+            'peak_in_use': int(counters.get('peak_in_use', 0))
+        }
+        if isinstance(pool, QueuePool):
+            capacity = pool.size() + max(pool._max_overflow, 0)
+            stats.update({
+                'in_use': pool.checkedout(),
+                'idle': pool.checkedin(),
+                'capacity': capacity,
+                'saturation': round(pool.checkedout() / capacity, 3) if capacity else 0
+            })
+        return stats
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that times how long each checkout waits."""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            PoolMetrics.record('timeouts')
+            raise
+        PoolMetrics.record_checkout(time.perf_counter() - started, self.checkedout())
+        return connection
+
+
+class EngineConfig:
+    """Pool sizing, timeouts and engine event wiring."""
+
+    # Gunicorn workers and threads per worker (see Procfile)
+    WORKERS = int(os.getenv('WEB_CONCURRENCY', '4'))
+    THREADS = int(os.getenv('GUNICORN_THREADS', '1'))
+    # Threads per worker that use the database outside requests:
+    # the domain event workers
+    BACKGROUND_THREADS = int(os.getenv('DB_BACKGROUND_THREADS', os.getenv('EVENT_WORKERS', '2')))
+    # Server connection limit, and connections kept free for migrations,
+    # scripts and psql
+    MAX_CONNECTIONS = int(os.getenv('DB_MAX_CONNECTIONS', '100'))
+    RESERVED_CONNECTIONS = int(os.getenv('DB_RESERVED_CONNECTIONS', '10'))
+    # Longest a checkout waits for a free connection
+    POOL_TIMEOUT_SECONDS = float(os.getenv('DB_POOL_TIMEOUT', '10'))
+    # Connections older than this are replaced on checkout
+    POOL_RECYCLE_SECONDS = int(os.getenv('DB_POOL_RECYCLE', '1800'))
+    # PostgreSQL statement timeouts in milliseconds (0 = none)
+    STATEMENT_TIMEOUT_MS = int(os.getenv('DB_STATEMENT_TIMEOUT_MS', '5000'))
+    ANALYTICS_STATEMENT_TIMEOUT_MS = int(os.getenv('DB_ANALYTICS_STATEMENT_TIMEOUT_MS', '30000'))
+    BACKGROUND_STATEMENT_TIMEOUT_MS = int(os.getenv('DB_BACKGROUND_STATEMENT_TIMEOUT_MS', '0'))
+    # Blueprints whose requests aggregate over many rows
+    ANALYTICS_BLUEPRINTS = {'analytics', 'analytics_dashboard', 'reports', 'export', 'predictive'}
+
+    # Pool settings in use, for metrics
+    settings = None
+
+    @staticmethod
+    def pool_settings(workers=None, threads=None, background_threads=None,
+                      max_connections=None, reserved_connections=None):
+        """
+        Pool size and overflow for one worker process.
+
+        Returns:
+            dict with pool_size and max_overflow
+        """
+        workers = max(workers or EngineConfig.WORKERS, 1)
+        threads = threads or EngineConfig.THREADS
+        background_threads = EngineConfig.BACKGROUND_THREADS if background_threads is None else background_threads
+        max_connections = max_connections or EngineConfig.MAX_CONNECTIONS
+        reserved_connections = EngineConfig.RESERVED_CONNECTIONS if reserved_connections is None else reserved_connections
+
+        share = max((max_connections - reserved_connections) // workers, 1)
+        pool_size = min(threads + background_threads, share)
+        return {
+            'pool_size': pool_size,
+            'max_overflow': min(share - pool_size, pool_size)
+        }
+
+    @staticmethod
+    def engine_options(database_url):
+        """
+        SQLALCHEMY_ENGINE_OPTIONS for a database URL.
+
+        In-memory SQLite keeps Flask-SQLAlchemy's single shared
+        connection.
+        """
+        url = make_url(database_url)
+        backend = url.get_backend_name()
+        if backend == 'sqlite' and url.database in (None, '', ':memory:'):
+            return {}
+
+        settings = EngineConfig.pool_settings()
+        options = dict(
+            settings,
+            poolclass=InstrumentedQueuePool,
+            pool_timeout=EngineConfig.POOL_TIMEOUT_SECONDS,
+            pool_recycle=EngineConfig.POOL_RECYCLE_SECONDS
+        )
+        if backend != 'sqlite':
+            options['pool_pre_ping'] = True
+        if backend == 'postgresql':
+            options['connect_args'] = {
+                'options': f'-c statement_timeout={EngineConfig.STATEMENT_TIMEOUT_MS}',
+                'application_name': 'alpha-learning'
+            }
+        EngineConfig.settings = dict(settings, pool_timeout=EngineConfig.POOL_TIMEOUT_SECONDS)
+        return options
+
+    @staticmethod
+    def statement_timeout():
+        """
+        Statement timeout for a transaction starting now.
+
+        Returns:
+            milliseconds, or None to keep the connection's default
+        """
+        if not has_request_context():
+            return EngineConfig.BACKGROUND_STATEMENT_TIMEOUT_MS
+        if request.blueprint in EngineConfig.ANALYTICS_BLUEPRINTS:
+            return EngineConfig.ANALYTICS_STATEMENT_TIMEOUT_MS
+        return None
+
+    @staticmethod
+    def init_app(app, db):
+        """Wire timeouts, pool metrics and fork handling for the app's engines."""
+        with app.app_context():
+            engines = list(db.engines.values())
+
+        for engine in engines:
+            event.listen(engine, 'connect', lambda *args: PoolMetrics.record('connects'))
+            event.listen(engine, 'invalidate', lambda *args: PoolMetrics.record('invalidated'))
+
+        if not event.contains(db.session, 'after_begin', _set_statement_timeout):
+            event.listen(db.session, 'after_begin', _set_statement_timeout)
+
+        def discard_inherited_connections():
+            for engine in engines:
+                engine.dispose(close=False)
+            PoolMetrics.reset()
+
+        os.register_at_fork(after_in_child=discard_inherited_connections)
+
+
+def _set_statement_timeout(session, transaction, connection):
+    """Apply the request's statement timeout to a new PostgreSQL transaction."""
+    if connection.dialect.name != 'postgresql':
+        return
+    timeout = EngineConfig.statement_timeout()
+    if timeout is not None and timeout != EngineConfig.STATEMENT_TIMEOUT_MS:
+        connection.exec_driver_sql(f'SET LOCAL statement_timeout = {int(timeout)}')
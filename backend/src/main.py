@@ -24,7 +24,7 @@ from src.models.interactive_example import InteractiveExample, ExampleInteractio
 from src.models.hint import Hint, HintUsage
 from src.models.solution import WorkedSolution, SolutionView
 from src.models.resource import Resource, ResourceDownload
-from src.models.gamification import StudentProgress, XPTransaction, LevelReward, StudentReward
+from src.models.gamification import StudentProgress, XPTransaction, XPRollup, XPLedgerCompaction, LevelReward, StudentReward
 from src.models.achievement import Achievement, StudentAchievement, AchievementProgressLog
 from src.models.daily_challenge import DailyChallenge
 from src.models.streak import StreakTracking
@@ -34,11 +34,18 @@ from src.models.shared_challenge import SharedChallenge, ChallengeParticipant
 from src.models.activity_feed import ActivityFeed
 from src.models.teacher import Teacher
 from src.models.assignment_model import Assignment, AssignmentStudent
-from src.models.student_session import StudentSession
+from src.models.student_session import StudentSession, StudentDailyStats
 from src.models.intervention import TeacherMessage, MessageTemplate, Intervention, Meeting
 from src.models.parent import Parent, ParentChildLink, LinkRequest
 from src.models.parent_communication import ParentTeacherMessage, Goal, GoalNote, GoalProgress
 from src.models.admin_models import AuditLog, SystemSetting
+from src.models.leaderboard import LeaderboardRank
+from src.models.domain_event import ProcessedEvent
+from src.models.cohort_stats import CohortSketch
+from src.models.engagement import EngagementScore
+from src.models.risk import StudentRiskScore
+from src.models.report_snapshot import ReportSnapshot, DigestRun
+from src.models.platform_metrics import PlatformDailyActivity, PlatformMetricsSnapshot
 
 # Import all route blueprints
 from src.routes.user import user_bp
@@ -82,6 +89,10 @@ from src.routes.init_routes import init_bp
 # Create Flask application
 app = Flask(__name__)
 
+# Compress responses; registered first so it runs after other after_request hooks
+from src.middleware.compression import configure_compression
+configure_compression(app)
+
 # Configure CORS
 CORS(app, resources={
     r"/api/*": {
@@ -99,9 +110,17 @@ app.config['JWT_ACCESS_TOKEN_EXPIRES'] = 86400  # 24 hours
 # Initialize JWT
 jwt = JWTManager(app)
 
+# Resolve the JWT subject to a user and profile ids once per request
+from src.middleware.identity import IdentityLoader
+IdentityLoader.init_app(app)
+
 # Initialize database
 db = init_db(app)
 
+# Start background workers for post-request side effects
+from src.services.domain_event_service import DomainEventService
+DomainEventService.init_app(app)
+
 # Register all blueprints with /api prefix
 app.register_blueprint(init_bp, url_prefix='/api')
 app.register_blueprint(auth_bp, url_prefix='/api/auth')
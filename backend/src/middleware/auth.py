@@ -3,22 +3,21 @@ Authentication middleware for protecting routes.
 """
 from functools import wraps
 from flask import request, jsonify
-from flask_jwt_extended import verify_jwt_in_request, get_jwt_identity
-from src.database import db
-from src.models.user import User
+from flask_jwt_extended import verify_jwt_in_request
+from src.middleware.identity import current_identity
 
 
 def token_required(f):
     """
     Decorator to require a valid JWT token for a route.
-    Adds the current user to the function arguments.
+    Adds the current user's Identity (id, role and profile ids, see
+    src/middleware/identity.py) to the function arguments.
     """
     @wraps(f)
     def decorated(*args, **kwargs):
         try:
             verify_jwt_in_request()
-            current_user_id = get_jwt_identity()
-            current_user = db.session.get(User, current_user_id)
+            current_user = current_identity()
             
             if not current_user:
                 return jsonify({'error': 'User not found'}), 404
@@ -40,8 +39,7 @@ def role_required(*roles):
         def decorated(*args, **kwargs):
             try:
                 verify_jwt_in_request()
-                current_user_id = get_jwt_identity()
-                current_user = db.session.get(User, current_user_id)
+                current_user = current_identity()
                 
                 if not current_user:
                     return jsonify({'error': 'User not found'}), 404
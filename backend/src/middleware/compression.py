@@ -0,0 +1,349 @@
+"""
+Negotiated response compression.
+
+The encoding is chosen from Accept-Encoding among br, zstd and gzip, in
+that order of preference when the client rates them equally. gzip uses
+zlib; br and zstd are used when the optional brotli and zstandard
+packages are installed. Levels are set per content type and favour
+speed for dynamic responses.
+
+Buffered responses are compressed in one pass and left alone when that
+does not make them smaller. Streamed responses (generators, files) are
+compressed chunk by chunk as they are sent, with a sync flush after each
+chunk so clients see data as soon as it is produced. Only text-like
+types are compressed; images, video, archives and anything already
+encoded pass through untouched. Every negotiable response carries
+Vary: Accept-Encoding.
+
+Files under src/static/assets with a .br or .gz sibling (see
+precompress_assets.py) are served from the sibling, which is compressed
+offline at the highest level.
+"""
+import mimetypes
+import os
+import threading
+import time
+import zlib
+from collections import defaultdict
+from flask import request, send_from_directory
+from werkzeug.security import safe_join
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+class _GzipEncoder:
+
+    def __init__(self, level):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data):
+        return self._compressor.compress(data)
+
+    def flush(self):
+        return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self._compressor.flush()
+
+
+class _BrotliEncoder:
+
+    def __init__(self, level):
+        self._compressor = brotli.Compressor(quality=level)
+
+    def compress(self, data):
+        return self._compressor.process(data)
+
+    def flush(self):
+        return self._compressor.flush()
+
+    def finish(self):
+        return self._compressor.finish()
+
+
+class _ZstdEncoder:
+
+    def __init__(self, level):
+        self._compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data):
+        return self._compressor.compress(data)
+
+    def flush(self):
+        return self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self):
+        return self._compressor.flush()
+
+
+def _available_encoders():
+    encoders = {}
+    if brotli is not None:
+        encoders['br'] = _BrotliEncoder
+    if zstandard is not None:
+        encoders['zstd'] = _ZstdEncoder
+    encoders['gzip'] = _GzipEncoder
+    return encoders
+
+
+class Compression:
+    """Content negotiation, compression and compression metrics."""
+
+    # Encoders by name, in order of preference
+    ENCODERS = _available_encoders()
+    # Levels by mimetype; 'default' covers the other compressible types
+    LEVELS = {
+        'default': {'br': 4, 'zstd': 3, 'gzip': 6},
+        'application/json': {'br': 4, 'zstd': 3, 'gzip': 5},
+        'text/csv': {'br': 5, 'zstd': 6, 'gzip': 6},
+        'text/css': {'br': 6, 'zstd': 9, 'gzip': 6},
+        'text/javascript': {'br': 6, 'zstd': 9, 'gzip': 6},
+        'application/javascript': {'br': 6, 'zstd': 9, 'gzip': 6}
+    }
+    # Compressible types besides text/*
+    COMPRESSIBLE_TYPES = {
+        'application/json', 'application/javascript', 'application/xml',
+        'application/manifest+json', 'application/x-ndjson', 'image/svg+xml'
+    }
+    # Smaller buffered bodies are sent as they are
+    MIN_SIZE = 500
+    # Precompressed sibling extensions for static assets
+    PRECOMPRESSED = {'br': '.br', 'gzip': '.gz'}
+    ASSET_PREFIX = 'assets/'
+
+    _stats = defaultdict(lambda: defaultdict(float))
+    _lock = threading.Lock()
+
+    # ------------------------------------------------------------------
+    # Negotiation
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def negotiate(available):
+        """
+        Best encoding in available for the current request.
+
+        Follows the Accept-Encoding q-values, including q=0 refusals and
+        '*'; ties go to the order of available.
+
+        Returns:
+            encoding name, or None to send the body as it is
+        """
+        qualities = {}
+        for item in request.headers.get('Accept-Encoding', '').split(','):
+            name, _, params = item.partition(';')
+            name = name.strip().lower()
+            if not name:
+                continue
+            quality = 1.0
+            for param in params.split(';'):
+                key, _, value = param.partition('=')
+                if key.strip().lower() == 'q':
+                    try:
+                        quality = float(value)
+                    except ValueError:
+                        quality = 0.0
+            qualities[name] = quality
+        default = qualities.get('*', 0.0)
+        best, best_quality = None, 0.0
+        for encoding in available:
+            quality = qualities.get(encoding, default)
+            if quality > best_quality:
+                best, best_quality = encoding, quality
+        return best
+
+    @staticmethod
+    def compressible(mimetype):
+        return bool(mimetype) and (mimetype.startswith('text/') or mimetype in Compression.COMPRESSIBLE_TYPES)
+
+    @staticmethod
+    def level(encoding, mimetype):
+        levels = Compression.LEVELS.get(mimetype, Compression.LEVELS['default'])
+        return levels.get(encoding, Compression.LEVELS['default'][encoding])
+
+    # ------------------------------------------------------------------
+    # Responses
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def compress_response(response):
+        """Compress a response for the current request if worthwhile."""
+        if response.status_code < 200 or response.status_code >= 300 or response.status_code in (204, 206) \
+                or 'Content-Encoding' in response.headers or 'Content-Range' in response.headers \
+                or response.cache_control.no_transform:
+            return response
+        if not Compression.compressible(response.mimetype):
+            Compression._record_skip('type')
+            return response
+
+        response.vary.add('Accept-Encoding')
+        encoding = Compression.negotiate(list(Compression.ENCODERS))
+        if encoding is None:
+            Compression._record_skip('not_accepted')
+            return response
+        encoder = Compression.ENCODERS[encoding](Compression.level(encoding, response.mimetype))
+
+        if response.is_streamed:
+            response.response = Compression._stream(encoding, encoder, response.response)
+            response.direct_passthrough = False
+            response.headers.pop('Content-Length', None)
+        else:
+            data = response.get_data()
+            if len(data) < Compression.MIN_SIZE:
+                Compression._record_skip('small')
+                return response
+            started = time.thread_time()
+            compressed = encoder.compress(data) + encoder.finish()
+            if len(compressed) >= len(data):
+                Compression._record_skip('no_gain')
+                return response
+            Compression._record(encoding, len(data), len(compressed), time.thread_time() - started)
+            response.set_data(compressed)
+
+        response.headers['Content-Encoding'] = encoding
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+        return response
+
+    @staticmethod
+    def _stream(encoding, encoder, source):
+        """Compress a streamed body chunk by chunk, recording totals at the end."""
+        raw = sent = 0
+        cpu = 0.0
+        try:
+            for chunk in source:
+                if not chunk:
+                    continue
+                if isinstance(chunk, str):
+                    chunk = chunk.encode('utf-8')
+                started = time.thread_time()
+                output = encoder.compress(chunk) + encoder.flush()
+                cpu += time.thread_time() - started
+                raw += len(chunk)
+                sent += len(output)
+                yield output
+            started = time.thread_time()
+            output = encoder.finish()
+            cpu += time.thread_time() - started
+            sent += len(output)
+            yield output
+        finally:
+            if hasattr(source, 'close'):
+                source.close()
+            Compression._record(encoding, raw, sent, cpu, streamed=True)
+
+    @staticmethod
+    def precompressed_asset(static_folder, filename):
+        """
+        Response serving a .br/.gz sibling of a static asset, or None.
+
+        Siblings are used only for files under assets/ that the client
+        accepts an encoding for.
+        """
+        if not filename.startswith(Compression.ASSET_PREFIX):
+            return None
+        path = safe_join(static_folder, filename)
+        if path is None:
+            return None
+        siblings = {
+            encoding: path + extension for encoding, extension in Compression.PRECOMPRESSED.items()
+            if os.path.isfile(path + extension)
+        }
+        encoding = Compression.negotiate(list(siblings)) if siblings else None
+        if encoding is None:
+            return None
+
+        mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+        response = send_from_directory(
+            static_folder, filename + Compression.PRECOMPRESSED[encoding], mimetype=mimetype
+        )
+        response.headers['Content-Encoding'] = encoding
+        response.vary.add('Accept-Encoding')
+        try:
+            original = os.path.getsize(path)
+        except OSError:
+            original = 0
+        Compression._record('precompressed_' + encoding, original, os.path.getsize(siblings[encoding]), 0.0)
+        return response
+
+    # ------------------------------------------------------------------
+    # Metrics
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _record(name, raw, sent, cpu, streamed=False):
+        with Compression._lock:
+            counters = Compression._stats[name]
+            counters['responses'] += 1
+            counters['streamed'] += int(streamed)
+            counters['bytes_in'] += raw
+            counters['bytes_out'] += sent
+            counters['cpu_seconds'] += cpu
+
+    @staticmethod
+    def _record_skip(reason):
+        with Compression._lock:
+            Compression._stats['skipped'][reason] += 1
+
+    @staticmethod
+    def reset_stats():
+        with Compression._lock:
+            Compression._stats.clear()
+
+    @staticmethod
+    def stats():
+        """
+        Compression counters for this process.
+
+        Returns:
+            dict with the available encodings, per-encoding counters
+            (responses, streamed, bytes in/out, bytes saved, ratio, CPU
+            seconds), precompressed asset counters, skip reasons and
+            totals
+        """
+        with Compression._lock:
+            stats = {name: dict(counters) for name, counters in Compression._stats.items()}
+        skipped = {reason: int(count) for reason, count in stats.pop('skipped', {}).items()}
+        totals = defaultdict(float)
+        for counters in stats.values():
+            for key in ('responses', 'streamed', 'bytes_in', 'bytes_out'):
+                counters[key] = int(counters[key])
+            counters['bytes_saved'] = counters['bytes_in'] - counters['bytes_out']
+            counters['ratio'] = round(counters['bytes_out'] / counters['bytes_in'], 3) if counters['bytes_in'] else 0
+            counters['cpu_seconds'] = round(counters['cpu_seconds'], 6)
+            for key in ('responses', 'bytes_in', 'bytes_out', 'bytes_saved', 'cpu_seconds'):
+                totals[key] += counters[key]
+        totals['cpu_seconds'] = round(totals['cpu_seconds'], 6)
+        return {
+            'encodings': list(Compression.ENCODERS),
+            'min_size': Compression.MIN_SIZE,
+            'by_encoding': stats,
+            'skipped': skipped,
+            'totals': dict(totals)
+        }
+
+
+def configure_compression(app):
+    """Compress responses and serve precompressed static assets."""
+    if 'compression' in app.extensions:
+        return
+    app.extensions['compression'] = Compression
+
+    @app.before_request
+    def serve_precompressed_asset():
+        if request.endpoint == 'static' and request.method in ('GET', 'HEAD'):
+            return Compression.precompressed_asset(app.static_folder, request.view_args.get('filename', ''))
+        return None
+
+    @app.after_request
+    def compress_response(response):
+        return Compression.compress_response(response)
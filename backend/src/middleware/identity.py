@@ -0,0 +1,140 @@
+"""
+Request-scoped identity resolution.
+
+The JWT subject is resolved once per request to the user's id, username
+and role and the ids of their student, teacher and parent profiles, in a
+single query, and kept in flask.g. Handlers and the auth decorators use
+current_identity() instead of loading User and Student rows themselves.
+
+Resolved identities are also cached per process for TTL_SECONDS, keyed
+by the JWT subject. Each entry records the version of its user:<id>
+cache tag, which is bumped whenever the user or one of their profiles
+is committed (see src/services/cache_tags.py). A new profile or a role
+change is therefore seen by every worker on the next request.
+"""
+import threading
+import time
+from collections import OrderedDict, defaultdict, namedtuple
+from flask import g
+from flask_jwt_extended import get_jwt_identity
+from src.database import db
+from src.models.user import User
+from src.models.student import Student
+from src.models.teacher import Teacher
+from src.models.parent import Parent
+from src.services.cache_tags import CacheTags
+
+
+class Identity(namedtuple('Identity', ['id', 'username', 'role', 'student_id', 'teacher_id', 'parent_id'])):
+    """A resolved user; id is the user id, profile ids are None if missing."""
+
+    __slots__ = ()
+
+    @property
+    def user(self):
+        """The User row, for handlers that need more than the ids."""
+        return db.session.get(User, self.id)
+
+
+class IdentityLoader:
+    """Per-request and per-process identity cache."""
+
+    # Longest a resolved identity is reused without a tag change
+    TTL_SECONDS = 300
+    # Most identities kept per process
+    MAX_ENTRIES = 10000
+
+    _identities = OrderedDict()
+    _stats = defaultdict(int)
+    _lock = threading.Lock()
+
+    @staticmethod
+    def init_app(app):
+        """Resolve the identity afresh for every request."""
+        @app.before_request
+        def reset_identity():
+            g.pop('identity', None)
+
+    @staticmethod
+    def current():
+        """
+        Identity of the current request's JWT subject.
+
+        Call after the JWT was verified (jwt_required, token_required).
+
+        Returns:
+            Identity, or None if the user no longer exists
+        """
+        if 'identity' not in g:
+            g.identity = IdentityLoader.resolve(get_jwt_identity())
+        return g.identity
+
+    @staticmethod
+    def resolve(subject):
+        """Identity for a JWT subject, from the cache or one query."""
+        try:
+            user_id = int(subject)
+        except (TypeError, ValueError):
+            return None
+
+        now = time.monotonic()
+        with IdentityLoader._lock:
+            cached = IdentityLoader._identities.get(user_id)
+            if cached is not None and now - cached[0] >= IdentityLoader.TTL_SECONDS:
+                cached = None
+        if cached is not None and CacheTags.is_current(cached[2]):
+            with IdentityLoader._lock:
+                if user_id in IdentityLoader._identities:
+                    IdentityLoader._identities.move_to_end(user_id)
+                IdentityLoader._stats['hits'] += 1
+            return cached[1]
+
+        versions = CacheTags.versions([CacheTags.user(user_id)])
+        identity = IdentityLoader._load(user_id)
+        with IdentityLoader._lock:
+            IdentityLoader._stats['misses'] += 1
+            if identity is not None and versions is not None:
+                IdentityLoader._identities[user_id] = (now, identity, versions)
+                IdentityLoader._identities.move_to_end(user_id)
+                while len(IdentityLoader._identities) > IdentityLoader.MAX_ENTRIES:
+                    IdentityLoader._identities.popitem(last=False)
+        return identity
+
+    @staticmethod
+    def _load(user_id):
+        """Load the user and their profile ids in one query."""
+        row = db.session.query(
+            User.id,
+            User.username,
+            User.role,
+            Student.id,
+            Teacher.id,
+            Parent.id
+        ).outerjoin(
+            Student, Student.user_id == User.id
+        ).outerjoin(
+            Teacher, Teacher.user_id == User.id
+        ).outerjoin(
+            Parent, Parent.user_id == User.id
+        ).filter(User.id == user_id).first()
+        return Identity(*row) if row else None
+
+    @staticmethod
+    def invalidate(user_id=None):
+        """Drop one cached identity, or all of them, in this process."""
+        with IdentityLoader._lock:
+            if user_id is None:
+                IdentityLoader._identities.clear()
+            else:
+                IdentityLoader._identities.pop(int(user_id), None)
+
+    @staticmethod
+    def stats():
+        """Hits, misses and size of this process's identity cache."""
+        with IdentityLoader._lock:
+            return dict(IdentityLoader._stats, size=len(IdentityLoader._identities))
+
+
+def current_identity():
+    """Identity of the current request; see IdentityLoader.current()."""
+    return IdentityLoader.current()
@@ -24,6 +24,11 @@ class AuditLog(db.Model):
     # Relationship
     admin = db.relationship('User', backref='audit_logs')
     
+    __table_args__ = (
+        # Recent entries of one action type, for platform metrics
+        db.Index('idx_audit_logs_action_created', 'action_type', 'created_at'),
+    )
+    
     def to_dict(self):
         """Convert to dictionary"""
         return {
@@ -0,0 +1,44 @@
+"""
+Cohort statistics models for population-wide comparisons.
+"""
+from datetime import datetime
+from src.database import db
+
+
+class CohortSketch(db.Model):
+    """
+    Quantile sketch of one student metric over one cohort.
+
+    A cohort is every student in a grade or a class. The digest column
+    holds a serialized TDigest (see src/services/quantile_sketch.py),
+    which answers percentile questions for the whole cohort; count and
+    total give the exact mean. Rows are rebuilt by CohortStatsService.
+    """
+    __tablename__ = 'cohort_sketches'
+
+    id = db.Column(db.Integer, primary_key=True)
+    scope = db.Column(db.String(10), nullable=False)  # 'grade' or 'class'
+    scope_id = db.Column(db.Integer, nullable=False)  # Grade level or class id
+    metric = db.Column(db.String(30), nullable=False)  # 'accuracy', 'practice_time', ...
+    count = db.Column(db.Integer, nullable=False, default=0)
+    total = db.Column(db.Float, nullable=False, default=0.0)
+    digest = db.Column(db.JSON, nullable=False)
+    refreshed_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.UniqueConstraint('scope', 'scope_id', 'metric', name='unique_cohort_sketch'),
+    )
+
+    def __repr__(self):
+        return f'<CohortSketch {self.scope}:{self.scope_id} {self.metric} n={self.count}>'
+
+    def to_dict(self):
+        """Convert sketch summary to dictionary."""
+        return {
+            'scope': self.scope,
+            'scope_id': self.scope_id,
+            'metric': self.metric,
+            'count': self.count,
+            'mean': self.total / self.count if self.count else 0,
+            'refreshed_at': self.refreshed_at.isoformat() if self.refreshed_at else None
+        }
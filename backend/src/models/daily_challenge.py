@@ -11,6 +11,10 @@ class DailyChallenge(db.Model):
     Challenges reset every 24 hours and provide bonus XP.
     """
     __tablename__ = 'daily_challenges'
+    __table_args__ = (
+        db.Index('idx_daily_challenges_student_status', 'student_id', 'status'),
+        db.Index('idx_daily_challenges_status_expires', 'status', 'expires_at'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     student_id = db.Column(db.Integer, db.ForeignKey('students.id'), nullable=False)
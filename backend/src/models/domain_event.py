@@ -0,0 +1,39 @@
+"""
+Domain event models for idempotent background side effects.
+"""
+from datetime import datetime
+from src.database import db
+
+
+class ProcessedEvent(db.Model):
+    """
+    Marker for a domain event whose side effects have been applied.
+
+    The marker is written in the same transaction as the side effects, so
+    an event that is redelivered after a worker restart is recognised and
+    skipped instead of being applied twice.
+    """
+    __tablename__ = 'processed_events'
+
+    id = db.Column(db.Integer, primary_key=True)
+    event_key = db.Column(db.String(100), nullable=False, unique=True)
+    event_type = db.Column(db.String(50), nullable=False)
+    student_id = db.Column(db.Integer, db.ForeignKey('students.id'), nullable=True)
+    processed_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index('idx_processed_events_processed_at', 'processed_at'),
+    )
+
+    def __repr__(self):
+        return f'<ProcessedEvent {self.event_key}>'
+
+    def to_dict(self):
+        """Convert processed event to dictionary."""
+        return {
+            'id': self.id,
+            'event_key': self.event_key,
+            'event_type': self.event_type,
+            'student_id': self.student_id,
+            'processed_at': self.processed_at.isoformat() if self.processed_at else None
+        }
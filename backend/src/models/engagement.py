@@ -0,0 +1,46 @@
+"""
+Engagement models for materialized engagement scores.
+"""
+from datetime import datetime
+from src.database import db
+
+
+class EngagementScore(db.Model):
+    """
+    A student's composite engagement score over the standard window.
+
+    Computed by EngagementService from the daily stats rollup and
+    refreshed when one of the student's sessions ends and by the nightly
+    refresh_engagement_scores.py job. The component totals are kept so
+    dashboards can explain a score without recomputing it.
+    """
+    __tablename__ = 'engagement_scores'
+
+    id = db.Column(db.Integer, primary_key=True)
+    student_id = db.Column(db.Integer, db.ForeignKey('students.id'), nullable=False, unique=True)
+    score = db.Column(db.Float, nullable=False, default=0.0)  # 0-100
+    sessions = db.Column(db.Integer, nullable=False, default=0)
+    practice_minutes = db.Column(db.Float, nullable=False, default=0.0)
+    questions_answered = db.Column(db.Integer, nullable=False, default=0)
+    questions_correct = db.Column(db.Integer, nullable=False, default=0)
+    active_days = db.Column(db.Integer, nullable=False, default=0)
+    computed_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    # Relationships
+    student = db.relationship('Student', backref=db.backref('engagement_score', uselist=False, cascade='all, delete-orphan'))
+
+    def __repr__(self):
+        return f'<EngagementScore Student{self.student_id} {self.score:.1f}>'
+
+    def to_dict(self):
+        """Convert engagement score to dictionary."""
+        return {
+            'student_id': self.student_id,
+            'score': round(self.score, 1),
+            'sessions': self.sessions,
+            'practice_minutes': round(self.practice_minutes, 1),
+            'questions_answered': self.questions_answered,
+            'questions_correct': self.questions_correct,
+            'active_days': self.active_days,
+            'computed_at': self.computed_at.isoformat() if self.computed_at else None
+        }
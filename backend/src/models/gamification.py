@@ -110,6 +110,11 @@ class XPTransaction(db.Model):
     # Relationships
     student = db.relationship('Student', backref=db.backref('xp_transactions', lazy=True))
 
+    __table_args__ = (
+        db.Index('idx_xp_transactions_created', 'created_at'),
+        db.Index('idx_xp_transactions_student_created', 'student_id', 'created_at'),
+    )
+
     def __repr__(self):
         return f'<XPTransaction {self.id} - {self.total_xp}XP>'
 
@@ -129,6 +134,78 @@ class XPTransaction(db.Model):
         }
 
 
+
+class XPRollup(db.Model):
+    """
+    XP earned by one student for one action type in one day or week.
+
+    Rows only hold transactions that have been compacted out of
+    xp_transactions (see XPLedgerService); recent XP stays in the raw
+    ledger until it ages past the retention window.
+    """
+    __tablename__ = 'xp_rollups'
+
+    id = db.Column(db.Integer, primary_key=True)
+    student_id = db.Column(db.Integer, db.ForeignKey('students.id'), nullable=False)
+    period = db.Column(db.String(10), nullable=False)  # 'day' or 'week' (weeks start on Monday)
+    period_start = db.Column(db.Date, nullable=False)
+    action_type = db.Column(db.String(50), nullable=False)
+    total_xp = db.Column(db.BigInteger, nullable=False, default=0)
+    transaction_count = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    # Relationships
+    student = db.relationship('Student', backref=db.backref('xp_rollups', lazy=True, cascade='all, delete-orphan'))
+
+    __table_args__ = (
+        db.UniqueConstraint('student_id', 'period', 'period_start', 'action_type', name='unique_xp_rollup'),
+        db.Index('idx_xp_rollups_period', 'period', 'period_start'),
+    )
+
+    def __repr__(self):
+        return f'<XPRollup Student{self.student_id} {self.period} {self.period_start} {self.action_type}>'
+
+    def to_dict(self):
+        """Convert rollup to dictionary for JSON serialization."""
+        return {
+            'id': self.id,
+            'student_id': self.student_id,
+            'period': self.period,
+            'period_start': self.period_start.isoformat() if self.period_start else None,
+            'action_type': self.action_type,
+            'total_xp': self.total_xp,
+            'transaction_count': self.transaction_count,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
+
+
+class XPLedgerCompaction(db.Model):
+    """
+    One compaction step of the XP ledger.
+
+    The latest compacted_before is the ledger watermark: every raw
+    transaction created before it has been folded into xp_rollups and
+    deleted.
+    """
+    __tablename__ = 'xp_ledger_compactions'
+
+    id = db.Column(db.Integer, primary_key=True)
+    compacted_before = db.Column(db.DateTime, nullable=False, index=True)
+    transactions_folded = db.Column(db.Integer, nullable=False, default=0)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<XPLedgerCompaction before {self.compacted_before}>'
+
+    def to_dict(self):
+        """Convert compaction to dictionary for JSON serialization."""
+        return {
+            'id': self.id,
+            'compacted_before': self.compacted_before.isoformat() if self.compacted_before else None,
+            'transactions_folded': self.transactions_folded,
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
+
 class LevelReward(db.Model):
     """
     Defines rewards available at each level.
@@ -0,0 +1,47 @@
+"""
+Leaderboard models for materialized rank tables.
+"""
+from datetime import datetime
+from src.database import db
+
+
+class LeaderboardRank(db.Model):
+    """
+    Materialized leaderboard score for one student on one board.
+
+    Rank order (score descending, student id ascending) is read from the
+    (board, scope, score, student_id) index, so reading a page is an
+    index scan instead of a full sort of the source tables, and a score
+    change writes only the student's own row.
+    """
+    __tablename__ = 'leaderboard_ranks'
+
+    id = db.Column(db.Integer, primary_key=True)
+    board = db.Column(db.String(30), nullable=False)  # 'global_xp', 'grade_xp', 'skills', 'achievements'
+    scope = db.Column(db.Integer, nullable=False, default=0)  # Grade for 'grade_xp', 0 otherwise
+    student_id = db.Column(db.Integer, db.ForeignKey('students.id'), nullable=False)
+    score = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    # Relationships
+    student = db.relationship('Student', backref=db.backref('leaderboard_ranks', lazy=True, cascade='all, delete-orphan'))
+
+    __table_args__ = (
+        db.UniqueConstraint('board', 'scope', 'student_id', name='unique_leaderboard_student'),
+        db.Index('idx_leaderboard_ranks_score', 'board', 'scope', 'score', 'student_id'),
+        db.Index('idx_leaderboard_ranks_updated', 'board', 'scope', 'updated_at'),
+    )
+
+    def __repr__(self):
+        return f'<LeaderboardRank {self.board}:{self.scope} Student{self.student_id} {self.score}>'
+
+    def to_dict(self):
+        """Convert rank entry to dictionary."""
+        return {
+            'id': self.id,
+            'board': self.board,
+            'scope': self.scope,
+            'student_id': self.student_id,
+            'score': self.score,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
@@ -0,0 +1,54 @@
+"""
+Platform metrics models for pre-aggregated admin dashboard data.
+"""
+from datetime import datetime
+from src.database import db
+
+
+class PlatformDailyActivity(db.Model):
+    """
+    Platform-wide practice activity for one UTC day.
+
+    sketch holds the HyperLogLog registers of the students who started a
+    session that day, so any range of days can be merged into a distinct
+    active-user estimate. Maintained by PlatformMetricsService.
+    """
+    __tablename__ = 'platform_daily_activity'
+
+    id = db.Column(db.Integer, primary_key=True)
+    day = db.Column(db.Date, nullable=False, unique=True)
+    sketch = db.Column(db.LargeBinary, nullable=False)
+    active_students = db.Column(db.Integer, nullable=False, default=0)  # estimate for the day
+    sessions = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<PlatformDailyActivity {self.day} {self.active_students}>'
+
+    def to_dict(self):
+        """Convert daily activity to dictionary."""
+        return {
+            'day': self.day.isoformat() if self.day else None,
+            'active_students': self.active_students,
+            'sessions': self.sessions,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
+
+
+class PlatformMetricsSnapshot(db.Model):
+    """
+    The latest admin dashboard metrics, shared by every process.
+
+    One row (id 1) written by PlatformMetricsService.refresh(). Processes
+    read it instead of computing their own; refreshing_at marks the
+    process that has claimed the next refresh.
+    """
+    __tablename__ = 'platform_metrics_snapshot'
+
+    id = db.Column(db.Integer, primary_key=True)
+    data = db.Column(db.JSON, nullable=False)
+    computed_at = db.Column(db.DateTime, nullable=False)
+    refreshing_at = db.Column(db.DateTime, nullable=True)
+
+    def __repr__(self):
+        return f'<PlatformMetricsSnapshot {self.computed_at}>'
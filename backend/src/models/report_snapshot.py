@@ -0,0 +1,86 @@
+"""
+Report snapshot models for pre-generated parent reports.
+"""
+from datetime import datetime
+from src.database import db
+
+
+class ReportSnapshot(db.Model):
+    """
+    A generated report for one student and period, stored as JSON.
+
+    Written by WeeklyDigestService's bulk digest run and served by
+    ReportService instead of recomputing the report on every view.
+    period_start identifies the period (the Monday of a week).
+    """
+    __tablename__ = 'report_snapshots'
+
+    id = db.Column(db.Integer, primary_key=True)
+    student_id = db.Column(db.Integer, db.ForeignKey('students.id'), nullable=False)
+    period = db.Column(db.String(20), nullable=False, default='week')  # 'week'
+    period_start = db.Column(db.Date, nullable=False)
+    report = db.Column(db.JSON, nullable=False)
+    run_id = db.Column(db.Integer, db.ForeignKey('digest_runs.id'), nullable=True)
+    generated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    # Relationships
+    student = db.relationship('Student', backref=db.backref('report_snapshots', lazy=True, cascade='all, delete-orphan'))
+
+    __table_args__ = (
+        db.UniqueConstraint('student_id', 'period', 'period_start', name='unique_report_snapshot'),
+    )
+
+    def __repr__(self):
+        return f'<ReportSnapshot Student{self.student_id} {self.period} {self.period_start}>'
+
+    def to_dict(self):
+        """Convert report snapshot to dictionary."""
+        return {
+            'student_id': self.student_id,
+            'period': self.period,
+            'period_start': self.period_start.isoformat() if self.period_start else None,
+            'report': self.report,
+            'generated_at': self.generated_at.isoformat() if self.generated_at else None
+        }
+
+
+class DigestRun(db.Model):
+    """
+    Progress of one bulk digest run.
+
+    Students are processed in id order, and last_student_id is committed
+    together with each partition's snapshots, so an interrupted run
+    resumes after the last partition it stored.
+    """
+    __tablename__ = 'digest_runs'
+
+    id = db.Column(db.Integer, primary_key=True)
+    period = db.Column(db.String(20), nullable=False, default='week')
+    period_start = db.Column(db.Date, nullable=False)
+    status = db.Column(db.String(20), nullable=False, default='running')  # 'running', 'completed'
+    total_students = db.Column(db.Integer, nullable=False, default=0)
+    processed_students = db.Column(db.Integer, nullable=False, default=0)
+    last_student_id = db.Column(db.Integer, nullable=True)
+    started_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    finished_at = db.Column(db.DateTime, nullable=True)
+
+    __table_args__ = (
+        db.Index('idx_digest_runs_period', 'period', 'period_start', 'status'),
+    )
+
+    def __repr__(self):
+        return f'<DigestRun {self.id} {self.period} {self.period_start} {self.status}>'
+
+    def to_dict(self):
+        """Convert digest run to dictionary."""
+        return {
+            'id': self.id,
+            'period': self.period,
+            'period_start': self.period_start.isoformat() if self.period_start else None,
+            'status': self.status,
+            'total_students': self.total_students,
+            'processed_students': self.processed_students,
+            'last_student_id': self.last_student_id,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
+        }
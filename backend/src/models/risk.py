@@ -0,0 +1,57 @@
+"""
+Risk models for materialized at-risk scores.
+"""
+from datetime import datetime
+from src.database import db
+
+
+class StudentRiskScore(db.Model):
+    """
+    A student's latest at-risk score and the factors behind it.
+
+    Computed for every student by RiskScoringService's batch pipeline and
+    refreshed when the student's sessions or assignments change.
+    model_version identifies the scoring rules that produced the row, so
+    rows from older rules are recomputed instead of served.
+    """
+    __tablename__ = 'student_risk_scores'
+
+    id = db.Column(db.Integer, primary_key=True)
+    student_id = db.Column(db.Integer, db.ForeignKey('students.id'), nullable=False, unique=True)
+    risk_score = db.Column(db.Integer, nullable=False, default=0)  # 0-100
+    risk_level = db.Column(db.String(10), nullable=False, default='low')  # 'low', 'medium', 'high'
+    risk_factors = db.Column(db.JSON, nullable=False, default=list)
+
+    # Features the score was computed from
+    engagement_score = db.Column(db.Float, nullable=False, default=0.0)
+    recent_accuracy = db.Column(db.Float, nullable=True)  # None without sessions
+    recent_sessions = db.Column(db.Integer, nullable=False, default=0)
+    overdue_assignments = db.Column(db.Integer, nullable=False, default=0)
+
+    model_version = db.Column(db.Integer, nullable=False, default=1)
+    computed_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    # Relationships
+    student = db.relationship('Student', backref=db.backref('risk_score', uselist=False, cascade='all, delete-orphan'))
+
+    __table_args__ = (
+        db.Index('idx_student_risk_scores_level', 'risk_level', 'risk_score'),
+    )
+
+    def __repr__(self):
+        return f'<StudentRiskScore Student{self.student_id} {self.risk_level} {self.risk_score}>'
+
+    def to_dict(self):
+        """Convert risk score to dictionary."""
+        return {
+            'student_id': self.student_id,
+            'risk_score': self.risk_score,
+            'risk_level': self.risk_level,
+            'risk_factors': self.risk_factors,
+            'engagement_score': round(self.engagement_score, 1),
+            'recent_accuracy': round(self.recent_accuracy, 2) if self.recent_accuracy is not None else None,
+            'recent_sessions': self.recent_sessions,
+            'overdue_assignments': self.overdue_assignments,
+            'model_version': self.model_version,
+            'computed_at': self.computed_at.isoformat() if self.computed_at else None
+        }
@@ -40,6 +40,9 @@ class SharedChallenge(db.Model):
     # Rewards
     xp_reward = db.Column(db.Integer, default=0)
     
+    # Bumped on every scoreboard change, for "changed since" polling
+    scoreboard_version = db.Column(db.Integer, nullable=False, default=0)
+    
     # Timestamps
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -71,6 +74,7 @@ class SharedChallenge(db.Model):
             'end_time': self.end_time.isoformat() if self.end_time else None,
             'status': self.status,
             'xp_reward': self.xp_reward,
+            'scoreboard_version': self.scoreboard_version,
             'created_at': self.created_at.isoformat() if self.created_at else None
         }
         
@@ -102,7 +106,7 @@ class ChallengeParticipant(db.Model):
     completed_at = db.Column(db.DateTime)
     
     # Ranking (for competitive mode)
-    rank = db.Column(db.Integer)
+    rank = db.Column(db.Integer)  # Final rank, settled when the challenge completes
     
     # Timestamps
     joined_at = db.Column(db.DateTime, default=datetime.utcnow)
@@ -113,7 +117,11 @@ class ChallengeParticipant(db.Model):
     student = db.relationship('Student', backref='challenge_participations')
     
     # Unique constraint
-    __table_args__ = (db.UniqueConstraint('challenge_id', 'student_id', name='unique_challenge_participant'),)
+    __table_args__ = (
+        db.UniqueConstraint('challenge_id', 'student_id', name='unique_challenge_participant'),
+        # Scoreboard order, read by SharedChallengeService
+        db.Index('idx_challenge_participants_score', 'challenge_id', 'completed', 'accuracy', 'questions_answered', 'id'),
+    )
     
     def to_dict(self, include_student=True):
         """Convert participant to dictionary"""
@@ -24,6 +24,13 @@ class StudentSession(db.Model):
     student = db.relationship('Student', backref='sessions')
     skill = db.relationship('Skill', backref='practice_sessions')
     
+    __table_args__ = (
+        # Latest activity per student, for dashboard ETags
+        db.Index('idx_student_sessions_student_activity', 'student_id', 'last_activity_at'),
+        # Recently started sessions, for platform metrics
+        db.Index('idx_student_sessions_started', 'started_at'),
+    )
+    
     def __repr__(self):
         return f'<StudentSession {self.id} Student{self.student_id} {"Active" if self.is_active else "Ended"}>'
     
@@ -49,3 +56,49 @@ class StudentSession(db.Model):
             'duration': duration
         }
 
+
+
+class StudentDailyStats(db.Model):
+    """
+    Practice totals for one student, on one day, for one skill.
+
+    Sessions are counted on the UTC day they started. Practice time only
+    includes ended sessions, matching how reports have always summed it.
+    Maintained by DailyStatsService as sessions start, record answers and
+    end; skill_id is 0 for sessions without a skill.
+    """
+    __tablename__ = 'student_daily_stats'
+
+    id = db.Column(db.Integer, primary_key=True)
+    student_id = db.Column(db.Integer, db.ForeignKey('students.id'), nullable=False)
+    day = db.Column(db.Date, nullable=False)
+    skill_id = db.Column(db.Integer, nullable=False, default=0)
+    questions_answered = db.Column(db.Integer, nullable=False, default=0)
+    questions_correct = db.Column(db.Integer, nullable=False, default=0)
+    practice_seconds = db.Column(db.Float, nullable=False, default=0.0)
+    sessions = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    # Relationships
+    student = db.relationship('Student', backref=db.backref('daily_stats', lazy=True, cascade='all, delete-orphan'))
+
+    __table_args__ = (
+        db.UniqueConstraint('student_id', 'day', 'skill_id', name='unique_student_daily_stats'),
+        # Platform-wide reads of a span of days
+        db.Index('idx_student_daily_stats_day', 'day', 'student_id'),
+    )
+
+    def __repr__(self):
+        return f'<StudentDailyStats Student{self.student_id} {self.day} Skill{self.skill_id}>'
+
+    def to_dict(self):
+        """Convert daily stats to dictionary"""
+        return {
+            'student_id': self.student_id,
+            'day': self.day.isoformat(),
+            'skill_id': self.skill_id or None,
+            'questions_answered': self.questions_answered,
+            'questions_correct': self.questions_correct,
+            'practice_seconds': round(self.practice_seconds, 1),
+            'sessions': self.sessions
+        }
@@ -2,10 +2,10 @@
 Achievement API routes.
 """
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask_jwt_extended import jwt_required
+from src.middleware.identity import current_identity
 from src.services.achievement_service import AchievementService
-from src.models.user import User
-from src.models.achievement import Achievement
+from src.services.achievement_snapshot_service import AchievementSnapshotService
 
 achievement_routes_bp = Blueprint('achievement_routes', __name__, url_prefix='/api/achievements')
 
@@ -17,14 +17,10 @@ def get_all_achievements():
     try:
         category = request.args.get('category')
         
-        query = Achievement.query.filter_by(is_active=True)
-        if category:
-            query = query.filter_by(category=category)
-        
-        achievements = query.all()
+        achievements = AchievementSnapshotService.get_catalogue(category)
         
         return jsonify({
-            'achievements': [a.to_dict() for a in achievements],
+            'achievements': achievements,
             'total': len(achievements)
         }), 200
     
@@ -37,17 +33,16 @@ def get_all_achievements():
 def get_student_achievements():
     """Get student's achievements with progress."""
     try:
-        current_user_id = get_jwt_identity()
-        user = User.query.get(current_user_id)
+        user = current_identity()
         
-        if not user or not user.student:
+        if not user or not user.student_id:
             return jsonify({'error': 'Student profile not found'}), 404
         
         category = request.args.get('category')
         unlocked_only = request.args.get('unlocked_only', 'false').lower() == 'true'
         
         achievements = AchievementService.get_student_achievements(
-            student_id=user.student.id,
+            student_id=user.student_id,
             category=category,
             unlocked_only=unlocked_only
         )
@@ -66,13 +61,12 @@ def get_student_achievements():
 def get_unlocked():
     """Get student's unlocked achievements."""
     try:
-        current_user_id = get_jwt_identity()
-        user = User.query.get(current_user_id)
+        user = current_identity()
         
-        if not user or not user.student:
+        if not user or not user.student_id:
             return jsonify({'error': 'Student profile not found'}), 404
         
-        achievements = AchievementService.get_unlocked_achievements(user.student.id)
+        achievements = AchievementService.get_unlocked_achievements(user.student_id)
         
         return jsonify({
             'achievements': achievements,
@@ -88,14 +82,13 @@ def get_unlocked():
 def get_in_progress():
     """Get achievements close to unlocking."""
     try:
-        current_user_id = get_jwt_identity()
-        user = User.query.get(current_user_id)
+        user = current_identity()
         
-        if not user or not user.student:
+        if not user or not user.student_id:
             return jsonify({'error': 'Student profile not found'}), 404
         
         limit = request.args.get('limit', 5, type=int)
-        achievements = AchievementService.get_in_progress_achievements(user.student.id, limit)
+        achievements = AchievementService.get_in_progress_achievements(user.student_id, limit)
         
         return jsonify({
             'achievements': achievements,
@@ -111,13 +104,12 @@ def get_in_progress():
 def get_displayed():
     """Get student's displayed badges."""
     try:
-        current_user_id = get_jwt_identity()
-        user = User.query.get(current_user_id)
+        user = current_identity()
         
-        if not user or not user.student:
+        if not user or not user.student_id:
             return jsonify({'error': 'Student profile not found'}), 404
         
-        achievements = AchievementService.get_displayed_achievements(user.student.id)
+        achievements = AchievementService.get_displayed_achievements(user.student_id)
         
         return jsonify({
             'achievements': achievements,
@@ -133,13 +125,12 @@ def get_displayed():
 def toggle_display(achievement_id):
     """Toggle badge display on profile."""
     try:
-        current_user_id = get_jwt_identity()
-        user = User.query.get(current_user_id)
+        user = current_identity()
         
-        if not user or not user.student:
+        if not user or not user.student_id:
             return jsonify({'error': 'Student profile not found'}), 404
         
-        student_achievement = AchievementService.toggle_display(user.student.id, achievement_id)
+        student_achievement = AchievementService.toggle_display(user.student_id, achievement_id)
         
         if not student_achievement:
             return jsonify({'error': 'Achievement not found or not unlocked'}), 404
@@ -158,13 +149,12 @@ def toggle_display(achievement_id):
 def get_stats():
     """Get achievement statistics."""
     try:
-        current_user_id = get_jwt_identity()
-        user = User.query.get(current_user_id)
+        user = current_identity()
         
-        if not user or not user.student:
+        if not user or not user.student_id:
             return jsonify({'error': 'Student profile not found'}), 404
         
-        stats = AchievementService.get_achievement_stats(user.student.id)
+        stats = AchievementService.get_achievement_stats(user.student_id)
         
         return jsonify(stats), 200
     
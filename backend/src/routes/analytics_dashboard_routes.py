@@ -2,12 +2,20 @@
 API routes for analytics dashboard.
 """
 from flask import Blueprint, request, jsonify
+from src.api_optimizations import cache_response, conditional_response
 from src.services.analytics_dashboard_service import AnalyticsDashboardService
+from src.services.watermark_service import WatermarkService
 
 analytics_dashboard_bp = Blueprint('analytics_dashboard', __name__, url_prefix='/api/analytics')
 
 
 @analytics_dashboard_bp.route('/student/<int:student_id>/dashboard', methods=['GET'])
+@conditional_response(
+    tags=['student:{student_id}'],
+    watermark=lambda student_id: WatermarkService.student_activity(student_id),
+    refresh_seconds=900
+)
+@cache_response(900, 'student_dashboard', tags=['student:{student_id}'])
 def get_student_dashboard(student_id):
     """Get analytics dashboard for student"""
     days = request.args.get('days', default=30, type=int)
@@ -17,6 +25,12 @@ def get_student_dashboard(student_id):
 
 
 @analytics_dashboard_bp.route('/teacher/<int:teacher_id>/dashboard', methods=['GET'])
+@conditional_response(
+    tags=['teacher:{teacher_id}'],
+    watermark=lambda teacher_id: WatermarkService.teacher_activity(teacher_id),
+    refresh_seconds=900
+)
+@cache_response(900, 'teacher_analytics_dashboard', tags=['teacher:{teacher_id}'])
 def get_teacher_dashboard(teacher_id):
     """Get analytics dashboard for teacher"""
     class_id = request.args.get('class_id', type=int)
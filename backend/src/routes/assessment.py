@@ -2,10 +2,13 @@
 Assessment API routes for creating and managing assessments.
 """
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask_jwt_extended import jwt_required
+from src.middleware.identity import current_identity
 from src.database import db
 from src.models.student import Student
 from src.models.assessment import Assessment, AssessmentResponse, Question, Skill
+from src.services.domain_event_service import DomainEventService
+from src.api_optimizations import cache_response, conditional_response
 import random
 
 assessment_bp = Blueprint('assessment', __name__, url_prefix='/api/assessment')
@@ -31,15 +34,16 @@ def start_assessment():
     }
     """
     try:
-        user_id = int(get_jwt_identity())
-        student = Student.query.filter_by(user_id=user_id).first()
+        user = current_identity()
         
-        if not student:
+        if not user or not user.student_id:
             return jsonify({'error': 'Student profile not found'}), 404
         
         data = request.get_json()
         assessment_type = data.get('assessment_type', 'diagnostic')
-        grade_level = data.get('grade_level', student.grade)
+        grade_level = data.get('grade_level')
+        if grade_level is None:
+            grade_level = db.session.get(Student, user.student_id).grade
         skill_id = data.get('skill_id')
         
         # Validate assessment type
@@ -64,7 +68,7 @@ def start_assessment():
         
         # Create assessment
         assessment = Assessment(
-            student_id=student.id,
+            student_id=user.student_id,
             assessment_type=assessment_type,
             grade_level=grade_level,
             total_questions=len(questions)
@@ -104,15 +108,14 @@ def submit_response(assessment_id):
     }
     """
     try:
-        user_id = int(get_jwt_identity())
-        student = Student.query.filter_by(user_id=user_id).first()
+        user = current_identity()
         
-        if not student:
+        if not user or not user.student_id:
             return jsonify({'error': 'Student profile not found'}), 404
         
         # Verify assessment belongs to student
         assessment = Assessment.query.get(assessment_id)
-        if not assessment or assessment.student_id != student.id:
+        if not assessment or assessment.student_id != user.student_id:
             return jsonify({'error': 'Assessment not found'}), 404
         
         if assessment.completed:
@@ -157,6 +160,19 @@ def submit_response(assessment_id):
         if is_correct:
             assessment.correct_answers += 1
         
+        # The answer also earns XP and achievements and advances the session,
+        # challenges, streak and activity feed; background workers apply
+        # these after commit (see DomainEventService)
+        db.session.flush()
+        DomainEventService.publish('answer_submitted', user.student_id, {
+            'response_id': response.id,
+            'question_id': question.id,
+            'skill_id': question.skill_id,
+            'difficulty': question.difficulty,
+            'correct': is_correct,
+            'time_spent': time_spent
+        }, event_key=f'answer:{response.id}')
+        
         db.session.commit()
         
         return jsonify({
@@ -185,15 +201,14 @@ def complete_assessment(assessment_id):
     }
     """
     try:
-        user_id = int(get_jwt_identity())
-        student = Student.query.filter_by(user_id=user_id).first()
+        user = current_identity()
         
-        if not student:
+        if not user or not user.student_id:
             return jsonify({'error': 'Student profile not found'}), 404
         
         # Verify assessment belongs to student
         assessment = Assessment.query.get(assessment_id)
-        if not assessment or assessment.student_id != student.id:
+        if not assessment or assessment.student_id != user.student_id:
             return jsonify({'error': 'Assessment not found'}), 404
         
         if assessment.completed:
@@ -228,13 +243,12 @@ def get_assessment_history():
     }
     """
     try:
-        user_id = int(get_jwt_identity())
-        student = Student.query.filter_by(user_id=user_id).first()
+        user = current_identity()
         
-        if not student:
+        if not user or not user.student_id:
             return jsonify({'error': 'Student profile not found'}), 404
         
-        assessments = Assessment.query.filter_by(student_id=student.id).order_by(Assessment.started_at.desc()).all()
+        assessments = Assessment.query.filter_by(student_id=user.student_id).order_by(Assessment.started_at.desc()).all()
         
         return jsonify({
             'assessments': [a.to_dict() for a in assessments]
@@ -257,14 +271,13 @@ def get_assessment(assessment_id):
     }
     """
     try:
-        user_id = int(get_jwt_identity())
-        student = Student.query.filter_by(user_id=user_id).first()
+        user = current_identity()
         
-        if not student:
+        if not user or not user.student_id:
             return jsonify({'error': 'Student profile not found'}), 404
         
         assessment = Assessment.query.get(assessment_id)
-        if not assessment or assessment.student_id != student.id:
+        if not assessment or assessment.student_id != user.student_id:
             return jsonify({'error': 'Assessment not found'}), 404
         
         # Get all responses with question details
@@ -284,6 +297,8 @@ def get_assessment(assessment_id):
 
 
 @assessment_bp.route('/skills', methods=['GET'])
+@conditional_response(tags=['catalog:skills'], per_user=False)
+@cache_response(86400, 'skill_catalog', per_user=False, tags=['catalog:skills'])
 def get_skills():
     """
     Get all available skills, optionally filtered by grade level.
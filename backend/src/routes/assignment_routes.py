@@ -38,10 +38,10 @@ def get_assignments(current_user):
     else:
         # Get student's assignments
         # Find student ID from user
-        if not hasattr(current_user, 'student') or not current_user.student:
+        if not current_user.student_id:
             return jsonify({'error': 'Student not found'}), 404
         
-        student_id = current_user.student[0].id
+        student_id = current_user.student_id
         assignments = AssignmentService.get_student_assignments(student_id, filters)
         return jsonify({'success': True, 'assignments': assignments}), 200
 
@@ -85,10 +85,10 @@ def start_assignment(current_user, assignment_id):
         return jsonify({'error': 'Teachers cannot start assignments'}), 403
     
     # Find student ID
-    if not hasattr(current_user, 'student') or not current_user.student:
+    if not current_user.student_id:
         return jsonify({'error': 'Student not found'}), 404
     
-    student_id = current_user.student[0].id
+    student_id = current_user.student_id
     result, status = AssignmentService.start_assignment(assignment_id, student_id)
     return jsonify(result), status
 
@@ -101,10 +101,10 @@ def complete_assignment(current_user, assignment_id):
         return jsonify({'error': 'Teachers cannot complete assignments'}), 403
     
     # Find student ID
-    if not hasattr(current_user, 'student') or not current_user.student:
+    if not current_user.student_id:
         return jsonify({'error': 'Student not found'}), 404
     
-    student_id = current_user.student[0].id
+    student_id = current_user.student_id
     result, status = AssignmentService.complete_assignment(assignment_id, student_id)
     return jsonify(result), status
 
@@ -128,10 +128,10 @@ def get_assignment_progress(current_user, assignment_id):
         return jsonify({'error': 'Use /stats endpoint for teacher view'}), 403
     
     # Find student ID
-    if not hasattr(current_user, 'student') or not current_user.student:
+    if not current_user.student_id:
         return jsonify({'error': 'Student not found'}), 404
     
-    student_id = current_user.student[0].id
+    student_id = current_user.student_id
     result, status = AssignmentService.get_student_assignment_progress(assignment_id, student_id)
     return jsonify(result), status
 
@@ -2,9 +2,9 @@
 Daily Challenge API routes.
 """
 from flask import Blueprint, jsonify, request
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask_jwt_extended import jwt_required
+from src.middleware.identity import current_identity
 from src.services.challenge_service import ChallengeService
-from src.models.user import User
 
 challenge_bp = Blueprint('challenges', __name__, url_prefix='/api/challenges')
 
@@ -13,13 +13,12 @@ challenge_bp = Blueprint('challenges', __name__, url_prefix='/api/challenges')
 @jwt_required()
 def get_daily_challenges():
     """Get today's active challenges for the current student."""
-    current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
+    user = current_identity()
     
-    if not user or not user.student:
+    if not user or not user.student_id:
         return jsonify({'success': False, 'message': 'Student not found'}), 404
     
-    challenges = ChallengeService.get_active_challenges(user.student.id)
+    challenges = ChallengeService.get_active_challenges(user.student_id)
     
     return jsonify({
         'success': True,
@@ -31,13 +30,12 @@ def get_daily_challenges():
 @jwt_required()
 def generate_challenges():
     """Generate new daily challenges (manually triggered)."""
-    current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
+    user = current_identity()
     
-    if not user or not user.student:
+    if not user or not user.student_id:
         return jsonify({'success': False, 'message': 'Student not found'}), 404
     
-    challenges = ChallengeService.generate_daily_challenges(user.student.id)
+    challenges = ChallengeService.generate_daily_challenges(user.student_id)
     
     if not challenges:
         return jsonify({
@@ -56,10 +54,9 @@ def generate_challenges():
 @jwt_required()
 def update_challenge_progress(challenge_id):
     """Update progress for a specific challenge."""
-    current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
+    user = current_identity()
     
-    if not user or not user.student:
+    if not user or not user.student_id:
         return jsonify({'success': False, 'message': 'Student not found'}), 404
     
     data = request.get_json()
@@ -85,13 +82,12 @@ def update_challenge_progress(challenge_id):
 @jwt_required()
 def get_challenge_stats():
     """Get challenge completion statistics."""
-    current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
+    user = current_identity()
     
-    if not user or not user.student:
+    if not user or not user.student_id:
         return jsonify({'success': False, 'message': 'Student not found'}), 404
     
-    stats = ChallengeService.get_challenge_stats(user.student.id)
+    stats = ChallengeService.get_challenge_stats(user.student_id)
     
     return jsonify({
         'success': True,
@@ -103,14 +99,13 @@ def get_challenge_stats():
 @jwt_required()
 def get_challenge_history():
     """Get challenge completion history."""
-    current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
+    user = current_identity()
     
-    if not user or not user.student:
+    if not user or not user.student_id:
         return jsonify({'success': False, 'message': 'Student not found'}), 404
     
     limit = request.args.get('limit', 30, type=int)
-    history = ChallengeService.get_challenge_history(user.student.id, limit)
+    history = ChallengeService.get_challenge_history(user.student_id, limit)
     
     return jsonify({
         'success': True,
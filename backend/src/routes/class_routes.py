@@ -3,8 +3,9 @@ API routes for class groups.
 """
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
+from src.middleware.identity import current_identity
 from src.services.class_service import ClassService
-from src.models.user import User
+from src.api_optimizations import cache_response, conditional_response
 from src.models.student import Student
 
 class_bp = Blueprint('class', __name__, url_prefix='/api/classes')
@@ -48,21 +49,19 @@ def create_class():
 def get_my_classes():
     """Get all classes for current user (as teacher or student)."""
     try:
-        user_id = get_jwt_identity()
-
         # Get student profile
-        user = User.query.get(user_id)
-        if not user or not user.student:
+        user = current_identity()
+        if not user or not user.student_id:
             return jsonify({'error': 'Student profile not found'}), 404
 
-        student_id = user.student.id
+        student_id = user.student_id
 
         # Get classes as student
         classes = ClassService.get_student_classes(student_id)
 
         # Also get classes as teacher
         from src.models.class_group import ClassGroup
-        teacher_classes = ClassGroup.query.filter_by(teacher_id=user_id).all()
+        teacher_classes = ClassGroup.query.filter_by(teacher_id=user.id).all()
         for tc in teacher_classes:
             class_dict = tc.to_dict()
             class_dict['role'] = 'teacher'
@@ -135,7 +134,6 @@ def delete_class(class_id):
 def join_class():
     """Join a class using invite code."""
     try:
-        user_id = get_jwt_identity()
         data = request.get_json()
 
         invite_code = data.get('invite_code')
@@ -143,11 +141,11 @@ def join_class():
             return jsonify({'error': 'Invite code is required'}), 400
 
         # Get student profile
-        user = User.query.get(user_id)
-        if not user or not user.student:
+        user = current_identity()
+        if not user or not user.student_id:
             return jsonify({'error': 'Student profile not found'}), 404
 
-        student_id = user.student.id
+        student_id = user.student_id
 
         class_group = ClassService.join_class(student_id, invite_code)
 
@@ -167,14 +165,12 @@ def join_class():
 def leave_class(class_id):
     """Leave a class."""
     try:
-        user_id = get_jwt_identity()
-
         # Get student profile
-        user = User.query.get(user_id)
-        if not user or not user.student:
+        user = current_identity()
+        if not user or not user.student_id:
             return jsonify({'error': 'Student profile not found'}), 404
 
-        student_id = user.student.id
+        student_id = user.student_id
 
         ClassService.leave_class(class_id, student_id)
 
@@ -216,6 +212,8 @@ def get_members(class_id):
 
 @class_bp.route('/<int:class_id>/leaderboard', methods=['GET'])
 @jwt_required()
+@conditional_response(tags=['class:{class_id}'], per_user=False)
+@cache_response(3600, 'class_leaderboard', per_user=False, tags=['class:{class_id}'])
 def get_leaderboard(class_id):
     """Get class leaderboard."""
     try:
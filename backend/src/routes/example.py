@@ -2,9 +2,9 @@
 Example API routes for managing interactive examples and tracking interactions.
 """
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask_jwt_extended import jwt_required
+from src.middleware.identity import current_identity
 from src.database import db
-from src.models.student import Student
 from src.models.interactive_example import InteractiveExample
 from src.services.example_service import ExampleService
 
@@ -16,15 +16,13 @@ bp = Blueprint('example', __name__, url_prefix='/api/examples')
 def get_skill_examples(skill_id):
     """Get all interactive examples for a specific skill."""
     try:
-        user_id = get_jwt_identity()
-        
         # Get student
-        student = Student.query.filter_by(user_id=user_id).first()
-        if not student:
+        user = current_identity()
+        if not user or not user.student_id:
             return jsonify({'error': 'Student profile not found'}), 404
         
         # Get examples for skill
-        examples = ExampleService.get_examples_for_skill(skill_id, student_id=student.id)
+        examples = ExampleService.get_examples_for_skill(skill_id, student_id=user.student_id)
         
         return jsonify({
             'examples': examples,
@@ -40,15 +38,13 @@ def get_skill_examples(skill_id):
 def get_example(example_id):
     """Get details for a specific interactive example."""
     try:
-        user_id = get_jwt_identity()
-        
         # Get student
-        student = Student.query.filter_by(user_id=user_id).first()
-        if not student:
+        user = current_identity()
+        if not user or not user.student_id:
             return jsonify({'error': 'Student profile not found'}), 404
         
         # Get example
-        example = ExampleService.get_example_by_id(example_id, student_id=student.id)
+        example = ExampleService.get_example_by_id(example_id, student_id=user.student_id)
         
         if not example:
             return jsonify({'error': 'Example not found'}), 404
@@ -64,11 +60,9 @@ def get_example(example_id):
 def start_example(example_id):
     """Record that a student started an interactive example."""
     try:
-        user_id = get_jwt_identity()
-        
         # Get student
-        student = Student.query.filter_by(user_id=user_id).first()
-        if not student:
+        user = current_identity()
+        if not user or not user.student_id:
             return jsonify({'error': 'Student profile not found'}), 404
         
         # Check if example exists
@@ -77,7 +71,7 @@ def start_example(example_id):
             return jsonify({'error': 'Example not found'}), 404
         
         # Start interaction
-        interaction = ExampleService.start_interaction(example_id, student.id)
+        interaction = ExampleService.start_interaction(example_id, user.student_id)
         
         return jsonify({
             'message': 'Interaction started',
@@ -94,12 +88,11 @@ def start_example(example_id):
 def log_action(interaction_id):
     """Log a student interaction action."""
     try:
-        user_id = get_jwt_identity()
         data = request.get_json()
         
         # Get student
-        student = Student.query.filter_by(user_id=user_id).first()
-        if not student:
+        user = current_identity()
+        if not user or not user.student_id:
             return jsonify({'error': 'Student profile not found'}), 404
         
         # Validate input
@@ -126,12 +119,11 @@ def log_action(interaction_id):
 def update_time(interaction_id):
     """Update time spent on an example."""
     try:
-        user_id = get_jwt_identity()
         data = request.get_json()
         
         # Get student
-        student = Student.query.filter_by(user_id=user_id).first()
-        if not student:
+        user = current_identity()
+        if not user or not user.student_id:
             return jsonify({'error': 'Student profile not found'}), 404
         
         # Validate input
@@ -159,11 +151,9 @@ def update_time(interaction_id):
 def complete_example(interaction_id):
     """Mark an interaction as completed."""
     try:
-        user_id = get_jwt_identity()
-        
         # Get student
-        student = Student.query.filter_by(user_id=user_id).first()
-        if not student:
+        user = current_identity()
+        if not user or not user.student_id:
             return jsonify({'error': 'Student profile not found'}), 404
         
         # Complete interaction
@@ -186,15 +176,13 @@ def complete_example(interaction_id):
 def get_example_stats():
     """Get example interaction statistics for the student."""
     try:
-        user_id = get_jwt_identity()
-        
         # Get student
-        student = Student.query.filter_by(user_id=user_id).first()
-        if not student:
+        user = current_identity()
+        if not user or not user.student_id:
             return jsonify({'error': 'Student profile not found'}), 404
         
         # Get stats
-        stats = ExampleService.get_student_stats(student.id)
+        stats = ExampleService.get_student_stats(user.student_id)
         
         return jsonify(stats), 200
         
@@ -207,16 +195,14 @@ def get_example_stats():
 def get_recent_examples():
     """Get recently interacted examples."""
     try:
-        user_id = get_jwt_identity()
-        
         # Get student
-        student = Student.query.filter_by(user_id=user_id).first()
-        if not student:
+        user = current_identity()
+        if not user or not user.student_id:
             return jsonify({'error': 'Student profile not found'}), 404
         
         # Get recent examples
         limit = request.args.get('limit', 5, type=int)
-        examples = ExampleService.get_recent_examples(student.id, limit)
+        examples = ExampleService.get_recent_examples(user.student_id, limit)
         
         return jsonify({
             'recent_examples': examples,
@@ -232,16 +218,14 @@ def get_recent_examples():
 def get_recommended_examples():
     """Get recommended examples based on learning path."""
     try:
-        user_id = get_jwt_identity()
-        
         # Get student
-        student = Student.query.filter_by(user_id=user_id).first()
-        if not student:
+        user = current_identity()
+        if not user or not user.student_id:
             return jsonify({'error': 'Student profile not found'}), 404
         
         # Get recommended examples
         limit = request.args.get('limit', 5, type=int)
-        examples = ExampleService.get_recommended_examples(student.id, limit)
+        examples = ExampleService.get_recommended_examples(user.student_id, limit)
         
         return jsonify({
             'recommended_examples': examples,
@@ -2,9 +2,9 @@
 Friend routes for managing friendships and friend requests.
 """
 from flask import Blueprint, jsonify, request
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask_jwt_extended import jwt_required
+from src.middleware.identity import current_identity
 from src.services.friend_service import FriendService
-from src.models.user import User
 
 friend_bp = Blueprint('friends', __name__, url_prefix='/api/friends')
 
@@ -14,13 +14,12 @@ friend_bp = Blueprint('friends', __name__, url_prefix='/api/friends')
 def get_friends():
     """Get all friends."""
     try:
-        username = get_jwt_identity()
-        user = User.query.filter_by(username=username).first()
+        user = current_identity()
         
-        if not user or not user.student:
+        if not user or not user.student_id:
             return jsonify({'error': 'Student not found'}), 404
         
-        friends = FriendService.get_friends(user.student.id)
+        friends = FriendService.get_friends(user.student_id)
         return jsonify({'friends': friends}), 200
         
     except Exception as e:
@@ -32,13 +31,12 @@ def get_friends():
 def send_request(addressee_id):
     """Send a friend request."""
     try:
-        username = get_jwt_identity()
-        user = User.query.filter_by(username=username).first()
+        user = current_identity()
         
-        if not user or not user.student:
+        if not user or not user.student_id:
             return jsonify({'error': 'Student not found'}), 404
         
-        friendship = FriendService.send_request(user.student.id, addressee_id)
+        friendship = FriendService.send_request(user.student_id, addressee_id)
         return jsonify({'message': 'Friend request sent', 'friendship': friendship.to_dict()}), 201
         
     except ValueError as e:
@@ -52,13 +50,12 @@ def send_request(addressee_id):
 def accept_request(friendship_id):
     """Accept a friend request."""
     try:
-        username = get_jwt_identity()
-        user = User.query.filter_by(username=username).first()
+        user = current_identity()
         
-        if not user or not user.student:
+        if not user or not user.student_id:
             return jsonify({'error': 'Student not found'}), 404
         
-        friendship = FriendService.accept_request(friendship_id, user.student.id)
+        friendship = FriendService.accept_request(friendship_id, user.student_id)
         return jsonify({'message': 'Friend request accepted', 'friendship': friendship.to_dict()}), 200
         
     except ValueError as e:
@@ -72,13 +69,12 @@ def accept_request(friendship_id):
 def reject_request(friendship_id):
     """Reject a friend request."""
     try:
-        username = get_jwt_identity()
-        user = User.query.filter_by(username=username).first()
+        user = current_identity()
         
-        if not user or not user.student:
+        if not user or not user.student_id:
             return jsonify({'error': 'Student not found'}), 404
         
-        FriendService.reject_request(friendship_id, user.student.id)
+        FriendService.reject_request(friendship_id, user.student_id)
         return jsonify({'message': 'Friend request rejected'}), 200
         
     except ValueError as e:
@@ -92,13 +88,12 @@ def reject_request(friendship_id):
 def cancel_request(friendship_id):
     """Cancel a sent friend request."""
     try:
-        username = get_jwt_identity()
-        user = User.query.filter_by(username=username).first()
+        user = current_identity()
         
-        if not user or not user.student:
+        if not user or not user.student_id:
             return jsonify({'error': 'Student not found'}), 404
         
-        FriendService.cancel_request(friendship_id, user.student.id)
+        FriendService.cancel_request(friendship_id, user.student_id)
         return jsonify({'message': 'Friend request cancelled'}), 200
         
     except ValueError as e:
@@ -112,13 +107,12 @@ def cancel_request(friendship_id):
 def remove_friend(friend_id):
     """Remove a friend."""
     try:
-        username = get_jwt_identity()
-        user = User.query.filter_by(username=username).first()
+        user = current_identity()
         
-        if not user or not user.student:
+        if not user or not user.student_id:
             return jsonify({'error': 'Student not found'}), 404
         
-        FriendService.remove_friend(user.student.id, friend_id)
+        FriendService.remove_friend(user.student_id, friend_id)
         return jsonify({'message': 'Friend removed'}), 200
         
     except ValueError as e:
@@ -132,13 +126,12 @@ def remove_friend(friend_id):
 def get_received_requests():
     """Get received friend requests."""
     try:
-        username = get_jwt_identity()
-        user = User.query.filter_by(username=username).first()
+        user = current_identity()
         
-        if not user or not user.student:
+        if not user or not user.student_id:
             return jsonify({'error': 'Student not found'}), 404
         
-        requests = FriendService.get_received_requests(user.student.id)
+        requests = FriendService.get_received_requests(user.student_id)
         return jsonify({'requests': requests}), 200
         
     except Exception as e:
@@ -150,13 +143,12 @@ def get_received_requests():
 def get_sent_requests():
     """Get sent friend requests."""
     try:
-        username = get_jwt_identity()
-        user = User.query.filter_by(username=username).first()
+        user = current_identity()
         
-        if not user or not user.student:
+        if not user or not user.student_id:
             return jsonify({'error': 'Student not found'}), 404
         
-        requests = FriendService.get_sent_requests(user.student.id)
+        requests = FriendService.get_sent_requests(user.student_id)
         return jsonify({'requests': requests}), 200
         
     except Exception as e:
@@ -168,17 +160,16 @@ def get_sent_requests():
 def search_students():
     """Search for students."""
     try:
-        username = get_jwt_identity()
-        user = User.query.filter_by(username=username).first()
+        user = current_identity()
         
-        if not user or not user.student:
+        if not user or not user.student_id:
             return jsonify({'error': 'Student not found'}), 404
         
         query = request.args.get('q', '')
         if not query or len(query) < 2:
             return jsonify({'students': []}), 200
         
-        students = FriendService.search_students(query, user.student.id)
+        students = FriendService.search_students(query, user.student_id)
         return jsonify({'students': students}), 200
         
     except Exception as e:
@@ -190,13 +181,12 @@ def search_students():
 def get_friend_count():
     """Get friend count."""
     try:
-        username = get_jwt_identity()
-        user = User.query.filter_by(username=username).first()
+        user = current_identity()
         
-        if not user or not user.student:
+        if not user or not user.student_id:
             return jsonify({'error': 'Student not found'}), 404
         
-        count = FriendService.get_friend_count(user.student.id)
+        count = FriendService.get_friend_count(user.student_id)
         return jsonify({'count': count}), 200
         
     except Exception as e:
@@ -2,9 +2,11 @@
 Gamification API routes for XP, levels, and rewards.
 """
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask_jwt_extended import jwt_required
+from src.middleware.identity import current_identity
 from src.services.gamification_service import GamificationService
-from src.models.user import User
+from src.services.domain_event_service import DomainEventService
+from src.api_optimizations import cache_response, conditional_response
 
 gamification_bp = Blueprint('gamification', __name__, url_prefix='/api/gamification')
 
@@ -14,13 +16,12 @@ gamification_bp = Blueprint('gamification', __name__, url_prefix='/api/gamificat
 def get_progress():
     """Get student's gamification progress."""
     try:
-        current_user_id = get_jwt_identity()
-        user = User.query.get(current_user_id)
+        user = current_identity()
         
-        if not user or not user.student:
+        if not user or not user.student_id:
             return jsonify({'error': 'Student profile not found'}), 404
         
-        progress = GamificationService.get_student_progress(user.student.id)
+        progress = GamificationService.get_student_progress(user.student_id)
         return jsonify(progress), 200
     
     except Exception as e:
@@ -32,10 +33,9 @@ def get_progress():
 def award_xp():
     """Award XP to current student."""
     try:
-        current_user_id = get_jwt_identity()
-        user = User.query.get(current_user_id)
+        user = current_identity()
         
-        if not user or not user.student:
+        if not user or not user.student_id:
             return jsonify({'error': 'Student profile not found'}), 404
         
         data = request.get_json()
@@ -47,8 +47,13 @@ def award_xp():
         if not action_type:
             return jsonify({'error': 'action_type is required'}), 400
         
+        # Assessment answers earn their XP when the answer is submitted
+        if action_type == 'question_complete' and DomainEventService.answer_credited(
+                user.student_id, (metadata or {}).get('question_id')):
+            return jsonify({'error': 'XP for this answer is awarded by the assessment submission'}), 409
+        
         result = GamificationService.award_xp(
-            student_id=user.student.id,
+            student_id=user.student_id,
             action_type=action_type,
             base_xp=base_xp,
             difficulty=difficulty,
@@ -66,14 +71,13 @@ def award_xp():
 def get_xp_history():
     """Get student's XP transaction history."""
     try:
-        current_user_id = get_jwt_identity()
-        user = User.query.get(current_user_id)
+        user = current_identity()
         
-        if not user or not user.student:
+        if not user or not user.student_id:
             return jsonify({'error': 'Student profile not found'}), 404
         
         limit = request.args.get('limit', 20, type=int)
-        transactions = GamificationService.get_xp_history(user.student.id, limit)
+        transactions = GamificationService.get_xp_history(user.student_id, limit)
         
         return jsonify({
             'transactions': transactions,
@@ -89,13 +93,12 @@ def get_xp_history():
 def get_rewards():
     """Get student's unlocked and upcoming rewards."""
     try:
-        current_user_id = get_jwt_identity()
-        user = User.query.get(current_user_id)
+        user = current_identity()
         
-        if not user or not user.student:
+        if not user or not user.student_id:
             return jsonify({'error': 'Student profile not found'}), 404
         
-        rewards = GamificationService.get_student_rewards(user.student.id)
+        rewards = GamificationService.get_student_rewards(user.student_id)
         return jsonify(rewards), 200
     
     except Exception as e:
@@ -104,13 +107,14 @@ def get_rewards():
 
 @gamification_bp.route('/leaderboard', methods=['GET'])
 @jwt_required()
+@conditional_response(tags=['leaderboard:global_xp'])
+@cache_response(3600, 'gamification_leaderboard', tags=['leaderboard:global_xp'])
 def get_leaderboard():
     """Get leaderboard rankings."""
     try:
-        current_user_id = get_jwt_identity()
-        user = User.query.get(current_user_id)
+        user = current_identity()
         
-        if not user or not user.student:
+        if not user or not user.student_id:
             return jsonify({'error': 'Student profile not found'}), 404
         
         timeframe = request.args.get('timeframe', 'all')
@@ -121,7 +125,7 @@ def get_leaderboard():
         # Find current user's rank
         current_user_rank = None
         for entry in leaderboard:
-            if entry['student_id'] == user.student.id:
+            if entry['student_id'] == user.student_id:
                 current_user_rank = entry['rank']
                 entry['is_current_user'] = True
             else:
@@ -2,10 +2,9 @@
 Hint API routes for managing and requesting hints.
 """
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask_jwt_extended import jwt_required
+from src.middleware.identity import current_identity
 from src.database import db
-from src.models.student import Student
-from src.models.user import User
 from src.services.hint_service import HintService
 from src.models.assessment import Question
 
@@ -15,8 +14,6 @@ hint_bp = Blueprint('hint', __name__, url_prefix='/api/hints')
 @hint_bp.route('/question/<int:question_id>', methods=['GET'])
 @jwt_required()
 def get_question_hints(question_id):
-    user_id = get_jwt_identity()
-    current_user = User.query.get(user_id)
     """Get all hints for a question."""
     try:
         hints = HintService.get_hints_for_question(question_id)
@@ -33,8 +30,7 @@ def get_question_hints(question_id):
 @hint_bp.route('/request', methods=['POST'])
 @jwt_required()
 def request_hint():
-    user_id = get_jwt_identity()
-    current_user = User.query.get(user_id)
+    current_user = current_identity()
     """Request the next hint for a question."""
     try:
         data = request.get_json()
@@ -53,10 +49,10 @@ def request_hint():
             return jsonify({'error': 'No more hints available'}), 404
         
         # Record hint usage
-        student = current_user.student
-        if student:
+        student_id = current_user.student_id
+        if student_id:
             usage = HintService.record_hint_usage(
-                student_id=student.id,
+                student_id=student_id,
                 question_id=question_id,
                 hint_id=hint_data['hint']['id'],
                 hint_level=hint_data['hint']['hint_level'],
@@ -74,8 +70,6 @@ def request_hint():
 @hint_bp.route('/usage/<int:usage_id>/feedback', methods=['PUT'])
 @jwt_required()
 def update_hint_feedback(usage_id):
-    user_id = get_jwt_identity()
-    current_user = User.query.get(user_id)
     """Update hint usage with feedback."""
     try:
         data = request.get_json()
@@ -105,15 +99,14 @@ def update_hint_feedback(usage_id):
 @hint_bp.route('/stats', methods=['GET'])
 @jwt_required()
 def get_student_stats():
-    user_id = get_jwt_identity()
-    current_user = User.query.get(user_id)
+    current_user = current_identity()
     """Get hint usage statistics for the current student."""
     try:
-        student = current_user.student
-        if not student:
+        student_id = current_user.student_id
+        if not student_id:
             return jsonify({'error': 'No student profile found'}), 404
         
-        stats = HintService.get_student_hint_stats(student.id)
+        stats = HintService.get_student_hint_stats(student_id)
         
         return jsonify(stats), 200
         
@@ -124,8 +117,6 @@ def get_student_stats():
 @hint_bp.route('/question/<int:question_id>/stats', methods=['GET'])
 @jwt_required()
 def get_question_stats(question_id):
-    user_id = get_jwt_identity()
-    current_user = User.query.get(user_id)
     """Get hint usage statistics for a question."""
     try:
         stats = HintService.get_question_hint_stats(question_id)
@@ -139,8 +130,6 @@ def get_question_stats(question_id):
 @hint_bp.route('/generate/<int:question_id>', methods=['POST'])
 @jwt_required()
 def generate_hints(question_id):
-    user_id = get_jwt_identity()
-    current_user = User.query.get(user_id)
     """
     Generate hints for a question automatically.
     This is typically used by teachers/admins.
@@ -168,8 +157,6 @@ def generate_hints(question_id):
 @hint_bp.route('/create', methods=['POST'])
 @jwt_required()
 def create_custom_hint():
-    user_id = get_jwt_identity()
-    current_user = User.query.get(user_id)
     """
     Create a custom hint for a question.
     This is typically used by teachers/admins.
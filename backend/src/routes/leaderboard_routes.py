@@ -2,15 +2,18 @@
 Leaderboard API routes.
 """
 from flask import Blueprint, jsonify, request
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask_jwt_extended import jwt_required
+from src.middleware.identity import current_identity
 from src.services.leaderboard_service import LeaderboardService
-from src.models.user import User
+from src.api_optimizations import cache_response, conditional_response
 
 leaderboard_bp = Blueprint('leaderboard', __name__, url_prefix='/api/leaderboards')
 
 
 @leaderboard_bp.route('/global', methods=['GET'])
 @jwt_required()
+@conditional_response(tags=['leaderboard:global_xp'], per_user=False)
+@cache_response(3600, 'leaderboard', per_user=False, tags=['leaderboard:global_xp'])
 def get_global_leaderboard():
     """Get global XP leaderboard."""
     limit = request.args.get('limit', 50, type=int)
@@ -29,6 +32,8 @@ def get_global_leaderboard():
 
 @leaderboard_bp.route('/grade/<int:grade>', methods=['GET'])
 @jwt_required()
+@conditional_response(tags=['leaderboard:grade_xp:{grade}'], per_user=False)
+@cache_response(3600, 'leaderboard', per_user=False, tags=['leaderboard:grade_xp:{grade}'])
 def get_grade_leaderboard(grade):
     """Get grade-level leaderboard."""
     limit = request.args.get('limit', 50, type=int)
@@ -48,6 +53,8 @@ def get_grade_leaderboard(grade):
 
 @leaderboard_bp.route('/skills', methods=['GET'])
 @jwt_required()
+@conditional_response(tags=['leaderboard:skills'], per_user=False)
+@cache_response(3600, 'leaderboard', per_user=False, tags=['leaderboard:skills'])
 def get_skills_leaderboard():
     """Get skills mastered leaderboard."""
     limit = request.args.get('limit', 50, type=int)
@@ -66,6 +73,8 @@ def get_skills_leaderboard():
 
 @leaderboard_bp.route('/achievements', methods=['GET'])
 @jwt_required()
+@conditional_response(tags=['leaderboard:achievements'], per_user=False)
+@cache_response(3600, 'leaderboard', per_user=False, tags=['leaderboard:achievements'])
 def get_achievements_leaderboard():
     """Get achievements unlocked leaderboard."""
     limit = request.args.get('limit', 50, type=int)
@@ -86,13 +95,12 @@ def get_achievements_leaderboard():
 @jwt_required()
 def get_my_rank(leaderboard_type):
     """Get current user's rank in specified leaderboard."""
-    current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
+    user = current_identity()
     
-    if not user or not user.student:
+    if not user or not user.student_id:
         return jsonify({'success': False, 'message': 'Student not found'}), 404
     
-    rank_info = LeaderboardService.get_student_rank(user.student.id, leaderboard_type)
+    rank_info = LeaderboardService.get_student_rank(user.student_id, leaderboard_type)
     
     if not rank_info:
         return jsonify({'success': False, 'message': 'Rank not found'}), 404
@@ -108,15 +116,14 @@ def get_my_rank(leaderboard_type):
 @jwt_required()
 def get_nearby_students(leaderboard_type):
     """Get students near current user's rank."""
-    current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
+    user = current_identity()
     
-    if not user or not user.student:
+    if not user or not user.student_id:
         return jsonify({'success': False, 'message': 'Student not found'}), 404
     
     range_size = request.args.get('range', 5, type=int)
     nearby = LeaderboardService.get_nearby_students(
-        user.student.id,
+        user.student_id,
         leaderboard_type,
         range_size
     )
@@ -133,13 +140,12 @@ def get_nearby_students(leaderboard_type):
 @jwt_required()
 def get_leaderboard_summary():
     """Get summary of user's ranks across all leaderboards."""
-    current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
+    user = current_identity()
     
-    if not user or not user.student:
+    if not user or not user.student_id:
         return jsonify({'success': False, 'message': 'Student not found'}), 404
     
-    summary = LeaderboardService.get_leaderboard_summary(user.student.id)
+    summary = LeaderboardService.get_leaderboard_summary(user.student_id)
     
     return jsonify({
         'success': True,
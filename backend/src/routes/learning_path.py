@@ -2,9 +2,9 @@
 Learning Path API routes for generating and managing personalized learning paths.
 """
 from flask import Blueprint, jsonify, request
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask_jwt_extended import jwt_required
+from src.middleware.identity import current_identity
 from src.database import db
-from src.models.student import Student
 from src.models.learning_path import LearningPath
 from src.services.learning_path_service import LearningPathService
 
@@ -32,10 +32,9 @@ def generate_learning_path(assessment_id):
         }
     """
     try:
-        user_id = int(get_jwt_identity())
-        student = Student.query.filter_by(user_id=user_id).first()
+        user = current_identity()
         
-        if not student:
+        if not user or not user.student_id:
             return jsonify({'error': 'Student profile not found'}), 404
         
         # Generate learning path
@@ -65,13 +64,12 @@ def get_current_learning_path():
         }
     """
     try:
-        user_id = int(get_jwt_identity())
-        student = Student.query.filter_by(user_id=user_id).first()
+        user = current_identity()
         
-        if not student:
+        if not user or not user.student_id:
             return jsonify({'error': 'Student profile not found'}), 404
         
-        learning_path = LearningPathService.get_student_learning_path(student.id)
+        learning_path = LearningPathService.get_student_learning_path(user.student_id)
         
         return jsonify(learning_path), 200
         
@@ -96,13 +94,12 @@ def get_next_skill():
         }
     """
     try:
-        user_id = int(get_jwt_identity())
-        student = Student.query.filter_by(user_id=user_id).first()
+        user = current_identity()
         
-        if not student:
+        if not user or not user.student_id:
             return jsonify({'error': 'Student profile not found'}), 404
         
-        next_skill = LearningPathService.get_next_skill(student.id)
+        next_skill = LearningPathService.get_next_skill(user.student_id)
         
         if next_skill:
             return jsonify(next_skill), 200
@@ -120,7 +117,6 @@ def get_next_skill():
 def update_progress():
     """Update progress for a skill in the learning path"""
     try:
-        current_user_id = int(get_jwt_identity())
         data = request.get_json()
         
         skill_id = data.get('skill_id')
@@ -131,20 +127,20 @@ def update_progress():
             return jsonify({'error': 'Missing required fields'}), 400
         
         # Get student
-        student = Student.query.filter_by(user_id=current_user_id).first()
-        if not student:
+        user = current_identity()
+        if not user or not user.student_id:
             return jsonify({'error': 'Student profile not found'}), 404
         
         # Get or create learning path item
         learning_path_item = LearningPath.query.filter_by(
-            student_id=student.id,
+            student_id=user.student_id,
             skill_id=skill_id
         ).first()
         
         if not learning_path_item:
             # Create new learning path item
             learning_path_item = LearningPath(
-                student_id=student.id,
+                student_id=user.student_id,
                 skill_id=skill_id,
                 status='in_progress'
             )
@@ -5,6 +5,7 @@ API endpoints for student monitoring and real-time tracking
 from flask import Blueprint, request, jsonify
 from src.middleware.auth import token_required
 from src.services.monitoring_service import MonitoringService
+from src.services.domain_event_service import DomainEventService
 
 monitoring_bp = Blueprint('monitoring', __name__, url_prefix='/api/monitoring')
 
@@ -83,9 +84,9 @@ def get_student_monitoring(current_user, student_id):
     """Get student monitoring details"""
     # Teachers can view any student, students can only view themselves
     if current_user.role == 'student':
-        if not hasattr(current_user, 'student') or not current_user.student:
+        if not current_user.student_id:
             return jsonify({'error': 'Student not found'}), 404
-        if current_user.student[0].id != student_id:
+        if current_user.student_id != student_id:
             return jsonify({'error': 'Unauthorized'}), 403
     
     status_data = MonitoringService.get_student_status(student_id)
@@ -117,10 +118,10 @@ def start_session(current_user):
         return jsonify({'error': 'Teachers cannot start practice sessions'}), 403
     
     # Find student ID
-    if not hasattr(current_user, 'student') or not current_user.student:
+    if not current_user.student_id:
         return jsonify({'error': 'Student not found'}), 404
     
-    student_id = current_user.student[0].id
+    student_id = current_user.student_id
     data = request.get_json() or {}
     skill_id = data.get('skill_id')
     
@@ -136,10 +137,10 @@ def track_activity(current_user):
         return jsonify({'error': 'Teachers cannot track activity'}), 403
     
     # Find student ID
-    if not hasattr(current_user, 'student') or not current_user.student:
+    if not current_user.student_id:
         return jsonify({'error': 'Student not found'}), 404
     
-    student_id = current_user.student[0].id
+    student_id = current_user.student_id
     data = request.get_json()
     
     if not data or 'question_id' not in data or 'correct' not in data:
@@ -149,6 +150,10 @@ def track_activity(current_user):
     question_id = data['question_id']
     correct = data['correct']
     
+    # Assessment answers are tracked when the answer is submitted
+    if DomainEventService.answer_credited(student_id, question_id):
+        return jsonify({'error': 'This answer is tracked by the assessment submission'}), 409
+    
     result, status = MonitoringService.track_session_activity(student_id, skill_id, question_id, correct)
     return jsonify(result), status
 
@@ -35,3 +35,26 @@ def forecast_performance(student_id):
     result, status = PredictiveAnalyticsService.forecast_performance(student_id, days)
     return jsonify(result), status
 
+
+
+@predictive_bp.route('/forecast/batch', methods=['POST'])
+def forecast_batch():
+    """Forecast performance for many (student, skill) series"""
+    data = request.get_json() or {}
+    series = data.get('series', [])
+    if not isinstance(series, list) or not all(isinstance(s, dict) and 'student_id' in s for s in series):
+        return jsonify({'success': False, 'error': 'series must be a list of {student_id, skill_id}'}), 400
+    days = data.get('days', 7)
+    result, status = PredictiveAnalyticsService.forecast_batch(
+        [(s['student_id'], s.get('skill_id')) for s in series], days
+    )
+    return jsonify(result), status
+
+
+@predictive_bp.route('/forecast/class/<int:class_id>', methods=['GET'])
+def forecast_class(class_id):
+    """Forecast performance for every student in a class"""
+    days = request.args.get('days', default=7, type=int)
+    skill_id = request.args.get('skill_id', default=None, type=int)
+    result, status = PredictiveAnalyticsService.forecast_class(class_id, days, skill_id)
+    return jsonify(result), status
@@ -2,10 +2,9 @@
 Resource API routes for managing and downloading educational resources.
 """
 from flask import Blueprint, request, jsonify, send_from_directory
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask_jwt_extended import jwt_required
+from src.middleware.identity import current_identity
 from src.database import db
-from src.models.student import Student
-from src.models.user import User
 from src.services.resource_service import ResourceService
 import os
 
@@ -69,15 +68,14 @@ def get_resource(resource_id):
 @jwt_required()
 def download_resource(resource_id):
     """Record a resource download."""
-    user_id = get_jwt_identity()
-    current_user = User.query.get(user_id)
+    current_user = current_identity()
     
     try:
         data = request.get_json() or {}
         download_method = data.get('download_method', 'direct')
         
-        student = current_user.student
-        if not student:
+        student_id = current_user.student_id
+        if not student_id:
             return jsonify({'error': 'Student profile not found'}), 404
         
         # Get resource
@@ -87,7 +85,7 @@ def download_resource(resource_id):
         
         # Record download
         download = ResourceService.record_download(
-            student_id=student.id,
+            student_id=student_id,
             resource_id=resource_id,
             download_method=download_method
         )
@@ -106,17 +104,16 @@ def download_resource(resource_id):
 @jwt_required()
 def get_student_downloads():
     """Get download history for the current student."""
-    user_id = get_jwt_identity()
-    current_user = User.query.get(user_id)
+    current_user = current_identity()
     
     try:
-        student = current_user.student
-        if not student:
+        student_id = current_user.student_id
+        if not student_id:
             return jsonify({'error': 'Student profile not found'}), 404
         
         limit = request.args.get('limit', type=int)
         
-        downloads = ResourceService.get_student_downloads(student.id, limit)
+        downloads = ResourceService.get_student_downloads(student_id, limit)
         
         return jsonify({
             'downloads': downloads,
@@ -177,8 +174,6 @@ def get_recent_resources():
 @jwt_required()
 def create_resource():
     """Create a new resource (admin/teacher only)."""
-    user_id = get_jwt_identity()
-    current_user = User.query.get(user_id)
     
     try:
         data = request.get_json()
@@ -2,9 +2,9 @@
 Review API routes for spaced repetition review system.
 """
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask_jwt_extended import jwt_required
+from src.middleware.identity import current_identity
 from src.database import db
-from src.models.student import Student
 from src.models.learning_path import LearningPath
 from src.models.assessment import Question
 from src.services.review_service import ReviewService
@@ -18,15 +18,13 @@ bp = Blueprint('review', __name__, url_prefix='/api/reviews')
 def get_reviews_due():
     """Get all skills due for review."""
     try:
-        user_id = get_jwt_identity()
-        
         # Get student
-        student = Student.query.filter_by(user_id=user_id).first()
-        if not student:
+        user = current_identity()
+        if not user or not user.student_id:
             return jsonify({'error': 'Student profile not found'}), 404
         
         # Get reviews due
-        reviews_due = ReviewService.get_reviews_due(student.id)
+        reviews_due = ReviewService.get_reviews_due(user.student_id)
         
         # Format response
         reviews_data = []
@@ -59,16 +57,14 @@ def get_reviews_due():
 def get_upcoming_reviews():
     """Get upcoming reviews in the next 7 days."""
     try:
-        user_id = get_jwt_identity()
-        
         # Get student
-        student = Student.query.filter_by(user_id=user_id).first()
-        if not student:
+        user = current_identity()
+        if not user or not user.student_id:
             return jsonify({'error': 'Student profile not found'}), 404
         
         # Get upcoming reviews
         days_ahead = request.args.get('days', 7, type=int)
-        upcoming = ReviewService.get_upcoming_reviews(student.id, days_ahead)
+        upcoming = ReviewService.get_upcoming_reviews(user.student_id, days_ahead)
         
         # Format response
         upcoming_data = []
@@ -99,7 +95,6 @@ def get_upcoming_reviews():
 def start_review():
     """Start a review session."""
     try:
-        user_id = get_jwt_identity()
         data = request.get_json()
         
         learning_path_id = data.get('learning_path_id')
@@ -107,12 +102,12 @@ def start_review():
             return jsonify({'error': 'learning_path_id is required'}), 400
         
         # Get student
-        student = Student.query.filter_by(user_id=user_id).first()
-        if not student:
+        user = current_identity()
+        if not user or not user.student_id:
             return jsonify({'error': 'Student profile not found'}), 404
         
         # Start review session
-        review_session = ReviewService.start_review_session(learning_path_id, student.id)
+        review_session = ReviewService.start_review_session(learning_path_id, user.student_id)
         
         if not review_session:
             return jsonify({'error': 'Could not start review session'}), 400
@@ -162,7 +157,6 @@ def start_review():
 def complete_review(review_session_id):
     """Complete a review session."""
     try:
-        user_id = get_jwt_identity()
         data = request.get_json()
         
         answers = data.get('answers', [])
@@ -170,8 +164,8 @@ def complete_review(review_session_id):
             return jsonify({'error': 'answers are required'}), 400
         
         # Get student
-        student = Student.query.filter_by(user_id=user_id).first()
-        if not student:
+        user = current_identity()
+        if not user or not user.student_id:
             return jsonify({'error': 'Student profile not found'}), 404
         
         # Calculate score
@@ -203,16 +197,14 @@ def complete_review(review_session_id):
 def get_review_history():
     """Get review history for the student."""
     try:
-        user_id = get_jwt_identity()
-        
         # Get student
-        student = Student.query.filter_by(user_id=user_id).first()
-        if not student:
+        user = current_identity()
+        if not user or not user.student_id:
             return jsonify({'error': 'Student profile not found'}), 404
         
         # Get review history
         limit = request.args.get('limit', 10, type=int)
-        history = ReviewService.get_review_history(student.id, limit)
+        history = ReviewService.get_review_history(user.student_id, limit)
         
         # Format response
         history_data = [session.to_dict() for session in history]
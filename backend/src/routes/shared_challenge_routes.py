@@ -112,8 +112,12 @@ def update_progress(current_user, current_student, challenge_id):
 @shared_challenge_bp.route('/api/shared-challenges/<int:challenge_id>/leaderboard', methods=['GET'])
 @token_required
 def get_leaderboard(current_user, current_student, challenge_id):
-    """Get challenge leaderboard"""
-    result, status = SharedChallengeService.get_challenge_leaderboard(challenge_id)
+    """Get challenge leaderboard, or only its version if unchanged since ?since="""
+    result, status = SharedChallengeService.get_challenge_leaderboard(
+        challenge_id,
+        since_version=request.args.get('since', type=int),
+        limit=request.args.get('limit', type=int)
+    )
     return jsonify(result), status
 
 
@@ -2,10 +2,9 @@
 Solution API routes for managing and viewing worked solutions.
 """
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask_jwt_extended import jwt_required
+from src.middleware.identity import current_identity
 from src.database import db
-from src.models.student import Student
-from src.models.user import User
 from src.models.assessment import Question
 from src.services.solution_service import SolutionService
 
@@ -16,17 +15,16 @@ solution_bp = Blueprint('solution', __name__, url_prefix='/api/solutions')
 @jwt_required()
 def get_question_solution(question_id):
     """Get the worked solution for a question."""
-    user_id = get_jwt_identity()
-    current_user = User.query.get(user_id)
+    current_user = current_identity()
     
     try:
-        student = current_user.student
-        if not student:
+        student_id = current_user.student_id
+        if not student_id:
             return jsonify({'error': 'Student profile not found'}), 404
         
         # Check eligibility
         eligible, attempts_made, attempts_required = SolutionService.is_eligible_for_solution(
-            student.id, 
+            student_id, 
             question_id
         )
         
@@ -51,8 +49,7 @@ def get_question_solution(question_id):
 @jwt_required()
 def record_view():
     """Record that a student viewed a solution."""
-    user_id = get_jwt_identity()
-    current_user = User.query.get(user_id)
+    current_user = current_identity()
     
     try:
         data = request.get_json()
@@ -64,13 +61,13 @@ def record_view():
         if not question_id or not solution_id:
             return jsonify({'error': 'question_id and solution_id are required'}), 400
         
-        student = current_user.student
-        if not student:
+        student_id = current_user.student_id
+        if not student_id:
             return jsonify({'error': 'Student profile not found'}), 404
         
         # Record view
         view = SolutionService.record_solution_view(
-            student_id=student.id,
+            student_id=student_id,
             question_id=question_id,
             solution_id=solution_id,
             time_spent=time_spent,
@@ -90,8 +87,6 @@ def record_view():
 @jwt_required()
 def update_feedback(view_id):
     """Update feedback for a solution view."""
-    user_id = get_jwt_identity()
-    current_user = User.query.get(user_id)
     
     try:
         data = request.get_json()
@@ -121,8 +116,6 @@ def update_feedback(view_id):
 @jwt_required()
 def generate_solution(question_id):
     """Generate a worked solution for a question."""
-    user_id = get_jwt_identity()
-    current_user = User.query.get(user_id)
     
     try:
         question = Question.query.get(question_id)
@@ -148,15 +141,14 @@ def generate_solution(question_id):
 @jwt_required()
 def get_student_stats():
     """Get solution viewing statistics for the current student."""
-    user_id = get_jwt_identity()
-    current_user = User.query.get(user_id)
+    current_user = current_identity()
     
     try:
-        student = current_user.student
-        if not student:
+        student_id = current_user.student_id
+        if not student_id:
             return jsonify({'error': 'Student profile not found'}), 404
         
-        stats = SolutionService.get_student_solution_stats(student.id)
+        stats = SolutionService.get_student_solution_stats(student_id)
         
         return jsonify(stats), 200
         
@@ -168,8 +160,6 @@ def get_student_stats():
 @jwt_required()
 def get_question_stats(question_id):
     """Get solution viewing statistics for a question."""
-    user_id = get_jwt_identity()
-    current_user = User.query.get(user_id)
     
     try:
         stats = SolutionService.get_question_solution_stats(question_id)
@@ -5,13 +5,21 @@ API endpoints for teacher dashboard and management
 
 from flask import Blueprint, request, jsonify
 from src.middleware.auth import token_required
+from src.api_optimizations import cache_response, conditional_response
 from src.services.teacher_service import TeacherService
+from src.services.watermark_service import WatermarkService
 
 teacher_bp = Blueprint('teacher', __name__, url_prefix='/api/teacher')
 
 
 @teacher_bp.route('/dashboard', methods=['GET'])
 @token_required
+@conditional_response(
+    tags=['teacher:{current_user.id}'],
+    watermark=lambda current_user: WatermarkService.teacher_activity(current_user.id),
+    refresh_seconds=900
+)
+@cache_response(900, 'teacher_dashboard', tags=['teacher:{current_user.id}'])
 def get_dashboard(current_user):
     """Get teacher dashboard data"""
     # Verify user is a teacher
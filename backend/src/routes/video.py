@@ -2,9 +2,9 @@
 Video API routes for managing video tutorials and tracking viewing.
 """
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask_jwt_extended import jwt_required
+from src.middleware.identity import current_identity
 from src.database import db
-from src.models.student import Student
 from src.models.video import VideoTutorial
 from src.services.video_service import VideoService
 
@@ -16,15 +16,13 @@ bp = Blueprint('video', __name__, url_prefix='/api/videos')
 def get_skill_videos(skill_id):
     """Get all videos for a specific skill."""
     try:
-        user_id = get_jwt_identity()
-        
         # Get student
-        student = Student.query.filter_by(user_id=user_id).first()
-        if not student:
+        user = current_identity()
+        if not user or not user.student_id:
             return jsonify({'error': 'Student profile not found'}), 404
         
         # Get videos for skill
-        videos = VideoService.get_videos_for_skill(skill_id, student_id=student.id)
+        videos = VideoService.get_videos_for_skill(skill_id, student_id=user.student_id)
         
         return jsonify({
             'videos': videos,
@@ -40,15 +38,13 @@ def get_skill_videos(skill_id):
 def get_video(video_id):
     """Get details for a specific video."""
     try:
-        user_id = get_jwt_identity()
-        
         # Get student
-        student = Student.query.filter_by(user_id=user_id).first()
-        if not student:
+        user = current_identity()
+        if not user or not user.student_id:
             return jsonify({'error': 'Student profile not found'}), 404
         
         # Get video
-        video = VideoService.get_video_by_id(video_id, student_id=student.id)
+        video = VideoService.get_video_by_id(video_id, student_id=user.student_id)
         
         if not video:
             return jsonify({'error': 'Video not found'}), 404
@@ -64,11 +60,9 @@ def get_video(video_id):
 def start_video(video_id):
     """Record that a student started watching a video."""
     try:
-        user_id = get_jwt_identity()
-        
         # Get student
-        student = Student.query.filter_by(user_id=user_id).first()
-        if not student:
+        user = current_identity()
+        if not user or not user.student_id:
             return jsonify({'error': 'Student profile not found'}), 404
         
         # Check if video exists
@@ -77,7 +71,7 @@ def start_video(video_id):
             return jsonify({'error': 'Video not found'}), 404
         
         # Start video view
-        view = VideoService.start_video_view(video_id, student.id)
+        view = VideoService.start_video_view(video_id, user.student_id)
         
         return jsonify({
             'message': 'Video view started',
@@ -93,12 +87,11 @@ def start_video(video_id):
 def update_progress(video_id):
     """Update viewing progress for a video."""
     try:
-        user_id = get_jwt_identity()
         data = request.get_json()
         
         # Get student
-        student = Student.query.filter_by(user_id=user_id).first()
-        if not student:
+        user = current_identity()
+        if not user or not user.student_id:
             return jsonify({'error': 'Student profile not found'}), 404
         
         # Validate input
@@ -114,7 +107,7 @@ def update_progress(video_id):
         # Update progress
         view = VideoService.update_video_progress(
             video_id,
-            student.id,
+            user.student_id,
             int(watch_time),
             float(percentage)
         )
@@ -133,11 +126,9 @@ def update_progress(video_id):
 def complete_video(video_id):
     """Mark a video as completed."""
     try:
-        user_id = get_jwt_identity()
-        
         # Get student
-        student = Student.query.filter_by(user_id=user_id).first()
-        if not student:
+        user = current_identity()
+        if not user or not user.student_id:
             return jsonify({'error': 'Student profile not found'}), 404
         
         # Check if video exists
@@ -146,7 +137,7 @@ def complete_video(video_id):
             return jsonify({'error': 'Video not found'}), 404
         
         # Complete video
-        view = VideoService.complete_video(video_id, student.id)
+        view = VideoService.complete_video(video_id, user.student_id)
         
         return jsonify({
             'message': 'Video completed',
@@ -162,15 +153,13 @@ def complete_video(video_id):
 def get_video_stats():
     """Get video viewing statistics for the student."""
     try:
-        user_id = get_jwt_identity()
-        
         # Get student
-        student = Student.query.filter_by(user_id=user_id).first()
-        if not student:
+        user = current_identity()
+        if not user or not user.student_id:
             return jsonify({'error': 'Student profile not found'}), 404
         
         # Get stats
-        stats = VideoService.get_student_video_stats(student.id)
+        stats = VideoService.get_student_video_stats(user.student_id)
         
         return jsonify(stats), 200
         
@@ -183,16 +172,14 @@ def get_video_stats():
 def get_recent_videos():
     """Get recently watched videos."""
     try:
-        user_id = get_jwt_identity()
-        
         # Get student
-        student = Student.query.filter_by(user_id=user_id).first()
-        if not student:
+        user = current_identity()
+        if not user or not user.student_id:
             return jsonify({'error': 'Student profile not found'}), 404
         
         # Get recent videos
         limit = request.args.get('limit', 5, type=int)
-        videos = VideoService.get_recent_videos(student.id, limit)
+        videos = VideoService.get_recent_videos(user.student_id, limit)
         
         return jsonify({
             'recent_videos': videos,
@@ -208,16 +195,14 @@ def get_recent_videos():
 def get_recommended_videos():
     """Get recommended videos based on learning path."""
     try:
-        user_id = get_jwt_identity()
-        
         # Get student
-        student = Student.query.filter_by(user_id=user_id).first()
-        if not student:
+        user = current_identity()
+        if not user or not user.student_id:
             return jsonify({'error': 'Student profile not found'}), 404
         
         # Get recommended videos
         limit = request.args.get('limit', 5, type=int)
-        videos = VideoService.get_recommended_videos(student.id, limit)
+        videos = VideoService.get_recommended_videos(user.student_id, limit)
         
         return jsonify({
             'recommended_videos': videos,
@@ -0,0 +1,300 @@
+"""
+Achievement rule engine for applying tracked actions in a single transaction.
+
+Action rules are compiled once per process into a map from action type
+to the achievement counters it advances. Applying an action then costs
+one upsert of all affected StudentAchievement rows, one batched insert of
+progress logs, one UPDATE for any thresholds crossed and a single commit,
+instead of a lookup, get-or-create and commit per achievement.
+"""
+import threading
+from datetime import datetime
+from sqlalchemy import insert, update
+from sqlalchemy.dialects import postgresql, sqlite
+from src.database import db
+from src.models.achievement import Achievement, StudentAchievement, AchievementProgressLog
+from src.services.gamification_service import GamificationService
+from src.services.leaderboard_table_service import LeaderboardTableService
+from src.services.achievement_snapshot_service import AchievementSnapshotService
+
+
+def _first_try(metadata):
+    return bool(metadata.get('first_try'))
+
+
+def _perfect(metadata):
+    return bool(metadata.get('perfect'))
+
+
+def _answered_within(seconds):
+    def condition(metadata):
+        return metadata.get('time_taken', 999) < seconds
+    return condition
+
+
+def _answered_in(metadata):
+    return f"Answered in {metadata.get('time_taken', 999)}s"
+
+
+# Action type -> list of (achievement name, condition, description).
+# A condition of None always applies; descriptions may be callables of metadata.
+ACTION_RULES = {
+    'question_complete': [
+        # Practice achievements
+        ('First Steps', None, 'Answered a question'),
+        ('Dedicated Learner', None, 'Answered a question'),
+        ('Practice Master', None, 'Answered a question'),
+        ('Question Champion', None, 'Answered a question'),
+        ('Practice Legend', None, 'Answered a question'),
+        # Accuracy achievements (if first try)
+        ('Sharp Shooter', _first_try, 'First-try correct'),
+        ('Precision Expert', _first_try, 'First-try correct'),
+        ('Perfect Aim', _first_try, 'First-try correct'),
+        ('Flawless Performer', _first_try, 'First-try correct'),
+        # Speed achievements (if fast)
+        ('Speed Demon', _answered_within(30), _answered_in),
+        ('Lightning Fast', _answered_within(20), _answered_in),
+    ],
+    'skill_mastered': [
+        ('First Mastery', None, 'Mastered a skill'),
+        ('Skill Collector', None, 'Mastered a skill'),
+        ('Mastery Expert', None, 'Mastered a skill'),
+        ('Mastery Champion', None, 'Mastered a skill'),
+        ('Complete Mastery', None, 'Mastered a skill'),
+    ],
+    'review_complete': [
+        ('Reviewer', None, 'Completed a review'),
+        ('Review Regular', None, 'Completed a review'),
+        ('Review Expert', None, 'Completed a review'),
+        ('Perfect Reviewer', _perfect, 'Perfect review'),
+    ],
+    'video_watch': [('Video Watcher', None, 'Watched a video')],
+    'resource_download': [('Resource Explorer', None, 'Downloaded a resource')],
+    'example_try': [('Interactive Learner', None, 'Tried an example')],
+    'hint_use': [('Hint Seeker', None, 'Used a hint')],
+    'solution_view': [('Solution Student', None, 'Viewed a solution')],
+    'assessment_complete': [('Welcome Aboard', None, 'Completed assessment')],
+}
+
+
+class AchievementRuleEngine:
+    """Compiled achievement rules and the single-transaction apply path."""
+
+    _compiled = None
+    _lock = threading.Lock()
+
+    @staticmethod
+    def compile():
+        """
+        Resolve ACTION_RULES against the achievements table.
+
+        The result is cached for the life of the process. An empty
+        achievements table is not cached, so seeding from another worker
+        is picked up on the next call.
+
+        Returns:
+            dict mapping action type to a list of compiled rule dicts
+        """
+        compiled = AchievementRuleEngine._compiled
+        if compiled is not None:
+            return compiled
+
+        with AchievementRuleEngine._lock:
+            if AchievementRuleEngine._compiled is not None:
+                return AchievementRuleEngine._compiled
+
+            names = {name for rules in ACTION_RULES.values() for name, _, _ in rules}
+            achievements = {
+                a.name: a for a in Achievement.query.filter(Achievement.name.in_(names)).all()
+            }
+
+            compiled = {}
+            for action_type, rules in ACTION_RULES.items():
+                compiled[action_type] = [
+                    {
+                        'achievement_id': achievements[name].id,
+                        'name': name,
+                        'requirement_value': achievements[name].requirement_value,
+                        'xp_reward': achievements[name].xp_reward,
+                        'condition': condition,
+                        'description': description
+                    }
+                    for name, condition, description in rules
+                    if name in achievements
+                ]
+
+            if achievements:
+                AchievementRuleEngine._compiled = compiled
+            return compiled
+
+    @staticmethod
+    def reset():
+        """Drop the compiled rules so they are rebuilt on next use."""
+        with AchievementRuleEngine._lock:
+            AchievementRuleEngine._compiled = None
+
+    @staticmethod
+    def evaluate(action_type, metadata=None):
+        """
+        Get the counter deltas an action produces.
+
+        Returns:
+            list of (rule, delta, description) tuples
+        """
+        metadata = metadata or {}
+        deltas = []
+
+        for rule in AchievementRuleEngine.compile().get(action_type, []):
+            condition = rule['condition']
+            if condition is not None and not condition(metadata):
+                continue
+
+            description = rule['description']
+            if callable(description):
+                description = description(metadata)
+
+            deltas.append((rule, 1, description))
+
+        return deltas
+
+    @staticmethod
+    def apply(student_id, action_type, metadata=None, commit=True):
+        """
+        Apply an action's achievement progress in one transaction.
+
+        Args:
+            student_id: Student ID
+            action_type: Tracked action (e.g. 'question_complete')
+            metadata: Action context used by rule conditions
+            commit: Commit the transaction (False only flushes it so the
+                caller can batch it with other writes)
+
+        Returns:
+            dict with the number of rules matched, counters advanced and
+            achievements unlocked
+        """
+        deltas = AchievementRuleEngine.evaluate(action_type, metadata)
+        if not deltas:
+            return {'matched': 0, 'updated': 0, 'unlocked': []}
+
+        now = datetime.utcnow()
+        rules_by_id = {rule['achievement_id']: (rule, delta, description) for rule, delta, description in deltas}
+
+        # Upsert every affected counter; unlocked achievements are left untouched
+        rows = AchievementRuleEngine._upsert_progress(student_id, rules_by_id, now)
+        if rows:
+            AchievementSnapshotService.queue_invalidation(student_id)
+
+        logs = []
+        unlocked_ids = []
+        for student_achievement_id, achievement_id, progress in rows:
+            rule, delta, description = rules_by_id[achievement_id]
+            logs.append({
+                'student_id': student_id,
+                'achievement_id': achievement_id,
+                'student_achievement_id': student_achievement_id,
+                'progress_delta': delta,
+                'new_progress': progress,
+                'description': description,
+                'created_at': now
+            })
+            if progress >= rule['requirement_value']:
+                unlocked_ids.append(student_achievement_id)
+
+        if logs:
+            db.session.execute(insert(AchievementProgressLog), logs)
+
+        unlocked = []
+        if unlocked_ids:
+            db.session.execute(
+                update(StudentAchievement).where(
+                    StudentAchievement.id.in_(unlocked_ids),
+                    StudentAchievement.unlocked_at == None
+                ).values(unlocked_at=now, updated_at=now).execution_options(synchronize_session=False)
+            )
+
+            for student_achievement_id, achievement_id, _ in rows:
+                if student_achievement_id not in unlocked_ids:
+                    continue
+                rule = rules_by_id[achievement_id][0]
+                unlocked.append(rule['name'])
+                if rule['xp_reward'] > 0:
+                    GamificationService.award_xp(
+                        student_id=student_id,
+                        action_type='achievement_unlock',
+                        base_xp=rule['xp_reward'],
+                        metadata={'achievement_name': rule['name']},
+                        commit=False
+                    )
+
+            LeaderboardTableService.record_achievements_unlocked(student_id)
+
+        if commit:
+            db.session.commit()
+        else:
+            db.session.flush()
+
+        return {'matched': len(deltas), 'updated': len(rows), 'unlocked': unlocked}
+
+    @staticmethod
+    def _upsert_progress(student_id, rules_by_id, now):
+        """
+        Add deltas to the student's counters, creating missing rows.
+
+        Returns:
+            list of (student_achievement_id, achievement_id, new_progress)
+            for counters that were advanced
+        """
+        values = [
+            {
+                'student_id': student_id,
+                'achievement_id': achievement_id,
+                'progress': delta,
+                'is_displayed': False,
+                'created_at': now,
+                'updated_at': now
+            }
+            for achievement_id, (_, delta, _) in rules_by_id.items()
+        ]
+
+        dialect = db.session.get_bind().dialect.name
+        if dialect in ('postgresql', 'sqlite'):
+            dialect_insert = postgresql.insert if dialect == 'postgresql' else sqlite.insert
+            stmt = dialect_insert(StudentAchievement).values(values)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=['student_id', 'achievement_id'],
+                set_={
+                    'progress': StudentAchievement.progress + stmt.excluded.progress,
+                    'updated_at': now
+                },
+                where=StudentAchievement.unlocked_at == None
+            ).returning(
+                StudentAchievement.id,
+                StudentAchievement.achievement_id,
+                StudentAchievement.progress
+            )
+            return [tuple(row) for row in db.session.execute(stmt).all()]
+
+        # Generic path: one SELECT for existing rows, then batched ORM writes
+        existing = {
+            sa.achievement_id: sa for sa in StudentAchievement.query.filter(
+                StudentAchievement.student_id == student_id,
+                StudentAchievement.achievement_id.in_(list(rules_by_id))
+            ).all()
+        }
+
+        touched = []
+        for value in values:
+            sa = existing.get(value['achievement_id'])
+            if sa is None:
+                sa = StudentAchievement(**value)
+                db.session.add(sa)
+            elif sa.unlocked_at is None:
+                sa.progress += value['progress']
+                sa.updated_at = now
+            else:
+                continue
+            touched.append(sa)
+
+        db.session.flush()
+        return [(sa.id, sa.achievement_id, sa.progress) for sa in touched]
@@ -2,10 +2,11 @@
 Achievement service for tracking and unlocking achievements.
 """
 from datetime import datetime
-from sqlalchemy import and_
 from src.database import db
 from src.models.achievement import Achievement, StudentAchievement, AchievementProgressLog
 from src.services.gamification_service import GamificationService
+from src.services.achievement_rule_engine import AchievementRuleEngine
+from src.services.achievement_snapshot_service import AchievementSnapshotService
 
 
 class AchievementService:
@@ -83,6 +84,8 @@ class AchievementService:
                 db.session.add(achievement)
         
         db.session.commit()
+        AchievementRuleEngine.reset()
+        AchievementSnapshotService.reset()
         return len(AchievementService.ACHIEVEMENTS)
     
     @staticmethod
@@ -100,6 +103,7 @@ class AchievementService:
                 progress=0
             )
             db.session.add(student_achievement)
+            AchievementSnapshotService.queue_invalidation(student_id)
             db.session.commit()
         
         return student_achievement
@@ -128,6 +132,7 @@ class AchievementService:
             description=description
         )
         db.session.add(log)
+        AchievementSnapshotService.queue_invalidation(student_id)
         db.session.commit()
         
         # Check if should unlock
@@ -150,6 +155,7 @@ class AchievementService:
         # Unlock
         student_achievement.unlocked_at = datetime.utcnow()
         student_achievement.updated_at = datetime.utcnow()
+        AchievementSnapshotService.queue_invalidation(student_id)
         db.session.commit()
         
         # Award XP
@@ -167,42 +173,12 @@ class AchievementService:
     @staticmethod
     def get_student_achievements(student_id, category=None, unlocked_only=False):
         """Get student's achievements with progress."""
-        # Get all achievements
-        query = Achievement.query.filter_by(is_active=True)
-        if category:
-            query = query.filter_by(category=category)
-        
-        achievements = query.all()
-        
-        # Get student progress for each
-        result = []
-        for achievement in achievements:
-            student_achievement = StudentAchievement.query.filter_by(
-                student_id=student_id,
-                achievement_id=achievement.id
-            ).first()
-            
-            if student_achievement:
-                data = student_achievement.to_dict()
-            else:
-                # Create default data for not-started achievements
-                data = {
-                    'student_id': student_id,
-                    'achievement_id': achievement.id,
-                    'progress': 0,
-                    'unlocked_at': None,
-                    'is_displayed': False,
-                    'achievement': achievement.to_dict(),
-                    'progress_percentage': 0,
-                    'is_unlocked': False
-                }
-            
-            if unlocked_only and not data['is_unlocked']:
-                continue
-            
-            result.append(data)
-        
-        return result
+        return [
+            dict(data) for data in AchievementSnapshotService.get_snapshot(student_id)
+            if data['achievement']['is_active']
+            and (not category or data['achievement']['category'] == category)
+            and (not unlocked_only or data['is_unlocked'])
+        ]
     
     @staticmethod
     def get_unlocked_achievements(student_id):
@@ -211,37 +187,26 @@ class AchievementService:
     
     @staticmethod
     def get_in_progress_achievements(student_id, limit=5):
-        """Get achievements close to unlocking."""
-        student_achievements = StudentAchievement.query.filter(
-            and_(
-                StudentAchievement.student_id == student_id,
-                StudentAchievement.unlocked_at == None
-            )
-        ).all()
-        
-        # Calculate progress percentage and sort
-        progress_list = []
-        for sa in student_achievements:
-            if sa.achievement.requirement_value > 0:
-                percentage = (sa.progress / sa.achievement.requirement_value) * 100
-                if percentage > 0:  # Only include started achievements
-                    progress_list.append((sa, percentage))
+        """Get achievements close to unlocking, including retired ones the student started."""
+        # Only include started, still locked achievements
+        progress_list = [
+            data for data in AchievementSnapshotService.get_snapshot(student_id)
+            if not data['is_unlocked'] and data['progress_percentage'] > 0
+        ]
         
         # Sort by progress percentage descending
-        progress_list.sort(key=lambda x: x[1], reverse=True)
+        progress_list.sort(key=lambda data: data['progress_percentage'], reverse=True)
         
         # Return top N
-        return [sa.to_dict() for sa, _ in progress_list[:limit]]
+        return [dict(data) for data in progress_list[:limit]]
     
     @staticmethod
     def get_displayed_achievements(student_id):
-        """Get achievements displayed on profile."""
-        student_achievements = StudentAchievement.query.filter_by(
-            student_id=student_id,
-            is_displayed=True
-        ).all()
-        
-        return [sa.to_dict() for sa in student_achievements]
+        """Get achievements displayed on profile, including retired ones."""
+        return [
+            dict(data) for data in AchievementSnapshotService.get_snapshot(student_id)
+            if data['is_displayed']
+        ]
     
     @staticmethod
     def toggle_display(student_id, achievement_id):
@@ -256,111 +221,54 @@ class AchievementService:
         
         student_achievement.is_displayed = not student_achievement.is_displayed
         student_achievement.updated_at = datetime.utcnow()
+        AchievementSnapshotService.queue_invalidation(student_id)
         db.session.commit()
         
         return student_achievement
     
     @staticmethod
     def get_achievement_stats(student_id):
-        """Get achievement statistics."""
-        all_achievements = Achievement.query.filter_by(is_active=True).count()
-        unlocked = StudentAchievement.query.filter(
-            and_(
-                StudentAchievement.student_id == student_id,
-                StudentAchievement.unlocked_at != None
-            )
-        ).count()
-        
-        displayed = StudentAchievement.query.filter_by(
-            student_id=student_id,
-            is_displayed=True
-        ).count()
-        
-        # Get recent unlocks
-        recent = StudentAchievement.query.filter(
-            and_(
-                StudentAchievement.student_id == student_id,
-                StudentAchievement.unlocked_at != None
-            )
-        ).order_by(StudentAchievement.unlocked_at.desc()).limit(5).all()
+        """
+        Get achievement statistics.
+
+        The total counts active achievements; unlocked and displayed
+        counts include retired achievements the student earned.
+        """
+        snapshot = AchievementSnapshotService.get_snapshot(student_id)
+        all_achievements = sum(1 for data in snapshot if data['achievement']['is_active'])
+        
+        unlocked = []
+        displayed = 0
+        for data in snapshot:
+            if data['is_unlocked']:
+                unlocked.append(data)
+            if data['is_displayed']:
+                displayed += 1
+        
+        # Get recent unlocks (ISO timestamps sort chronologically)
+        recent = sorted(unlocked, key=lambda data: data['unlocked_at'], reverse=True)[:5]
         
         return {
             'total_achievements': all_achievements,
-            'unlocked_count': unlocked,
+            'unlocked_count': len(unlocked),
             'displayed_count': displayed,
-            'completion_percentage': (unlocked / all_achievements * 100) if all_achievements > 0 else 0,
-            'recent_unlocks': [sa.to_dict() for sa in recent]
+            'completion_percentage': (len(unlocked) / all_achievements * 100) if all_achievements > 0 else 0,
+            'recent_unlocks': [dict(data) for data in recent]
         }
     
     @staticmethod
-    def track_action(student_id, action_type, metadata=None):
-        """Track action and update relevant achievements."""
-        if metadata is None:
-            metadata = {}
-        
-        # Map actions to achievements
-        updates = []
-        
-        if action_type == 'question_complete':
-            # Practice achievements
-            updates.append(('First Steps', 1, 'Answered a question'))
-            updates.append(('Dedicated Learner', 1, 'Answered a question'))
-            updates.append(('Practice Master', 1, 'Answered a question'))
-            updates.append(('Question Champion', 1, 'Answered a question'))
-            updates.append(('Practice Legend', 1, 'Answered a question'))
-            
-            # Accuracy achievements (if first try)
-            if metadata.get('first_try'):
-                updates.append(('Sharp Shooter', 1, 'First-try correct'))
-                updates.append(('Precision Expert', 1, 'First-try correct'))
-                updates.append(('Perfect Aim', 1, 'First-try correct'))
-                updates.append(('Flawless Performer', 1, 'First-try correct'))
-            
-            # Speed achievements (if fast)
-            time_taken = metadata.get('time_taken', 999)
-            if time_taken < 30:
-                updates.append(('Speed Demon', 1, f'Answered in {time_taken}s'))
-            if time_taken < 20:
-                updates.append(('Lightning Fast', 1, f'Answered in {time_taken}s'))
-        
-        elif action_type == 'skill_mastered':
-            updates.append(('First Mastery', 1, 'Mastered a skill'))
-            updates.append(('Skill Collector', 1, 'Mastered a skill'))
-            updates.append(('Mastery Expert', 1, 'Mastered a skill'))
-            updates.append(('Mastery Champion', 1, 'Mastered a skill'))
-            updates.append(('Complete Mastery', 1, 'Mastered a skill'))
-        
-        elif action_type == 'review_complete':
-            updates.append(('Reviewer', 1, 'Completed a review'))
-            updates.append(('Review Regular', 1, 'Completed a review'))
-            updates.append(('Review Expert', 1, 'Completed a review'))
-            
-            if metadata.get('perfect'):
-                updates.append(('Perfect Reviewer', 1, 'Perfect review'))
+    def track_action(student_id, action_type, metadata=None, commit=True):
+        """
+        Track action and update relevant achievements.
         
-        elif action_type == 'video_watch':
-            updates.append(('Video Watcher', 1, 'Watched a video'))
+        All counters the action advances are written, logged and unlocked
+        in a single transaction by the compiled rule engine.
         
-        elif action_type == 'resource_download':
-            updates.append(('Resource Explorer', 1, 'Downloaded a resource'))
+        Args:
+            commit: Commit the transaction (False leaves it open for the caller)
         
-        elif action_type == 'example_try':
-            updates.append(('Interactive Learner', 1, 'Tried an example'))
-        
-        elif action_type == 'hint_use':
-            updates.append(('Hint Seeker', 1, 'Used a hint'))
-        
-        elif action_type == 'solution_view':
-            updates.append(('Solution Student', 1, 'Viewed a solution'))
-        
-        elif action_type == 'assessment_complete':
-            updates.append(('Welcome Aboard', 1, 'Completed assessment'))
-        
-        # Apply updates
-        for achievement_name, delta, description in updates:
-            achievement = Achievement.query.filter_by(name=achievement_name).first()
-            if achievement:
-                AchievementService.update_progress(student_id, achievement.id, delta, description)
-        
-        return len(updates)
-
+        Returns:
+            Number of achievement rules the action matched
+        """
+        result = AchievementRuleEngine.apply(student_id, action_type, metadata or {}, commit=commit)
+        return result['matched']
@@ -0,0 +1,186 @@
+"""
+Achievement snapshot service for serving achievement pages from memory.
+
+The achievement catalogue (active and retired achievements) is loaded
+once per process. A student's snapshot merges the catalogue with their
+StudentAchievement rows, fetched in a single query, into the dicts the
+API returns. Snapshots are cached per student and dropped when a
+transaction that changed that student's progress commits in this
+process. Writes made by other worker processes are caught by the
+student:{id} and catalog:achievements cache tags (see cache_tags),
+checked on every read.
+"""
+import threading
+import time
+from collections import OrderedDict
+from src.database import db, on_commit
+from src.models.achievement import Achievement, StudentAchievement
+from src.services.cache_tags import CacheTags
+
+
+class AchievementSnapshotService:
+    """Process-wide achievement catalogue and per-student snapshots."""
+
+    # Catalogue lifetime; other workers' seeding is caught by the catalogue tag
+    CATALOGUE_TTL_SECONDS = 3600
+    # Snapshot lifetime; other workers' writes are caught by the student tag
+    SNAPSHOT_TTL_SECONDS = 600
+    # Most students kept in memory per process
+    MAX_SNAPSHOTS = 10000
+
+    _catalogue = None
+    _snapshots = OrderedDict()
+    _lock = threading.RLock()
+
+    @staticmethod
+    def get_catalogue(category=None):
+        """Get active achievement definitions as dicts, in id order."""
+        return [
+            a for a in AchievementSnapshotService._get_all()
+            if a['is_active'] and (not category or a['category'] == category)
+        ]
+
+    @staticmethod
+    def get_snapshot(student_id):
+        """
+        Get the student's progress on every achievement.
+
+        Returns:
+            list of dicts shaped like StudentAchievement.to_dict(), in
+            achievement id order: one per StudentAchievement row, including
+            rows of retired achievements, plus placeholder entries for
+            active achievements not yet started. The list is shared;
+            callers must not modify the entries.
+        """
+        now = time.monotonic()
+        with AchievementSnapshotService._lock:
+            cached = AchievementSnapshotService._snapshots.get(student_id)
+            if cached is not None and now - cached[0] >= AchievementSnapshotService.SNAPSHOT_TTL_SECONDS:
+                cached = None
+        if cached is not None and CacheTags.is_current(cached[2]):
+            with AchievementSnapshotService._lock:
+                if student_id in AchievementSnapshotService._snapshots:
+                    AchievementSnapshotService._snapshots.move_to_end(student_id)
+            return cached[1]
+
+        versions = CacheTags.versions([CacheTags.student(student_id), CacheTags.ACHIEVEMENT_CATALOG])
+        snapshot = AchievementSnapshotService._build(student_id)
+        if versions is None:
+            return snapshot
+
+        with AchievementSnapshotService._lock:
+            AchievementSnapshotService._snapshots[student_id] = (now, snapshot, versions)
+            AchievementSnapshotService._snapshots.move_to_end(student_id)
+            while len(AchievementSnapshotService._snapshots) > AchievementSnapshotService.MAX_SNAPSHOTS:
+                AchievementSnapshotService._snapshots.popitem(last=False)
+        return snapshot
+
+    @staticmethod
+    def queue_invalidation(student_id):
+        """
+        Drop a student's snapshot when the current transaction commits.
+
+        Also queues the student's cache tag, since progress upserts are
+        bulk statements that skip the flush events deriving tags.
+        """
+        db.session.info.setdefault('achievement_snapshot_invalidations', set()).add(student_id)
+        CacheTags.queue(CacheTags.student(student_id))
+
+    @staticmethod
+    def invalidate(student_id=None):
+        """Drop one student's snapshot, or all snapshots."""
+        with AchievementSnapshotService._lock:
+            if student_id is None:
+                AchievementSnapshotService._snapshots.clear()
+            else:
+                AchievementSnapshotService._snapshots.pop(student_id, None)
+
+    @staticmethod
+    def reset():
+        """Drop the catalogue and all snapshots so they are reloaded on next use."""
+        with AchievementSnapshotService._lock:
+            AchievementSnapshotService._catalogue = None
+            AchievementSnapshotService._snapshots.clear()
+
+    @staticmethod
+    def _get_all():
+        """
+        Get every achievement definition, active or not, loading it if missing or stale.
+
+        An empty catalogue is not cached so seeding is picked up on the
+        next call.
+        """
+        now = time.monotonic()
+        with AchievementSnapshotService._lock:
+            cached = AchievementSnapshotService._catalogue
+            if cached is not None and now - cached[0] >= AchievementSnapshotService.CATALOGUE_TTL_SECONDS:
+                cached = None
+        if cached is not None and CacheTags.is_current(cached[2]):
+            return cached[1]
+
+        versions = CacheTags.versions([CacheTags.ACHIEVEMENT_CATALOG])
+        catalogue = [a.to_dict() for a in Achievement.query.order_by(Achievement.id).all()]
+        if catalogue and versions is not None:
+            with AchievementSnapshotService._lock:
+                AchievementSnapshotService._catalogue = (now, catalogue, versions)
+        return catalogue
+
+    @staticmethod
+    def _build(student_id):
+        """Merge the catalogue with the student's rows in one pass."""
+        catalogue = AchievementSnapshotService._get_all()
+        rows = {
+            row.achievement_id: row for row in db.session.query(
+                StudentAchievement.id,
+                StudentAchievement.achievement_id,
+                StudentAchievement.progress,
+                StudentAchievement.unlocked_at,
+                StudentAchievement.is_displayed,
+                StudentAchievement.created_at,
+                StudentAchievement.updated_at
+            ).filter(StudentAchievement.student_id == student_id).all()
+        }
+
+        snapshot = []
+        for achievement in catalogue:
+            row = rows.get(achievement['id'])
+            if row is None:
+                if not achievement['is_active']:
+                    continue
+                # Default data for not-started achievements
+                snapshot.append({
+                    'student_id': student_id,
+                    'achievement_id': achievement['id'],
+                    'progress': 0,
+                    'unlocked_at': None,
+                    'is_displayed': False,
+                    'achievement': achievement,
+                    'progress_percentage': 0,
+                    'is_unlocked': False
+                })
+                continue
+
+            requirement = achievement['requirement_value']
+            snapshot.append({
+                'id': row.id,
+                'student_id': student_id,
+                'achievement_id': row.achievement_id,
+                'progress': row.progress,
+                'unlocked_at': row.unlocked_at.isoformat() if row.unlocked_at else None,
+                'is_displayed': row.is_displayed,
+                'created_at': row.created_at.isoformat() if row.created_at else None,
+                'updated_at': row.updated_at.isoformat() if row.updated_at else None,
+                'achievement': achievement,
+                'progress_percentage': (row.progress / requirement * 100) if requirement > 0 else 0,
+                'is_unlocked': row.unlocked_at is not None
+            })
+        return snapshot
+
+
+def _invalidate_committed_snapshots(student_ids):
+    """Drop snapshots of students whose progress just changed."""
+    for student_id in student_ids:
+        AchievementSnapshotService.invalidate(student_id)
+
+
+on_commit('achievement_snapshot_invalidations', _invalidate_committed_snapshots)
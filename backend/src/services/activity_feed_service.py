@@ -15,8 +15,13 @@ class ActivityFeedService:
     """Service for managing activity feed"""
     
     @staticmethod
-    def create_activity(student_id, activity_type, data):
-        """Create a new activity entry"""
+    def create_activity(student_id, activity_type, data, commit=True):
+        """
+        Create a new activity entry
+        
+        With commit=False the entry is only flushed and errors propagate,
+        so the caller's transaction can be rolled back as a whole.
+        """
         try:
             activity = ActivityFeed(
                 student_id=student_id,
@@ -36,11 +41,16 @@ class ActivityFeedService:
             )
             
             db.session.add(activity)
-            db.session.commit()
+            if commit:
+                db.session.commit()
+            else:
+                db.session.flush()
             
             return {'success': True, 'activity': activity.to_dict()}, 201
             
         except Exception as e:
+            if not commit:
+                raise
             db.session.rollback()
             return {'error': str(e)}, 500
     
@@ -294,7 +304,7 @@ class ActivityFeedService:
     # Activity creation helpers (to be called from other services)
     
     @staticmethod
-    def on_skill_mastery(student_id, skill_name, accuracy, xp_earned):
+    def on_skill_mastery(student_id, skill_name, accuracy, xp_earned, commit=True):
         """Create activity when skill is mastered"""
         return ActivityFeedService.create_activity(student_id, 'skill_mastery', {
             'title': f'Mastered {skill_name}!',
@@ -302,30 +312,30 @@ class ActivityFeedService:
             'xp_earned': xp_earned,
             'accuracy': accuracy,
             'visibility': 'friends'
-        })
+        }, commit=commit)
     
     @staticmethod
-    def on_level_up(student_id, new_level, total_xp):
+    def on_level_up(student_id, new_level, total_xp, commit=True):
         """Create activity when student levels up"""
         return ActivityFeedService.create_activity(student_id, 'level_up', {
             'title': f'Reached Level {new_level}!',
             'description': 'Awesome progress!',
             'level_reached': new_level,
             'visibility': 'friends'
-        })
+        }, commit=commit)
     
     @staticmethod
-    def on_achievement_unlock(student_id, achievement_name, xp_earned):
+    def on_achievement_unlock(student_id, achievement_name, xp_earned, commit=True):
         """Create activity when achievement is unlocked"""
         return ActivityFeedService.create_activity(student_id, 'achievement_unlock', {
             'title': f'Unlocked {achievement_name}!',
             'description': 'New achievement earned!',
             'xp_earned': xp_earned,
             'visibility': 'friends'
-        })
+        }, commit=commit)
     
     @staticmethod
-    def on_challenge_complete(student_id, challenge_name, rank, xp_earned):
+    def on_challenge_complete(student_id, challenge_name, rank, xp_earned, commit=True):
         """Create activity when challenge is completed"""
         rank_text = f'Ranked #{rank}' if rank else 'Completed'
         return ActivityFeedService.create_activity(student_id, 'challenge_complete', {
@@ -333,15 +343,15 @@ class ActivityFeedService:
             'description': f'{rank_text}',
             'xp_earned': xp_earned,
             'visibility': 'friends'
-        })
+        }, commit=commit)
     
     @staticmethod
-    def on_streak_milestone(student_id, streak_days):
+    def on_streak_milestone(student_id, streak_days, commit=True):
         """Create activity for streak milestone"""
         return ActivityFeedService.create_activity(student_id, 'streak_milestone', {
             'title': f'{streak_days} Day Streak!',
             'description': 'Keep up the great work!',
             'streak_days': streak_days,
             'visibility': 'friends'
-        })
+        }, commit=commit)
 
@@ -3,13 +3,10 @@ Admin Service for platform administration dashboard.
 """
 from src.database import db
 from src.models.user import User
-from src.models.student import Student
-from src.models.student_session import StudentSession
-from src.models.learning_path import LearningPath
-from src.models.assignment_model import Assignment
 from src.models.admin_models import AuditLog
+from src.services.platform_metrics_service import PlatformMetricsService
+from src.database_engine import PoolMetrics
 from datetime import datetime, timedelta
-from sqlalchemy import func
 
 
 class AdminService:
@@ -17,78 +14,44 @@ class AdminService:
     
     @staticmethod
     def get_platform_metrics():
-        """Get platform-wide metrics for admin dashboard"""
+        """
+        Get platform-wide metrics for admin dashboard.
+
+        Served from PlatformMetricsService's snapshot; active user counts
+        are HyperLogLog estimates over the last 7 and 30 days.
+        """
         try:
-            # User counts by role
-            total_users = User.query.count()
-            students_count = User.query.filter_by(role='student').count()
-            teachers_count = User.query.filter_by(role='teacher').count()
-            parents_count = User.query.filter_by(role='parent').count()
-            admins_count = User.query.filter_by(role='admin').count()
-            
-            # Active users (last 7 days)
-            week_ago = datetime.utcnow() - timedelta(days=7)
-            active_sessions = StudentSession.query.filter(
-                StudentSession.started_at >= week_ago
-            ).all()
-            active_student_ids = set(s.student_id for s in active_sessions)
-            active_users_week = len(active_student_ids)
-            
-            # Active users (last 30 days)
-            month_ago = datetime.utcnow() - timedelta(days=30)
-            active_sessions_month = StudentSession.query.filter(
-                StudentSession.started_at >= month_ago
-            ).all()
-            active_student_ids_month = set(s.student_id for s in active_sessions_month)
-            active_users_month = len(active_student_ids_month)
-            
-            # Session metrics
-            total_sessions = StudentSession.query.count()
-            total_time = db.session.query(
-                func.sum(
-                    func.julianday(StudentSession.ended_at) - 
-                    func.julianday(StudentSession.started_at)
-                ) * 24 * 60
-            ).filter(StudentSession.ended_at.isnot(None)).scalar() or 0
-            
-            # Question metrics
-            total_questions = db.session.query(
-                func.sum(StudentSession.questions_answered)
-            ).scalar() or 0
-            
-            total_correct = db.session.query(
-                func.sum(StudentSession.questions_correct)
-            ).scalar() or 0
+            snapshot = PlatformMetricsService.get_snapshot()
             
-            platform_accuracy = (total_correct / total_questions * 100) if total_questions > 0 else 0
-            
-            # Skills mastered
-            skills_mastered = LearningPath.query.filter_by(mastery_achieved=True).count()
+            # User counts by role
+            by_role = snapshot['users_by_role']
             
-            # Assignments
-            total_assignments = Assignment.query.count()
+            # Practice totals
+            totals = snapshot['totals']
+            platform_accuracy = (totals['correct'] / totals['questions'] * 100) if totals['questions'] > 0 else 0
             
             metrics = {
                 'users': {
-                    'total': total_users,
-                    'students': students_count,
-                    'teachers': teachers_count,
-                    'parents': parents_count,
-                    'admins': admins_count
+                    'total': sum(by_role.values()),
+                    'students': by_role.get('student', 0),
+                    'teachers': by_role.get('teacher', 0),
+                    'parents': by_role.get('parent', 0),
+                    'admins': by_role.get('admin', 0)
                 },
                 'activity': {
-                    'active_users_week': active_users_week,
-                    'active_users_month': active_users_month,
-                    'total_sessions': total_sessions,
-                    'total_time_minutes': round(total_time, 1),
-                    'total_questions': int(total_questions),
-                    'total_correct': int(total_correct),
+                    'active_users_week': snapshot['active_users'][7],
+                    'active_users_month': snapshot['active_users'][30],
+                    'total_sessions': totals['sessions'],
+                    'total_time_minutes': round(totals['minutes'], 1),
+                    'total_questions': totals['questions'],
+                    'total_correct': totals['correct'],
                     'platform_accuracy': round(platform_accuracy, 1)
                 },
                 'learning': {
-                    'skills_mastered': skills_mastered,
-                    'total_assignments': total_assignments
-                }
+                    'skills_mastered': snapshot['skills_mastered'],
+                    'total_assignments': snapshot['table_counts']['assignments']
+                },
+                'as_of': snapshot['computed_at'].isoformat() if snapshot['computed_at'] else None
             }
             
             return {'success': True, 'metrics': metrics}, 200
@@ -151,40 +114,29 @@ class AdminService:
     
     @staticmethod
     def get_system_health():
-        """Get system health metrics"""
+        """
+        Get system health metrics.
+
+        Served from PlatformMetricsService's snapshot; table counts are
+        planner estimates on PostgreSQL.
+        """
         try:
-            # Database size (approximate)
-            table_counts = {
-                'users': User.query.count(),
-                'students': Student.query.count(),
-                'sessions': StudentSession.query.count(),
-                'learning_paths': LearningPath.query.count(),
-                'assignments': Assignment.query.count(),
-                'audit_logs': AuditLog.query.count()
-            }
-            
-            # Recent errors from audit logs (if any)
-            recent_errors = AuditLog.query.filter(
-                AuditLog.action_type == 'error',
-                AuditLog.created_at >= datetime.utcnow() - timedelta(hours=24)
-            ).count()
-            
-            # Active sessions (last hour)
-            hour_ago = datetime.utcnow() - timedelta(hours=1)
-            active_sessions = StudentSession.query.filter(
-                StudentSession.started_at >= hour_ago
-            ).count()
+            snapshot = PlatformMetricsService.get_snapshot()
+            table_counts = dict(snapshot['table_counts'])
+            recent_errors = snapshot['errors_last_24h']
             
             health = {
                 'database': {
                     'table_counts': table_counts,
-                    'total_records': sum(table_counts.values())
+                    'total_records': sum(table_counts.values()),
+                    'pool': PoolMetrics.stats(db.engine)
                 },
                 'activity': {
-                    'active_sessions_last_hour': active_sessions,
+                    'active_sessions_last_hour': snapshot['active_sessions_last_hour'],
                     'errors_last_24h': recent_errors
                 },
-                'status': 'healthy' if recent_errors < 10 else 'degraded'
+                'status': 'healthy' if recent_errors < 10 else 'degraded',
+                'as_of': snapshot['computed_at'].isoformat() if snapshot['computed_at'] else None
             }
             
             return {'success': True, 'health': health}, 200
@@ -9,6 +9,9 @@ from src.models.assignment_model import Assignment, AssignmentStudent
 from src.models.class_group import ClassGroup, ClassMembership
 from src.models.streak import StreakTracking
 from src.models.gamification import StudentProgress
+from src.services.daily_stats_service import DailyStatsService
+from src.services.cohort_stats_service import CohortStatsService
+from src.services.engagement_service import EngagementService
 from datetime import datetime, timedelta
 from sqlalchemy import func, and_
 
@@ -188,11 +191,15 @@ class AnalyticsDashboardService:
                 if not membership:
                     return {'success': False, 'error': 'Student not in any class'}, 404
                 
-                comparison_metrics = AnalyticsDashboardService._get_class_metrics(membership.class_id, exclude_student=student_id)
+                comparison_metrics, percentiles, cohort_size = CohortStatsService.compare(
+                    student_metrics, 'class', membership.class_id
+                )
                 comparison_label = f"Class {membership.class_group.name}"
             
             elif comparison_type == 'grade':
-                comparison_metrics = AnalyticsDashboardService._get_grade_metrics(student.grade, exclude_student=student_id)
+                comparison_metrics, percentiles, cohort_size = CohortStatsService.compare(
+                    student_metrics, 'grade', student.grade
+                )
                 comparison_label = f"Grade {student.grade}"
             
             else:
@@ -205,6 +212,8 @@ class AnalyticsDashboardService:
                 'comparison_label': comparison_label,
                 'student': student_metrics,
                 'comparison_group': comparison_metrics,
+                'cohort_size': cohort_size,
+                'percentiles': percentiles,
                 'differences': {
                     'accuracy': round(student_metrics['accuracy'] - comparison_metrics['accuracy'], 1),
                     'practice_time': round(student_metrics['practice_time'] - comparison_metrics['practice_time'], 1),
@@ -222,51 +231,9 @@ class AnalyticsDashboardService:
     def calculate_engagement_score(student_id, days=30):
         """Calculate composite engagement score (0-100)"""
         try:
-            start_date = datetime.utcnow() - timedelta(days=days)
-            
-            # Get sessions
-            sessions = StudentSession.query.filter(
-                StudentSession.student_id == student_id,
-                StudentSession.started_at >= start_date
-            ).all()
-            
-            if not sessions:
-                return 0.0
-            
-            # Component scores (each 0-100)
-            
-            # 1. Session frequency (30% weight)
-            session_count = len(sessions)
-            expected_sessions = days * 0.5  # Expect 0.5 sessions per day
-            frequency_score = min((session_count / expected_sessions) * 100, 100) if expected_sessions > 0 else 0
-            
-            # 2. Practice time (25% weight)
-            total_time = sum(
-                (s.ended_at - s.started_at).total_seconds() / 60
-                if s.ended_at else 0
-                for s in sessions
-            )
-            expected_time = days * 15  # Expect 15 min per day
-            time_score = min((total_time / expected_time) * 100, 100) if expected_time > 0 else 0
-            
-            # 3. Accuracy (25% weight)
-            total_questions = sum(s.questions_answered or 0 for s in sessions)
-            total_correct = sum(s.questions_correct or 0 for s in sessions)
-            accuracy_score = (total_correct / total_questions * 100) if total_questions > 0 else 0
-            
-            # 4. Consistency (20% weight)
-            days_with_practice = len(set(s.started_at.date() for s in sessions))
-            consistency_score = (days_with_practice / days) * 100
-            
-            # Weighted average
-            engagement_score = (
-                frequency_score * 0.30 +
-                time_score * 0.25 +
-                accuracy_score * 0.25 +
-                consistency_score * 0.20
-            )
-            
-            return engagement_score
+            if days == EngagementService.WINDOW_DAYS:
+                return EngagementService.get_scores([student_id]).get(student_id, 0.0)
+            return EngagementService.compute([student_id], days)[student_id]['score']
             
         except Exception as e:
             return 0.0
@@ -274,44 +241,19 @@ class AnalyticsDashboardService:
     @staticmethod
     def _get_daily_aggregates(student_id, days):
         """Get daily aggregated data for trends"""
-        start_date = datetime.utcnow() - timedelta(days=days)
+        start_day = (datetime.utcnow() - timedelta(days=days)).date()
+        daily_data = DailyStatsService.by_day(DailyStatsService.get_stats(student_id, start_day))
         
-        sessions = StudentSession.query.filter(
-            StudentSession.student_id == student_id,
-            StudentSession.started_at >= start_date
-        ).all()
+        chart = {'time': [], 'accuracy': [], 'questions': []}
+        for day, data in daily_data.items():
+            date_key = day.isoformat()
+            q = data['questions']
+            accuracy = (data['correct'] / q * 100) if q > 0 else 0
+            chart['time'].append({'date': date_key, 'value': round(data['seconds'] / 60, 1)})
+            chart['accuracy'].append({'date': date_key, 'value': round(accuracy, 1)})
+            chart['questions'].append({'date': date_key, 'value': q})
         
-        # Group by date
-        daily_data = {}
-        for session in sessions:
-            date_key = session.started_at.date().isoformat()
-            
-            if date_key not in daily_data:
-                daily_data[date_key] = {
-                    'time': 0,
-                    'questions': 0,
-                    'correct': 0
-                }
-            
-            if session.ended_at:
-                daily_data[date_key]['time'] += (session.ended_at - session.started_at).total_seconds() / 60
-            daily_data[date_key]['questions'] += session.questions_answered or 0
-            daily_data[date_key]['correct'] += session.questions_correct or 0
-        
-        # Calculate accuracy for each day
-        for date_key in daily_data:
-            q = daily_data[date_key]['questions']
-            c = daily_data[date_key]['correct']
-            daily_data[date_key]['accuracy'] = (c / q * 100) if q > 0 else 0
-        
-        # Convert to lists for charting
-        sorted_dates = sorted(daily_data.keys())
-        
-        return {
-            'time': [{'date': d, 'value': round(daily_data[d]['time'], 1)} for d in sorted_dates],
-            'accuracy': [{'date': d, 'value': round(daily_data[d]['accuracy'], 1)} for d in sorted_dates],
-            'questions': [{'date': d, 'value': daily_data[d]['questions']} for d in sorted_dates]
-        }
+        return chart
     
     @staticmethod
     def _get_subject_distribution(student_id):
@@ -384,92 +326,10 @@ class AnalyticsDashboardService:
         if not student_ids:
             return 0.0
         
-        scores = [AnalyticsDashboardService.calculate_engagement_score(sid, 30) for sid in student_ids]
-        return sum(scores) / len(scores) if scores else 0
+        scores = EngagementService.get_scores(student_ids)
+        return sum(scores.values()) / len(scores) if scores else 0
     
     @staticmethod
     def _get_student_metrics(student_id):
         """Get metrics for a single student"""
-        sessions = StudentSession.query.filter_by(student_id=student_id).all()
-        
-        total_time = sum(
-            (s.ended_at - s.started_at).total_seconds() / 60
-            if s.ended_at else 0
-            for s in sessions
-        )
-        
-        total_questions = sum(s.questions_answered or 0 for s in sessions)
-        total_correct = sum(s.questions_correct or 0 for s in sessions)
-        accuracy = (total_correct / total_questions * 100) if total_questions > 0 else 0
-        
-        skills_mastered = LearningPath.query.filter_by(
-            student_id=student_id,
-            mastery_achieved=True
-        ).count()
-        
-        engagement_score = AnalyticsDashboardService.calculate_engagement_score(student_id, 30)
-        
-        return {
-            'accuracy': round(accuracy, 1),
-            'practice_time': round(total_time, 1),
-            'skills_mastered': skills_mastered,
-            'learning_velocity': round(skills_mastered / 4, 2),  # Assume 4 weeks
-            'engagement_score': round(engagement_score, 1)
-        }
-    
-    @staticmethod
-    def _get_class_metrics(class_id, exclude_student=None):
-        """Get average metrics for a class"""
-        memberships = ClassMembership.query.filter_by(class_id=class_id).all()
-        student_ids = [m.student_id for m in memberships if m.student_id != exclude_student]
-        
-        if not student_ids:
-            return {
-                'accuracy': 0,
-                'practice_time': 0,
-                'skills_mastered': 0,
-                'learning_velocity': 0,
-                'engagement_score': 0
-            }
-        
-        # Aggregate metrics
-        metrics = [AnalyticsDashboardService._get_student_metrics(sid) for sid in student_ids]
-        
-        return {
-            'accuracy': round(sum(m['accuracy'] for m in metrics) / len(metrics), 1),
-            'practice_time': round(sum(m['practice_time'] for m in metrics) / len(metrics), 1),
-            'skills_mastered': round(sum(m['skills_mastered'] for m in metrics) / len(metrics), 1),
-            'learning_velocity': round(sum(m['learning_velocity'] for m in metrics) / len(metrics), 2),
-            'engagement_score': round(sum(m['engagement_score'] for m in metrics) / len(metrics), 1)
-        }
-    
-    @staticmethod
-    def _get_grade_metrics(grade, exclude_student=None):
-        """Get average metrics for a grade level"""
-        students = Student.query.filter_by(grade=grade).all()
-        student_ids = [s.id for s in students if s.id != exclude_student]
-        
-        if not student_ids:
-            return {
-                'accuracy': 0,
-                'practice_time': 0,
-                'skills_mastered': 0,
-                'learning_velocity': 0,
-                'engagement_score': 0
-            }
-        
-        # Sample up to 50 students for performance
-        if len(student_ids) > 50:
-            import random
-            student_ids = random.sample(student_ids, 50)
-        
-        metrics = [AnalyticsDashboardService._get_student_metrics(sid) for sid in student_ids]
-        
-        return {
-            'accuracy': round(sum(m['accuracy'] for m in metrics) / len(metrics), 1),
-            'practice_time': round(sum(m['practice_time'] for m in metrics) / len(metrics), 1),
-            'skills_mastered': round(sum(m['skills_mastered'] for m in metrics) / len(metrics), 1),
-            'learning_velocity': round(sum(m['learning_velocity'] for m in metrics) / len(metrics), 2),
-            'engagement_score': round(sum(m['engagement_score'] for m in metrics) / len(metrics), 1)
-        }
-
+        return CohortStatsService.compute_student_metrics([student_id])[student_id]
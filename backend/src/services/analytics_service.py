@@ -8,9 +8,9 @@ from src.models.student_session import StudentSession
 from src.models.learning_path import LearningPath
 from src.models.assignment_model import Assignment, AssignmentStudent
 from src.models.class_group import ClassGroup, ClassMembership
-from src.models.assessment import Skill
+from src.services.daily_stats_service import DailyStatsService
+from src.services.class_analytics_engine import ClassAnalyticsEngine
 from datetime import datetime, timedelta
-from collections import defaultdict
 
 
 class AnalyticsService:
@@ -109,60 +109,24 @@ class AnalyticsService:
             if not student_ids:
                 return {}
             
-            # Get date range
+            # Load the roster's paths and sessions once
             start_date = datetime.utcnow() - timedelta(days=days)
+            engine = ClassAnalyticsEngine(student_ids, since=start_date)
             
-            # Get all sessions for class students
-            sessions = StudentSession.query.filter(
-                StudentSession.student_id.in_(student_ids),
-                StudentSession.started_at >= start_date
-            ).all()
-            
-            # Calculate class-wide metrics
-            total_questions = sum(s.questions_answered for s in sessions)
-            total_correct = sum(s.questions_correct for s in sessions)
-            avg_accuracy = total_correct / total_questions if total_questions > 0 else 0
-            
-            # Get active students (practiced in last 7 days)
-            week_ago = datetime.utcnow() - timedelta(days=7)
-            active_student_ids = set(s.student_id for s in sessions if s.started_at >= week_ago)
-            engagement_rate = len(active_student_ids) / len(student_ids) if student_ids else 0
+            # Calculate class-wide metrics (active = practiced in last 7 days)
+            overall = engine.overall(datetime.utcnow() - timedelta(days=7))
             
             # Get student distribution
-            student_accuracies = []
-            for student_id in student_ids:
-                paths = LearningPath.query.filter_by(student_id=student_id).all()
-                if paths:
-                    student_avg = sum(p.current_accuracy for p in paths) / len(paths)
-                    student_accuracies.append(student_avg)
-            
-            # Calculate distribution
-            distribution = {
-                'excellent': sum(1 for a in student_accuracies if a >= 0.9),
-                'good': sum(1 for a in student_accuracies if 0.8 <= a < 0.9),
-                'fair': sum(1 for a in student_accuracies if 0.7 <= a < 0.8),
-                'needs_improvement': sum(1 for a in student_accuracies if a < 0.7)
-            }
+            distribution = engine.distribution()
             
             # Get skill heatmap (which skills the class struggles with)
-            skill_analytics = AnalyticsService._get_class_skill_heatmap(class_id)
+            skill_analytics = engine.skill_heatmap()
             
             # Get trend data
-            trend_data = AnalyticsService.get_class_trend_data(class_id, 'accuracy', days)
+            trend_data = engine.daily_trend()
             
             # Get top performers and struggling students
-            student_rankings = []
-            for student_id in student_ids:
-                student = Student.query.get(student_id)
-                paths = LearningPath.query.filter_by(student_id=student_id).all()
-                avg_acc = sum(p.current_accuracy for p in paths) / len(paths) if paths else 0
-                student_rankings.append({
-                    'student_id': student_id,
-                    'student_name': student.name if student else 'Unknown',
-                    'accuracy': round(avg_acc, 2)
-                })
-            
-            student_rankings.sort(key=lambda x: x['accuracy'], reverse=True)
+            student_rankings = engine.rankings()
             top_performers = student_rankings[:5]
             struggling_students = [s for s in student_rankings if s['accuracy'] < 0.7]
             
@@ -173,13 +137,7 @@ class AnalyticsService:
                     'grade_level': class_group.grade_level,
                     'student_count': len(student_ids)
                 },
-                'overall': {
-                    'avg_accuracy': round(avg_accuracy, 2),
-                    'total_questions': total_questions,
-                    'engagement_rate': round(engagement_rate, 2),
-                    'active_students': len(active_student_ids),
-                    'total_sessions': len(sessions)
-                },
+                'overall': overall,
                 'distribution': distribution,
                 'skill_heatmap': skill_analytics,
                 'trends': trend_data,
@@ -194,34 +152,19 @@ class AnalyticsService:
     def get_student_trend_data(student_id, metric='accuracy', days=30):
         """Get trend data for student"""
         try:
-            start_date = datetime.utcnow() - timedelta(days=days)
-            sessions = StudentSession.query.filter(
-                StudentSession.student_id == student_id,
-                StudentSession.started_at >= start_date
-            ).order_by(StudentSession.started_at).all()
-            
-            # Group by day
-            daily_data = defaultdict(lambda: {'questions': 0, 'correct': 0, 'time': 0, 'sessions': 0})
-            
-            for session in sessions:
-                day_key = session.started_at.date().isoformat()
-                daily_data[day_key]['questions'] += session.questions_answered
-                daily_data[day_key]['correct'] += session.questions_correct
-                daily_data[day_key]['sessions'] += 1
-                if session.ended_at:
-                    daily_data[day_key]['time'] += (session.ended_at - session.started_at).total_seconds()
+            start_day = (datetime.utcnow() - timedelta(days=days)).date()
+            daily_data = DailyStatsService.by_day(DailyStatsService.get_stats(student_id, start_day))
             
             # Convert to list of data points
             trend_points = []
-            for day_key in sorted(daily_data.keys()):
-                data = daily_data[day_key]
+            for day, data in daily_data.items():
                 accuracy = data['correct'] / data['questions'] if data['questions'] > 0 else 0
                 
                 point = {
-                    'date': day_key,
+                    'date': day.isoformat(),
                     'accuracy': round(accuracy, 2),
                     'questions': data['questions'],
-                    'time_hours': round(data['time'] / 3600, 1),
+                    'time_hours': round(data['seconds'] / 3600, 1),
                     'sessions': data['sessions']
                 }
                 trend_points.append(point)
@@ -243,38 +186,7 @@ class AnalyticsService:
                 return []
             
             start_date = datetime.utcnow() - timedelta(days=days)
-            sessions = StudentSession.query.filter(
-                StudentSession.student_id.in_(student_ids),
-                StudentSession.started_at >= start_date
-            ).order_by(StudentSession.started_at).all()
-            
-            # Group by day
-            daily_data = defaultdict(lambda: {'questions': 0, 'correct': 0, 'time': 0, 'sessions': 0, 'active_students': set()})
-            
-            for session in sessions:
-                day_key = session.started_at.date().isoformat()
-                daily_data[day_key]['questions'] += session.questions_answered
-                daily_data[day_key]['correct'] += session.questions_correct
-                daily_data[day_key]['sessions'] += 1
-                daily_data[day_key]['active_students'].add(session.student_id)
-                if session.ended_at:
-                    daily_data[day_key]['time'] += (session.ended_at - session.started_at).total_seconds()
-            
-            # Convert to list of data points
-            trend_points = []
-            for day_key in sorted(daily_data.keys()):
-                data = daily_data[day_key]
-                accuracy = data['correct'] / data['questions'] if data['questions'] > 0 else 0
-                
-                point = {
-                    'date': day_key,
-                    'accuracy': round(accuracy, 2),
-                    'questions': data['questions'],
-                    'time_hours': round(data['time'] / 3600, 1),
-                    'sessions': data['sessions'],
-                    'active_students': len(data['active_students'])
-                }
-                trend_points.append(point)
+            trend_points = ClassAnalyticsEngine(student_ids, since=start_date).daily_trend()
             
             return trend_points
             
@@ -300,31 +212,7 @@ class AnalyticsService:
             memberships = ClassMembership.query.filter_by(class_id=class_id).all()
             student_ids = [m.student_id for m in memberships]
             
-            # Calculate student's average
-            student_paths = LearningPath.query.filter_by(student_id=student_id).all()
-            student_avg = sum(p.current_accuracy for p in student_paths) / len(student_paths) if student_paths else 0
-            
-            # Calculate class average
-            all_accuracies = []
-            for sid in student_ids:
-                paths = LearningPath.query.filter_by(student_id=sid).all()
-                if paths:
-                    avg = sum(p.current_accuracy for p in paths) / len(paths)
-                    all_accuracies.append(avg)
-            
-            class_avg = sum(all_accuracies) / len(all_accuracies) if all_accuracies else 0
-            
-            # Calculate percentile
-            below_student = sum(1 for a in all_accuracies if a < student_avg)
-            percentile = (below_student / len(all_accuracies) * 100) if all_accuracies else 50
-            
-            return {
-                'student_accuracy': round(student_avg, 2),
-                'class_average': round(class_avg, 2),
-                'percentile': round(percentile, 0),
-                'rank': below_student + 1,
-                'total_students': len(all_accuracies)
-            }
+            return ClassAnalyticsEngine(student_ids).comparison(student_id)
             
         except Exception as e:
             return {}
@@ -342,32 +230,7 @@ class AnalyticsService:
             if not student_ids:
                 return []
             
-            # Get all learning paths for class students
-            paths = LearningPath.query.filter(LearningPath.student_id.in_(student_ids)).all()
-            
-            # Group by skill
-            skill_data = defaultdict(lambda: {'accuracies': [], 'students': 0})
-            
-            for path in paths:
-                if path.skill:
-                    skill_data[path.skill.id]['accuracies'].append(path.current_accuracy)
-                    skill_data[path.skill.id]['students'] += 1
-                    if 'skill_name' not in skill_data[path.skill.id]:
-                        skill_data[path.skill.id]['skill_name'] = path.skill.name
-            
-            # Calculate averages
-            heatmap = []
-            for skill_id, data in skill_data.items():
-                avg_accuracy = sum(data['accuracies']) / len(data['accuracies']) if data['accuracies'] else 0
-                heatmap.append({
-                    'skill_id': skill_id,
-                    'skill_name': data['skill_name'],
-                    'avg_accuracy': round(avg_accuracy, 2),
-                    'student_count': data['students']
-                })
-            
-            # Sort by accuracy (struggling skills first)
-            heatmap.sort(key=lambda x: x['avg_accuracy'])
+            heatmap = ClassAnalyticsEngine(student_ids).skill_heatmap()
             
             return heatmap
             
@@ -7,6 +7,7 @@ from src.models.assignment_model import Assignment, AssignmentStudent
 from src.models.class_group import ClassGroup, ClassMembership
 from src.models.student import Student
 from src.models.gamification import StudentProgress
+from src.services.risk_scoring_service import RiskScoringService
 from datetime import datetime, timedelta
 
 
@@ -376,6 +377,9 @@ class AssignmentService:
                 progress.total_xp += xp_earned
                 # Level up logic would go here
             
+            # Overdue assignments feed the at-risk score
+            RiskScoringService.refresh([student_id], commit=False)
+            
             db.session.commit()
             
             return {
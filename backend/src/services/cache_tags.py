@@ -0,0 +1,225 @@
+"""
+Tag-based invalidation for cached responses and service caches.
+
+A tag names a slice of data that cached results depend on, such as
+student:42, class:7, teacher:3, user:5, leaderboard:skills,
+leaderboard:grade_xp:5, catalog:skills or catalog:achievements. Each
+tag has a version token kept in the response cache backend, so with
+the SQLite or Redis backend every worker sees the same versions. A
+cache records the versions of its tags before computing a result and
+treats the result as stale as soon as any of them changed.
+
+Versions are bumped from SQLAlchemy session events on the shared db
+session. after_flush maps each new, changed or deleted instance to its
+tags (any row with a student_id tags that student; users and their
+profiles tag the user; class, teacher and catalogue rows tag those).
+before_commit fans the transaction's student tags out to the students'
+classes and their teachers in one query, and after_commit bumps the
+collected tags in one backend write, so a cached result is never served
+after the commit that changed its data. Rolled back transactions bump
+nothing.
+
+Leaderboard tags are not derived from rows: a board page shows scores
+stored in the rank table, so the rank-table writer
+(leaderboard_table_service) queues a board's tag whenever a score or
+level it shows changes.
+
+Bulk update()/insert() statements skip flush events; code issuing them
+calls CacheTags.queue() with the tags it affects.
+"""
+import logging
+import uuid
+from itertools import chain
+from sqlalchemy import event, inspect, or_, select
+from src.database import db, on_commit
+from src.models.user import User
+from src.models.student import Student
+from src.models.teacher import Teacher
+from src.models.parent import Parent
+from src.models.class_group import ClassGroup, ClassMembership
+from src.models.assessment import Skill
+from src.models.achievement import Achievement
+
+logger = logging.getLogger(__name__)
+
+
+class CacheTags:
+    """Tag versions shared through the response cache backend."""
+
+    SKILL_CATALOG = 'catalog:skills'
+    ACHIEVEMENT_CATALOG = 'catalog:achievements'
+    # Boards listing every student, and the per-grade board, as named by
+    # LeaderboardTableService; a student's name or grade shows on all of them
+    STUDENT_LEADERBOARDS = ('global_xp', 'skills', 'achievements')
+    GRADE_LEADERBOARD = 'grade_xp'
+    # Version lifetime; must outlive the longest cache entry
+    VERSION_TTL_SECONDS = 7 * 86400
+
+    @staticmethod
+    def student(student_id):
+        return f'student:{student_id}'
+
+    @staticmethod
+    def class_(class_id):
+        return f'class:{class_id}'
+
+    @staticmethod
+    def teacher(teacher_id):
+        return f'teacher:{teacher_id}'
+
+    @staticmethod
+    def user(user_id):
+        return f'user:{user_id}'
+
+    @staticmethod
+    def leaderboard(board, scope=0):
+        """Tag of one leaderboard; scope is the grade of the grade board."""
+        return f'leaderboard:{board}:{scope}' if board == CacheTags.GRADE_LEADERBOARD else f'leaderboard:{board}'
+
+    # ------------------------------------------------------------------
+    # Versions
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _backend():
+        from src.services.response_cache import ResponseCache
+        return ResponseCache.backend()
+
+    @staticmethod
+    def versions(tags):
+        """
+        Current version of each tag, creating missing ones.
+
+        Call before computing the result to be cached. Missing tags get
+        a fresh token, so a version that was evicted never matches again.
+
+        Returns:
+            dict of tag -> version, or None if the backend failed
+        """
+        backend = CacheTags._backend()
+        versions = {}
+        try:
+            for tag in sorted(set(tags)):
+                key = f'tag:{tag}'
+                version = backend.get(key)
+                if version is None:
+                    backend.add(key, uuid.uuid4().hex.encode('ascii'), CacheTags.VERSION_TTL_SECONDS)
+                    version = backend.get(key)
+                if version is None:
+                    return None
+                versions[tag] = version.decode('ascii')
+        except Exception:
+            logger.exception('Reading cache tag versions failed')
+            return None
+        return versions
+
+    @staticmethod
+    def is_current(versions):
+        """True if none of the recorded tag versions changed."""
+        if not versions:
+            return True
+        backend = CacheTags._backend()
+        try:
+            for tag, version in versions.items():
+                current = backend.get(f'tag:{tag}')
+                if current is None or current.decode('ascii') != version:
+                    return False
+        except Exception:
+            logger.exception('Reading cache tag versions failed')
+            return False
+        return True
+
+    @staticmethod
+    def bump(tags):
+        """Give each tag a new version, invalidating everything cached under it."""
+        versions = {f'tag:{tag}': uuid.uuid4().hex.encode('ascii') for tag in set(tags)}
+        try:
+            CacheTags._backend().set_many(versions, CacheTags.VERSION_TTL_SECONDS)
+        except Exception:
+            logger.exception('Bumping cache tags %s failed', sorted(tags))
+
+    @staticmethod
+    def queue(*tags):
+        """Bump tags when the current transaction commits."""
+        db.session.info.setdefault('cache_tags', set()).update(tags)
+
+    # ------------------------------------------------------------------
+    # Change tracking
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def tags_for(instance):
+        """
+        Tags affected by a change to one model instance.
+
+        Reads loaded attribute values only, so it never triggers a load
+        during a flush.
+        """
+        values = inspect(instance).dict
+        tags = set()
+        if isinstance(instance, Student):
+            tags.add(CacheTags.student(values.get('id')))
+        elif values.get('student_id') is not None:
+            tags.add(CacheTags.student(values['student_id']))
+        if isinstance(instance, User):
+            tags.add(CacheTags.user(values.get('id')))
+        elif isinstance(instance, (Student, Teacher, Parent)):
+            tags.add(CacheTags.user(values.get('user_id')))
+        if isinstance(instance, Student):
+            tags.update(CacheTags.leaderboard(board) for board in CacheTags.STUDENT_LEADERBOARDS)
+            tags.add(CacheTags.leaderboard(CacheTags.GRADE_LEADERBOARD, values.get('grade')))
+        if isinstance(instance, ClassMembership):
+            tags.add(CacheTags.class_(values.get('class_id')))
+        if isinstance(instance, ClassGroup):
+            tags.add(CacheTags.class_(values.get('id')))
+            tags.add(CacheTags.teacher(values.get('teacher_id')))
+        if isinstance(instance, Skill):
+            tags.add(CacheTags.SKILL_CATALOG)
+        if isinstance(instance, Achievement):
+            tags.add(CacheTags.ACHIEVEMENT_CATALOG)
+        return {tag for tag in tags if not tag.endswith(':None')}
+
+    @staticmethod
+    def _fan_out(connection, tags):
+        """Add the classes of changed students and the teachers of those and changed classes."""
+        student_ids = {int(tag.split(':')[1]) for tag in tags if tag.startswith('student:')}
+        class_ids = {int(tag.split(':')[1]) for tag in tags if tag.startswith('class:')}
+        if not student_ids and not class_ids:
+            return tags
+        for class_id, teacher_id in connection.execute(
+            select(ClassGroup.id, ClassGroup.teacher_id).where(or_(
+                ClassGroup.id.in_(class_ids),
+                ClassGroup.id.in_(
+                    select(ClassMembership.class_id).where(ClassMembership.student_id.in_(student_ids))
+                )
+            ))
+        ).all():
+            tags.add(CacheTags.class_(class_id))
+            tags.add(CacheTags.teacher(teacher_id))
+        return tags
+
+
+@event.listens_for(db.session, 'after_flush')
+def _collect_changed_tags(session, flush_context):
+    """Record the tags touched by this flush."""
+    tags = set()
+    for instance in chain(session.new, session.deleted):
+        tags |= CacheTags.tags_for(instance)
+    for instance in session.dirty:
+        if session.is_modified(instance, include_collections=False):
+            tags |= CacheTags.tags_for(instance)
+    if tags:
+        session.info.setdefault('cache_tags', set()).update(tags)
+
+
+@event.listens_for(db.session, 'before_commit')
+def _fan_out_committing_tags(session):
+    """Add the classes and teachers of the transaction's students, once per commit."""
+    session.flush()
+    tags = session.info.get('cache_tags')
+    if tags:
+        CacheTags._fan_out(session.connection(), tags)
+
+
+# Invalidate everything cached under the committed changes' tags
+on_commit('cache_tags', CacheTags.bump)
@@ -2,11 +2,15 @@
 Service for managing daily challenges.
 """
 from datetime import datetime, timedelta
+import os
 import random
+import threading
+import time
 from src.database import db
 from src.models.daily_challenge import DailyChallenge
 from src.models.student import Student
-from src.models.assessment import Skill
+from src.models.user import User
+from src.models.assessment import Skill, Question
 from src.models.gamification import StudentProgress
 from src.services.gamification_service import GamificationService
 
@@ -36,6 +40,93 @@ class ChallengeService:
         }
     }
     
+    # Students who logged in within this many days get nightly challenges
+    ACTIVE_DAYS = int(os.environ.get('CHALLENGE_ACTIVE_DAYS', '14'))
+    # Students per bulk insert in the nightly run
+    BULK_CHUNK_SIZE = 1000
+    # Skill pool refresh interval, picks up newly seeded skills
+    SKILL_POOL_TTL_SECONDS = 600
+    
+    _skill_pool = None
+    _skill_pool_loaded_at = 0
+    _skill_pool_lock = threading.Lock()
+    
+    @staticmethod
+    def generate_all_daily_challenges(active_days=None, chunk_size=None):
+        """
+        Generate today's challenges for every active student in bulk.
+        
+        Meant to run nightly from the CLI or a scheduler. Expired challenges
+        are closed in one UPDATE, then students who logged in recently and
+        have no active challenges get 3 new ones, inserted and committed
+        in chunks. Lazy generation in get_active_challenges remains the
+        fallback for students the run missed.
+        
+        Args:
+            active_days: Only students who logged in within this many days
+            chunk_size: Students per bulk insert
+        
+        Returns:
+            dict with expired, students and challenges counts
+        """
+        active_days = active_days if active_days is not None else ChallengeService.ACTIVE_DAYS
+        chunk_size = chunk_size or ChallengeService.BULK_CHUNK_SIZE
+        now = datetime.utcnow()
+        today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
+        expires_at = today_start + timedelta(days=1)
+        
+        expired = ChallengeService.expire_challenges(now)
+        
+        has_active = db.session.query(DailyChallenge.id).filter(
+            DailyChallenge.student_id == Student.id,
+            DailyChallenge.status == 'active'
+        ).exists()
+        students = db.session.query(
+            Student.id,
+            Student.grade,
+            StudentProgress.current_level
+        ).join(
+            User, User.id == Student.user_id
+        ).outerjoin(
+            StudentProgress, StudentProgress.student_id == Student.id
+        ).filter(
+            User.last_login >= now - timedelta(days=active_days),
+            ~has_active
+        ).order_by(Student.id).all()
+        
+        created = 0
+        for start in range(0, len(students), chunk_size):
+            rows = []
+            for student_id, grade, level in students[start:start + chunk_size]:
+                difficulties = ChallengeService._get_difficulty_distribution(level or 1)
+                challenge_types = random.sample(list(ChallengeService.CHALLENGE_TYPES.keys()), 3)
+                for challenge_type, difficulty in zip(challenge_types, difficulties):
+                    row = ChallengeService._build_challenge(
+                        student_id, grade, challenge_type, difficulty, expires_at
+                    )
+                    row['created_at'] = now
+                    rows.append(row)
+            db.session.execute(DailyChallenge.__table__.insert(), rows)
+            db.session.commit()
+            created += len(rows)
+        
+        return {
+            'expired': expired,
+            'students': len(students),
+            'challenges': created
+        }
+    
+    @staticmethod
+    def expire_challenges(now=None):
+        """Mark every active challenge past its expiry as expired in one UPDATE."""
+        now = now or datetime.utcnow()
+        expired = DailyChallenge.query.filter(
+            DailyChallenge.status == 'active',
+            DailyChallenge.expires_at < now
+        ).update({DailyChallenge.status: 'expired'}, synchronize_session=False)
+        db.session.commit()
+        return expired
+    
     @staticmethod
     def generate_daily_challenges(student_id):
         """Generate 3 new daily challenges for a student."""
@@ -78,7 +169,8 @@ class ChallengeService:
                 student_id,
                 challenge_type,
                 difficulty,
-                expires_at
+                expires_at,
+                grade=student.grade
             )
             challenges.append(challenge)
         
@@ -100,8 +192,17 @@ class ChallengeService:
         return random.sample(pool, 3)
     
     @staticmethod
-    def _create_challenge(student_id, challenge_type, difficulty, expires_at):
+    def _create_challenge(student_id, challenge_type, difficulty, expires_at, grade=None):
         """Create a single challenge."""
+        challenge = DailyChallenge(**ChallengeService._build_challenge(
+            student_id, grade, challenge_type, difficulty, expires_at
+        ))
+        db.session.add(challenge)
+        return challenge
+    
+    @staticmethod
+    def _build_challenge(student_id, grade, challenge_type, difficulty, expires_at):
+        """Build the column values for a single challenge."""
         config = ChallengeService.CHALLENGE_TYPES[challenge_type]
         target = config['targets'][difficulty]
         bonus_xp = config['xp'][difficulty]
@@ -111,31 +212,83 @@ class ChallengeService:
         description = config['description_template'].format(target=target, skill_name='a skill')
         
         if challenge_type == 'skill_focus':
-            skill = Skill.query.order_by(db.func.random()).first()
+            skill = ChallengeService._sample_skill(grade, difficulty)
             if skill:
-                target_skill_id = skill.id
+                target_skill_id, skill_name = skill
                 description = config['description_template'].format(
                     target=target,
-                    skill_name=skill.name
+                    skill_name=skill_name
                 )
         else:
             description = config['description_template'].format(target=target)
         
-        challenge = DailyChallenge(
-            student_id=student_id,
-            challenge_type=challenge_type,
-            difficulty=difficulty,
-            description=description,
-            target_value=target,
-            current_progress=0,
-            target_skill_id=target_skill_id,
-            bonus_xp=bonus_xp,
-            status='active',
-            expires_at=expires_at
-        )
+        return {
+            'student_id': student_id,
+            'challenge_type': challenge_type,
+            'difficulty': difficulty,
+            'description': description,
+            'target_value': target,
+            'current_progress': 0,
+            'target_skill_id': target_skill_id,
+            'bonus_xp': bonus_xp,
+            'status': 'active',
+            'expires_at': expires_at
+        }
+    
+    @staticmethod
+    def _sample_skill(grade, difficulty):
+        """
+        Pick a random (skill_id, name) without touching the database.
         
-        db.session.add(challenge)
-        return challenge
+        Prefers skills at the student's grade with questions of the
+        challenge difficulty, then any skill at the grade, then any skill.
+        """
+        pool = ChallengeService._get_skill_pool()
+        for key in ((grade, difficulty), (grade, None), (None, None)):
+            candidates = pool.get(key)
+            if candidates:
+                return random.choice(candidates)
+        return None
+    
+    @staticmethod
+    def _get_skill_pool():
+        """
+        Get the cached skill pool, keyed by (grade, difficulty).
+        
+        Built from one query over skills and their question difficulties;
+        (grade, None) holds every skill at a grade and (None, None) every
+        skill. An empty pool is not cached so seeding is picked up.
+        """
+        with ChallengeService._skill_pool_lock:
+            pool = ChallengeService._skill_pool
+            now = time.monotonic()
+            if pool is not None and now - ChallengeService._skill_pool_loaded_at < ChallengeService.SKILL_POOL_TTL_SECONDS:
+                return pool
+            
+            rows = db.session.query(
+                Skill.id,
+                Skill.name,
+                Skill.grade_level,
+                Question.difficulty
+            ).outerjoin(
+                Question, Question.skill_id == Skill.id
+            ).distinct().all()
+            
+            pool = {}
+            seen = set()
+            for skill_id, name, grade, difficulty in rows:
+                skill = (skill_id, name)
+                if difficulty:
+                    pool.setdefault((grade, difficulty), []).append(skill)
+                if skill_id not in seen:
+                    seen.add(skill_id)
+                    pool.setdefault((grade, None), []).append(skill)
+                    pool.setdefault((None, None), []).append(skill)
+            
+            if pool:
+                ChallengeService._skill_pool = pool
+                ChallengeService._skill_pool_loaded_at = now
+            return pool
     
     @staticmethod
     def _expire_old_challenges(student_id):
@@ -207,6 +360,67 @@ class ChallengeService:
         db.session.commit()
         return challenge
     
+    @staticmethod
+    def record_answer(student_id, skill_id, correct, commit=True):
+        """
+        Advance a student's active challenges for one answered question.
+        
+        Question marathons count correct answers, skill focus counts answers
+        on the target skill and perfect streaks reset on a wrong answer.
+        
+        Args:
+            student_id: Student ID
+            skill_id: Skill of the answered question
+            correct: Whether the answer was correct
+            commit: Commit the update (False only flushes it so the caller
+                can batch it with other writes in one transaction)
+        
+        Returns:
+            list of challenges completed by this answer
+        """
+        now = datetime.utcnow()
+        challenges = DailyChallenge.query.filter(
+            DailyChallenge.student_id == student_id,
+            DailyChallenge.status == 'active'
+        ).all()
+        
+        completed = []
+        for challenge in challenges:
+            if challenge.is_expired:
+                challenge.status = 'expired'
+                continue
+            
+            if challenge.challenge_type == 'perfect_streak':
+                advance = 1 if correct else -challenge.current_progress
+            elif challenge.challenge_type == 'skill_focus':
+                advance = 1 if skill_id is not None and challenge.target_skill_id == skill_id else 0
+            else:
+                advance = 1 if correct else 0
+            
+            if not advance:
+                continue
+            
+            if not challenge.started_at:
+                challenge.started_at = now
+            challenge.current_progress = min(challenge.current_progress + advance, challenge.target_value)
+            
+            if challenge.current_progress >= challenge.target_value:
+                challenge.status = 'completed'
+                challenge.completed_at = now
+                GamificationService.award_xp(
+                    challenge.student_id,
+                    'daily_challenge',
+                    base_xp=challenge.bonus_xp,
+                    commit=False
+                )
+                completed.append(challenge)
+        
+        if commit:
+            db.session.commit()
+        else:
+            db.session.flush()
+        return completed
+    
     @staticmethod
     def get_challenge_stats(student_id):
         """Get challenge completion statistics."""
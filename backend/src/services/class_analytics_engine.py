@@ -0,0 +1,265 @@
+"""
+Class analytics engine for roster-wide performance numbers.
+
+Loads every LearningPath and StudentSession row for a set of students in
+two projected queries and keeps them as NumPy column arrays. Per-student
+accuracies, per-skill averages and per-day trends are then computed with
+group-by reductions (np.bincount over integer group codes) instead of a
+query and a Python loop per student, so a report over a whole grade
+level costs about as many queries as one over a single class.
+"""
+from datetime import date
+import numpy as np
+from src.database import db
+from src.models.student import Student
+from src.models.student_session import StudentSession
+from src.models.learning_path import LearningPath
+from src.models.assessment import Skill
+
+
+def _round2(values):
+    """Round to 2 places the way Python's round() does, for stable report values."""
+    return np.array([round(value, 2) for value in values.tolist()], dtype=np.float64)
+
+
+class ClassAnalyticsEngine:
+    """Vectorized analytics over one roster of students."""
+
+    # Accuracy bands for the class distribution, best first
+    DISTRIBUTION_BANDS = [
+        ('excellent', 0.9),
+        ('good', 0.8),
+        ('fair', 0.7),
+        ('needs_improvement', None)
+    ]
+
+    def __init__(self, student_ids, since=None):
+        """
+        Args:
+            student_ids: Roster, in the order rankings break ties
+            since: Only load sessions started at or after this datetime
+                (all sessions if None)
+        """
+        self.student_ids = np.asarray(list(student_ids), dtype=np.int64)
+        self.since = since
+        self._order = np.argsort(self.student_ids, kind='stable')
+        self._paths = None
+        self._sessions = None
+
+    def _index(self, ids):
+        """Map student ids to their position in the roster."""
+        positions = np.searchsorted(self.student_ids, ids, sorter=self._order)
+        return self._order[positions]
+
+    # ------------------------------------------------------------------
+    # Loading
+    # ------------------------------------------------------------------
+
+    @property
+    def paths(self):
+        """LearningPath columns for the roster: student, skill, skill_name, has_skill, accuracy."""
+        if self._paths is None:
+            rows = db.session.query(
+                LearningPath.student_id,
+                LearningPath.skill_id,
+                Skill.name,
+                LearningPath.current_accuracy
+            ).outerjoin(
+                Skill, Skill.id == LearningPath.skill_id
+            ).filter(
+                LearningPath.student_id.in_(self.student_ids.tolist())
+            ).order_by(LearningPath.id).all()
+
+            self._paths = {
+                'student': self._index(np.fromiter((r[0] for r in rows), dtype=np.int64, count=len(rows))),
+                'skill': np.fromiter((r[1] for r in rows), dtype=np.int64, count=len(rows)),
+                'skill_name': [r[2] for r in rows],
+                'has_skill': np.fromiter((r[2] is not None for r in rows), dtype=bool, count=len(rows)),
+                'accuracy': np.fromiter((r[3] or 0.0 for r in rows), dtype=np.float64, count=len(rows))
+            }
+        return self._paths
+
+    @property
+    def sessions(self):
+        """StudentSession columns for the roster: student, day, started, questions, correct, seconds."""
+        if self._sessions is None:
+            query = db.session.query(
+                StudentSession.student_id,
+                StudentSession.started_at,
+                StudentSession.ended_at,
+                StudentSession.questions_answered,
+                StudentSession.questions_correct
+            ).filter(
+                StudentSession.student_id.in_(self.student_ids.tolist())
+            )
+            if self.since is not None:
+                query = query.filter(StudentSession.started_at >= self.since)
+            rows = query.all()
+
+            count = len(rows)
+            started = [r[1] for r in rows]
+            self._sessions = {
+                'student': self._index(np.fromiter((r[0] for r in rows), dtype=np.int64, count=count)),
+                'day': np.fromiter((s.toordinal() for s in started), dtype=np.int64, count=count),
+                'started': np.array(started, dtype='datetime64[us]') if count else np.array([], dtype='datetime64[us]'),
+                'questions': np.fromiter((r[3] or 0 for r in rows), dtype=np.int64, count=count),
+                'correct': np.fromiter((r[4] or 0 for r in rows), dtype=np.int64, count=count),
+                'seconds': np.fromiter(
+                    ((r[2] - r[1]).total_seconds() if r[2] else 0.0 for r in rows),
+                    dtype=np.float64, count=count
+                )
+            }
+        return self._sessions
+
+    # ------------------------------------------------------------------
+    # Students
+    # ------------------------------------------------------------------
+
+    def student_accuracies(self):
+        """
+        Mean path accuracy per student.
+
+        Returns:
+            (accuracies, has_paths) arrays aligned with the roster; students
+            without paths have accuracy 0
+        """
+        paths = self.paths
+        n = len(self.student_ids)
+        totals = np.bincount(paths['student'], weights=paths['accuracy'], minlength=n)
+        counts = np.bincount(paths['student'], minlength=n)
+        has_paths = counts > 0
+        accuracies = np.divide(totals, counts, out=np.zeros(n), where=has_paths)
+        return accuracies, has_paths
+
+    def distribution(self):
+        """Count students with paths in each accuracy band."""
+        accuracies, has_paths = self.student_accuracies()
+        accuracies = accuracies[has_paths]
+
+        distribution = {}
+        upper = None
+        for band, lower in self.DISTRIBUTION_BANDS:
+            in_band = np.ones(len(accuracies), dtype=bool)
+            if lower is not None:
+                in_band &= accuracies >= lower
+            if upper is not None:
+                in_band &= accuracies < upper
+            distribution[band] = int(in_band.sum())
+            upper = lower
+        return distribution
+
+    def rankings(self):
+        """
+        Every student ranked by rounded mean accuracy, best first.
+
+        Ties keep roster order. Returns a list of dicts with student_id,
+        student_name and accuracy.
+        """
+        accuracies, _ = self.student_accuracies()
+        rounded = _round2(accuracies)
+        order = np.argsort(-rounded, kind='stable')
+
+        names = dict(db.session.query(Student.id, Student.name).filter(
+            Student.id.in_(self.student_ids.tolist())
+        ).all())
+        return [{
+            'student_id': int(self.student_ids[i]),
+            'student_name': names.get(int(self.student_ids[i]), 'Unknown'),
+            'accuracy': float(rounded[i])
+        } for i in order]
+
+    def comparison(self, student_id):
+        """Compare one roster student's mean accuracy to the others with paths."""
+        accuracies, has_paths = self.student_accuracies()
+        student_avg = float(accuracies[self._index(np.array([student_id]))[0]])
+        all_accuracies = accuracies[has_paths]
+
+        below_student = int((all_accuracies < student_avg).sum())
+        total = len(all_accuracies)
+        return {
+            'student_accuracy': round(student_avg, 2),
+            'class_average': round(float(all_accuracies.mean()), 2) if total else 0,
+            'percentile': round(below_student / total * 100, 0) if total else 50,
+            'rank': below_student + 1,
+            'total_students': total
+        }
+
+    # ------------------------------------------------------------------
+    # Skills
+    # ------------------------------------------------------------------
+
+    def skill_heatmap(self):
+        """
+        Mean accuracy per skill across the roster, struggling skills first.
+
+        Ties keep the order skills first appear in the paths.
+        """
+        paths = self.paths
+        with_skill = np.flatnonzero(paths['has_skill'])
+        if not len(with_skill):
+            return []
+
+        skills, first_seen, codes = np.unique(paths['skill'][with_skill], return_index=True, return_inverse=True)
+        totals = np.bincount(codes, weights=paths['accuracy'][with_skill], minlength=len(skills))
+        counts = np.bincount(codes, minlength=len(skills))
+        averages = _round2(totals / counts)
+
+        by_appearance = np.argsort(first_seen, kind='stable')
+        order = by_appearance[np.argsort(averages[by_appearance], kind='stable')]
+        return [{
+            'skill_id': int(skills[i]),
+            'skill_name': paths['skill_name'][with_skill[first_seen[i]]],
+            'avg_accuracy': float(averages[i]),
+            'student_count': int(counts[i])
+        } for i in order]
+
+    # ------------------------------------------------------------------
+    # Sessions
+    # ------------------------------------------------------------------
+
+    def overall(self, active_since):
+        """Question totals and engagement over the loaded sessions."""
+        sessions = self.sessions
+        total_questions = int(sessions['questions'].sum())
+        total_correct = int(sessions['correct'].sum())
+
+        recent = sessions['started'] >= np.datetime64(active_since, 'us')
+        active_students = len(np.unique(sessions['student'][recent]))
+        n = len(self.student_ids)
+        return {
+            'avg_accuracy': round(total_correct / total_questions, 2) if total_questions > 0 else 0,
+            'total_questions': total_questions,
+            'engagement_rate': round(active_students / n, 2) if n else 0,
+            'active_students': active_students,
+            'total_sessions': len(sessions['questions'])
+        }
+
+    def daily_trend(self):
+        """Per-day questions, accuracy, time, sessions and active students, oldest first."""
+        sessions = self.sessions
+        if not len(sessions['day']):
+            return []
+
+        days, codes = np.unique(sessions['day'], return_inverse=True)
+        m = len(days)
+        questions = np.bincount(codes, weights=sessions['questions'], minlength=m)
+        correct = np.bincount(codes, weights=sessions['correct'], minlength=m)
+        seconds = np.bincount(codes, weights=sessions['seconds'], minlength=m)
+        session_counts = np.bincount(codes, minlength=m)
+
+        # Distinct (day, student) pairs, counted per day
+        pairs = np.unique(codes * len(self.student_ids) + sessions['student'])
+        active = np.bincount(pairs // len(self.student_ids), minlength=m)
+
+        trend = []
+        for i in range(m):
+            accuracy = correct[i] / questions[i] if questions[i] > 0 else 0
+            trend.append({
+                'date': date.fromordinal(int(days[i])).isoformat(),
+                'accuracy': round(float(accuracy), 2),
+                'questions': int(questions[i]),
+                'time_hours': round(float(seconds[i]) / 3600, 1),
+                'sessions': int(session_counts[i]),
+                'active_students': int(active[i])
+            })
+        return trend
@@ -1,19 +1,39 @@
 """
 Service for managing class groups and memberships.
+
+Class rosters (members with their level and XP) are loaded with one
+joined query and cached per class. The cache is dropped when a
+membership change or an XP change for one of the members commits in
+this process, and a roster is reloaded once its class:{id} cache tag
+has been bumped by a commit in another worker (see cache_tags).
 """
 import random
 import string
-from sqlalchemy import func
-from src.database import db
+import threading
+import time
+from collections import OrderedDict
+from sqlalchemy import func, event
+from sqlalchemy.orm import object_session
+from src.database import db, on_commit
 from src.models.class_group import ClassGroup, ClassMembership
 from src.models.student import Student
 from src.models.user import User
 from src.models.gamification import StudentProgress
+from src.services.cache_tags import CacheTags
 
 
 class ClassService:
     """Service for class group operations."""
 
+    # Roster lifetime; other workers' writes are caught by the class tag
+    ROSTER_TTL_SECONDS = 600
+    # Most classes kept in memory per process
+    MAX_ROSTERS = 5000
+
+    _rosters = OrderedDict()
+    _student_classes = {}
+    _lock = threading.RLock()
+
     @staticmethod
     def generate_invite_code():
         """Generate unique 6-character invite code."""
@@ -83,6 +103,7 @@ class ClassService:
             raise ValueError("Only the teacher can delete this class")
 
         db.session.delete(class_group)
+        ClassService.queue_invalidation(class_id)
         db.session.commit()
 
     @staticmethod
@@ -110,6 +131,7 @@ class ClassService:
         )
 
         db.session.add(membership)
+        ClassService.queue_invalidation(class_group.id)
         db.session.commit()
 
         return class_group
@@ -129,6 +151,7 @@ class ClassService:
             raise ValueError("Teachers cannot leave their own class")
 
         db.session.delete(membership)
+        ClassService.queue_invalidation(class_id)
         db.session.commit()
 
     @staticmethod
@@ -150,50 +173,52 @@ class ClassService:
             raise ValueError("Student is not a member")
 
         db.session.delete(membership)
+        ClassService.queue_invalidation(class_id)
         db.session.commit()
 
     @staticmethod
     def get_student_classes(student_id):
         """Get all classes a student is in."""
-        memberships = ClassMembership.query.filter_by(student_id=student_id).all()
-
-        classes = []
-        for membership in memberships:
-            class_group = ClassGroup.query.get(membership.class_id)
-            if class_group:
-                class_dict = class_group.to_dict()
-                class_dict['role'] = membership.role
-                class_dict['joined_at'] = membership.joined_at.isoformat()
-                classes.append(class_dict)
-
-        return classes
+        member_count = db.session.query(
+            func.count(ClassMembership.id)
+        ).filter(
+            ClassMembership.class_id == ClassGroup.id
+        ).correlate(ClassGroup).scalar_subquery()
+
+        rows = db.session.query(
+            ClassGroup.id,
+            ClassGroup.name,
+            ClassGroup.description,
+            ClassGroup.teacher_id,
+            ClassGroup.grade_level,
+            ClassGroup.invite_code,
+            ClassGroup.created_at,
+            member_count.label('member_count'),
+            ClassMembership.role,
+            ClassMembership.joined_at
+        ).join(
+            ClassMembership, ClassMembership.class_id == ClassGroup.id
+        ).filter(
+            ClassMembership.student_id == student_id
+        ).order_by(ClassMembership.id).all()
+
+        return [{
+            'id': row.id,
+            'name': row.name,
+            'description': row.description,
+            'teacher_id': row.teacher_id,
+            'grade_level': row.grade_level,
+            'invite_code': row.invite_code,
+            'created_at': row.created_at.isoformat(),
+            'member_count': row.member_count,
+            'role': row.role,
+            'joined_at': row.joined_at.isoformat()
+        } for row in rows]
 
     @staticmethod
     def get_class_members(class_id):
         """Get all members of a class with their stats."""
-        memberships = ClassMembership.query.filter_by(class_id=class_id).all()
-
-        members = []
-        for membership in memberships:
-            student = Student.query.get(membership.student_id)
-            if student:
-                progress = StudentProgress.query.filter_by(student_id=student.id).first()
-
-                name_parts = student.name.split(' ', 1)
-                members.append({
-                    'id': student.id,
-                    'name': student.name,
-                    'first_name': name_parts[0] if name_parts else student.name,
-                    'last_name': name_parts[1] if len(name_parts) > 1 else '',
-                    'grade': student.grade,
-                    'avatar': student.avatar if hasattr(student, 'avatar') else '😊',
-                    'level': progress.current_level if progress else 1,
-                    'xp': progress.total_xp if progress else 0,
-                    'role': membership.role,
-                    'joined_at': membership.joined_at.isoformat()
-                })
-
-        return members
+        return [dict(member) for member in ClassService._get_roster(class_id)]
 
     @staticmethod
     def get_class_leaderboard(class_id):
@@ -212,7 +237,7 @@ class ClassService:
     @staticmethod
     def get_class_stats(class_id):
         """Get aggregate class statistics."""
-        members = ClassService.get_class_members(class_id)
+        members = ClassService._get_roster(class_id)
 
         if not members:
             return {
@@ -224,11 +249,11 @@ class ClassService:
             }
 
         total_xp = sum(m['xp'] for m in members)
-        average_xp = total_xp // len(members) if members else 0
-        average_level = sum(m['level'] for m in members) // len(members) if members else 0
+        average_xp = total_xp // len(members)
+        average_level = sum(m['level'] for m in members) // len(members)
 
         # Get top student
-        top_student = max(members, key=lambda x: x['xp']) if members else None
+        top_student = max(members, key=lambda x: x['xp'])
 
         return {
             'member_count': len(members),
@@ -239,6 +264,132 @@ class ClassService:
                 'name': top_student['name'],
                 'xp': top_student['xp'],
                 'level': top_student['level']
-            } if top_student else None
+            }
         }
 
+    @staticmethod
+    def _get_roster(class_id):
+        """
+        Get the cached roster of a class, loading it if missing or stale.
+
+        The list and its entries are shared; callers must copy before
+        modifying them.
+        """
+        now = time.monotonic()
+        with ClassService._lock:
+            cached = ClassService._rosters.get(class_id)
+            if cached is not None and now - cached[0] >= ClassService.ROSTER_TTL_SECONDS:
+                cached = None
+        if cached is not None and CacheTags.is_current(cached[2]):
+            with ClassService._lock:
+                if class_id in ClassService._rosters:
+                    ClassService._rosters.move_to_end(class_id)
+            return cached[1]
+
+        versions = CacheTags.versions([CacheTags.class_(class_id)])
+        roster = ClassService._load_roster(class_id)
+        if versions is None:
+            return roster
+
+        with ClassService._lock:
+            ClassService._forget(class_id)
+            ClassService._rosters[class_id] = (now, roster, versions)
+            for member in roster:
+                ClassService._student_classes.setdefault(member['id'], set()).add(class_id)
+            while len(ClassService._rosters) > ClassService.MAX_ROSTERS:
+                ClassService._forget(next(iter(ClassService._rosters)))
+        return roster
+
+    @staticmethod
+    def _load_roster(class_id):
+        """Load every member of a class with their progress in one query."""
+        rows = db.session.query(
+            Student.id,
+            Student.name,
+            Student.grade,
+            Student.avatar,
+            StudentProgress.current_level,
+            StudentProgress.total_xp,
+            ClassMembership.role,
+            ClassMembership.joined_at
+        ).join(
+            Student, Student.id == ClassMembership.student_id
+        ).outerjoin(
+            StudentProgress, StudentProgress.student_id == Student.id
+        ).filter(
+            ClassMembership.class_id == class_id
+        ).order_by(ClassMembership.id).all()
+
+        members = []
+        for row in rows:
+            name_parts = row.name.split(' ', 1)
+            members.append({
+                'id': row.id,
+                'name': row.name,
+                'first_name': name_parts[0] if name_parts else row.name,
+                'last_name': name_parts[1] if len(name_parts) > 1 else '',
+                'grade': row.grade,
+                'avatar': row.avatar,
+                'level': row.current_level if row.current_level is not None else 1,
+                'xp': row.total_xp if row.total_xp is not None else 0,
+                'role': row.role,
+                'joined_at': row.joined_at.isoformat()
+            })
+        return members
+
+    @staticmethod
+    def queue_invalidation(class_id):
+        """Drop a class roster when the current transaction commits."""
+        db.session.info.setdefault('class_roster_invalidations', set()).add(class_id)
+
+    @staticmethod
+    def invalidate(class_id=None, student_id=None):
+        """Drop one class roster, every roster a student is on, or all rosters."""
+        with ClassService._lock:
+            if class_id is None and student_id is None:
+                ClassService._rosters.clear()
+                ClassService._student_classes.clear()
+                return
+            if class_id is not None:
+                ClassService._forget(class_id)
+            if student_id is not None:
+                for cached_class_id in list(ClassService._student_classes.get(student_id, ())):
+                    ClassService._forget(cached_class_id)
+
+    @staticmethod
+    def _forget(class_id):
+        """Remove a roster and its reverse index entries; caller holds the lock."""
+        cached = ClassService._rosters.pop(class_id, None)
+        if cached is None:
+            return
+        for member in cached[1]:
+            class_ids = ClassService._student_classes.get(member['id'])
+            if class_ids is not None:
+                class_ids.discard(class_id)
+                if not class_ids:
+                    del ClassService._student_classes[member['id']]
+
+
+@event.listens_for(StudentProgress.total_xp, 'set')
+def _queue_xp_invalidation(target, value, oldvalue, initiator):
+    """Drop cached rosters showing a student whose XP is changing."""
+    if target.student_id is None or value == oldvalue:
+        return
+    session = object_session(target) or db.session
+    session.info.setdefault('class_roster_student_invalidations', set()).add(target.student_id)
+
+
+def _invalidate_committed_classes(class_ids):
+    """Drop rosters whose members just changed."""
+    for class_id in class_ids:
+        ClassService.invalidate(class_id=class_id)
+
+
+def _invalidate_committed_students(student_ids):
+    """Drop rosters showing a student whose XP just changed."""
+    for student_id in student_ids:
+        ClassService.invalidate(student_id=student_id)
+
+
+on_commit('class_roster_invalidations', _invalidate_committed_classes)
+on_commit('class_roster_student_invalidations', _invalidate_committed_students)
@@ -0,0 +1,256 @@
+"""
+Cohort statistics service for comparing a student against their grade or class.
+
+A periodic batch job (refresh_cohort_stats.py) computes the comparison
+metrics for every student with a few grouped queries per chunk and folds
+them into one quantile sketch per (cohort, metric), stored as
+CohortSketch rows. A comparison then loads the cohort's sketches in one
+indexed read and answers both the cohort mean and the student's
+percentile against the whole cohort, however many students it has.
+Cohorts without stored sketches (a class created since the last refresh)
+are built on demand from their members.
+"""
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from sqlalchemy import func
+from src.database import db
+from src.models.student import Student
+from src.models.student_session import StudentDailyStats
+from src.models.learning_path import LearningPath
+from src.models.class_group import ClassMembership
+from src.models.cohort_stats import CohortSketch
+from src.services.engagement_service import EngagementService
+from src.services.quantile_sketch import TDigest
+
+
+class CohortStatsService:
+    """Service for cohort quantile sketches and comparisons."""
+
+    # Metrics kept per cohort, with the places their averages are rounded to
+    METRICS = {
+        'accuracy': 1,
+        'practice_time': 1,
+        'skills_mastered': 1,
+        'learning_velocity': 2,
+        'engagement_score': 1
+    }
+    # Sketch size; higher is more accurate
+    COMPRESSION = 200
+    # Students per batch when refreshing
+    REFRESH_CHUNK_SIZE = 1000
+    # Cached cohort lifetime, picks up refreshes run by other workers
+    COHORT_TTL_SECONDS = 300
+    # Most cohorts kept in memory per process
+    MAX_COHORTS = 2000
+
+    _cohorts = OrderedDict()
+    _lock = threading.RLock()
+
+    # ------------------------------------------------------------------
+    # Student metrics
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def compute_student_metrics(student_ids, now=None):
+        """
+        Compute comparison metrics for a set of students in three grouped queries.
+
+        Accuracy and practice time (minutes of ended sessions) are
+        lifetime totals from the daily stats rollup; engagement uses the
+        standard EngagementService window.
+
+        Returns:
+            dict of student_id -> metrics dict (accuracy, practice_time,
+            skills_mastered, learning_velocity, engagement_score)
+        """
+        student_ids = list(student_ids)
+        if not student_ids:
+            return {}
+        now = now or datetime.utcnow()
+
+        lifetime = {row[0]: row[1:] for row in db.session.query(
+            StudentDailyStats.student_id,
+            func.sum(StudentDailyStats.questions_answered),
+            func.sum(StudentDailyStats.questions_correct),
+            func.sum(StudentDailyStats.practice_seconds)
+        ).filter(
+            StudentDailyStats.student_id.in_(student_ids)
+        ).group_by(StudentDailyStats.student_id).all()}
+
+        engagement = EngagementService.compute(student_ids, now=now)
+
+        mastered = dict(db.session.query(
+            LearningPath.student_id,
+            func.count(LearningPath.id)
+        ).filter(
+            LearningPath.student_id.in_(student_ids),
+            LearningPath.mastery_achieved == True
+        ).group_by(LearningPath.student_id).all())
+
+        metrics = {}
+        for student_id in student_ids:
+            questions, correct, seconds = lifetime.get(student_id, (0, 0, 0.0))
+            questions, correct, seconds = questions or 0, correct or 0, seconds or 0.0
+            accuracy = (correct / questions * 100) if questions > 0 else 0
+
+            skills_mastered = mastered.get(student_id, 0)
+            metrics[student_id] = {
+                'accuracy': round(accuracy, 1),
+                'practice_time': round(seconds / 60, 1),
+                'skills_mastered': skills_mastered,
+                'learning_velocity': round(skills_mastered / 4, 2),  # Assume 4 weeks
+                'engagement_score': round(engagement[student_id]['score'], 1)
+            }
+        return metrics
+
+    # ------------------------------------------------------------------
+    # Refresh
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def refresh():
+        """
+        Rebuild every grade and class sketch from current student metrics.
+
+        Students are processed in chunks; the old sketches are replaced in
+        one transaction at the end so readers never see a partial refresh.
+
+        Returns:
+            dict with students and cohorts counts
+        """
+        students = db.session.query(Student.id, Student.grade).order_by(Student.id).all()
+        classes_by_student = {}
+        for student_id, class_id in db.session.query(ClassMembership.student_id, ClassMembership.class_id).all():
+            classes_by_student.setdefault(student_id, []).append(class_id)
+
+        digests = {}
+        now = datetime.utcnow()
+        chunk_size = CohortStatsService.REFRESH_CHUNK_SIZE
+        for start in range(0, len(students), chunk_size):
+            chunk = students[start:start + chunk_size]
+            metrics = CohortStatsService.compute_student_metrics([s.id for s in chunk], now=now)
+            for student_id, grade in chunk:
+                cohorts = [('class', class_id) for class_id in classes_by_student.get(student_id, [])]
+                if grade is not None:
+                    cohorts.append(('grade', grade))
+                for cohort in cohorts:
+                    CohortStatsService._add(digests.setdefault(cohort, {}), metrics[student_id])
+
+        CohortSketch.query.delete(synchronize_session=False)
+        values = [{
+            'scope': scope,
+            'scope_id': scope_id,
+            'metric': metric,
+            'count': int(digest.count),
+            'total': digest.total,
+            'digest': digest.to_dict(),
+            'refreshed_at': now
+        } for (scope, scope_id), cohort in digests.items() for metric, digest in cohort.items()]
+        if values:
+            db.session.execute(CohortSketch.__table__.insert(), values)
+        db.session.commit()
+        CohortStatsService.invalidate()
+
+        return {'students': len(students), 'cohorts': len(digests)}
+
+    @staticmethod
+    def _add(cohort, metrics):
+        """Add one student's metrics to a cohort's digests."""
+        for metric in CohortStatsService.METRICS:
+            digest = cohort.get(metric)
+            if digest is None:
+                digest = cohort[metric] = TDigest(CohortStatsService.COMPRESSION)
+            digest.add(metrics[metric])
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def get_cohort(scope, scope_id):
+        """
+        Get a cohort's sketches.
+
+        Args:
+            scope: 'grade' or 'class'
+            scope_id: Grade level or class id
+
+        Returns:
+            dict of metric -> TDigest, empty if the cohort has no students.
+            The digests are shared; callers must not modify them.
+        """
+        key = (scope, scope_id)
+        now = time.monotonic()
+        with CohortStatsService._lock:
+            cached = CohortStatsService._cohorts.get(key)
+            if cached is not None and now - cached[0] < CohortStatsService.COHORT_TTL_SECONDS:
+                CohortStatsService._cohorts.move_to_end(key)
+                return cached[1]
+
+        rows = CohortSketch.query.filter_by(scope=scope, scope_id=scope_id).all()
+        if rows:
+            cohort = {row.metric: TDigest.from_dict(row.digest) for row in rows}
+        else:
+            cohort = CohortStatsService._build(scope, scope_id)
+
+        with CohortStatsService._lock:
+            CohortStatsService._cohorts[key] = (now, cohort)
+            CohortStatsService._cohorts.move_to_end(key)
+            while len(CohortStatsService._cohorts) > CohortStatsService.MAX_COHORTS:
+                CohortStatsService._cohorts.popitem(last=False)
+        return cohort
+
+    @staticmethod
+    def _build(scope, scope_id):
+        """Build one cohort's sketches directly from its members."""
+        if scope == 'class':
+            query = db.session.query(ClassMembership.student_id).filter(ClassMembership.class_id == scope_id)
+        else:
+            query = db.session.query(Student.id).filter(Student.grade == scope_id)
+        student_ids = [row[0] for row in query.all()]
+
+        cohort = {}
+        for metrics in CohortStatsService.compute_student_metrics(student_ids).values():
+            CohortStatsService._add(cohort, metrics)
+        return cohort
+
+    @staticmethod
+    def compare(student_metrics, scope, scope_id):
+        """
+        Compare a cohort member's metrics against the rest of the cohort.
+
+        Averages leave the student out, as before; percentiles place the
+        student within the whole cohort (50 means the middle).
+
+        Returns:
+            (averages, percentiles, cohort_size)
+        """
+        cohort = CohortStatsService.get_cohort(scope, scope_id)
+        averages = {}
+        percentiles = {}
+        size = 0
+        for metric, places in CohortStatsService.METRICS.items():
+            digest = cohort.get(metric)
+            value = student_metrics[metric]
+            if digest is None or not digest.count:
+                averages[metric] = 0
+                percentiles[metric] = 50
+                continue
+            size = int(digest.count)
+
+            # The student is one of the cohort's values
+            others = digest.count - 1
+            averages[metric] = round((digest.total - value) / others, places) if others > 0 else 0
+            percentiles[metric] = round(min(max(digest.cdf(value), 0.0), 1.0) * 100)
+        return averages, percentiles, size
+
+    @staticmethod
+    def invalidate(scope=None, scope_id=None):
+        """Drop one cached cohort, or all cohorts."""
+        with CohortStatsService._lock:
+            if scope is None:
+                CohortStatsService._cohorts.clear()
+            else:
+                CohortStatsService._cohorts.pop((scope, scope_id), None)
@@ -0,0 +1,224 @@
+"""
+Daily stats service for the per-student, per-day, per-skill practice rollup.
+
+StudentDailyStats rows are kept up to date from the session write paths
+(see MonitoringService): a started session adds one to the day's session
+count, every answer adds to its question counters and an ended session
+adds its duration. Trend and report reads then fetch the rollup rows for
+a date range in one scan of the (student_id, day, skill_id) index instead
+of loading and bucketing raw StudentSession rows, so a 365-day chart
+costs about the same as a 7-day one.
+"""
+from collections import namedtuple
+from datetime import datetime
+from src.database import db, upsert
+from src.models.student_session import StudentSession, StudentDailyStats
+
+# Detached rollup row, shaped like get_stats() rows, for batch loaders
+StatsRow = namedtuple('StatsRow', [
+    'day', 'skill_id', 'questions_answered', 'questions_correct', 'practice_seconds', 'sessions'
+])
+
+
+def _empty():
+    """Zeroed totals for one bucket."""
+    return {'questions': 0, 'correct': 0, 'seconds': 0.0, 'sessions': 0}
+
+
+class DailyStatsService:
+    """Service for maintaining and reading daily practice rollups."""
+
+    # Students per batch when rebuilding from sessions
+    REBUILD_CHUNK_SIZE = 500
+
+    # ------------------------------------------------------------------
+    # Session hooks
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def record_session_start(session):
+        """
+        Count a new session on the day it started.
+
+        Must be called inside the transaction that created the session;
+        the caller commits.
+        """
+        DailyStatsService._add(session, sessions=1)
+
+    @staticmethod
+    def record_answer(session, correct):
+        """Add one answered question to the session's day."""
+        DailyStatsService._add(session, questions_answered=1, questions_correct=1 if correct else 0)
+
+    @staticmethod
+    def record_session_end(session):
+        """Add an ended session's duration to the day it started."""
+        if session.ended_at:
+            seconds = (session.ended_at - session.started_at).total_seconds()
+            DailyStatsService._add(session, practice_seconds=seconds)
+
+    @staticmethod
+    def _add(session, **deltas):
+        """Add deltas to the session's (student, day, skill) row."""
+        started_at = session.started_at or datetime.utcnow()
+        value = {
+            'student_id': session.student_id,
+            'day': started_at.date(),
+            'skill_id': session.skill_id or 0,
+            'questions_answered': 0,
+            'questions_correct': 0,
+            'practice_seconds': 0.0,
+            'sessions': 0,
+            'updated_at': datetime.utcnow()
+        }
+        value.update(deltas)
+        DailyStatsService._upsert([value])
+
+    @staticmethod
+    def _upsert(values):
+        """Add counters into existing rows, creating missing ones."""
+        upsert(
+            StudentDailyStats, values, ['student_id', 'day', 'skill_id'],
+            increment=('questions_answered', 'questions_correct', 'practice_seconds', 'sessions')
+        )
+
+    # ------------------------------------------------------------------
+    # Rebuild
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def rebuild(student_ids=None):
+        """
+        Rebuild the rollup from StudentSession rows.
+
+        Use for the initial backfill and after anything that bypassed the
+        session hooks. Students are processed in chunks, each committed on
+        its own.
+
+        Args:
+            student_ids: Only rebuild these students (all if None)
+
+        Returns:
+            dict with students and rows counts
+        """
+        if student_ids is None:
+            student_ids = [
+                row[0] for row in db.session.query(StudentSession.student_id).distinct().all()
+            ]
+            # Also clear students whose sessions are all gone
+            student_ids = sorted(set(student_ids) | {
+                row[0] for row in db.session.query(StudentDailyStats.student_id).distinct().all()
+            })
+
+        rows_written = 0
+        chunk_size = DailyStatsService.REBUILD_CHUNK_SIZE
+        for start in range(0, len(student_ids), chunk_size):
+            chunk = student_ids[start:start + chunk_size]
+            totals = {}
+            sessions = db.session.query(
+                StudentSession.student_id,
+                StudentSession.skill_id,
+                StudentSession.started_at,
+                StudentSession.ended_at,
+                StudentSession.questions_answered,
+                StudentSession.questions_correct
+            ).filter(StudentSession.student_id.in_(chunk)).yield_per(1000)
+
+            for student_id, skill_id, started_at, ended_at, answered, correct in sessions:
+                key = (student_id, started_at.date(), skill_id or 0)
+                entry = totals.get(key)
+                if entry is None:
+                    entry = totals[key] = _empty()
+                entry['questions'] += answered or 0
+                entry['correct'] += correct or 0
+                entry['sessions'] += 1
+                if ended_at:
+                    entry['seconds'] += (ended_at - started_at).total_seconds()
+
+            StudentDailyStats.query.filter(
+                StudentDailyStats.student_id.in_(chunk)
+            ).delete(synchronize_session=False)
+
+            now = datetime.utcnow()
+            values = [{
+                'student_id': student_id,
+                'day': day,
+                'skill_id': skill_id,
+                'questions_answered': entry['questions'],
+                'questions_correct': entry['correct'],
+                'practice_seconds': entry['seconds'],
+                'sessions': entry['sessions'],
+                'updated_at': now
+            } for (student_id, day, skill_id), entry in totals.items()]
+            if values:
+                db.session.execute(StudentDailyStats.__table__.insert(), values)
+            db.session.commit()
+            rows_written += len(values)
+
+        return {'students': len(student_ids), 'rows': rows_written}
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def get_stats(student_id, start_day=None, end_day=None):
+        """
+        Get a student's rollup rows for days in [start_day, end_day].
+
+        Returns:
+            list of StudentDailyStats column tuples (day, skill_id,
+            questions_answered, questions_correct, practice_seconds,
+            sessions) in day order
+        """
+        if isinstance(start_day, datetime):
+            start_day = start_day.date()
+        if isinstance(end_day, datetime):
+            end_day = end_day.date()
+
+        query = db.session.query(
+            StudentDailyStats.day,
+            StudentDailyStats.skill_id,
+            StudentDailyStats.questions_answered,
+            StudentDailyStats.questions_correct,
+            StudentDailyStats.practice_seconds,
+            StudentDailyStats.sessions
+        ).filter(StudentDailyStats.student_id == student_id)
+        if start_day is not None:
+            query = query.filter(StudentDailyStats.day >= start_day)
+        if end_day is not None:
+            query = query.filter(StudentDailyStats.day <= end_day)
+        return query.order_by(StudentDailyStats.day).all()
+
+    @staticmethod
+    def by_day(rows):
+        """Fold rollup rows into {day: totals}, in day order."""
+        days = {}
+        for row in rows:
+            DailyStatsService._fold(days.setdefault(row.day, _empty()), row)
+        return days
+
+    @staticmethod
+    def by_skill(rows):
+        """Fold rollup rows into {skill_id: totals}; sessions without a skill are left out."""
+        skills = {}
+        for row in rows:
+            if row.skill_id:
+                DailyStatsService._fold(skills.setdefault(row.skill_id, _empty()), row)
+        return skills
+
+    @staticmethod
+    def totals(rows):
+        """Fold rollup rows into one totals dict."""
+        total = _empty()
+        for row in rows:
+            DailyStatsService._fold(total, row)
+        return total
+
+    @staticmethod
+    def _fold(entry, row):
+        """Add one rollup row into a totals dict."""
+        entry['questions'] += row.questions_answered
+        entry['correct'] += row.questions_correct
+        entry['seconds'] += row.practice_seconds
+        entry['sessions'] += row.sessions
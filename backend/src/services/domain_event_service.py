@@ -0,0 +1,321 @@
+"""
+Domain event service for applying side effects in the background.
+
+A request publishes one event inside its own transaction; the event is
+staged in the local EventOutbox and released when that transaction
+commits. A small pool of worker threads per process claims events from
+the outbox, one student at a time and in publish order, and applies all
+of an event's side effects in a single database transaction together
+with a ProcessedEvent marker, so a redelivered event is skipped.
+
+The first event is 'answer_submitted'. Submitting an assessment answer
+used to save only the response; it now also earns XP and achievements,
+advances the practice session, daily and shared challenges and the
+practice streak, and posts to the activity feed. This is new behavior,
+not a move of existing work. /gamification/award-xp and
+/monitoring/session/activity refuse to credit an answer that was
+submitted through an assessment (see answer_credited), and the practice
+streak advances at most once a day, so clients that also call those
+endpoints do not count an answer twice.
+"""
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from sqlalchemy.exc import IntegrityError
+from src.database import db, on_commit
+from src.models.assessment import Assessment, AssessmentResponse
+from src.models.domain_event import ProcessedEvent
+from src.services.event_outbox import EventOutbox
+from src.services.gamification_service import GamificationService
+from src.services.achievement_rule_engine import AchievementRuleEngine
+from src.services.monitoring_service import MonitoringService
+from src.services.challenge_service import ChallengeService
+from src.services.shared_challenge_service import SharedChallengeService
+from src.services.streak_service import StreakService
+from src.services.activity_feed_service import ActivityFeedService
+
+logger = logging.getLogger(__name__)
+
+
+def _apply_answer_submitted(student_id, payload):
+    """Apply every side effect of one answered question."""
+    # A staged event is released after a crash even if its request never
+    # committed; there is nothing to apply for an answer that was not saved.
+    if AssessmentResponse.query.get(payload['response_id']) is None:
+        return
+
+    correct = bool(payload.get('correct'))
+    skill_id = payload.get('skill_id')
+    metadata = {'first_try': correct}
+    if payload.get('time_spent'):
+        metadata['time_taken'] = payload['time_spent']
+
+    progress = GamificationService.get_or_create_progress(student_id, commit=False)
+    starting_level = progress.current_level
+
+    MonitoringService.track_session_activity(student_id, skill_id, payload.get('question_id'), correct, commit=False)
+
+    GamificationService.award_xp(
+        student_id,
+        'question_complete',
+        difficulty=payload.get('difficulty'),
+        metadata=dict(metadata, question_id=payload.get('question_id')),
+        commit=False
+    )
+
+    unlocked = AchievementRuleEngine.apply(student_id, 'question_complete', metadata, commit=False)['unlocked']
+    if unlocked:
+        rewards = {rule['name']: rule['xp_reward'] for rule in AchievementRuleEngine.compile()['question_complete']}
+        for name in unlocked:
+            ActivityFeedService.on_achievement_unlock(student_id, name, rewards.get(name, 0), commit=False)
+
+    streak = StreakService.update_practice_streak(student_id, commit=False)
+    if streak.get('milestone_reached'):
+        ActivityFeedService.on_streak_milestone(student_id, streak['streak'], commit=False)
+
+    for challenge in ChallengeService.record_answer(student_id, skill_id, correct, commit=False):
+        name = ChallengeService.CHALLENGE_TYPES[challenge.challenge_type]['name']
+        ActivityFeedService.on_challenge_complete(student_id, name, None, challenge.bonus_xp, commit=False)
+
+    for challenge in SharedChallengeService.record_answer(student_id, skill_id, correct, commit=False):
+        ActivityFeedService.on_challenge_complete(student_id, challenge.title, None, challenge.xp_reward, commit=False)
+
+    if progress.current_level > starting_level:
+        ActivityFeedService.on_level_up(student_id, progress.current_level, progress.total_xp, commit=False)
+
+
+# Event type -> handler(student_id, payload). Handlers must not commit.
+EVENT_HANDLERS = {
+    'answer_submitted': _apply_answer_submitted,
+}
+
+
+class DomainEventService:
+    """Publishing and background processing of domain events."""
+
+    # Worker threads per serving process; 0 leaves events for drain()
+    WORKER_COUNT = int(os.getenv('EVENT_WORKERS', '2'))
+    # Idle workers poll this often for events published by other processes
+    POLL_INTERVAL_SECONDS = 1.0
+    # A claim older than this is assumed to belong to a dead worker
+    LEASE_SECONDS = 60
+    # Staged events older than this are released by recovery
+    STAGE_TIMEOUT_SECONDS = 60
+    # Done events are kept this long to dedupe republished keys
+    RETENTION_SECONDS = 86400
+    MAINTENANCE_INTERVAL_SECONDS = 30
+    MAX_ATTEMPTS = 5
+    RETRY_BASE_SECONDS = 2
+    # Answers submitted through an assessment this recently are credited by
+    # their answer_submitted event and refused by the direct endpoints
+    ANSWER_CREDIT_SECONDS = 3600
+
+    _app = None
+    _outbox = None
+    _workers = []
+    _pid = None
+    _wakeup = threading.Event()
+    _lock = threading.Lock()
+
+    @staticmethod
+    def init_app(app):
+        """
+        Open the outbox; workers start with the process's first request.
+
+        Importing the app (scripts, tests, a preloading gunicorn master)
+        therefore starts no threads. Those callers use drain().
+        """
+        path = os.getenv('EVENT_OUTBOX_PATH')
+        if not path:
+            os.makedirs(app.instance_path, exist_ok=True)
+            path = os.path.join(app.instance_path, 'event_outbox.db')
+        DomainEventService._app = app
+        DomainEventService._outbox = EventOutbox(path)
+        app.before_request(DomainEventService._ensure_workers)
+
+    @staticmethod
+    def publish(event_type, student_id, payload, event_key):
+        """
+        Publish an event as part of the current transaction.
+
+        The event becomes visible to workers only when the transaction
+        commits and is dropped if it rolls back. Publishing a key that is
+        already in the outbox is a no-op.
+
+        Args:
+            event_type: Key into EVENT_HANDLERS
+            student_id: Student whose events must be applied in order
+            payload: JSON-serializable event data
+            event_key: Unique key used for deduplication
+        """
+        outbox_id = DomainEventService._outbox.stage(event_key, event_type, student_id, payload)
+        if outbox_id is not None:
+            db.session.info.setdefault('domain_events', []).append(outbox_id)
+
+    @staticmethod
+    def answer_credited(student_id, question_id):
+        """
+        Whether an answer to question_id is credited by an answer_submitted event.
+
+        True if the student submitted the question through an assessment
+        within ANSWER_CREDIT_SECONDS; endpoints awarding XP or session
+        activity per question use this to avoid counting it twice.
+        """
+        if not question_id:
+            return False
+        since = datetime.utcnow() - timedelta(seconds=DomainEventService.ANSWER_CREDIT_SECONDS)
+        return db.session.query(
+            AssessmentResponse.query.join(
+                Assessment, Assessment.id == AssessmentResponse.assessment_id
+            ).filter(
+                Assessment.student_id == student_id,
+                AssessmentResponse.question_id == question_id,
+                AssessmentResponse.answered_at >= since
+            ).exists()
+        ).scalar()
+
+    @staticmethod
+    def process_next():
+        """
+        Claim and apply one event.
+
+        Returns:
+            True if an event was claimed, False if the queue had nothing ready
+        """
+        outbox = DomainEventService._outbox
+        claimed = outbox.claim()
+        if claimed is None:
+            return False
+
+        try:
+            DomainEventService._apply(claimed)
+        except Exception as e:
+            db.session.rollback()
+            error = f'{type(e).__name__}: {e}'
+            if claimed['attempts'] >= DomainEventService.MAX_ATTEMPTS:
+                logger.error('Giving up on event %s: %s', claimed['event_key'], error)
+                outbox.fail(claimed['id'], error)
+            else:
+                delay = DomainEventService.RETRY_BASE_SECONDS * 2 ** (claimed['attempts'] - 1)
+                outbox.retry(claimed['id'], error, delay)
+            return True
+
+        outbox.complete(claimed['id'])
+        return True
+
+    @staticmethod
+    def drain(timeout=30):
+        """
+        Process events in the calling thread until none are ready or in flight.
+
+        Used by maintenance scripts and tests; workers may still be
+        processing in parallel.
+
+        Returns:
+            Number of events this call processed
+        """
+        processed = 0
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if DomainEventService.process_next():
+                processed += 1
+                continue
+            counts = DomainEventService._outbox.counts()
+            if not counts.get(EventOutbox.PROCESSING) and not counts.get(EventOutbox.STAGED):
+                break
+            time.sleep(0.05)
+        return processed
+
+    @staticmethod
+    def recover():
+        """Reclaim expired leases, release orphaned staged events and prune done ones."""
+        return DomainEventService._outbox.recover(
+            DomainEventService.LEASE_SECONDS,
+            DomainEventService.STAGE_TIMEOUT_SECONDS,
+            DomainEventService.RETENTION_SECONDS
+        )
+
+    @staticmethod
+    def get_queue_stats():
+        """Number of outbox events in each status."""
+        return DomainEventService._outbox.counts()
+
+    # Internal helpers
+
+    @staticmethod
+    def _apply(claimed):
+        """Run an event's handler and record it, in one transaction."""
+        if ProcessedEvent.query.filter_by(event_key=claimed['event_key']).first():
+            return
+
+        handler = EVENT_HANDLERS.get(claimed['event_type'])
+        if handler is None:
+            raise ValueError(f"No handler for event type '{claimed['event_type']}'")
+        handler(claimed['student_id'], claimed['payload'])
+
+        db.session.add(ProcessedEvent(
+            event_key=claimed['event_key'],
+            event_type=claimed['event_type'],
+            student_id=claimed['student_id']
+        ))
+        try:
+            db.session.commit()
+        except IntegrityError:
+            # Another worker applied it after our lease expired
+            db.session.rollback()
+
+    @staticmethod
+    def _ensure_workers():
+        """Start the worker pool once per process, including after a fork."""
+        if DomainEventService._pid == os.getpid() or DomainEventService.WORKER_COUNT <= 0:
+            return
+        with DomainEventService._lock:
+            if DomainEventService._pid == os.getpid():
+                return
+            DomainEventService._workers = []
+            for number in range(DomainEventService.WORKER_COUNT):
+                worker = threading.Thread(
+                    target=DomainEventService._run_worker,
+                    args=(number == 0,),
+                    name=f'domain-event-worker-{number}',
+                    daemon=True
+                )
+                worker.start()
+                DomainEventService._workers.append(worker)
+            DomainEventService._pid = os.getpid()
+
+    @staticmethod
+    def _run_worker(maintains):
+        """Worker loop; the first worker also runs periodic recovery."""
+        last_maintenance = 0
+        while True:
+            processed = False
+            try:
+                with DomainEventService._app.app_context():
+                    due = time.monotonic() - last_maintenance >= DomainEventService.MAINTENANCE_INTERVAL_SECONDS
+                    if maintains and due:
+                        DomainEventService.recover()
+                        last_maintenance = time.monotonic()
+                    processed = DomainEventService.process_next()
+            except Exception:
+                logger.exception('Domain event worker error')
+
+            if not processed:
+                DomainEventService._wakeup.wait(DomainEventService.POLL_INTERVAL_SECONDS)
+                DomainEventService._wakeup.clear()
+
+
+def _release_committed_events(outbox_ids):
+    """Hand published events to the workers once the request has committed."""
+    DomainEventService._outbox.release(outbox_ids)
+    DomainEventService._wakeup.set()
+
+
+def _discard_rolled_back_events(outbox_ids):
+    """Drop events published by a rolled back transaction."""
+    DomainEventService._outbox.discard(outbox_ids)
+
+
+on_commit('domain_events', _release_committed_events, _discard_rolled_back_events)
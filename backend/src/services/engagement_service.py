@@ -0,0 +1,183 @@
+"""
+Engagement service for batch-computed, materialized engagement scores.
+
+Scores for any set of students come from one grouped query over the
+daily stats rollup for the window, so scoring a class or the whole
+school costs one scan instead of a session query per student. Scores for
+the standard window are stored in engagement_scores: a student's row is
+recomputed when one of their sessions ends, and the nightly
+refresh_engagement_scores.py job recomputes every row so scores decay as
+the window moves. Readers fetch stored scores in bulk and compute any
+missing or out-of-date ones in a single batch.
+"""
+from datetime import datetime, timedelta
+from sqlalchemy import func
+from src.database import db, upsert
+from src.models.student_session import StudentDailyStats
+from src.models.engagement import EngagementScore
+
+
+class EngagementService:
+    """Service for computing and reading engagement scores."""
+
+    # Window of the stored scores, in days
+    WINDOW_DAYS = 30
+    # Students per batch when refreshing
+    REFRESH_CHUNK_SIZE = 1000
+
+    @staticmethod
+    def score(session_count, practice_minutes, questions, correct, days_with_practice, days):
+        """Weight session, time, accuracy and consistency totals into a 0-100 score."""
+        if not session_count:
+            return 0.0
+
+        # Component scores (each 0-100)
+
+        # 1. Session frequency (30% weight)
+        expected_sessions = days * 0.5  # Expect 0.5 sessions per day
+        frequency_score = min((session_count / expected_sessions) * 100, 100) if expected_sessions > 0 else 0
+
+        # 2. Practice time (25% weight)
+        expected_time = days * 15  # Expect 15 min per day
+        time_score = min((practice_minutes / expected_time) * 100, 100) if expected_time > 0 else 0
+
+        # 3. Accuracy (25% weight)
+        accuracy_score = (correct / questions * 100) if questions > 0 else 0
+
+        # 4. Consistency (20% weight)
+        consistency_score = (days_with_practice / days) * 100
+
+        # Weighted average
+        return (
+            frequency_score * 0.30 +
+            time_score * 0.25 +
+            accuracy_score * 0.25 +
+            consistency_score * 0.20
+        )
+
+    @staticmethod
+    def compute(student_ids, days=None, now=None):
+        """
+        Compute engagement for a set of students in one grouped query.
+
+        The window covers whole UTC days from `days` days ago through
+        today.
+
+        Returns:
+            dict of student_id -> dict with score and its component totals
+            (sessions, practice_minutes, questions_answered,
+            questions_correct, active_days); every requested student is
+            present
+        """
+        days = days or EngagementService.WINDOW_DAYS
+        now = now or datetime.utcnow()
+        student_ids = list(student_ids)
+        if not student_ids:
+            return {}
+        window_start = (now - timedelta(days=days)).date()
+
+        totals = {row[0]: row[1:] for row in db.session.query(
+            StudentDailyStats.student_id,
+            func.sum(StudentDailyStats.sessions),
+            func.sum(StudentDailyStats.practice_seconds),
+            func.sum(StudentDailyStats.questions_answered),
+            func.sum(StudentDailyStats.questions_correct),
+            func.count(func.distinct(StudentDailyStats.day))
+        ).filter(
+            StudentDailyStats.student_id.in_(student_ids),
+            StudentDailyStats.day >= window_start
+        ).group_by(StudentDailyStats.student_id).all()}
+
+        results = {}
+        for student_id in student_ids:
+            sessions, seconds, questions, correct, active_days = totals.get(student_id, (0, 0.0, 0, 0, 0))
+            sessions, minutes = sessions or 0, (seconds or 0.0) / 60
+            questions, correct = questions or 0, correct or 0
+            results[student_id] = {
+                'score': EngagementService.score(sessions, minutes, questions, correct, active_days, days),
+                'sessions': sessions,
+                'practice_minutes': minutes,
+                'questions_answered': questions,
+                'questions_correct': correct,
+                'active_days': active_days
+            }
+        return results
+
+    # ------------------------------------------------------------------
+    # Materialized scores
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def refresh(student_ids=None, commit=True):
+        """
+        Recompute and store standard-window scores.
+
+        Args:
+            student_ids: Students to refresh (default: every student with
+                practice in the window or a stored score)
+            commit: Commit each chunk (False only flushes, for callers
+                refreshing inside their own transaction)
+
+        Returns:
+            Number of scores stored
+        """
+        now = datetime.utcnow()
+        if student_ids is None:
+            window_start = (now - timedelta(days=EngagementService.WINDOW_DAYS)).date()
+            student_ids = sorted({
+                row[0] for row in db.session.query(StudentDailyStats.student_id).filter(
+                    StudentDailyStats.day >= window_start
+                ).distinct().all()
+            } | {
+                row[0] for row in db.session.query(EngagementScore.student_id).all()
+            })
+
+        student_ids = list(student_ids)
+        chunk_size = EngagementService.REFRESH_CHUNK_SIZE
+        for start in range(0, len(student_ids), chunk_size):
+            chunk = student_ids[start:start + chunk_size]
+            EngagementService._store(EngagementService.compute(chunk, now=now), now)
+            if commit:
+                db.session.commit()
+            else:
+                db.session.flush()
+        return len(student_ids)
+
+    @staticmethod
+    def get_scores(student_ids):
+        """
+        Fetch standard-window scores for a set of students in bulk.
+
+        Stored scores computed today are used as they are; missing or
+        older ones are recomputed in one batch and stored.
+
+        Returns:
+            dict of student_id -> score (0-100)
+        """
+        student_ids = list(student_ids)
+        if not student_ids:
+            return {}
+        now = datetime.utcnow()
+        today = datetime.combine(now.date(), datetime.min.time())
+
+        scores = dict(db.session.query(
+            EngagementScore.student_id,
+            EngagementScore.score
+        ).filter(
+            EngagementScore.student_id.in_(student_ids),
+            EngagementScore.computed_at >= today
+        ).all())
+
+        missing = [student_id for student_id in student_ids if student_id not in scores]
+        if missing:
+            computed = EngagementService.compute(missing, now=now)
+            EngagementService._store(computed, now)
+            db.session.commit()
+            scores.update((student_id, result['score']) for student_id, result in computed.items())
+        return scores
+
+    @staticmethod
+    def _store(results, computed_at):
+        """Insert or replace stored scores."""
+        values = [dict(result, student_id=student_id, computed_at=computed_at) for student_id, result in results.items()]
+        upsert(EngagementScore, values, ['student_id'])
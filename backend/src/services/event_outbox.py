@@ -0,0 +1,221 @@
+"""
+Durable local outbox for domain events.
+
+Events are stored in a SQLite file next to the application so they
+survive a gunicorn worker restart. Every worker process on the host opens
+the same file; claims run under BEGIN IMMEDIATE so each event is handed
+to exactly one worker, and a student's events are only handed out one at
+a time and in publish order.
+
+Lifecycle of an event:
+    staged      written by the request, its transaction not yet committed
+    pending     ready to be claimed (or waiting out a retry backoff)
+    processing  claimed by a worker under a lease
+    done        side effects applied; kept briefly to dedupe republishes
+    failed      gave up after repeated errors
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+
+
+class EventOutbox:
+    """SQLite-backed queue of domain events, safe across threads and processes."""
+
+    STAGED = 'staged'
+    PENDING = 'pending'
+    PROCESSING = 'processing'
+    DONE = 'done'
+    FAILED = 'failed'
+
+    SCHEMA = (
+        """
+        CREATE TABLE IF NOT EXISTS events (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            event_key TEXT NOT NULL UNIQUE,
+            event_type TEXT NOT NULL,
+            student_id INTEGER NOT NULL,
+            payload TEXT NOT NULL,
+            status TEXT NOT NULL,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            available_at REAL NOT NULL,
+            created_at REAL NOT NULL,
+            claimed_at REAL,
+            last_error TEXT
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_events_status ON events (status, id)",
+        "CREATE INDEX IF NOT EXISTS idx_events_student ON events (student_id, status, id)",
+    )
+
+    # Next claimable event: the oldest ready one whose student has nothing
+    # in flight and no older event still waiting.
+    CLAIM_SQL = """
+        SELECT id, event_key, event_type, student_id, payload, attempts
+        FROM events AS e
+        WHERE e.status = 'pending'
+          AND e.available_at <= ?
+          AND NOT EXISTS (
+              SELECT 1 FROM events AS p
+              WHERE p.student_id = e.student_id
+                AND (p.status = 'processing'
+                     OR (p.id < e.id AND p.status IN ('staged', 'pending')))
+          )
+        ORDER BY e.id
+        LIMIT 1
+    """
+
+    def __init__(self, path):
+        """
+        Args:
+            path: SQLite file path, created if missing
+        """
+        self.path = path
+        self._local = threading.local()
+        conn = self._connection()
+        for statement in self.SCHEMA:
+            conn.execute(statement)
+
+    def stage(self, event_key, event_type, student_id, payload):
+        """
+        Write an event that is not claimable until released.
+
+        Returns:
+            The outbox id, or None if an event with this key already exists
+        """
+        now = time.time()
+        cursor = self._connection().execute(
+            "INSERT OR IGNORE INTO events "
+            "(event_key, event_type, student_id, payload, status, available_at, created_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (event_key, event_type, student_id, json.dumps(payload), self.STAGED, now, now)
+        )
+        return cursor.lastrowid if cursor.rowcount else None
+
+    def release(self, ids):
+        """Make staged events claimable once their transaction has committed."""
+        self._update_staged(
+            ids,
+            "UPDATE events SET status = 'pending', available_at = ? WHERE status = 'staged' AND id IN ({})",
+            (time.time(),)
+        )
+
+    def discard(self, ids):
+        """Drop staged events whose transaction rolled back."""
+        self._update_staged(
+            ids,
+            "DELETE FROM events WHERE status = 'staged' AND id IN ({})",
+            ()
+        )
+
+    def claim(self):
+        """
+        Claim the next event that can be processed.
+
+        Returns:
+            dict with id, event_key, event_type, student_id, payload and
+            attempts (including this one), or None if nothing is ready
+        """
+        conn = self._connection()
+        now = time.time()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = conn.execute(self.CLAIM_SQL, (now,)).fetchone()
+            if row is not None:
+                conn.execute(
+                    "UPDATE events SET status = 'processing', attempts = attempts + 1, claimed_at = ? WHERE id = ?",
+                    (now, row[0])
+                )
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+
+        if row is None:
+            return None
+        return {
+            'id': row[0],
+            'event_key': row[1],
+            'event_type': row[2],
+            'student_id': row[3],
+            'payload': json.loads(row[4]),
+            'attempts': row[5] + 1
+        }
+
+    def complete(self, event_id):
+        """Mark a claimed event as done."""
+        self._connection().execute(
+            "UPDATE events SET status = 'done', claimed_at = NULL, last_error = NULL WHERE id = ?",
+            (event_id,)
+        )
+
+    def retry(self, event_id, error, delay_seconds):
+        """Return a claimed event to the queue after a backoff."""
+        self._connection().execute(
+            "UPDATE events SET status = 'pending', claimed_at = NULL, available_at = ?, last_error = ? WHERE id = ?",
+            (time.time() + delay_seconds, error, event_id)
+        )
+
+    def fail(self, event_id, error):
+        """Give up on a claimed event; later events for the student proceed."""
+        self._connection().execute(
+            "UPDATE events SET status = 'failed', claimed_at = NULL, last_error = ? WHERE id = ?",
+            (error, event_id)
+        )
+
+    def recover(self, lease_seconds, stage_timeout_seconds, retention_seconds):
+        """
+        Repair the queue after crashes and prune finished events.
+
+        Expired leases are returned to the queue. Staged events older than
+        the stage timeout were left behind by a process that died between
+        its commit and the release, so they are released; handlers check
+        that the data they refer to was actually committed.
+
+        Returns:
+            dict with counts of reclaimed, released and pruned events
+        """
+        conn = self._connection()
+        now = time.time()
+        reclaimed = conn.execute(
+            "UPDATE events SET status = 'pending', claimed_at = NULL WHERE status = 'processing' AND claimed_at < ?",
+            (now - lease_seconds,)
+        ).rowcount
+        released = conn.execute(
+            "UPDATE events SET status = 'pending' WHERE status = 'staged' AND created_at < ?",
+            (now - stage_timeout_seconds,)
+        ).rowcount
+        pruned = conn.execute(
+            "DELETE FROM events WHERE status = 'done' AND created_at < ?",
+            (now - retention_seconds,)
+        ).rowcount
+        return {'reclaimed': reclaimed, 'released': released, 'pruned': pruned}
+
+    def counts(self):
+        """Number of events in each status."""
+        rows = self._connection().execute("SELECT status, COUNT(*) FROM events GROUP BY status").fetchall()
+        return dict(rows)
+
+    # Internal helpers
+
+    def _update_staged(self, ids, sql, params):
+        if not ids:
+            return
+        placeholders = ', '.join('?' * len(ids))
+        self._connection().execute(sql.format(placeholders), params + tuple(ids))
+
+    def _connection(self):
+        """Per-thread connection, reopened after a fork."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            # Autocommit mode; claims manage their own transaction
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            # WAL with NORMAL sync survives process crashes, which is what
+            # a worker restart is, without an fsync per event
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
@@ -0,0 +1,334 @@
+"""
+Forecast service for batch performance forecasts and mastery predictions.
+
+A forecast series is one student's sessions, either for one skill or
+across all skills (skill_id None). For N series the service runs one
+grouped query for each series' session count and last activity, serves
+series whose last activity is unchanged from the cache, and loads the
+session history for the rest in one more query. Weekly accuracies are
+bucketed into a padded (series x week) array, and every series' trend is
+fitted at once by weighted least squares, so forecasting a class costs
+about what forecasting one student used to.
+"""
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+import numpy as np
+from sqlalchemy import func
+from src.database import db
+from src.models.student_session import StudentSession
+from src.models.learning_path import LearningPath
+
+
+class ForecastService:
+    """Service for vectorized forecasting over many (student, skill) series."""
+
+    # History window in days and the number of weekly buckets fitted
+    HISTORY_DAYS = 30
+    WEEKS = 4
+    # Sessions needed in the window for a forecast
+    MIN_SESSIONS = 3
+    # Weekly slope (accuracy fraction) below which a trend counts as stable
+    STABLE_SLOPE = 0.01
+    # Cached forecast lifetime; weekly buckets move with the clock
+    CACHE_TTL_SECONDS = 900
+    # Most series kept in memory per process
+    MAX_CACHED = 20000
+
+    _cache = OrderedDict()
+    _lock = threading.RLock()
+
+    # ------------------------------------------------------------------
+    # Loading
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _signatures(pairs, now):
+        """
+        Session count and last activity per series in one grouped query.
+
+        Returns:
+            dict of (student_id, skill_id) -> (session_count, last_activity_at)
+        """
+        student_ids = sorted({student_id for student_id, _ in pairs})
+        rows = db.session.query(
+            StudentSession.student_id,
+            StudentSession.skill_id,
+            func.count(StudentSession.id),
+            func.max(StudentSession.last_activity_at)
+        ).filter(
+            StudentSession.student_id.in_(student_ids),
+            StudentSession.started_at >= now - timedelta(days=ForecastService.HISTORY_DAYS)
+        ).group_by(StudentSession.student_id, StudentSession.skill_id).all()
+
+        signatures = {}
+        for student_id, skill_id, count, last_activity in rows:
+            # Every row also belongs to its student's all-skills series
+            keys = [(student_id, None)] if skill_id is None else [(student_id, skill_id), (student_id, None)]
+            for key in keys:
+                previous_count, previous_activity = signatures.get(key, (0, None))
+                latest = max(filter(None, (previous_activity, last_activity)), default=None)
+                signatures[key] = (previous_count + count, latest)
+        return signatures
+
+    @staticmethod
+    def _weekly_totals(pairs, now):
+        """
+        Bucket each series' sessions into weeks in one history query.
+
+        Returns:
+            (questions, correct) arrays of shape (len(pairs), WEEKS);
+            week 0 is the most recent seven days
+        """
+        index = {}
+        for i, pair in enumerate(pairs):
+            index.setdefault(pair, []).append(i)
+
+        questions = np.zeros((len(pairs), ForecastService.WEEKS))
+        correct = np.zeros((len(pairs), ForecastService.WEEKS))
+        rows = db.session.query(
+            StudentSession.student_id,
+            StudentSession.skill_id,
+            StudentSession.started_at,
+            StudentSession.questions_answered,
+            StudentSession.questions_correct
+        ).filter(
+            StudentSession.student_id.in_(sorted({student_id for student_id, _ in pairs})),
+            StudentSession.started_at >= now - timedelta(days=ForecastService.WEEKS * 7)
+        ).all()
+        if not rows:
+            return questions, correct
+
+        # Each session lands in its skill series and its all-skills series
+        targets, weeks, answered, right = [], [], [], []
+        for student_id, skill_id, started_at, q, c in rows:
+            week = int((now - started_at).total_seconds() // (7 * 86400))
+            if week >= ForecastService.WEEKS:
+                continue
+            keys = [(student_id, None)] if skill_id is None else [(student_id, skill_id), (student_id, None)]
+            for key in keys:
+                for i in index.get(key, ()):
+                    targets.append(i)
+                    weeks.append(week)
+                    answered.append(q or 0)
+                    right.append(c or 0)
+
+        np.add.at(questions, (targets, weeks), answered)
+        np.add.at(correct, (targets, weeks), right)
+        return questions, correct
+
+    # ------------------------------------------------------------------
+    # Fitting
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def fit(questions, correct):
+        """
+        Fit a weighted least-squares line to every series' weekly accuracy.
+
+        Weeks without questions are left out of the fit. Time is measured
+        in weeks, with week w centred at -(w + 0.5).
+
+        Returns:
+            dict of arrays: weeks (with data), mean (of weekly
+            accuracies), slope (per week), intercept (at now) and rmse
+        """
+        has_data = questions > 0
+        accuracy = np.divide(correct, questions, out=np.zeros_like(questions), where=has_data)
+        x = -(np.arange(questions.shape[1]) + 0.5)
+        w = has_data.astype(np.float64)
+
+        sw = w.sum(axis=1)
+        sx = w @ x
+        sxx = w @ (x * x)
+        sy = (w * accuracy).sum(axis=1)
+        sxy = (w * accuracy) @ x
+
+        denominator = sw * sxx - sx * sx
+        slope = np.divide(sw * sxy - sx * sy, denominator, out=np.zeros_like(sw), where=denominator > 1e-12)
+        mean = np.divide(sy, sw, out=np.zeros_like(sw), where=sw > 0)
+        intercept = np.divide(sy - slope * sx, sw, out=np.zeros_like(sw), where=sw > 0)
+
+        residuals = w * (accuracy - (intercept[:, None] + slope[:, None] * x))
+        rmse = np.sqrt(np.divide((residuals ** 2).sum(axis=1), sw, out=np.zeros_like(sw), where=sw > 0))
+        return {'weeks': sw.astype(np.int64), 'mean': mean, 'slope': slope, 'intercept': intercept, 'rmse': rmse}
+
+    # ------------------------------------------------------------------
+    # Forecasts
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def forecast_batch(pairs, days=7):
+        """
+        Forecast accuracy `days` ahead for many (student_id, skill_id) series.
+
+        skill_id None forecasts across all of the student's practice.
+
+        Returns:
+            list of forecast dicts aligned with pairs, shaped like
+            PredictiveAnalyticsService.forecast_performance's 'forecast'
+        """
+        pairs = [(student_id, skill_id) for student_id, skill_id in pairs]
+        if not pairs:
+            return []
+        now = datetime.utcnow()
+        signatures = ForecastService._signatures(pairs, now)
+
+        results = [None] * len(pairs)
+        misses = []
+        clock = time.monotonic()
+        with ForecastService._lock:
+            for i, pair in enumerate(pairs):
+                key = (pair, days, signatures.get(pair))
+                cached = ForecastService._cache.get(key)
+                if cached is not None and clock - cached[0] < ForecastService.CACHE_TTL_SECONDS:
+                    ForecastService._cache.move_to_end(key)
+                    results[i] = dict(cached[1])
+                else:
+                    misses.append(i)
+
+        # Series with too few sessions need no history
+        fit_indices = [i for i in misses if signatures.get(pairs[i], (0, None))[0] >= ForecastService.MIN_SESSIONS]
+        fitted = set(fit_indices)
+        for i in misses:
+            if i not in fitted:
+                results[i] = {
+                    'insufficient_data': True,
+                    'message': f'Need at least {ForecastService.MIN_SESSIONS} recent sessions for forecast'
+                }
+
+        if fit_indices:
+            questions, correct = ForecastService._weekly_totals([pairs[i] for i in fit_indices], now)
+            fits = ForecastService.fit(questions, correct)
+            forecast = np.clip(fits['intercept'] + fits['slope'] * (days / 7), 0.0, 1.0)
+            trend = np.where(
+                fits['slope'] > ForecastService.STABLE_SLOPE, 'improving',
+                np.where(fits['slope'] < -ForecastService.STABLE_SLOPE, 'declining', 'stable')
+            )
+            confidence = np.where(
+                fits['weeks'] < 3, 'low',
+                np.where((fits['weeks'] >= ForecastService.WEEKS) & (fits['rmse'] < 0.05), 'high', 'medium')
+            )
+            for row, i in enumerate(fit_indices):
+                if not fits['weeks'][row]:
+                    results[i] = {'insufficient_data': True, 'message': 'No weekly data available'}
+                    continue
+                results[i] = {
+                    'forecast_days': days,
+                    'current_accuracy': round(float(fits['mean'][row]) * 100, 1),
+                    'forecast_accuracy': round(float(forecast[row]) * 100, 1),
+                    'trend': str(trend[row]),
+                    'weekly_change': round(float(fits['slope'][row]) * 100, 1),
+                    'confidence': str(confidence[row]),
+                    'recommendation': {
+                        'improving': 'Continue current practice',
+                        'declining': 'Increase practice frequency'
+                    }.get(str(trend[row]), 'Maintain consistency')
+                }
+
+        with ForecastService._lock:
+            for i in misses:
+                key = (pairs[i], days, signatures.get(pairs[i]))
+                ForecastService._cache[key] = (clock, results[i])
+                ForecastService._cache.move_to_end(key)
+            while len(ForecastService._cache) > ForecastService.MAX_CACHED:
+                ForecastService._cache.popitem(last=False)
+
+        return [dict(result) for result in results]
+
+    @staticmethod
+    def predict_mastery_batch(pairs):
+        """
+        Predict if and when each (student_id, skill_id) pair reaches mastery.
+
+        Uses one learning path query and the grouped session-count query
+        shared with forecasts.
+
+        Returns:
+            list aligned with pairs of prediction dicts shaped like
+            PredictiveAnalyticsService.predict_skill_mastery's
+            'prediction', or None where the student has no path for the
+            skill
+        """
+        pairs = [(student_id, skill_id) for student_id, skill_id in pairs]
+        if not pairs:
+            return []
+        now = datetime.utcnow()
+        student_pairs = [(student_id, None) for student_id, _ in pairs]
+        signatures = ForecastService._signatures(student_pairs, now)
+
+        paths = {}
+        for student_id, skill_id, accuracy, mastered in db.session.query(
+            LearningPath.student_id,
+            LearningPath.skill_id,
+            LearningPath.current_accuracy,
+            LearningPath.mastery_achieved
+        ).filter(
+            LearningPath.student_id.in_(sorted({student_id for student_id, _ in pairs})),
+            LearningPath.skill_id.in_(sorted({skill_id for _, skill_id in pairs}))
+        ).order_by(LearningPath.id.desc()).all():
+            # First path per pair wins, as with query.first()
+            paths[(student_id, skill_id)] = (accuracy or 0.0, mastered)
+
+        predictions = []
+        for pair in pairs:
+            path = paths.get(pair)
+            if path is None:
+                predictions.append(None)
+                continue
+            current_accuracy, mastered = path
+            if mastered:
+                predictions.append({
+                    'will_master': True,
+                    'probability': 100.0,
+                    'days_to_mastery': 0,
+                    'already_mastered': True
+                })
+                continue
+
+            session_count = signatures.get((pair[0], None), (0, None))[0]
+            if not session_count:
+                predictions.append({
+                    'will_master': False,
+                    'probability': 0.0,
+                    'days_to_mastery': None,
+                    'reason': 'No recent practice'
+                })
+                continue
+
+            practice_frequency = session_count / ForecastService.HISTORY_DAYS  # sessions per day
+
+            # Probability based on current accuracy and practice frequency
+            accuracy_factor = current_accuracy * 100  # 0-100
+            frequency_factor = min(practice_frequency * 50, 50)  # 0-50
+            probability = min(accuracy_factor + frequency_factor, 100)
+
+            # Estimate days to mastery (90% accuracy threshold)
+            if current_accuracy >= 0.90:
+                days_to_mastery = 0
+                will_master = True
+            elif current_accuracy >= 0.70 and practice_frequency > 0.2:
+                # Assume 1% improvement per 3 days of practice
+                improvement_needed = 0.90 - current_accuracy
+                days_to_mastery = int(improvement_needed * 100 * 3 / practice_frequency)
+                will_master = True
+            else:
+                days_to_mastery = None
+                will_master = probability > 50
+
+            predictions.append({
+                'will_master': will_master,
+                'probability': round(probability, 1),
+                'days_to_mastery': days_to_mastery,
+                'current_accuracy': round(current_accuracy * 100, 1),
+                'practice_frequency': round(practice_frequency, 2),
+                'recommendation': 'Keep practicing!' if will_master else 'Increase practice frequency'
+            })
+        return predictions
+
+    @staticmethod
+    def reset():
+        """Drop every cached forecast."""
+        with ForecastService._lock:
+            ForecastService._cache.clear()
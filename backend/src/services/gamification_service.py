@@ -3,6 +3,9 @@ Gamification Service for managing XP, levels, and rewards.
 """
 from src.database import db
 from src.models.gamification import StudentProgress, XPTransaction, LevelReward, StudentReward
+from src.services.leaderboard_table_service import LeaderboardTableService
+from src.services.leaderboard_index_service import LeaderboardIndexService
+from src.services.xp_ledger_service import XPLedgerService
 from datetime import datetime, timedelta
 
 
@@ -40,8 +43,15 @@ class GamificationService:
     }
 
     @staticmethod
-    def get_or_create_progress(student_id):
-        """Get or create student progress record."""
+    def get_or_create_progress(student_id, commit=True):
+        """
+        Get or create student progress record.
+        
+        Args:
+            student_id: Student ID
+            commit: Commit a newly created record (False only flushes it,
+                leaving the caller's transaction open)
+        """
         progress = StudentProgress.query.filter_by(student_id=student_id).first()
         
         if not progress:
@@ -54,12 +64,15 @@ class GamificationService:
                 xp_multiplier=1.0
             )
             db.session.add(progress)
-            db.session.commit()
+            if commit:
+                db.session.commit()
+            else:
+                db.session.flush()
         
         return progress
 
     @staticmethod
-    def award_xp(student_id, action_type, base_xp=None, difficulty=None, metadata=None):
+    def award_xp(student_id, action_type, base_xp=None, difficulty=None, metadata=None, commit=True):
         """
         Award XP to a student for an action.
         
@@ -69,12 +82,14 @@ class GamificationService:
             base_xp: Base XP amount (optional, uses default if not provided)
             difficulty: Difficulty level for multiplier (easy, medium, hard)
             metadata: Additional context (dict)
+            commit: Commit the award (False only flushes it so the caller can
+                batch it with other writes in one transaction)
         
         Returns:
             dict with XP awarded, level info, and level-up status
         """
         # Get or create progress
-        progress = GamificationService.get_or_create_progress(student_id)
+        progress = GamificationService.get_or_create_progress(student_id, commit=commit)
         
         # Determine base XP
         if base_xp is None:
@@ -157,7 +172,10 @@ class GamificationService:
             progress.total_xp
         )
         
-        db.session.commit()
+        if commit:
+            db.session.commit()
+        else:
+            db.session.flush()
         
         return {
             'xp_awarded': total_xp,
@@ -207,25 +225,27 @@ class GamificationService:
         """Get detailed progress for a student."""
         progress = GamificationService.get_or_create_progress(student_id)
         
-        # Get rank
-        all_progress = StudentProgress.query.order_by(StudentProgress.total_xp.desc()).all()
-        rank = next((i + 1 for i, p in enumerate(all_progress) if p.student_id == student_id), None)
+        # Get rank from the in-process global XP index
+        with LeaderboardIndexService.reading(LeaderboardTableService.GLOBAL_XP) as index:
+            rank = index.position(student_id)
+            total_students = len(index)
         
         result = progress.to_dict()
         result['rank'] = rank
-        result['total_students'] = len(all_progress)
+        result['total_students'] = total_students
         result['xp_for_current_level'] = StudentProgress.calculate_xp_for_level(progress.current_level)
         
         return result
 
     @staticmethod
     def get_xp_history(student_id, limit=20):
-        """Get recent XP transactions for a student."""
-        transactions = XPTransaction.query.filter_by(student_id=student_id).order_by(
-            XPTransaction.created_at.desc()
-        ).limit(limit).all()
+        """
+        Get recent XP transactions for a student.
         
-        return [t.to_dict() for t in transactions]
+        Read through the XP ledger, so history older than the compaction
+        watermark comes back as whole-day totals per action type.
+        """
+        return XPLedgerService.get_history(student_id, limit)
 
     @staticmethod
     def get_student_rewards(student_id):
@@ -281,18 +301,8 @@ class GamificationService:
             days = 7 if timeframe == 'week' else 30
             cutoff_date = datetime.utcnow() - timedelta(days=days)
             
-            # Get XP earned in timeframe
-            from sqlalchemy import func
-            xp_in_period = db.session.query(
-                XPTransaction.student_id,
-                func.sum(XPTransaction.total_xp).label('xp_earned')
-            ).filter(
-                XPTransaction.created_at >= cutoff_date
-            ).group_by(
-                XPTransaction.student_id
-            ).order_by(
-                func.sum(XPTransaction.total_xp).desc()
-            ).limit(limit).all()
+            # Get XP earned in timeframe from the raw ledger and its rollups
+            xp_in_period = XPLedgerService.get_top_earners(since=cutoff_date, limit=limit)
             
             leaderboard = []
             for i, (student_id, xp_earned) in enumerate(xp_in_period, 1):
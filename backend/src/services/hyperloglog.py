@@ -0,0 +1,79 @@
+"""
+Mergeable distinct-count sketch (HyperLogLog).
+
+A HyperLogLog estimates how many distinct values were added using a
+fixed array of small registers: each value's hash picks a register and
+the register keeps the longest run of leading zero bits seen. With
+precision 12 the sketch is 4 KB and the standard error is about 1.6%,
+however many values were added. Small counts use linear counting and
+are practically exact. Two sketches merge by taking the larger of each
+register, so per-day sketches can be combined into 7- or 30-day
+distinct counts without revisiting the raw values.
+"""
+import hashlib
+import math
+
+
+class HyperLogLog:
+    """HyperLogLog over hashable values, with 64-bit hashes."""
+
+    def __init__(self, precision=12, registers=None):
+        """
+        Args:
+            precision: log2 of the register count (4-16); higher is more
+                accurate and larger
+            registers: Existing register bytes (see to_bytes)
+        """
+        if not 4 <= precision <= 16:
+            raise ValueError('precision must be between 4 and 16')
+        self.precision = precision
+        self.size = 1 << precision
+        if registers is None:
+            self.registers = bytearray(self.size)
+        else:
+            if len(registers) != self.size:
+                raise ValueError('register count does not match precision')
+            self.registers = bytearray(registers)
+
+    @staticmethod
+    def _hash(value):
+        """64-bit hash of the value's string form, stable across processes."""
+        digest = hashlib.blake2b(str(value).encode('utf-8'), digest_size=8).digest()
+        return int.from_bytes(digest, 'big')
+
+    def add(self, value):
+        """Add one value."""
+        hashed = self._hash(value)
+        remaining_bits = 64 - self.precision
+        index = hashed >> remaining_bits
+        remainder = hashed & ((1 << remaining_bits) - 1)
+        rank = remaining_bits - remainder.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def merge(self, other):
+        """Fold another sketch of the same precision into this one."""
+        if other.precision != self.precision:
+            raise ValueError('cannot merge sketches of different precision')
+        self.registers = bytearray(map(max, self.registers, other.registers))
+        return self
+
+    def count(self):
+        """Estimated number of distinct values added."""
+        m = self.size
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / sum(2.0 ** -register for register in self.registers)
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * m and zeros:
+            # Linear counting is more accurate for small cardinalities
+            estimate = m * math.log(m / zeros)
+        return int(round(estimate))
+
+    def to_bytes(self):
+        """Serialize the registers."""
+        return bytes(self.registers)
+
+    @classmethod
+    def from_bytes(cls, data, precision=12):
+        """Rebuild a sketch from to_bytes() output."""
+        return cls(precision, registers=data)
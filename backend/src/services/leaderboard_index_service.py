@@ -0,0 +1,400 @@
+"""
+Leaderboard index service for in-process rank lookups.
+
+Each board is mirrored in memory by a RankIndex, an order-statistic
+structure over (score descending, student id ascending). Rank,
+percentile and "nearby students" windows are answered from it in
+O(log n) without touching the database.
+
+Indexes are seeded from the materialized leaderboard_ranks table, updated
+in-process when a transaction that moved a score commits, and caught up
+periodically with changes committed by other workers. Readers and the
+commit hook (which also runs on worker threads) share a lock per board;
+database reads happen outside it, and the periodic full reseed runs in a
+background thread.
+"""
+import logging
+import threading
+import time
+from bisect import bisect_left, bisect_right, insort
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from flask import current_app
+from src.database import db, on_commit
+from src.models.leaderboard import LeaderboardRank
+
+logger = logging.getLogger(__name__)
+
+
+class RankIndex:
+    """
+    Order-statistic index of student scores.
+
+    Keys are stored as (-score, student_id) in sorted sublists with a
+    Fenwick tree over the sublist lengths, so inserts, removals, rank
+    lookups and positional selects are all O(log n).
+    """
+
+    LOAD = 256
+
+    def __init__(self, entries=()):
+        """
+        Args:
+            entries: iterable of (student_id, score) pairs
+        """
+        self._scores = {}
+        for student_id, score in entries:
+            self._scores[student_id] = score
+
+        keys = sorted((-score, student_id) for student_id, score in self._scores.items())
+        self._lists = [keys[i:i + self.LOAD] for i in range(0, len(keys), self.LOAD)]
+        self._maxes = [sublist[-1] for sublist in self._lists]
+        self._build_tree()
+
+    def __len__(self):
+        return len(self._scores)
+
+    def __contains__(self, student_id):
+        return student_id in self._scores
+
+    def get_score(self, student_id):
+        """Get a student's indexed score, or None."""
+        return self._scores.get(student_id)
+
+    def set_score(self, student_id, score):
+        """Insert a student or move them to a new score."""
+        if student_id in self._scores:
+            if self._scores[student_id] == score:
+                return
+            self._remove_key((-self._scores[student_id], student_id))
+        self._scores[student_id] = score
+        self._insert_key((-score, student_id))
+
+    def remove(self, student_id):
+        """Remove a student from the index."""
+        score = self._scores.pop(student_id, None)
+        if score is None:
+            return False
+        self._remove_key((-score, student_id))
+        return True
+
+    def position(self, student_id):
+        """1-based position of a student (ties broken by student id), or None."""
+        score = self._scores.get(student_id)
+        if score is None:
+            return None
+        return self.position_of(score, student_id)
+
+    def position_of(self, score, student_id):
+        """1-based position a student would hold with the given score."""
+        key = (-score, student_id)
+        list_index = bisect_left(self._maxes, key)
+        if list_index == len(self._lists):
+            return len(self._scores) + 1
+        return self._prefix(list_index) + bisect_left(self._lists[list_index], key) + 1
+
+    def count_above(self, score):
+        """Number of students with a strictly higher score."""
+        key = (-score,)
+        list_index = bisect_left(self._maxes, key)
+        if list_index == len(self._lists):
+            return len(self._scores)
+        return self._prefix(list_index) + bisect_left(self._lists[list_index], key)
+
+    def slice(self, start, stop):
+        """
+        Get entries by 0-based position range.
+
+        Returns:
+            list of (position, student_id, score) with 1-based positions
+        """
+        start = max(start, 0)
+        stop = min(stop, len(self._scores))
+        if start >= stop:
+            return []
+
+        list_index, offset = self._locate(start)
+        result = []
+        position = start + 1
+        while position <= stop:
+            sublist = self._lists[list_index]
+            for neg_score, student_id in sublist[offset:offset + stop - position + 1]:
+                result.append((position, student_id, -neg_score))
+                position += 1
+            list_index += 1
+            offset = 0
+        return result
+
+    # Internal helpers
+
+    def _build_tree(self):
+        """Rebuild the Fenwick tree over sublist lengths."""
+        size = len(self._lists)
+        tree = [0] * (size + 1)
+        for i, sublist in enumerate(self._lists, start=1):
+            tree[i] += len(sublist)
+            parent = i + (i & -i)
+            if parent <= size:
+                tree[parent] += tree[i]
+        self._tree = tree
+
+    def _tree_add(self, list_index, delta):
+        i = list_index + 1
+        while i < len(self._tree):
+            self._tree[i] += delta
+            i += i & -i
+
+    def _prefix(self, list_index):
+        """Total length of sublists before list_index."""
+        total = 0
+        i = list_index
+        while i > 0:
+            total += self._tree[i]
+            i -= i & -i
+        return total
+
+    def _locate(self, position):
+        """Map a 0-based position to (sublist index, offset)."""
+        index = 0
+        remaining = position
+        step = 1 << (len(self._tree).bit_length())
+        while step:
+            candidate = index + step
+            if candidate < len(self._tree) and self._tree[candidate] <= remaining:
+                index = candidate
+                remaining -= self._tree[candidate]
+            step >>= 1
+        return index, remaining
+
+    def _insert_key(self, key):
+        if not self._lists:
+            self._lists.append([key])
+            self._maxes.append(key)
+            self._build_tree()
+            return
+
+        list_index = bisect_right(self._maxes, key)
+        if list_index == len(self._lists):
+            list_index -= 1
+        sublist = self._lists[list_index]
+        insort(sublist, key)
+        self._maxes[list_index] = sublist[-1]
+
+        if len(sublist) > self.LOAD * 2:
+            self._lists[list_index:list_index + 1] = [sublist[:self.LOAD], sublist[self.LOAD:]]
+            self._maxes[list_index:list_index + 1] = [sublist[self.LOAD - 1], sublist[-1]]
+            self._build_tree()
+        else:
+            self._tree_add(list_index, 1)
+
+    def _remove_key(self, key):
+        list_index = bisect_left(self._maxes, key)
+        sublist = self._lists[list_index]
+        del sublist[bisect_left(sublist, key)]
+
+        if sublist:
+            self._maxes[list_index] = sublist[-1]
+            self._tree_add(list_index, -1)
+        else:
+            del self._lists[list_index]
+            del self._maxes[list_index]
+            self._build_tree()
+
+
+class LeaderboardIndexService:
+    """Process-wide registry of RankIndex instances, one per board and scope."""
+
+    # How often an index pulls rows changed by other workers
+    SYNC_INTERVAL_SECONDS = 5
+    # Overlap applied to the sync watermark to tolerate late commits
+    SYNC_OVERLAP_SECONDS = 30
+    # Full reseed interval, which also drops removed students
+    RESEED_INTERVAL_SECONDS = 600
+
+    _indexes = {}
+    # Guards the registry only; each board's index has its own lock
+    _lock = threading.Lock()
+
+    @staticmethod
+    @contextmanager
+    def reading(board, scope=0):
+        """
+        Hold a board's index for lookups, seeding or syncing it as needed.
+
+        The index is yielded under the board's lock, so changes applied by
+        other threads never interleave with the caller's lookups; keep the
+        block to in-memory reads. Only the first use of a board waits for
+        its seed; periodic reseeds load in a background thread and swap
+        the new index in.
+        """
+        state = LeaderboardIndexService._load(board, scope)
+        LeaderboardIndexService._refresh(board, scope, state)
+        with state['lock']:
+            yield state['index']
+
+    @staticmethod
+    def apply_change(board, scope, student_id, score):
+        """
+        Apply a committed score change to a loaded index.
+
+        A score of None removes the student. Boards that have not been
+        loaded yet are skipped; they are seeded from the table on first use.
+        """
+        state = LeaderboardIndexService._indexes.get((board, scope))
+        if state is None:
+            return
+        with state['lock']:
+            if state['index'] is None:
+                return
+            if state['pending'] is not None:
+                state['pending'].append((student_id, score))
+            LeaderboardIndexService._set(state['index'], student_id, score)
+
+    @staticmethod
+    def queue_change(board, scope, student_id, score):
+        """Queue a score change to be applied when the current transaction commits."""
+        db.session.info.setdefault('leaderboard_index_changes', []).append(
+            (board, scope, student_id, score)
+        )
+
+    @staticmethod
+    def reset(board=None):
+        """Drop loaded indexes so they are reseeded on next use."""
+        with LeaderboardIndexService._lock:
+            if board is None:
+                LeaderboardIndexService._indexes.clear()
+            else:
+                for key in [k for k in LeaderboardIndexService._indexes if k[0] == board]:
+                    del LeaderboardIndexService._indexes[key]
+
+    @staticmethod
+    def _load(board, scope):
+        """Get a board's state, seeding its index on first use."""
+        key = (board, scope)
+        with LeaderboardIndexService._lock:
+            state = LeaderboardIndexService._indexes.get(key)
+            if state is None:
+                state = {
+                    'lock': threading.Lock(),
+                    'refreshing': threading.Lock(),
+                    'index': None,
+                    'pending': None,
+                    'reseeder': None
+                }
+                LeaderboardIndexService._indexes[key] = state
+
+        if state['index'] is None:
+            with state['refreshing']:
+                if state['index'] is None:
+                    LeaderboardIndexService._reseed(board, scope, state)
+        return state
+
+    @staticmethod
+    def _refresh(board, scope, state):
+        """Sync a loaded index, or start its periodic reseed, when due."""
+        now = time.monotonic()
+        reseed_due = now - state['seeded_at'] >= LeaderboardIndexService.RESEED_INTERVAL_SECONDS
+        sync_due = now - state['synced_at'] >= LeaderboardIndexService.SYNC_INTERVAL_SECONDS
+        if not (reseed_due or sync_due):
+            return
+        # Another thread is already refreshing this board
+        if not state['refreshing'].acquire(blocking=False):
+            return
+
+        if reseed_due:
+            app = current_app._get_current_object()
+            state['reseeder'] = threading.Thread(
+                target=LeaderboardIndexService._reseed_in_background,
+                args=(app, board, scope, state),
+                name=f'leaderboard-reseed-{board}-{scope}',
+                daemon=True
+            )
+            state['reseeder'].start()
+            return
+
+        try:
+            LeaderboardIndexService._sync(board, scope, state)
+        finally:
+            state['refreshing'].release()
+
+    @staticmethod
+    def _reseed_in_background(app, board, scope, state):
+        """Reseed thread body; releases the board's refresh claim when done."""
+        try:
+            with app.app_context():
+                LeaderboardIndexService._reseed(board, scope, state)
+                LeaderboardIndexService._sync(board, scope, state)
+        except Exception:
+            logger.exception('Leaderboard index reseed failed for %s:%s', board, scope)
+        finally:
+            state['refreshing'].release()
+
+    @staticmethod
+    def _reseed(board, scope, state):
+        """
+        Load a board's scores from the rank table and swap the index in.
+
+        The table is read without holding the board's lock. Changes
+        committed in this process while it loads are recorded and replayed
+        onto the new index before it replaces the old one.
+        """
+        with state['lock']:
+            state['pending'] = []
+        try:
+            seeded_from = datetime.utcnow()
+            rows = db.session.query(LeaderboardRank.student_id, LeaderboardRank.score).filter(
+                LeaderboardRank.board == board,
+                LeaderboardRank.scope == scope
+            ).all()
+            index = RankIndex(rows)
+        except Exception:
+            with state['lock']:
+                state['pending'] = None
+            raise
+
+        now = time.monotonic()
+        with state['lock']:
+            for student_id, score in state['pending']:
+                LeaderboardIndexService._set(index, student_id, score)
+            state.update(
+                index=index,
+                pending=None,
+                watermark=seeded_from,
+                seeded_at=now,
+                synced_at=now
+            )
+
+    @staticmethod
+    def _sync(board, scope, state):
+        """Pull rows updated since the last sync."""
+        synced_from = datetime.utcnow()
+        since = state['watermark'] - timedelta(seconds=LeaderboardIndexService.SYNC_OVERLAP_SECONDS)
+        rows = db.session.query(LeaderboardRank.student_id, LeaderboardRank.score).filter(
+            LeaderboardRank.board == board,
+            LeaderboardRank.scope == scope,
+            LeaderboardRank.updated_at >= since
+        ).all()
+
+        with state['lock']:
+            index = state['index']
+            for student_id, score in rows:
+                index.set_score(student_id, score)
+            state['watermark'] = synced_from
+            state['synced_at'] = time.monotonic()
+
+    @staticmethod
+    def _set(index, student_id, score):
+        """Apply one change; a score of None removes the student."""
+        if score is None:
+            index.remove(student_id)
+        else:
+            index.set_score(student_id, score)
+
+
+def _apply_committed_changes(changes):
+    """Apply queued leaderboard changes once they are durable."""
+    for board, scope, student_id, score in changes:
+        LeaderboardIndexService.apply_change(board, scope, student_id, score)
+
+
+on_commit('leaderboard_index_changes', _apply_committed_changes)
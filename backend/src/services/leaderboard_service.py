@@ -2,12 +2,11 @@
 Leaderboard service for rankings and competition.
 """
 from datetime import datetime, timedelta
-from sqlalchemy import desc, and_, func
 from src.database import db
 from src.models.student import Student
 from src.models.gamification import StudentProgress
-from src.models.achievement import StudentAchievement
-from src.models.learning_path import LearningPath
+from src.services.leaderboard_table_service import LeaderboardTableService
+from src.services.leaderboard_index_service import LeaderboardIndexService
 
 
 class LeaderboardService:
@@ -16,28 +15,19 @@ class LeaderboardService:
     @staticmethod
     def get_global_xp_leaderboard(limit=50, offset=0):
         """Get global XP leaderboard."""
-        students = db.session.query(
-            Student.id,
-            Student.name,
-            StudentProgress.total_xp,
-            StudentProgress.current_level
-        ).join(
-            StudentProgress, Student.id == StudentProgress.student_id
-        ).order_by(
-            desc(StudentProgress.total_xp),
-            Student.id  # Tie-breaker
-        ).limit(limit).offset(offset).all()
+        rows = LeaderboardTableService.get_page(
+            LeaderboardTableService.GLOBAL_XP, limit=limit, offset=offset
+        )
         
-        # Calculate ranks
         leaderboard = []
-        for idx, (student_id, name, total_xp, level) in enumerate(students, start=offset+1):
+        for rank, total_xp, student_id, name, grade, level in rows:
             leaderboard.append({
-                'rank': idx,
+                'rank': rank,
                 'student_id': student_id,
                 'student_name': name,
                 'total_xp': total_xp,
                 'level': level,
-                'tier': LeaderboardService._get_tier_from_rank(idx)
+                'tier': LeaderboardService._get_tier_from_rank(rank)
             })
         
         return leaderboard
@@ -45,30 +35,20 @@ class LeaderboardService:
     @staticmethod
     def get_grade_leaderboard(grade, limit=50, offset=0):
         """Get grade-level XP leaderboard."""
-        students = db.session.query(
-            Student.id,
-            Student.name,
-            StudentProgress.total_xp,
-            StudentProgress.current_level
-        ).join(
-            StudentProgress, Student.id == StudentProgress.student_id
-        ).filter(
-            Student.grade == grade
-        ).order_by(
-            desc(StudentProgress.total_xp),
-            Student.id
-        ).limit(limit).offset(offset).all()
+        rows = LeaderboardTableService.get_page(
+            LeaderboardTableService.GRADE_XP, scope=grade, limit=limit, offset=offset
+        )
         
         leaderboard = []
-        for idx, (student_id, name, total_xp, level) in enumerate(students, start=offset+1):
+        for rank, total_xp, student_id, name, _, level in rows:
             leaderboard.append({
-                'rank': idx,
+                'rank': rank,
                 'student_id': student_id,
                 'student_name': name,
                 'total_xp': total_xp,
                 'level': level,
                 'grade': grade,
-                'tier': LeaderboardService._get_tier_from_rank(idx)
+                'tier': LeaderboardService._get_tier_from_rank(rank)
             })
         
         return leaderboard
@@ -76,33 +56,19 @@ class LeaderboardService:
     @staticmethod
     def get_skills_leaderboard(limit=50, offset=0):
         """Get skills mastered leaderboard."""
-        # Count mastered skills per student
-        students = db.session.query(
-            Student.id,
-            Student.name,
-            Student.grade,
-            func.count(LearningPath.id).label('skills_mastered')
-        ).outerjoin(
-            LearningPath, and_(
-                Student.id == LearningPath.student_id,
-                LearningPath.mastery_achieved == True
-            )
-        ).group_by(
-            Student.id
-        ).order_by(
-            desc('skills_mastered'),
-            Student.id
-        ).limit(limit).offset(offset).all()
+        rows = LeaderboardTableService.get_page(
+            LeaderboardTableService.SKILLS, limit=limit, offset=offset
+        )
         
         leaderboard = []
-        for idx, (student_id, name, grade, skills_mastered) in enumerate(students, start=offset+1):
+        for rank, skills_mastered, student_id, name, grade, _ in rows:
             leaderboard.append({
-                'rank': idx,
+                'rank': rank,
                 'student_id': student_id,
                 'student_name': name,
                 'grade': grade,
                 'skills_mastered': skills_mastered,
-                'tier': LeaderboardService._get_tier_from_rank(idx)
+                'tier': LeaderboardService._get_tier_from_rank(rank)
             })
         
         return leaderboard
@@ -110,145 +76,119 @@ class LeaderboardService:
     @staticmethod
     def get_achievements_leaderboard(limit=50, offset=0):
         """Get achievements unlocked leaderboard."""
-        students = db.session.query(
-            Student.id,
-            Student.name,
-            Student.grade,
-            func.count(StudentAchievement.id).label('achievements_unlocked')
-        ).outerjoin(
-            StudentAchievement, and_(
-                Student.id == StudentAchievement.student_id,
-                StudentAchievement.unlocked_at != None
-            )
-        ).group_by(
-            Student.id
-        ).order_by(
-            desc('achievements_unlocked'),
-            Student.id
-        ).limit(limit).offset(offset).all()
+        rows = LeaderboardTableService.get_page(
+            LeaderboardTableService.ACHIEVEMENTS, limit=limit, offset=offset
+        )
         
         leaderboard = []
-        for idx, (student_id, name, grade, achievements) in enumerate(students, start=offset+1):
+        for rank, achievements, student_id, name, grade, _ in rows:
             leaderboard.append({
-                'rank': idx,
+                'rank': rank,
                 'student_id': student_id,
                 'student_name': name,
                 'grade': grade,
                 'achievements_unlocked': achievements,
-                'tier': LeaderboardService._get_tier_from_rank(idx)
+                'tier': LeaderboardService._get_tier_from_rank(rank)
             })
         
         return leaderboard
     
+    # Metric labels for rank lookups, keyed by leaderboard type
+    RANK_METRICS = {
+        'global_xp': 'Total XP',
+        'skills': 'Skills Mastered',
+        'achievements': 'Achievements Unlocked'
+    }
+    
     @staticmethod
     def get_student_rank(student_id, leaderboard_type='global_xp'):
-        """Get specific student's rank in a leaderboard."""
-        if leaderboard_type == 'global_xp':
-            # Count students with more XP
-            student_progress = StudentProgress.query.filter_by(student_id=student_id).first()
-            if not student_progress:
+        """
+        Get specific student's rank in a leaderboard.
+        
+        Answered from the in-process rank index, so no COUNT(*) runs
+        against the source tables. Ranks are positions (ties broken by
+        student id), the same rule the pages and nearby windows use.
+        A student not yet in this worker's index (created since its last
+        sync) ranks with a score of 0 on the skills and achievements boards.
+        """
+        metric_name = LeaderboardService.RANK_METRICS.get(leaderboard_type)
+        if not metric_name:
+            return None
+        
+        with LeaderboardIndexService.reading(leaderboard_type) as index:
+            metric_value = index.get_score(student_id)
+            total_students = len(index)
+            rank = index.position_of(metric_value or 0, student_id)
+        
+        if metric_value is None:
+            if leaderboard_type == 'global_xp' or not db.session.get(Student, student_id):
                 return None
-            
-            rank = db.session.query(func.count(StudentProgress.id)).filter(
-                StudentProgress.total_xp > student_progress.total_xp
-            ).scalar() + 1
-            
-            total_students = db.session.query(func.count(StudentProgress.id)).scalar()
-            
-            return {
-                'rank': rank,
-                'total_students': total_students,
-                'percentile': (rank / total_students * 100) if total_students > 0 else 0,
-                'tier': LeaderboardService._get_tier_from_rank(rank),
-                'metric_value': student_progress.total_xp,
-                'metric_name': 'Total XP'
-            }
-        
-        elif leaderboard_type == 'skills':
-            # Count students with more skills mastered
-            student = Student.query.get(student_id)
-            if not student:
-                return None
-            
-            skills_mastered = LearningPath.query.filter_by(
-                student_id=student_id,
-                mastery_achieved=True
-            ).count()
-            
-            rank = db.session.query(func.count(func.distinct(Student.id))).select_from(Student).outerjoin(
-                LearningPath, and_(
-                    Student.id == LearningPath.student_id,
-                    LearningPath.mastery_achieved == True
-                )
-            ).group_by(Student.id).having(
-                func.count(LearningPath.id) > skills_mastered
-            ).scalar() or 0
-            
-            rank += 1
-            
-            total_students = Student.query.count()
-            
-            return {
-                'rank': rank,
-                'total_students': total_students,
-                'percentile': (rank / total_students * 100) if total_students > 0 else 0,
-                'tier': LeaderboardService._get_tier_from_rank(rank),
-                'metric_value': skills_mastered,
-                'metric_name': 'Skills Mastered'
-            }
-        
-        elif leaderboard_type == 'achievements':
-            # Count students with more achievements
-            achievements_unlocked = StudentAchievement.query.filter(
-                and_(
-                    StudentAchievement.student_id == student_id,
-                    StudentAchievement.unlocked_at != None
-                )
-            ).count()
-            
-            # This is simplified - in production would use a more efficient query
-            rank = 1
-            total_students = Student.query.count()
-            
-            return {
-                'rank': rank,
-                'total_students': total_students,
-                'percentile': (rank / total_students * 100) if total_students > 0 else 0,
-                'tier': LeaderboardService._get_tier_from_rank(rank),
-                'metric_value': achievements_unlocked,
-                'metric_name': 'Achievements Unlocked'
-            }
-        
-        return None
+            metric_value = 0
+            total_students += 1
+        
+        return {
+            'rank': rank,
+            'total_students': total_students,
+            'percentile': (rank / total_students * 100) if total_students > 0 else 0,
+            'tier': LeaderboardService._get_tier_from_rank(rank),
+            'metric_value': metric_value,
+            'metric_name': metric_name
+        }
     
     @staticmethod
     def get_nearby_students(student_id, leaderboard_type='global_xp', range_size=5):
         """Get students near the given student's rank."""
-        rank_info = LeaderboardService.get_student_rank(student_id, leaderboard_type)
-        if not rank_info:
+        if leaderboard_type not in LeaderboardService.RANK_METRICS:
             return []
         
-        rank = rank_info['rank']
-        start_rank = max(1, rank - range_size)
+        with LeaderboardIndexService.reading(leaderboard_type) as index:
+            position = index.position(student_id)
+            if position is None:
+                return []
+            start = max(0, position - 1 - range_size)
+            window = index.slice(start, start + range_size * 2 + 1)
         
-        # Get leaderboard around student's rank
-        if leaderboard_type == 'global_xp':
-            return LeaderboardService.get_global_xp_leaderboard(
-                limit=range_size * 2 + 1,
-                offset=start_rank - 1
-            )
-        elif leaderboard_type == 'skills':
-            return LeaderboardService.get_skills_leaderboard(
-                limit=range_size * 2 + 1,
-                offset=start_rank - 1
-            )
-        elif leaderboard_type == 'achievements':
-            return LeaderboardService.get_achievements_leaderboard(
-                limit=range_size * 2 + 1,
-                offset=start_rank - 1
-            )
+        if not window:
+            return []
+        
+        # One primary-key lookup for the names and levels in the window
+        student_ids = [sid for _, sid, _ in window]
+        details = {
+            row[0]: row for row in db.session.query(
+                Student.id,
+                Student.name,
+                Student.grade,
+                StudentProgress.current_level
+            ).outerjoin(
+                StudentProgress, StudentProgress.student_id == Student.id
+            ).filter(Student.id.in_(student_ids)).all()
+        }
+        
+        metric_key = {
+            'global_xp': 'total_xp',
+            'skills': 'skills_mastered',
+            'achievements': 'achievements_unlocked'
+        }[leaderboard_type]
+        
+        nearby = []
+        for rank, sid, score in window:
+            if sid not in details:
+                continue
+            _, name, grade, level = details[sid]
+            entry = {
+                'rank': rank,
+                'student_id': sid,
+                'student_name': name,
+                metric_key: score,
+                'tier': LeaderboardService._get_tier_from_rank(rank)
+            }
+            if leaderboard_type == 'global_xp':
+                entry['level'] = level
+            else:
+                entry['grade'] = grade
+            nearby.append(entry)
         
-        return []
+        return nearby
     
     @staticmethod
     def _get_tier_from_rank(rank):
@@ -0,0 +1,467 @@
+"""
+Leaderboard table service for materialized, incrementally maintained rank tables.
+
+Each board keeps one LeaderboardRank row per student holding their score.
+Score changes write only that row; rank order (score descending, student
+id ascending) comes from the (board, scope, score, student_id) index at
+read time, so page reads never sort the underlying students / progress /
+learning path tables and concurrent writers never renumber each other's
+rows. Every change is also queued for the in-process rank indexes (see
+leaderboard_index_service).
+
+Scores follow the source rows through session events rather than calls
+from each writer: a transaction that creates a student, changes a
+StudentProgress total or level, a student's grade, a LearningPath's
+mastery or a StudentAchievement's unlock moves the student on the
+affected boards when it commits. New students start on the skills and achievements
+boards with 0 and join the XP boards with their StudentProgress row.
+Bulk update()/insert() statements skip these events; code issuing them
+calls the record_* method for the board itself.
+
+Cached board pages are invalidated through one cache tag per board (see
+cache_tags), queued whenever a score or level shown on the board changes.
+The week and month XP boards of the gamification routes sum the same
+awards, so they share the global board's tag.
+"""
+from datetime import datetime
+from sqlalchemy import and_, or_, func, delete, insert, select, literal, event, inspect
+from src.database import db
+from src.models.student import Student
+from src.models.gamification import StudentProgress
+from src.models.achievement import StudentAchievement
+from src.models.learning_path import LearningPath
+from src.models.leaderboard import LeaderboardRank
+from src.services.leaderboard_index_service import LeaderboardIndexService
+from src.services.cache_tags import CacheTags
+
+
+class LeaderboardTableService:
+    """Service for maintaining and reading materialized leaderboard ranks."""
+
+    GLOBAL_XP = 'global_xp'
+    GRADE_XP = 'grade_xp'
+    SKILLS = 'skills'
+    ACHIEVEMENTS = 'achievements'
+
+    BOARDS = [GLOBAL_XP, GRADE_XP, SKILLS, ACHIEVEMENTS]
+
+    # ------------------------------------------------------------------
+    # Score change hooks
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def record_xp(student_id, total_xp, grade=None, level_changed=False):
+        """
+        Update the global and grade XP boards after a student's XP changes.
+
+        Called when a transaction that changed the XP, the level or the
+        student's grade commits (see the session events below). level_changed invalidates the
+        boards' cached pages, which show levels, even if the score is unchanged.
+        """
+        if grade is None:
+            grade = db.session.query(Student.grade).filter(Student.id == student_id).scalar()
+
+        LeaderboardTableService.update_score(LeaderboardTableService.GLOBAL_XP, student_id, total_xp)
+
+        if grade is not None:
+            # Drop entries left on another grade's board after a grade change
+            stale_scopes = db.session.query(LeaderboardRank.scope).filter(
+                LeaderboardRank.board == LeaderboardTableService.GRADE_XP,
+                LeaderboardRank.student_id == student_id,
+                LeaderboardRank.scope != grade
+            ).all()
+            for (scope,) in stale_scopes:
+                LeaderboardTableService.remove_student(LeaderboardTableService.GRADE_XP, student_id, scope)
+
+            LeaderboardTableService.update_score(LeaderboardTableService.GRADE_XP, student_id, total_xp, scope=grade)
+
+        if level_changed:
+            CacheTags.queue(CacheTags.leaderboard(LeaderboardTableService.GLOBAL_XP))
+            if grade is not None:
+                CacheTags.queue(CacheTags.leaderboard(LeaderboardTableService.GRADE_XP, grade))
+
+    @staticmethod
+    def record_skills_mastered(student_id):
+        """Recount a student's mastered skills and update the skills board."""
+        skills_mastered = db.session.query(func.count(LearningPath.id)).filter(
+            LearningPath.student_id == student_id,
+            LearningPath.mastery_achieved == True
+        ).scalar() or 0
+
+        return LeaderboardTableService.update_score(LeaderboardTableService.SKILLS, student_id, skills_mastered)
+
+    @staticmethod
+    def record_achievements_unlocked(student_id):
+        """Recount a student's unlocked achievements and update the achievements board."""
+        achievements_unlocked = db.session.query(func.count(StudentAchievement.id)).filter(
+            StudentAchievement.student_id == student_id,
+            StudentAchievement.unlocked_at != None
+        ).scalar() or 0
+
+        return LeaderboardTableService.update_score(
+            LeaderboardTableService.ACHIEVEMENTS, student_id, achievements_unlocked
+        )
+
+    @staticmethod
+    def update_score(board, student_id, score, scope=0):
+        """
+        Set a student's score on a board.
+
+        Only the student's own row is written; positions are derived from
+        the (board, scope, score, student_id) index when the board is read,
+        so concurrent writers never contend for other students' rows. The
+        board's cache tag is queued with every change, since pages show
+        the scores.
+
+        Returns:
+            LeaderboardRank entry for the student
+        """
+        entry = LeaderboardRank.query.filter_by(
+            board=board,
+            scope=scope,
+            student_id=student_id
+        ).first()
+
+        if entry and entry.score == score:
+            return entry
+
+        if not entry:
+            entry = LeaderboardRank(
+                board=board,
+                scope=scope,
+                student_id=student_id,
+                score=score
+            )
+            db.session.add(entry)
+        else:
+            entry.score = score
+        entry.updated_at = datetime.utcnow()
+        LeaderboardIndexService.queue_change(board, scope, student_id, score)
+        CacheTags.queue(CacheTags.leaderboard(board, scope))
+
+        return entry
+
+    @staticmethod
+    def remove_student(board, student_id, scope=0):
+        """Remove a student from a board."""
+        entry = LeaderboardRank.query.filter_by(
+            board=board,
+            scope=scope,
+            student_id=student_id
+        ).first()
+
+        if not entry:
+            return False
+
+        db.session.delete(entry)
+        LeaderboardIndexService.queue_change(board, scope, student_id, None)
+        CacheTags.queue(CacheTags.leaderboard(board, scope))
+
+        return True
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def get_page(board, scope=0, limit=50, offset=0):
+        """
+        Read one page of a board in rank order.
+
+        Pages are keyset reads on the (board, scope, score, student_id)
+        index: the entry just before the page is looked up by position in
+        the in-process rank index, and the page starts after its key, so
+        deep pages cost the same as the first one and no sort runs over the
+        board or the source tables. Ranks are positions (ties broken by
+        student id), matching the rank index.
+
+        Returns:
+            list of (rank, score, student_id, name, grade, level) tuples
+        """
+        query = db.session.query(
+            LeaderboardRank.score,
+            Student.id,
+            Student.name,
+            Student.grade,
+            StudentProgress.current_level
+        ).join(
+            Student, Student.id == LeaderboardRank.student_id
+        ).outerjoin(
+            StudentProgress, StudentProgress.student_id == LeaderboardRank.student_id
+        ).filter(
+            LeaderboardRank.board == board,
+            LeaderboardRank.scope == scope
+        )
+
+        if offset > 0:
+            with LeaderboardIndexService.reading(board, scope) as index:
+                boundary = index.slice(offset - 1, offset)
+            if not boundary:
+                return []
+            _, boundary_id, boundary_score = boundary[0]
+            query = query.filter(or_(
+                LeaderboardRank.score < boundary_score,
+                and_(LeaderboardRank.score == boundary_score, LeaderboardRank.student_id > boundary_id)
+            ))
+
+        rows = query.order_by(
+            LeaderboardRank.score.desc(),
+            LeaderboardRank.student_id
+        ).limit(limit).all()
+
+        return [(offset + i, *row) for i, row in enumerate(rows, start=1)]
+
+    @staticmethod
+    def get_rank(board, student_id, scope=0):
+        """
+        Get a student's 1-based position on a board, or None if absent.
+
+        One COUNT over the index entries ahead of the student.
+        """
+        entry = LeaderboardTableService.get_entry(board, student_id, scope)
+        if entry is None:
+            return None
+
+        ahead = db.session.query(func.count(LeaderboardRank.id)).filter(
+            LeaderboardRank.board == board,
+            LeaderboardRank.scope == scope,
+            or_(
+                LeaderboardRank.score > entry.score,
+                and_(LeaderboardRank.score == entry.score, LeaderboardRank.student_id < student_id)
+            )
+        ).scalar()
+        return ahead + 1
+
+    @staticmethod
+    def get_entry(board, student_id, scope=0):
+        """Get a student's stored entry on a board."""
+        return LeaderboardRank.query.filter_by(
+            board=board,
+            scope=scope,
+            student_id=student_id
+        ).first()
+
+    # ------------------------------------------------------------------
+    # Rebuild
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def rebuild(board=None):
+        """
+        Rebuild one board (or all boards) from the source tables.
+
+        Scores are written in a single INSERT ... SELECT. Use this after a
+        restore, a bulk import or anything else that bypassed the hooks.
+
+        Returns:
+            dict mapping board name to number of rows written
+        """
+        boards = [board] if board else LeaderboardTableService.BOARDS
+        counts = {}
+
+        for board_name in boards:
+            source = LeaderboardTableService._build_source_query(board_name)
+            if source is None:
+                raise ValueError(f"Unknown leaderboard: {board_name}")
+
+            db.session.execute(delete(LeaderboardRank).where(LeaderboardRank.board == board_name))
+            db.session.execute(
+                insert(LeaderboardRank).from_select(
+                    ['board', 'scope', 'student_id', 'score', 'updated_at'],
+                    source
+                )
+            )
+            counts[board_name] = db.session.query(func.count(LeaderboardRank.id)).filter(
+                LeaderboardRank.board == board_name
+            ).scalar()
+
+        for board_name in boards:
+            if board_name == LeaderboardTableService.GRADE_XP:
+                grades = db.session.query(LeaderboardRank.scope).filter(
+                    LeaderboardRank.board == board_name
+                ).distinct().all()
+                CacheTags.queue(*(CacheTags.leaderboard(board_name, grade) for (grade,) in grades))
+            else:
+                CacheTags.queue(CacheTags.leaderboard(board_name))
+        db.session.commit()
+
+        for board_name in boards:
+            LeaderboardIndexService.reset(board_name)
+
+        return counts
+
+    @staticmethod
+    def _build_source_query(board):
+        """Build the SELECT of scores used to rebuild a board."""
+        now = literal(datetime.utcnow())
+
+        if board == LeaderboardTableService.GLOBAL_XP:
+            return select(
+                literal(board),
+                literal(0),
+                StudentProgress.student_id,
+                StudentProgress.total_xp,
+                now
+            ).join(Student, Student.id == StudentProgress.student_id)
+
+        if board == LeaderboardTableService.GRADE_XP:
+            return select(
+                literal(board),
+                Student.grade,
+                StudentProgress.student_id,
+                StudentProgress.total_xp,
+                now
+            ).join(Student, Student.id == StudentProgress.student_id)
+
+        if board == LeaderboardTableService.SKILLS:
+            counts = select(
+                Student.id.label('student_id'),
+                func.count(LearningPath.id).label('score')
+            ).outerjoin(
+                LearningPath, and_(
+                    Student.id == LearningPath.student_id,
+                    LearningPath.mastery_achieved == True
+                )
+            ).group_by(Student.id).subquery()
+        elif board == LeaderboardTableService.ACHIEVEMENTS:
+            counts = select(
+                Student.id.label('student_id'),
+                func.count(StudentAchievement.id).label('score')
+            ).outerjoin(
+                StudentAchievement, and_(
+                    Student.id == StudentAchievement.student_id,
+                    StudentAchievement.unlocked_at != None
+                )
+            ).group_by(Student.id).subquery()
+        else:
+            return None
+
+        return select(
+            literal(board),
+            literal(0),
+            counts.c.student_id,
+            counts.c.score,
+            now
+        )
+
+
+# ----------------------------------------------------------------------
+# Session events
+# ----------------------------------------------------------------------
+
+def _changed(state, *names):
+    """True if any of the named attributes changed in this flush."""
+    return any(state.attrs[name].history.has_changes() for name in names)
+
+
+@event.listens_for(db.session, 'after_flush')
+def _collect_board_changes(session, flush_context):
+    """
+    Record the students whose board scores this flush may have changed.
+
+    Reads loaded attribute values and history only, so it never triggers
+    a load during a flush. The boards are updated when the transaction
+    commits.
+    """
+    changes = session.info.setdefault('leaderboard_changes', {})
+    removed = session.info.setdefault('leaderboard_removed', {})
+
+    def note(student_id, kind, value=True):
+        if student_id is not None:
+            changes.setdefault(student_id, {})[kind] = value
+
+    for instance in session.new:
+        values = inspect(instance).dict
+        if isinstance(instance, Student):
+            note(values.get('id'), 'joined')
+        elif isinstance(instance, StudentProgress):
+            note(values.get('student_id'), 'xp', values.get('total_xp') or 0)
+        elif isinstance(instance, LearningPath) and values.get('mastery_achieved'):
+            note(values.get('student_id'), 'skills')
+        elif isinstance(instance, StudentAchievement) and values.get('unlocked_at') is not None:
+            note(values.get('student_id'), 'achievements')
+
+    for instance in session.dirty:
+        state = inspect(instance)
+        values = state.dict
+        if isinstance(instance, Student) and _changed(state, 'grade'):
+            note(values.get('id'), 'grade')
+        elif isinstance(instance, StudentProgress):
+            if _changed(state, 'total_xp'):
+                note(values.get('student_id'), 'xp', values.get('total_xp'))
+            if _changed(state, 'current_level'):
+                note(values.get('student_id'), 'level_changed')
+        elif isinstance(instance, LearningPath) and _changed(state, 'mastery_achieved', 'student_id'):
+            note(values.get('student_id'), 'skills')
+        elif isinstance(instance, StudentAchievement) and _changed(state, 'unlocked_at', 'student_id'):
+            note(values.get('student_id'), 'achievements')
+
+    for instance in session.deleted:
+        values = inspect(instance).dict
+        if isinstance(instance, Student):
+            removed[values.get('id')] = values.get('grade')
+        elif isinstance(instance, StudentProgress):
+            note(values.get('student_id'), 'progress_removed')
+        elif isinstance(instance, LearningPath):
+            note(values.get('student_id'), 'skills')
+        elif isinstance(instance, StudentAchievement):
+            note(values.get('student_id'), 'achievements')
+
+
+@event.listens_for(db.session, 'before_commit')
+def _apply_board_changes(session):
+    """
+    Move the students recorded by the transaction's flushes on their boards.
+
+    Runs once per commit after a final flush, so recounts see every row
+    the transaction wrote and a student touched by many flushes (a
+    level-up loop, say) is moved once.
+    """
+    session.flush()
+    while session.info.get('leaderboard_changes') or session.info.get('leaderboard_removed'):
+        changes = session.info.pop('leaderboard_changes', None) or {}
+        removed = session.info.pop('leaderboard_removed', None) or {}
+        _move_students(changes, removed)
+        session.flush()
+
+
+@event.listens_for(db.session, 'after_soft_rollback')
+def _discard_board_changes(session, previous_transaction):
+    """Forget the changes of a rolled back transaction."""
+    session.info.pop('leaderboard_changes', None)
+    session.info.pop('leaderboard_removed', None)
+
+
+def _move_students(changes, removed):
+    """Apply collected changes: student id -> kinds, and deleted students' grades."""
+    # Deleted students' entries go with them (delete-orphan cascade)
+    for student_id, grade in removed.items():
+        changes.pop(student_id, None)
+        for board in LeaderboardTableService.BOARDS:
+            scope = grade if board == LeaderboardTableService.GRADE_XP else 0
+            if scope is not None:
+                LeaderboardIndexService.queue_change(board, scope, student_id, None)
+
+    for student_id, kinds in changes.items():
+        if 'joined' in kinds or 'skills' in kinds:
+            LeaderboardTableService.record_skills_mastered(student_id)
+        if 'joined' in kinds or 'achievements' in kinds:
+            LeaderboardTableService.record_achievements_unlocked(student_id)
+
+        if 'progress_removed' in kinds:
+            LeaderboardTableService.remove_student(LeaderboardTableService.GLOBAL_XP, student_id)
+            for (scope,) in db.session.query(LeaderboardRank.scope).filter(
+                LeaderboardRank.board == LeaderboardTableService.GRADE_XP,
+                LeaderboardRank.student_id == student_id
+            ).all():
+                LeaderboardTableService.remove_student(LeaderboardTableService.GRADE_XP, student_id, scope)
+        elif 'xp' in kinds or 'grade' in kinds or 'level_changed' in kinds:
+            total_xp = kinds.get('xp')
+            if total_xp is None:
+                total_xp = db.session.query(StudentProgress.total_xp).filter(
+                    StudentProgress.student_id == student_id
+                ).scalar()
+            if total_xp is not None:
+                LeaderboardTableService.record_xp(
+                    student_id, total_xp, level_changed='level_changed' in kinds
+                )
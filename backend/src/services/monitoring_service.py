@@ -9,6 +9,9 @@ from src.models.class_group import ClassGroup, ClassMembership
 from src.models.learning_path import LearningPath
 from src.models.assignment_model import Assignment, AssignmentStudent
 from src.models.streak import StreakTracking
+from src.services.daily_stats_service import DailyStatsService
+from src.services.engagement_service import EngagementService
+from src.services.risk_scoring_service import RiskScoringService
 from datetime import datetime, timedelta
 
 
@@ -413,8 +416,13 @@ class MonitoringService:
             return []
     
     @staticmethod
-    def track_session_activity(student_id, skill_id, question_id, correct):
-        """Track real-time session activity"""
+    def track_session_activity(student_id, skill_id, question_id, correct, commit=True):
+        """
+        Track real-time session activity
+        
+        With commit=False the update is only flushed and errors propagate,
+        so the caller's transaction can be rolled back as a whole.
+        """
         try:
             # Get or create active session
             session = StudentSession.query.filter_by(
@@ -425,21 +433,31 @@ class MonitoringService:
             if not session:
                 session = StudentSession(
                     student_id=student_id,
-                    skill_id=skill_id
+                    skill_id=skill_id,
+                    started_at=datetime.utcnow(),
+                    questions_answered=0,
+                    questions_correct=0
                 )
                 db.session.add(session)
+                DailyStatsService.record_session_start(session)
             
-            # Update session
-            session.questions_answered += 1
+            # Update session (counters may be NULL until the row is flushed)
+            session.questions_answered = (session.questions_answered or 0) + 1
             if correct:
-                session.questions_correct += 1
+                session.questions_correct = (session.questions_correct or 0) + 1
             session.accuracy = session.questions_correct / session.questions_answered if session.questions_answered > 0 else 0
             session.last_activity_at = datetime.utcnow()
+            DailyStatsService.record_answer(session, correct)
             
-            db.session.commit()
+            if commit:
+                db.session.commit()
+            else:
+                db.session.flush()
             return {'success': True, 'session': session.to_dict()}, 200
             
         except Exception as e:
+            if not commit:
+                raise
             db.session.rollback()
             return {'error': str(e)}, 500
     
@@ -456,13 +474,19 @@ class MonitoringService:
             for session in active_sessions:
                 session.is_active = False
                 session.ended_at = datetime.utcnow()
+                DailyStatsService.record_session_end(session)
+            if active_sessions:
+                EngagementService.refresh([student_id], commit=False)
+                RiskScoringService.refresh([student_id], commit=False)
             
             # Create new session
             session = StudentSession(
                 student_id=student_id,
-                skill_id=skill_id
+                skill_id=skill_id,
+                started_at=datetime.utcnow()
             )
             db.session.add(session)
+            DailyStatsService.record_session_start(session)
             db.session.commit()
             
             return {'success': True, 'session': session.to_dict()}, 201
@@ -479,8 +503,14 @@ class MonitoringService:
             if not session:
                 return {'error': 'Session not found'}, 404
             
+            if not session.is_active:
+                return {'success': True, 'session': session.to_dict()}, 200
+            
             session.is_active = False
             session.ended_at = datetime.utcnow()
+            DailyStatsService.record_session_end(session)
+            EngagementService.refresh([session.student_id], commit=False)
+            RiskScoringService.refresh([session.student_id], commit=False)
             db.session.commit()
             
             return {'success': True, 'session': session.to_dict()}, 200
@@ -11,6 +11,7 @@ from src.models.assignment_model import Assignment, AssignmentStudent
 from src.models.gamification import StudentProgress
 from src.models.achievement import Achievement, StudentAchievement
 from src.models.streak import StreakTracking
+from src.services.daily_stats_service import DailyStatsService
 from datetime import datetime, timedelta
 
 
@@ -59,22 +60,17 @@ class ParentViewService:
             if not student:
                 return {'success': False, 'error': 'Student not found'}, 404
             
-            # Get sessions (last 30 days)
-            cutoff = datetime.utcnow() - timedelta(days=30)
-            sessions = StudentSession.query.filter(
-                StudentSession.student_id == student_id,
-                StudentSession.started_at >= cutoff
-            ).all()
+            # Get daily practice rollup (last 30 days)
+            today = datetime.utcnow().date()
+            stats = DailyStatsService.get_stats(student_id, today - timedelta(days=30))
             
             # Calculate metrics
-            total_questions = sum(s.questions_answered for s in sessions)
-            total_correct = sum(s.questions_correct for s in sessions)
+            totals = DailyStatsService.totals(stats)
+            total_questions = totals['questions']
+            total_correct = totals['correct']
             accuracy = total_correct / total_questions if total_questions > 0 else 0
             
-            total_time = sum(
-                (s.ended_at - s.started_at).total_seconds() / 3600
-                for s in sessions if s.ended_at
-            )
+            total_time = totals['seconds'] / 3600
             
             # Get skill summary
             paths = LearningPath.query.filter_by(student_id=student_id).all()
@@ -93,17 +89,20 @@ class ParentViewService:
             # Get gamification
             progress = StudentProgress.query.filter_by(student_id=student_id).first()
             
-            # Get most practiced skill (last 7 days)
-            recent_cutoff = datetime.utcnow() - timedelta(days=7)
-            recent_sessions = StudentSession.query.filter(
+            # Get latest session start in the same 30 days
+            last_practice = db.session.query(
+                db.func.max(StudentSession.started_at)
+            ).filter(
                 StudentSession.student_id == student_id,
-                StudentSession.started_at >= recent_cutoff
-            ).all()
+                StudentSession.started_at >= datetime.utcnow() - timedelta(days=30)
+            ).scalar()
             
-            skill_counts = {}
-            for session in recent_sessions:
-                if session.skill_id:
-                    skill_counts[session.skill_id] = skill_counts.get(session.skill_id, 0) + session.questions_answered
+            # Get most practiced skill (last 7 days)
+            recent_cutoff = today - timedelta(days=7)
+            skill_counts = {
+                skill_id: data['questions'] for skill_id, data in
+                DailyStatsService.by_skill(row for row in stats if row.day >= recent_cutoff).items()
+            }
             
             most_practiced_skill = None
             most_practiced_count = 0
@@ -153,7 +152,7 @@ class ParentViewService:
                     'total_assignments': total_assignments
                 },
                 'quick_stats': {
-                    'last_practice': sessions[-1].started_at.isoformat() if sessions else None,
+                    'last_practice': last_practice.isoformat() if last_practice else None,
                     'most_practiced_skill': most_practiced_skill,
                     'most_practiced_count': most_practiced_count,
                     'next_assignment_due': next_due
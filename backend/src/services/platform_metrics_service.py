@@ -0,0 +1,445 @@
+"""
+Platform metrics service for the admin dashboard.
+
+Distinct active students are counted with one HyperLogLog sketch per
+UTC day, stored in platform_daily_activity and built from the
+per-student daily practice rollup (student_daily_stats). The 7- and
+30-day counts merge the window's daily sketches instead of loading every
+session. Days are immutable once over, so each refresh only rebuilds
+today, yesterday (late answers and session ends) and any day missing
+from the window.
+
+The snapshot holds the sketches' window counts, user counts by role,
+practice totals summed from the daily rollup, skills mastered summed
+from the skills leaderboard, and table cardinalities. Table
+cardinalities come from the planner's statistics on PostgreSQL and from
+COUNT(*) elsewhere. It is computed once for the whole platform, by
+refresh_platform_metrics.py on a schedule, and stored in
+platform_metrics_snapshot. Processes keep a copy for LOCAL_CACHE_SECONDS,
+so admin endpoints usually run no queries. Requests never compute it:
+if the stored snapshot is missing or older than REFRESH_INTERVAL_SECONDS
+(no scheduled job), the first process to claim it starts a refresh in a
+background thread and every request keeps serving the stored snapshot,
+or an empty one until the first refresh is stored.
+"""
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import func, or_, text
+from sqlalchemy.exc import IntegrityError
+from src.database import db, upsert
+from src.models.user import User
+from src.models.student import Student
+from src.models.student_session import StudentSession, StudentDailyStats
+from src.models.learning_path import LearningPath
+from src.models.leaderboard import LeaderboardRank
+from src.models.assignment_model import Assignment
+from src.models.admin_models import AuditLog
+from src.models.platform_metrics import PlatformDailyActivity, PlatformMetricsSnapshot
+from src.services.hyperloglog import HyperLogLog
+from src.services.leaderboard_table_service import LeaderboardTableService
+
+logger = logging.getLogger(__name__)
+
+
+class PlatformMetricsService:
+    """Sketch-backed platform metrics with a shared, periodically refreshed snapshot."""
+
+    # HyperLogLog precision: 4 KB per day, about 1.6% standard error
+    SKETCH_PRECISION = 12
+    # Active-user windows in days, including today
+    WINDOWS = (7, 30)
+    # Stored snapshots older than this are refreshed in the background by one reading process
+    REFRESH_INTERVAL_SECONDS = int(os.getenv('PLATFORM_METRICS_REFRESH_SECONDS', '60'))
+    # Each process re-reads the stored snapshot this often
+    LOCAL_CACHE_SECONDS = 15
+    # A refresh claim older than this is assumed to belong to a dead process
+    CLAIM_SECONDS = 300
+    # Days per query when backfilling history
+    BACKFILL_CHUNK_DAYS = 31
+    # Tables reported by the system health check
+    TABLES = {
+        'users': User,
+        'students': Student,
+        'sessions': StudentSession,
+        'learning_paths': LearningPath,
+        'assignments': Assignment,
+        'audit_logs': AuditLog
+    }
+
+    # Snapshot row id
+    SNAPSHOT_ID = 1
+
+    _snapshot = None
+    _snapshot_at = None
+    _lock = threading.Lock()
+    # Background refresh started by this process, if any
+    _refresher = None
+
+    # ------------------------------------------------------------------
+    # Daily sketches
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def refresh_days(days):
+        """
+        Rebuild and store the daily activity rows for the given days.
+
+        The caller commits.
+
+        Returns:
+            Number of days written
+        """
+        values = PlatformMetricsService._build_days(days)
+        PlatformMetricsService._store(values)
+        return len(values)
+
+    @staticmethod
+    def _build_days(days):
+        """
+        Build daily activity rows from the daily practice rollup.
+
+        One query over the (day, student_id) index returns each student's
+        session count per day for the span of days.
+
+        Returns:
+            list of PlatformDailyActivity column dicts, in day order
+        """
+        days = sorted(set(days))
+        if not days:
+            return []
+
+        precision = PlatformMetricsService.SKETCH_PRECISION
+        sketches = {day: HyperLogLog(precision) for day in days}
+        sessions = {day: 0 for day in days}
+        for day, student_id, count in db.session.query(
+            StudentDailyStats.day,
+            StudentDailyStats.student_id,
+            func.sum(StudentDailyStats.sessions)
+        ).filter(
+            StudentDailyStats.day >= days[0],
+            StudentDailyStats.day <= days[-1]
+        ).group_by(StudentDailyStats.day, StudentDailyStats.student_id).all():
+            if day in sketches and count:
+                sketches[day].add(student_id)
+                sessions[day] += count
+
+        now = datetime.utcnow()
+        return [{
+            'day': day,
+            'sketch': sketches[day].to_bytes(),
+            'active_students': sketches[day].count(),
+            'sessions': sessions[day],
+            'updated_at': now
+        } for day in days]
+
+    @staticmethod
+    def backfill():
+        """
+        Rebuild the daily rows for every day in the daily practice rollup.
+
+        Run after backfill_daily_stats.py. Each chunk of
+        BACKFILL_CHUNK_DAYS is committed on its own.
+
+        Returns:
+            Number of days written
+        """
+        first = db.session.query(func.min(StudentDailyStats.day)).scalar()
+        if first is None:
+            return 0
+
+        today = datetime.utcnow().date()
+        day = first
+        written = 0
+        while day <= today:
+            chunk = [day + timedelta(days=i) for i in range(PlatformMetricsService.BACKFILL_CHUNK_DAYS)]
+            written += PlatformMetricsService.refresh_days([d for d in chunk if d <= today])
+            db.session.commit()
+            day += timedelta(days=PlatformMetricsService.BACKFILL_CHUNK_DAYS)
+        return written
+
+    @staticmethod
+    def _store(values):
+        """Insert or replace daily activity rows."""
+        upsert(PlatformDailyActivity, values, ['day'])
+
+    @staticmethod
+    def active_users(today=None):
+        """
+        Estimate distinct active students for each window in WINDOWS.
+
+        Rebuilds today, yesterday and any missing day of the longest
+        window first, then merges the stored sketches. The caller commits.
+
+        Returns:
+            dict of window days -> estimated distinct students
+        """
+        today = today or datetime.utcnow().date()
+        longest = max(PlatformMetricsService.WINDOWS)
+        first_day = today - timedelta(days=longest - 1)
+
+        rows = {
+            row.day: row.sketch for row in db.session.query(
+                PlatformDailyActivity.day,
+                PlatformDailyActivity.sketch
+            ).filter(
+                PlatformDailyActivity.day >= first_day,
+                PlatformDailyActivity.day <= today
+            ).all()
+        }
+        stale = {today, today - timedelta(days=1)} | {
+            first_day + timedelta(days=i) for i in range(longest)
+            if first_day + timedelta(days=i) not in rows
+        }
+        values = PlatformMetricsService._build_days(stale)
+        PlatformMetricsService._store(values)
+        rows.update((value['day'], value['sketch']) for value in values)
+
+        precision = PlatformMetricsService.SKETCH_PRECISION
+        counts = {}
+        for window in sorted(PlatformMetricsService.WINDOWS):
+            merged = HyperLogLog(precision)
+            for i in range(window):
+                sketch = rows.get(today - timedelta(days=i))
+                if sketch is not None:
+                    merged.merge(HyperLogLog.from_bytes(sketch, precision))
+            counts[window] = merged.count()
+        return counts
+
+    # ------------------------------------------------------------------
+    # Cardinalities
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def table_counts():
+        """
+        Row counts for TABLES.
+
+        Uses the planner's estimates (pg_class.reltuples) on PostgreSQL,
+        falling back to COUNT(*) for tables never analyzed, and COUNT(*)
+        elsewhere.
+        """
+        names = {model.__tablename__: key for key, model in PlatformMetricsService.TABLES.items()}
+        counts = {}
+        if db.session.get_bind().dialect.name == 'postgresql':
+            for relname, estimate in db.session.execute(
+                text('SELECT relname, reltuples FROM pg_class WHERE relkind = :kind AND relname = ANY(:names)'),
+                {'kind': 'r', 'names': list(names)}
+            ).all():
+                if estimate is not None and estimate >= 0:
+                    counts[names[relname]] = int(estimate)
+
+        for key, model in PlatformMetricsService.TABLES.items():
+            if key not in counts:
+                counts[key] = db.session.query(func.count()).select_from(model).scalar()
+        return counts
+
+    # ------------------------------------------------------------------
+    # Snapshot
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def refresh():
+        """
+        Recompute the metrics snapshot and store it for every process.
+
+        Commits.
+
+        Returns:
+            The snapshot dict
+        """
+        now = datetime.utcnow()
+        active = PlatformMetricsService.active_users(now.date())
+        db.session.commit()
+
+        sessions, practice_seconds, questions, correct = db.session.query(
+            func.sum(StudentDailyStats.sessions),
+            func.sum(StudentDailyStats.practice_seconds),
+            func.sum(StudentDailyStats.questions_answered),
+            func.sum(StudentDailyStats.questions_correct)
+        ).one()
+        # The skills board holds each student's mastered skill count
+        skills_mastered = db.session.query(func.sum(LeaderboardRank.score)).filter(
+            LeaderboardRank.board == LeaderboardTableService.SKILLS,
+            LeaderboardRank.scope == 0
+        ).scalar()
+
+        snapshot = {
+            'computed_at': now,
+            'users_by_role': dict(db.session.query(User.role, func.count(User.id)).group_by(User.role).all()),
+            'active_users': active,
+            'totals': {
+                'sessions': int(sessions or 0),
+                'minutes': (practice_seconds or 0) / 60,
+                'questions': int(questions or 0),
+                'correct': int(correct or 0)
+            },
+            'skills_mastered': int(skills_mastered or 0),
+            'table_counts': PlatformMetricsService.table_counts(),
+            'errors_last_24h': AuditLog.query.filter(
+                AuditLog.action_type == 'error',
+                AuditLog.created_at >= now - timedelta(hours=24)
+            ).count(),
+            'active_sessions_last_hour': StudentSession.query.filter(
+                StudentSession.started_at >= now - timedelta(hours=1)
+            ).count()
+        }
+
+        # JSON object keys are strings; get_snapshot() turns the windows back into ints
+        data = dict(snapshot, active_users={str(days): count for days, count in active.items()})
+        del data['computed_at']
+        upsert(PlatformMetricsSnapshot, [{
+            'id': PlatformMetricsService.SNAPSHOT_ID,
+            'data': data,
+            'computed_at': now,
+            'refreshing_at': None
+        }], ['id'])
+        db.session.commit()
+
+        PlatformMetricsService._publish(snapshot)
+        return snapshot
+
+    @staticmethod
+    def get_snapshot():
+        """
+        Get the latest metrics snapshot without querying when possible.
+
+        Never computes the snapshot itself; a missing or stale one is
+        refreshed in the background (see module docstring).
+
+        Returns:
+            dict with computed_at (None before the first refresh),
+            users_by_role, active_users (by window days), totals,
+            skills_mastered, table_counts, errors_last_24h and
+            active_sessions_last_hour
+        """
+        with PlatformMetricsService._lock:
+            snapshot = PlatformMetricsService._snapshot
+            fresh = snapshot is not None and \
+                time.monotonic() - PlatformMetricsService._snapshot_at < PlatformMetricsService.LOCAL_CACHE_SECONDS
+        if fresh:
+            return snapshot
+
+        row = db.session.query(
+            PlatformMetricsSnapshot.data,
+            PlatformMetricsSnapshot.computed_at
+        ).filter(PlatformMetricsSnapshot.id == PlatformMetricsService.SNAPSHOT_ID).first()
+
+        now = datetime.utcnow()
+        if row is None:
+            if PlatformMetricsService._claim_first_refresh(now):
+                PlatformMetricsService._refresh_in_background()
+            return PlatformMetricsService._empty_snapshot()
+
+        due = row.computed_at <= now - timedelta(seconds=PlatformMetricsService.REFRESH_INTERVAL_SECONDS)
+        if due and PlatformMetricsService._claim_refresh(now):
+            PlatformMetricsService._refresh_in_background()
+
+        if not row.data:
+            # Placeholder stored by the first claim; nothing computed yet
+            return PlatformMetricsService._empty_snapshot()
+
+        snapshot = dict(
+            row.data,
+            computed_at=row.computed_at,
+            active_users={int(days): count for days, count in row.data['active_users'].items()}
+        )
+        PlatformMetricsService._publish(snapshot)
+        return snapshot
+
+    @staticmethod
+    def reset():
+        """Drop the stored snapshot and this process's copy."""
+        PlatformMetricsSnapshot.query.filter_by(id=PlatformMetricsService.SNAPSHOT_ID).delete()
+        db.session.commit()
+        with PlatformMetricsService._lock:
+            PlatformMetricsService._snapshot = None
+            PlatformMetricsService._snapshot_at = None
+
+    # Internal helpers
+
+    @staticmethod
+    def _publish(snapshot):
+        """Keep a snapshot as this process's copy."""
+        with PlatformMetricsService._lock:
+            PlatformMetricsService._snapshot = snapshot
+            PlatformMetricsService._snapshot_at = time.monotonic()
+
+    @staticmethod
+    def _empty_snapshot():
+        """Zeroed snapshot served until the first refresh is stored."""
+        return {
+            'computed_at': None,
+            'users_by_role': {},
+            'active_users': {days: 0 for days in PlatformMetricsService.WINDOWS},
+            'totals': {'sessions': 0, 'minutes': 0, 'questions': 0, 'correct': 0},
+            'skills_mastered': 0,
+            'table_counts': {key: 0 for key in PlatformMetricsService.TABLES},
+            'errors_last_24h': 0,
+            'active_sessions_last_hour': 0
+        }
+
+    @staticmethod
+    def _refresh_in_background():
+        """Run a claimed refresh in a thread of this process."""
+        app = current_app._get_current_object()
+
+        def run():
+            try:
+                with app.app_context():
+                    PlatformMetricsService.refresh()
+            except Exception:
+                logger.exception('Platform metrics refresh failed')
+
+        PlatformMetricsService._refresher = threading.Thread(
+            target=run, name='platform-metrics-refresh', daemon=True
+        )
+        PlatformMetricsService._refresher.start()
+
+    @staticmethod
+    def _claim_first_refresh(now):
+        """
+        Claim the first refresh by storing an empty, claimed snapshot row.
+
+        The row's primary key lets only one process insert it.
+
+        Returns:
+            True if this process should refresh
+        """
+        db.session.add(PlatformMetricsSnapshot(
+            id=PlatformMetricsService.SNAPSHOT_ID,
+            data={},
+            computed_at=datetime.min,
+            refreshing_at=now
+        ))
+        try:
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+            return False
+        return True
+
+    @staticmethod
+    def _claim_refresh(now):
+        """
+        Claim the refresh of a stale stored snapshot.
+
+        A conditional UPDATE, so only one process wins per interval.
+
+        Returns:
+            True if this process should refresh
+        """
+        interval = timedelta(seconds=PlatformMetricsService.REFRESH_INTERVAL_SECONDS)
+        claimed = PlatformMetricsSnapshot.query.filter(
+            PlatformMetricsSnapshot.id == PlatformMetricsService.SNAPSHOT_ID,
+            PlatformMetricsSnapshot.computed_at <= now - interval,
+            or_(
+                PlatformMetricsSnapshot.refreshing_at.is_(None),
+                PlatformMetricsSnapshot.refreshing_at < now - timedelta(seconds=PlatformMetricsService.CLAIM_SECONDS)
+            )
+        ).update({'refreshing_at': now}, synchronize_session=False)
+        db.session.commit()
+        return claimed == 1
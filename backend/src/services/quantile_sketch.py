@@ -0,0 +1,185 @@
+"""
+Mergeable quantile sketch (merging t-digest).
+
+A TDigest summarises a stream of values as a bounded list of weighted
+centroids. Centroids near the tails are kept small, so percentiles at
+the extremes stay close to exact while the whole sketch stays a few
+hundred numbers regardless of how many values were added. Two digests
+can be merged, so per-chunk or per-class sketches can be combined into
+a grade or school sketch without revisiting the raw values.
+"""
+import math
+
+
+class TDigest:
+    """Merging t-digest over float values."""
+
+    # Values buffered before they are folded into the centroids, per unit of compression
+    BUFFER_FACTOR = 5
+
+    def __init__(self, compression=100):
+        """
+        Args:
+            compression: Roughly the most centroids kept; higher is more
+                accurate and larger
+        """
+        self.compression = compression
+        self.centroids = []  # [mean, weight] pairs in mean order
+        self.count = 0.0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+        self._buffer = []
+
+    # ------------------------------------------------------------------
+    # Building
+    # ------------------------------------------------------------------
+
+    def add(self, value, weight=1):
+        """Add one value."""
+        value = float(value)
+        self._buffer.append([value, float(weight)])
+        self.count += weight
+        self.total += value * weight
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+        if len(self._buffer) >= self.BUFFER_FACTOR * self.compression:
+            self._compress()
+
+    def merge(self, other):
+        """Fold another digest into this one."""
+        if not other.count:
+            return self
+        self._buffer.extend([mean, weight] for mean, weight in other.centroids)
+        self._buffer.extend([mean, weight] for mean, weight in other._buffer)
+        self.count += other.count
+        self.total += other.total
+        self.min = other.min if self.min is None else min(self.min, other.min)
+        self.max = other.max if self.max is None else max(self.max, other.max)
+        self._compress()
+        return self
+
+    def _scale(self, q):
+        """k1 scale function: centroid index at quantile q."""
+        return self.compression / (2 * math.pi) * math.asin(2 * q - 1)
+
+    def _scale_inverse(self, k):
+        """Quantile at centroid index k."""
+        return (math.sin(min(k * 2 * math.pi / self.compression, math.pi / 2)) + 1) / 2
+
+    def _compress(self):
+        """Merge buffered values into the centroid list."""
+        if not self._buffer:
+            return
+        items = sorted(self.centroids + self._buffer)
+        self._buffer = []
+
+        merged = []
+        weight_before = 0.0
+        q_limit = self._scale_inverse(self._scale(0) + 1)
+        current = list(items[0])
+        for mean, weight in items[1:]:
+            if (weight_before + current[1] + weight) / self.count <= q_limit:
+                current[1] += weight
+                current[0] += (mean - current[0]) * weight / current[1]
+            else:
+                merged.append(current)
+                weight_before += current[1]
+                q_limit = self._scale_inverse(self._scale(weight_before / self.count) + 1)
+                current = [mean, weight]
+        merged.append(current)
+        self.centroids = merged
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    @property
+    def mean(self):
+        """Exact mean of the added values, or None if empty."""
+        return self.total / self.count if self.count else None
+
+    def cdf(self, value):
+        """
+        Mid-rank fraction of values at or below `value`.
+
+        Values equal to `value` count half, so for a sketch of distinct
+        values this is (values below + 0.5) / count.
+        """
+        self._compress()
+        if not self.centroids:
+            return None
+        if value < self.min:
+            return 0.0
+        if value > self.max:
+            return 1.0
+
+        before = 0.0
+        centroids = self.centroids
+        for i, (mean, weight) in enumerate(centroids):
+            if value == mean:
+                equal = sum(w for m, w in centroids[i:] if m == mean)
+                return (before + equal / 2) / self.count
+            if value < mean:
+                if i == 0:
+                    left_value, left_rank = self.min, 0.0
+                else:
+                    left_value, left_rank = centroids[i - 1][0], before - centroids[i - 1][1] / 2
+                right_rank = before + weight / 2
+                fraction = (value - left_value) / (mean - left_value) if mean > left_value else 1.0
+                return (left_rank + fraction * (right_rank - left_rank)) / self.count
+            before += weight
+
+        last_mean, last_weight = centroids[-1]
+        fraction = (value - last_mean) / (self.max - last_mean) if self.max > last_mean else 1.0
+        return (self.count - last_weight / 2 * (1 - fraction)) / self.count
+
+    def quantile(self, q):
+        """Estimated value at quantile q (0-1), or None if empty."""
+        self._compress()
+        if not self.centroids:
+            return None
+        target = min(max(q, 0.0), 1.0) * self.count
+
+        before = 0.0
+        centroids = self.centroids
+        left_value, left_rank = self.min, 0.0
+        for mean, weight in centroids:
+            center = before + weight / 2
+            if target <= center:
+                if center == left_rank:
+                    return mean
+                return left_value + (target - left_rank) / (center - left_rank) * (mean - left_value)
+            left_value, left_rank = mean, center
+            before += weight
+
+        if self.count == left_rank:
+            return self.max
+        return left_value + (target - left_rank) / (self.count - left_rank) * (self.max - left_value)
+
+    # ------------------------------------------------------------------
+    # Serialization
+    # ------------------------------------------------------------------
+
+    def to_dict(self):
+        """Serialize for storage in a JSON column."""
+        self._compress()
+        return {
+            'compression': self.compression,
+            'centroids': self.centroids,
+            'count': self.count,
+            'total': self.total,
+            'min': self.min,
+            'max': self.max
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        """Rebuild a digest from to_dict() output."""
+        digest = cls(compression=data.get('compression', 100))
+        digest.centroids = [list(c) for c in data.get('centroids', [])]
+        digest.count = data.get('count', 0.0)
+        digest.total = data.get('total', 0.0)
+        digest.min = data.get('min')
+        digest.max = data.get('max')
+        return digest
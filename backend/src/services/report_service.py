@@ -1,21 +1,44 @@
 """
 Report generation service for parent activity reports.
 """
+import copy
+import threading
+import time
+from collections import OrderedDict
 from datetime import datetime, timedelta
-from sqlalchemy import func
+from sqlalchemy import case, func
 from src.database import db
 from src.models.parent import ParentChildLink
 from src.models.student import Student
-from src.models.student_session import StudentSession
+from src.models.student_session import StudentSession, StudentDailyStats
+from src.models.assessment import Skill
 from src.models.learning_path import LearningPath
 from src.models.assignment_model import Assignment, AssignmentStudent
 from src.models.achievement import Achievement, StudentAchievement
 from src.models.streak import StreakTracking
+from src.models.report_snapshot import ReportSnapshot
+from src.services.daily_stats_service import DailyStatsService, StatsRow
+from src.services import sql_time
 
 
 class ReportService:
     """Service for generating parent activity reports"""
     
+    # Age up to which a snapshot of a period still in progress is served
+    SNAPSHOT_MAX_AGE_MINUTES = 60
+    # Row order of weekday histograms
+    WEEKDAY_NAMES = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+    # Window for the skill report's recent-accuracy trend
+    RECENT_SKILL_DAYS = 14
+    # Cached report lifetime; report windows move with the clock
+    REPORT_CACHE_TTL_SECONDS = 300
+    # Most skill and time reports kept in memory per process
+    MAX_CACHED_REPORTS = 5000
+    
+    # (kind, student_id, *args) -> (session signature, cached at, report)
+    _reports = OrderedDict()
+    _lock = threading.RLock()
+    
     @staticmethod
     def verify_parent_child_link(parent_id, student_id):
         """Verify parent has access to this child"""
@@ -83,6 +106,250 @@ class ReportService:
         
         return trend, round(change_percent, 1)
     
+    @staticmethod
+    def _get_snapshot(student_id, period, start_date, end_date):
+        """
+        Get a stored report for the period, if it can be served.
+
+        Snapshots generated after the period ended are final. A snapshot
+        of a period still in progress is only served while it is younger
+        than SNAPSHOT_MAX_AGE_MINUTES.
+        """
+        snapshot = ReportSnapshot.query.filter_by(
+            student_id=student_id,
+            period=period,
+            period_start=start_date
+        ).first()
+        if snapshot is None:
+            return None
+        if snapshot.generated_at.date() > end_date:
+            return snapshot.report
+        if snapshot.generated_at >= datetime.utcnow() - timedelta(minutes=ReportService.SNAPSHOT_MAX_AGE_MINUTES):
+            return snapshot.report
+        return None
+    
+    @staticmethod
+    def load_weekly_inputs(student_ids, start_date):
+        """
+        Load everything the weekly report needs for many students.
+
+        Uses five set-based queries regardless of the number of students:
+        the rollup rows for the week and the week before, the names of
+        the practiced skills, and grouped assignment, achievement and
+        streak lookups.
+
+        Args:
+            student_ids: Students to load
+            start_date: Monday of the report week
+
+        Returns:
+            dict of student_id -> plain-data inputs for build_weekly_report
+        """
+        student_ids = list(student_ids)
+        end_date = start_date + timedelta(days=6)
+        prev_start = start_date - timedelta(weeks=1)
+        start_datetime = datetime.combine(start_date, datetime.min.time())
+        end_datetime = datetime.combine(end_date, datetime.max.time())
+        
+        inputs = {student_id: {
+            'start_date': start_date,
+            'end_date': end_date,
+            'stats': [],
+            'prev_stats': [],
+            'skill_names': {},
+            'assignments_completed': 0,
+            'achievements_earned': 0,
+            'practice_streak': None
+        } for student_id in student_ids}
+        if not student_ids:
+            return inputs
+        
+        # Rollup rows for this week and last week
+        skill_ids = set()
+        for row in db.session.query(
+            StudentDailyStats.student_id,
+            StudentDailyStats.day,
+            StudentDailyStats.skill_id,
+            StudentDailyStats.questions_answered,
+            StudentDailyStats.questions_correct,
+            StudentDailyStats.practice_seconds,
+            StudentDailyStats.sessions
+        ).filter(
+            StudentDailyStats.student_id.in_(student_ids),
+            StudentDailyStats.day >= prev_start,
+            StudentDailyStats.day <= end_date
+        ).order_by(StudentDailyStats.student_id, StudentDailyStats.day).all():
+            stats_row = StatsRow(*row[1:])
+            if stats_row.day >= start_date:
+                inputs[row.student_id]['stats'].append(stats_row)
+                if stats_row.skill_id:
+                    skill_ids.add(stats_row.skill_id)
+            else:
+                inputs[row.student_id]['prev_stats'].append(stats_row)
+        
+        # Names of practiced skills the student has a learning path for
+        if skill_ids:
+            for student_id, skill_id, name in db.session.query(
+                LearningPath.student_id,
+                LearningPath.skill_id,
+                Skill.name
+            ).join(Skill, Skill.id == LearningPath.skill_id).filter(
+                LearningPath.student_id.in_(student_ids),
+                LearningPath.skill_id.in_(sorted(skill_ids))
+            ).order_by(LearningPath.id.desc()).all():
+                # First path per pair wins, as with query.first()
+                inputs[student_id]['skill_names'][skill_id] = name
+        
+        for student_id, count in db.session.query(
+            AssignmentStudent.student_id,
+            func.count(AssignmentStudent.id)
+        ).filter(
+            AssignmentStudent.student_id.in_(student_ids),
+            AssignmentStudent.status == 'completed',
+            AssignmentStudent.completed_at >= start_datetime,
+            AssignmentStudent.completed_at <= end_datetime
+        ).group_by(AssignmentStudent.student_id).all():
+            inputs[student_id]['assignments_completed'] = count
+        
+        for student_id, count in db.session.query(
+            StudentAchievement.student_id,
+            func.count(StudentAchievement.id)
+        ).filter(
+            StudentAchievement.student_id.in_(student_ids),
+            StudentAchievement.unlocked_at >= start_datetime,
+            StudentAchievement.unlocked_at <= end_datetime
+        ).group_by(StudentAchievement.student_id).all():
+            inputs[student_id]['achievements_earned'] = count
+        
+        for student_id, practice_streak in db.session.query(
+            StreakTracking.student_id,
+            StreakTracking.practice_streak
+        ).filter(StreakTracking.student_id.in_(student_ids)).all():
+            inputs[student_id]['practice_streak'] = practice_streak
+        
+        return inputs
+    
+    @staticmethod
+    def build_weekly_report(inputs):
+        """
+        Build a weekly report from load_weekly_inputs() data.
+
+        Pure function of its inputs (no database access), so bulk digest
+        runs can build reports in worker processes.
+        """
+        start_date = inputs['start_date']
+        end_date = inputs['end_date']
+        stats = inputs['stats']
+        
+        # Calculate summary metrics
+        week_totals = DailyStatsService.totals(stats)
+        total_time = week_totals['seconds'] / 60
+        total_questions = week_totals['questions']
+        total_correct = week_totals['correct']
+        accuracy = (total_correct / total_questions) if total_questions > 0 else 0
+        
+        # Get skills practiced
+        skills_practiced = []
+        for skill_id, skill_totals in DailyStatsService.by_skill(stats).items():
+            skill_name = inputs['skill_names'].get(skill_id)
+            if skill_name is None:
+                continue
+            skill_time = skill_totals['seconds'] / 60
+            skill_questions = skill_totals['questions']
+            skill_correct = skill_totals['correct']
+            skill_accuracy = (skill_correct / skill_questions) if skill_questions > 0 else 0
+            
+            skills_practiced.append({
+                'skill_name': skill_name,
+                'time_minutes': round(skill_time, 1),
+                'questions': skill_questions,
+                'accuracy': round(skill_accuracy, 2)
+            })
+        
+        # Check streak
+        practice_streak = inputs['practice_streak']
+        streak_maintained = practice_streak >= 7 if practice_streak is not None else False
+        
+        # Daily breakdown
+        daily_breakdown = []
+        days = DailyStatsService.by_day(stats)
+        current_date = start_date
+        while current_date <= end_date:
+            day = days.get(current_date)
+            day_time = day['seconds'] / 60 if day else 0
+            day_questions = day['questions'] if day else 0
+            day_correct = day['correct'] if day else 0
+            day_accuracy = (day_correct / day_questions) if day_questions > 0 else 0
+            
+            daily_breakdown.append({
+                'date': current_date.isoformat(),
+                'day_name': current_date.strftime('%A'),
+                'time_minutes': round(day_time, 1),
+                'sessions': day['sessions'] if day else 0,
+                'questions': day_questions,
+                'accuracy': round(day_accuracy, 2)
+            })
+            
+            current_date += timedelta(days=1)
+        
+        # Generate insights
+        insights = {}
+        
+        # Most active day
+        if daily_breakdown:
+            most_active = max(daily_breakdown, key=lambda x: x['time_minutes'])
+            insights['most_active_day'] = most_active['day_name']
+            
+            # Best performance day
+            days_with_activity = [d for d in daily_breakdown if d['questions'] > 0]
+            if days_with_activity:
+                best_performance = max(days_with_activity, key=lambda x: x['accuracy'])
+                insights['best_performance_day'] = best_performance['day_name']
+        
+        # Improvement areas (skills with accuracy < 70%)
+        improvement_areas = [s['skill_name'] for s in skills_practiced if s['accuracy'] < 0.70]
+        insights['improvement_areas'] = improvement_areas
+        
+        # Comparison to last week
+        prev_totals = DailyStatsService.totals(inputs['prev_stats'])
+        
+        prev_time = prev_totals['seconds'] / 60
+        prev_questions = prev_totals['questions']
+        prev_correct = prev_totals['correct']
+        prev_accuracy = (prev_correct / prev_questions) if prev_questions > 0 else 0
+        
+        time_trend, time_change = ReportService._calculate_trends(total_time, prev_time)
+        accuracy_change = round(accuracy - prev_accuracy, 2)
+        
+        insights['comparison_to_last_week'] = {
+            'time_change_percent': time_change,
+            'accuracy_change': accuracy_change,
+            'trend': time_trend
+        }
+        
+        # Build report
+        return {
+            'period': {
+                'start_date': start_date.isoformat(),
+                'end_date': end_date.isoformat(),
+                'week_number': start_date.isocalendar()[1]
+            },
+            'summary': {
+                'total_time_minutes': round(total_time, 1),
+                'total_sessions': week_totals['sessions'],
+                'questions_answered': total_questions,
+                'questions_correct': total_correct,
+                'accuracy': round(accuracy, 2),
+                'skills_practiced': len(skills_practiced),
+                'assignments_completed': inputs['assignments_completed'],
+                'achievements_earned': inputs['achievements_earned'],
+                'streak_maintained': streak_maintained
+            },
+            'daily_breakdown': daily_breakdown,
+            'skills_practiced': skills_practiced,
+            'insights': insights
+        }
+    
     @staticmethod
     def generate_weekly_report(parent_id, student_id, week_offset=0):
         """Generate weekly progress report"""
@@ -93,173 +360,12 @@ class ReportService:
             
             # Get date range for this week
             start_date, end_date = ReportService._get_date_range('week', week_offset)
-            start_datetime = datetime.combine(start_date, datetime.min.time())
-            end_datetime = datetime.combine(end_date, datetime.max.time())
-            
-            # Get all sessions in this week
-            sessions = StudentSession.query.filter(
-                StudentSession.student_id == student_id,
-                StudentSession.started_at >= start_datetime,
-                StudentSession.started_at <= end_datetime
-            ).all()
-            
-            # Calculate summary metrics
-            total_time = sum(
-                (session.ended_at - session.started_at).total_seconds() / 60
-                if session.ended_at else 0
-                for session in sessions
-            )
-            total_questions = sum(session.questions_answered or 0 for session in sessions)
-            total_correct = sum(session.questions_correct or 0 for session in sessions)
-            accuracy = (total_correct / total_questions) if total_questions > 0 else 0
-            
-            # Get skills practiced
-            skill_ids = set()
-            for session in sessions:
-                if session.skill_id:
-                    skill_ids.add(session.skill_id)
-            
-            skills_practiced = []
-            for skill_id in skill_ids:
-                skill_sessions = [s for s in sessions if s.skill_id == skill_id]
-                skill_time = sum(
-                    (s.ended_at - s.started_at).total_seconds() / 60
-                    if s.ended_at else 0
-                    for s in skill_sessions
-                )
-                skill_questions = sum(s.questions_answered or 0 for s in skill_sessions)
-                skill_correct = sum(s.questions_correct or 0 for s in skill_sessions)
-                skill_accuracy = (skill_correct / skill_questions) if skill_questions > 0 else 0
-                
-                path = LearningPath.query.filter_by(
-                    student_id=student_id,
-                    skill_id=skill_id
-                ).first()
-                
-                if path and path.skill:
-                    skills_practiced.append({
-                        'skill_name': path.skill.name,
-                        'time_minutes': round(skill_time, 1),
-                        'questions': skill_questions,
-                        'accuracy': round(skill_accuracy, 2)
-                    })
-            
-            # Get assignments completed this week
-            assignments_completed = AssignmentStudent.query.filter(
-                AssignmentStudent.student_id == student_id,
-                AssignmentStudent.status == 'completed',
-                AssignmentStudent.completed_at >= start_datetime,
-                AssignmentStudent.completed_at <= end_datetime
-            ).count()
-            
-            # Get achievements earned this week
-            achievements_earned = StudentAchievement.query.filter(
-                StudentAchievement.student_id == student_id,
-                StudentAchievement.unlocked_at >= start_datetime,
-                StudentAchievement.unlocked_at <= end_datetime
-            ).count()
-            
-            # Check streak
-            streak = StreakTracking.query.filter_by(student_id=student_id).first()
-            streak_maintained = streak.practice_streak >= 7 if streak else False
-            
-            # Daily breakdown
-            daily_breakdown = []
-            current_date = start_date
-            while current_date <= end_date:
-                day_start = datetime.combine(current_date, datetime.min.time())
-                day_end = datetime.combine(current_date, datetime.max.time())
-                
-                day_sessions = [s for s in sessions if day_start <= s.started_at <= day_end]
-                day_time = sum(
-                    (s.ended_at - s.started_at).total_seconds() / 60
-                    if s.ended_at else 0
-                    for s in day_sessions
-                )
-                day_questions = sum(s.questions_answered or 0 for s in day_sessions)
-                day_correct = sum(s.questions_correct or 0 for s in day_sessions)
-                day_accuracy = (day_correct / day_questions) if day_questions > 0 else 0
-                
-                daily_breakdown.append({
-                    'date': current_date.isoformat(),
-                    'day_name': current_date.strftime('%A'),
-                    'time_minutes': round(day_time, 1),
-                    'sessions': len(day_sessions),
-                    'questions': day_questions,
-                    'accuracy': round(day_accuracy, 2)
-                })
-                
-                current_date += timedelta(days=1)
             
-            # Generate insights
-            insights = {}
-            
-            # Most active day
-            if daily_breakdown:
-                most_active = max(daily_breakdown, key=lambda x: x['time_minutes'])
-                insights['most_active_day'] = most_active['day_name']
-                
-                # Best performance day
-                days_with_activity = [d for d in daily_breakdown if d['questions'] > 0]
-                if days_with_activity:
-                    best_performance = max(days_with_activity, key=lambda x: x['accuracy'])
-                    insights['best_performance_day'] = best_performance['day_name']
-            
-            # Improvement areas (skills with accuracy < 70%)
-            improvement_areas = [s['skill_name'] for s in skills_practiced if s['accuracy'] < 0.70]
-            insights['improvement_areas'] = improvement_areas
-            
-            # Comparison to last week
-            prev_start, prev_end = ReportService._get_date_range('week', week_offset + 1)
-            prev_start_dt = datetime.combine(prev_start, datetime.min.time())
-            prev_end_dt = datetime.combine(prev_end, datetime.max.time())
-            
-            prev_sessions = StudentSession.query.filter(
-                StudentSession.student_id == student_id,
-                StudentSession.started_at >= prev_start_dt,
-                StudentSession.started_at <= prev_end_dt
-            ).all()
-            
-            prev_time = sum(
-                (s.ended_at - s.started_at).total_seconds() / 60
-                if s.ended_at else 0
-                for s in prev_sessions
-            )
-            prev_questions = sum(s.questions_answered or 0 for s in prev_sessions)
-            prev_correct = sum(s.questions_correct or 0 for s in prev_sessions)
-            prev_accuracy = (prev_correct / prev_questions) if prev_questions > 0 else 0
-            
-            time_trend, time_change = ReportService._calculate_trends(total_time, prev_time)
-            accuracy_change = round(accuracy - prev_accuracy, 2)
-            
-            insights['comparison_to_last_week'] = {
-                'time_change_percent': time_change,
-                'accuracy_change': accuracy_change,
-                'trend': time_trend
-            }
-            
-            # Build report
-            report = {
-                'period': {
-                    'start_date': start_date.isoformat(),
-                    'end_date': end_date.isoformat(),
-                    'week_number': start_date.isocalendar()[1]
-                },
-                'summary': {
-                    'total_time_minutes': round(total_time, 1),
-                    'total_sessions': len(sessions),
-                    'questions_answered': total_questions,
-                    'questions_correct': total_correct,
-                    'accuracy': round(accuracy, 2),
-                    'skills_practiced': len(skills_practiced),
-                    'assignments_completed': assignments_completed,
-                    'achievements_earned': achievements_earned,
-                    'streak_maintained': streak_maintained
-                },
-                'daily_breakdown': daily_breakdown,
-                'skills_practiced': skills_practiced,
-                'insights': insights
-            }
+            # Serve the bulk digest's snapshot when there is one
+            report = ReportService._get_snapshot(student_id, 'week', start_date, end_date)
+            if report is None:
+                inputs = ReportService.load_weekly_inputs([student_id], start_date)
+                report = ReportService.build_weekly_report(inputs[student_id])
             
             return {'success': True, 'report': report}, 200
             
@@ -279,21 +385,15 @@ class ReportService:
             start_datetime = datetime.combine(start_date, datetime.min.time())
             end_datetime = datetime.combine(end_date, datetime.max.time())
             
-            # Get all sessions in this month
-            sessions = StudentSession.query.filter(
-                StudentSession.student_id == student_id,
-                StudentSession.started_at >= start_datetime,
-                StudentSession.started_at <= end_datetime
-            ).all()
+            # Get the month's daily practice rollup
+            stats = DailyStatsService.get_stats(student_id, start_date, end_date)
+            days = DailyStatsService.by_day(stats)
             
             # Calculate summary metrics
-            total_time = sum(
-                (session.ended_at - session.started_at).total_seconds() / 60
-                if session.ended_at else 0
-                for session in sessions
-            )
-            total_questions = sum(session.questions_answered or 0 for session in sessions)
-            total_correct = sum(session.questions_correct or 0 for session in sessions)
+            month_totals = DailyStatsService.totals(stats)
+            total_time = month_totals['seconds'] / 60
+            total_questions = month_totals['questions']
+            total_correct = month_totals['correct']
             accuracy = (total_correct / total_questions) if total_questions > 0 else 0
             
             # Skills mastered this month
@@ -334,24 +434,20 @@ class ReportService:
             
             while current_monday <= end_date:
                 week_end = min(current_monday + timedelta(days=6), end_date)
-                week_start_dt = datetime.combine(current_monday, datetime.min.time())
-                week_end_dt = datetime.combine(week_end, datetime.max.time())
                 
-                week_sessions = [s for s in sessions if week_start_dt <= s.started_at <= week_end_dt]
-                week_time = sum(
-                    (s.ended_at - s.started_at).total_seconds() / 60
-                    if s.ended_at else 0
-                    for s in week_sessions
+                week_totals = DailyStatsService.totals(
+                    row for row in stats if current_monday <= row.day <= week_end
                 )
-                week_questions = sum(s.questions_answered or 0 for s in week_sessions)
-                week_correct = sum(s.questions_correct or 0 for s in week_sessions)
+                week_time = week_totals['seconds'] / 60
+                week_questions = week_totals['questions']
+                week_correct = week_totals['correct']
                 week_accuracy = (week_correct / week_questions) if week_questions > 0 else 0
                 
                 weekly_breakdown.append({
                     'week_start': current_monday.isoformat(),
                     'week_end': week_end.isoformat(),
                     'time_minutes': round(week_time, 1),
-                    'sessions': len(week_sessions),
+                    'sessions': week_totals['sessions'],
                     'questions': week_questions,
                     'accuracy': round(week_accuracy, 2)
                 })
@@ -360,7 +456,7 @@ class ReportService:
             
             # Calculate consistency score
             days_in_month = (end_date - start_date).days + 1
-            days_with_practice = len(set(s.started_at.date() for s in sessions))
+            days_with_practice = sum(1 for data in days.values() if data['sessions'] > 0)
             consistency_score = days_with_practice / days_in_month if days_in_month > 0 else 0
             
             # Generate insights
@@ -398,7 +494,7 @@ class ReportService:
                 },
                 'summary': {
                     'total_time_minutes': round(total_time, 1),
-                    'total_sessions': len(sessions),
+                    'total_sessions': month_totals['sessions'],
                     'questions_answered': total_questions,
                     'accuracy': round(accuracy, 2),
                     'skills_mastered': skills_mastered,
@@ -414,6 +510,86 @@ class ReportService:
         except Exception as e:
             return {'success': False, 'error': str(e)}, 500
     
+    @staticmethod
+    def _load_skill_rows(student_id, now):
+        """
+        Load every learning path with its skill and session totals.
+
+        One statement: sessions are grouped by skill with conditional
+        aggregates for the all-time and RECENT_SKILL_DAYS windows, and
+        joined to the student's learning paths and their skills.
+        """
+        recent = StudentSession.started_at >= now - timedelta(days=ReportService.RECENT_SKILL_DAYS)
+        seconds = sql_time.seconds_between(StudentSession.started_at, StudentSession.ended_at)
+        totals = db.session.query(
+            StudentSession.skill_id.label('skill_id'),
+            func.sum(case((StudentSession.ended_at.isnot(None), seconds), else_=0)).label('seconds'),
+            func.count(case((recent, StudentSession.id))).label('recent_sessions'),
+            func.sum(case((recent, StudentSession.questions_answered), else_=0)).label('recent_questions'),
+            func.sum(case((recent, StudentSession.questions_correct), else_=0)).label('recent_correct')
+        ).filter(
+            StudentSession.student_id == student_id
+        ).group_by(StudentSession.skill_id).subquery()
+        
+        return db.session.query(
+            Skill.name,
+            Skill.subject_area,
+            LearningPath.current_accuracy,
+            LearningPath.mastery_achieved,
+            LearningPath.mastery_date,
+            LearningPath.questions_answered,
+            totals.c.seconds,
+            totals.c.recent_sessions,
+            totals.c.recent_questions,
+            totals.c.recent_correct
+        ).join(
+            Skill, Skill.id == LearningPath.skill_id
+        ).outerjoin(
+            totals, totals.c.skill_id == LearningPath.skill_id
+        ).filter(
+            LearningPath.student_id == student_id
+        ).order_by(LearningPath.id).all()
+    
+    @staticmethod
+    def _session_signature(student_id):
+        """Session count and latest session timestamps, which change with any practice."""
+        return tuple(db.session.query(
+            func.count(StudentSession.id),
+            func.max(StudentSession.started_at),
+            func.max(StudentSession.last_activity_at),
+            func.max(StudentSession.ended_at)
+        ).filter(StudentSession.student_id == student_id).one())
+    
+    @staticmethod
+    def _get_cached_report(key, signature):
+        """Get a cached report if the student has not practiced since it was built."""
+        with ReportService._lock:
+            cached = ReportService._reports.get(key)
+            if cached is None or cached[0] != signature \
+                    or time.monotonic() - cached[1] >= ReportService.REPORT_CACHE_TTL_SECONDS:
+                return None
+            ReportService._reports.move_to_end(key)
+            return copy.deepcopy(cached[2])
+    
+    @staticmethod
+    def _cache_report(key, signature, report):
+        """Cache a report under the signature it was built from."""
+        with ReportService._lock:
+            ReportService._reports[key] = (signature, time.monotonic(), copy.deepcopy(report))
+            ReportService._reports.move_to_end(key)
+            while len(ReportService._reports) > ReportService.MAX_CACHED_REPORTS:
+                ReportService._reports.popitem(last=False)
+    
+    @staticmethod
+    def invalidate_reports(student_id=None):
+        """Drop cached skill and time reports for one student (or everyone)."""
+        with ReportService._lock:
+            if student_id is None:
+                ReportService._reports.clear()
+                return
+            for key in [key for key in ReportService._reports if key[1] == student_id]:
+                del ReportService._reports[key]
+    
     @staticmethod
     def generate_skill_report(parent_id, student_id):
         """Generate skill performance report"""
@@ -422,38 +598,31 @@ class ReportService:
             if not ReportService.verify_parent_child_link(parent_id, student_id):
                 return {'success': False, 'error': 'Unauthorized'}, 403
             
-            # Get all learning paths
-            paths = LearningPath.query.filter_by(student_id=student_id).all()
+            # Serve a recent report if the student has not practiced since
+            cache_key = ('skills', student_id)
+            signature = ReportService._session_signature(student_id)
+            report = ReportService._get_cached_report(cache_key, signature)
+            if report is not None:
+                return {'success': True, 'report': report}, 200
             
+            now = datetime.utcnow()
             skills = []
             category_time = {}
             
-            for path in paths:
-                if not path.skill:
-                    continue
-                
-                # Get time spent on this skill (from sessions)
-                skill_sessions = StudentSession.query.filter_by(
-                    student_id=student_id,
-                    skill_id=path.skill_id
-                ).all()
-                
-                time_spent = sum(
-                    (s.ended_at - s.started_at).total_seconds() / 60
-                    if s.ended_at else 0
-                    for s in skill_sessions
-                )
+            for row in ReportService._load_skill_rows(student_id, now):
+                # Time spent on this skill (from ended sessions)
+                time_spent = (row.seconds or 0) / 60
+                current_accuracy = row.current_accuracy or 0.0
                 
                 # Determine trend (compare recent vs overall)
-                recent_sessions = [s for s in skill_sessions if s.started_at >= datetime.utcnow() - timedelta(days=14)]
-                if recent_sessions:
-                    recent_correct = sum(s.questions_correct or 0 for s in recent_sessions)
-                    recent_total = sum(s.questions_answered or 0 for s in recent_sessions)
+                if row.recent_sessions:
+                    recent_correct = row.recent_correct or 0
+                    recent_total = row.recent_questions or 0
                     recent_accuracy = (recent_correct / recent_total) if recent_total > 0 else 0
                     
-                    if recent_accuracy > path.current_accuracy + 0.05:
+                    if recent_accuracy > current_accuracy + 0.05:
                         trend = 'improving'
-                    elif recent_accuracy < path.current_accuracy - 0.05:
+                    elif recent_accuracy < current_accuracy - 0.05:
                         trend = 'declining'
                     else:
                         trend = 'stable'
@@ -461,18 +630,18 @@ class ReportService:
                     trend = 'no_recent_activity'
                 
                 skills.append({
-                    'skill_name': path.skill.name,
-                    'category': path.skill.subject_area,
-                    'accuracy': round(path.current_accuracy, 2),
-                    'mastery_status': 'mastered' if path.mastery_achieved else ('in_progress' if path.questions_answered > 0 else 'not_started'),
+                    'skill_name': row.name,
+                    'category': row.subject_area,
+                    'accuracy': round(current_accuracy, 2),
+                    'mastery_status': 'mastered' if row.mastery_achieved else ('in_progress' if row.questions_answered > 0 else 'not_started'),
                     'time_spent_minutes': round(time_spent, 1),
-                    'questions_answered': path.questions_answered,
-                    'mastered_date': path.mastery_date.isoformat() if path.mastery_date else None,
+                    'questions_answered': row.questions_answered,
+                    'mastered_date': row.mastery_date.isoformat() if row.mastery_date else None,
                     'trend': trend
                 })
                 
                 # Track time by category
-                category = path.skill.subject_area
+                category = row.subject_area
                 category_time[category] = category_time.get(category, 0) + time_spent
             
             # Calculate totals
@@ -485,7 +654,7 @@ class ReportService:
             top_skills = sorted(skills, key=lambda x: x['accuracy'], reverse=True)[:3]
             needs_attention = [s['skill_name'] for s in skills if s['accuracy'] < 0.70 and s['mastery_status'] != 'not_started']
             recent_mastery = [s['skill_name'] for s in skills if s['mastered_date'] and 
-                            datetime.fromisoformat(s['mastered_date']) >= datetime.utcnow() - timedelta(days=30)]
+                            datetime.fromisoformat(s['mastered_date']) >= now - timedelta(days=30)]
             
             insights = {
                 'top_skills': [s['skill_name'] for s in top_skills],
@@ -504,11 +673,87 @@ class ReportService:
                 'insights': insights
             }
             
+            ReportService._cache_report(cache_key, signature, report)
+            
             return {'success': True, 'report': report}, 200
             
         except Exception as e:
             return {'success': False, 'error': str(e)}, 500
     
+    @staticmethod
+    def get_practice_histogram(student_id, start, end):
+        """
+        Practice minutes and session counts by weekday and hour of day.
+
+        Bucketed in SQL with one grouped query, so a year-long window
+        returns at most 7 x 24 rows instead of every session.
+
+        Args:
+            student_id: Student to chart
+            start, end: Session start times to include (inclusive)
+
+        Returns:
+            dict with 'minutes' and 'sessions' as 7 x 24 lists: rows are
+            weekdays Monday to Sunday, columns are UTC hours 0-23.
+            Minutes only count ended sessions.
+        """
+        weekday = sql_time.weekday(StudentSession.started_at)
+        hour = sql_time.hour(StudentSession.started_at)
+        seconds = sql_time.seconds_between(StudentSession.started_at, StudentSession.ended_at)
+        
+        minutes = [[0.0] * 24 for _ in range(7)]
+        sessions = [[0] * 24 for _ in range(7)]
+        for day_of_week, hour_of_day, total_seconds, count in db.session.query(
+            weekday,
+            hour,
+            func.sum(case((StudentSession.ended_at.isnot(None), seconds), else_=0)),
+            func.count(StudentSession.id)
+        ).filter(
+            StudentSession.student_id == student_id,
+            StudentSession.started_at >= start,
+            StudentSession.started_at <= end
+        ).group_by(weekday, hour).all():
+            row = (day_of_week + 6) % 7  # SQL weekdays start on Sunday
+            minutes[row][hour_of_day] += (total_seconds or 0) / 60
+            sessions[row][hour_of_day] += count
+        
+        return {'minutes': minutes, 'sessions': sessions}
+    
+    @staticmethod
+    def _session_duration_stats(student_id, start, end):
+        """
+        Shortest, longest and median ended-session minutes and practice days.
+
+        One aggregate query, plus one ordered single-row read for the
+        median when there are ended sessions.
+        """
+        seconds = sql_time.seconds_between(StudentSession.started_at, StudentSession.ended_at)
+        window = (
+            StudentSession.student_id == student_id,
+            StudentSession.started_at >= start,
+            StudentSession.started_at <= end
+        )
+        ended, shortest, longest, days_with_practice = db.session.query(
+            func.count(StudentSession.ended_at),
+            func.min(seconds),
+            func.max(seconds),
+            func.count(func.distinct(sql_time.day(StudentSession.started_at)))
+        ).filter(*window).one()
+        
+        median = 0
+        if ended:
+            median = db.session.query(seconds).filter(
+                *window,
+                StudentSession.ended_at.isnot(None)
+            ).order_by(seconds).offset(ended // 2).limit(1).scalar()
+        
+        return {
+            'shortest': (shortest or 0) / 60,
+            'longest': (longest or 0) / 60,
+            'median': (median or 0) / 60,
+            'days_with_practice': days_with_practice
+        }
+    
     @staticmethod
     def generate_time_analysis(parent_id, student_id, days=30):
         """Generate time analysis report"""
@@ -517,76 +762,54 @@ class ReportService:
             if not ReportService.verify_parent_child_link(parent_id, student_id):
                 return {'success': False, 'error': 'Unauthorized'}, 403
             
+            # Serve a recent report if the student has not practiced since
+            cache_key = ('time', student_id, days)
+            signature = ReportService._session_signature(student_id)
+            report = ReportService._get_cached_report(cache_key, signature)
+            if report is not None:
+                return {'success': True, 'report': report}, 200
+            
             # Get date range
             end_date = datetime.utcnow()
             start_date = end_date - timedelta(days=days - 1)
             
-            # Get all sessions in period
-            sessions = StudentSession.query.filter(
-                StudentSession.student_id == student_id,
-                StudentSession.started_at >= start_date,
-                StudentSession.started_at <= end_date
-            ).all()
+            # Bucket sessions by weekday and hour in the database
+            histogram = ReportService.get_practice_histogram(student_id, start_date, end_date)
+            durations = ReportService._session_duration_stats(student_id, start_date, end_date)
             
             # Calculate total time and sessions
-            total_time = sum(
-                (s.ended_at - s.started_at).total_seconds() / 60
-                if s.ended_at else 0
-                for s in sessions
-            )
-            total_sessions = len(sessions)
+            total_time = sum(sum(row) for row in histogram['minutes'])
+            total_sessions = sum(sum(row) for row in histogram['sessions'])
             avg_session = total_time / total_sessions if total_sessions > 0 else 0
             
             # Group by day of week
             by_day_of_week = {
-                'Monday': 0, 'Tuesday': 0, 'Wednesday': 0, 'Thursday': 0,
-                'Friday': 0, 'Saturday': 0, 'Sunday': 0
+                day_name: round(sum(histogram['minutes'][i]), 1)
+                for i, day_name in enumerate(ReportService.WEEKDAY_NAMES)
             }
             
-            for session in sessions:
-                day_name = session.started_at.strftime('%A')
-                session_time = (session.ended_at - session.started_at).total_seconds() / 60 if session.ended_at else 0
-                by_day_of_week[day_name] += session_time
-            
-            # Round values
-            by_day_of_week = {k: round(v, 1) for k, v in by_day_of_week.items()}
-            
             # Group by time of day
             by_time_of_day = {'morning': 0, 'afternoon': 0, 'evening': 0}
             
-            for session in sessions:
-                hour = session.started_at.hour
-                session_time = (session.ended_at - session.started_at).total_seconds() / 60 if session.ended_at else 0
-                
-                if 6 <= hour < 12:
-                    by_time_of_day['morning'] += session_time
-                elif 12 <= hour < 18:
-                    by_time_of_day['afternoon'] += session_time
-                else:
-                    by_time_of_day['evening'] += session_time
+            for row in histogram['minutes']:
+                for hour, session_time in enumerate(row):
+                    if 6 <= hour < 12:
+                        by_time_of_day['morning'] += session_time
+                    elif 12 <= hour < 18:
+                        by_time_of_day['afternoon'] += session_time
+                    else:
+                        by_time_of_day['evening'] += session_time
             
             # Round values
             by_time_of_day = {k: round(v, 1) for k, v in by_time_of_day.items()}
             
             # Session statistics
-            session_durations = [
-                (s.ended_at - s.started_at).total_seconds() / 60
-                for s in sessions if s.ended_at
-            ]
-            
-            if session_durations:
-                session_durations.sort()
-                median_idx = len(session_durations) // 2
-                median_session = session_durations[median_idx]
-                longest_session = max(session_durations)
-                shortest_session = min(session_durations)
-            else:
-                median_session = 0
-                longest_session = 0
-                shortest_session = 0
+            median_session = durations['median']
+            longest_session = durations['longest']
+            shortest_session = durations['shortest']
             
             # Calculate consistency score
-            days_with_practice = len(set(s.started_at.date() for s in sessions))
+            days_with_practice = durations['days_with_practice']
             consistency_score = days_with_practice / days if days > 0 else 0
             
             # Generate insights
@@ -624,6 +847,7 @@ class ReportService:
                 'average_session_minutes': round(avg_session, 1),
                 'by_day_of_week': by_day_of_week,
                 'by_time_of_day': by_time_of_day,
+                'by_weekday_and_hour': [[round(v, 1) for v in row] for row in histogram['minutes']],
                 'session_stats': {
                     'longest_session_minutes': round(longest_session, 1),
                     'shortest_session_minutes': round(shortest_session, 1),
@@ -633,6 +857,8 @@ class ReportService:
                 'insights': insights
             }
             
+            ReportService._cache_report(cache_key, signature, report)
+            
             return {'success': True, 'report': report}, 200
             
         except Exception as e:
@@ -0,0 +1,612 @@
+"""
+Shared response cache for read-heavy API endpoints.
+
+Cached responses are keyed by namespace, path, normalized query string
+and, for per-user endpoints, the JWT identity, so one user's dashboard
+is never served to another. Only successful responses are stored, as
+plain bytes with their headers.
+
+Entries live in a pluggable backend selected by RESPONSE_CACHE_URL:
+
+    memory://                 per-process LRU (single-process use, tests)
+    sqlite:///path/cache.db   one file shared by every worker on the host
+                              (default, response_cache.db in the app's
+                              instance folder, readable by its owner only)
+    redis://host:6379/0       any server speaking the Redis protocol
+
+Every backend is bounded: the memory and SQLite backends evict the
+least recently used entries past MAX_ENTRIES, Redis relies on its own
+maxmemory policy (allkeys-lru). Entries also expire after their TTL.
+
+Views declare the tags their response depends on (see cache_tags);
+an entry records the tag versions seen before it was computed and is
+treated as a miss once a commit has bumped any of them, so TTLs only
+bound time-dependent drift.
+
+Concurrent misses for the same key are coalesced: one request computes
+the response while the others in the process wait for it, and on shared
+backends a short lease keeps other workers from recomputing it at the
+same time. Backend failures never fail a request; the view just runs
+uncached and the error is counted.
+"""
+import hashlib
+import json
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from functools import wraps
+from urllib.parse import urlparse
+from flask import current_app, request, make_response
+from src.services.cache_tags import CacheTags
+
+logger = logging.getLogger(__name__)
+
+
+class MemoryBackend:
+    """Per-process LRU with TTL."""
+
+    shared = False
+
+    def __init__(self, max_entries=10000):
+        self.max_entries = max_entries
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl):
+        self.set_many({key: value}, ttl)
+
+    def set_many(self, items, ttl):
+        """Set several keys with the same TTL."""
+        with self._lock:
+            expires_at = time.monotonic() + ttl
+            for key, value in items.items():
+                self._entries[key] = (value, expires_at)
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def add(self, key, value, ttl):
+        """Set key only if it is absent; returns True when stored."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] > time.monotonic():
+                return False
+            self._entries[key] = (value, time.monotonic() + ttl)
+            return True
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class SQLiteBackend:
+    """
+    LRU with TTL in a SQLite file shared by the workers on one host.
+
+    Runs in WAL mode so readers never block on a writer. Last-use times
+    are refreshed at most once per second per entry to keep hits cheap,
+    and the table is trimmed back to max_entries every PRUNE_EVERY
+    writes.
+    """
+
+    shared = True
+    PRUNE_EVERY = 100
+
+    def __init__(self, path, max_entries=10000):
+        self.path = path
+        self.max_entries = max_entries
+        self.evictions = 0
+        self._writes = 0
+        self._local = threading.local()
+        # Entries hold per-user responses; SQLite gives the WAL and shared
+        # memory files the database file's permissions
+        os.close(os.open(path, os.O_RDWR | os.O_CREAT, 0o600))
+
+    def _conn(self):
+        """One connection per thread, reopened after a fork."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS response_cache ('
+                'key TEXT PRIMARY KEY, value BLOB NOT NULL, '
+                'expires_at REAL NOT NULL, used_at REAL NOT NULL)'
+            )
+            conn.execute('CREATE INDEX IF NOT EXISTS ix_response_cache_used_at ON response_cache (used_at)')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def get(self, key):
+        conn = self._conn()
+        now = time.time()
+        row = conn.execute(
+            'SELECT value, expires_at FROM response_cache WHERE key = ?', (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        if row[1] <= now:
+            conn.execute('DELETE FROM response_cache WHERE key = ? AND expires_at <= ?', (key, now))
+            return None
+        conn.execute(
+            'UPDATE response_cache SET used_at = ? WHERE key = ? AND used_at < ?',
+            (now, key, now - 1)
+        )
+        return bytes(row[0])
+
+    def set(self, key, value, ttl):
+        self.set_many({key: value}, ttl)
+
+    def set_many(self, items, ttl):
+        """Set several keys with the same TTL in one write transaction."""
+        conn = self._conn()
+        now = time.time()
+        with conn:
+            conn.execute('BEGIN IMMEDIATE')
+            conn.executemany(
+                'INSERT OR REPLACE INTO response_cache (key, value, expires_at, used_at) VALUES (?, ?, ?, ?)',
+                [(key, value, now + ttl, now) for key, value in items.items()]
+            )
+        self._writes += 1
+        if self._writes % self.PRUNE_EVERY == 0:
+            self.prune()
+
+    def add(self, key, value, ttl):
+        """Set key only if it is absent; returns True when stored."""
+        conn = self._conn()
+        now = time.time()
+        conn.execute('DELETE FROM response_cache WHERE key = ? AND expires_at <= ?', (key, now))
+        cursor = conn.execute(
+            'INSERT OR IGNORE INTO response_cache (key, value, expires_at, used_at) VALUES (?, ?, ?, ?)',
+            (key, value, now + ttl, now)
+        )
+        return cursor.rowcount == 1
+
+    def delete(self, key):
+        self._conn().execute('DELETE FROM response_cache WHERE key = ?', (key,))
+
+    def clear(self):
+        self._conn().execute('DELETE FROM response_cache')
+
+    def prune(self):
+        """Drop expired entries, then the least recently used past max_entries."""
+        conn = self._conn()
+        conn.execute('DELETE FROM response_cache WHERE expires_at <= ?', (time.time(),))
+        excess = conn.execute('SELECT COUNT(*) FROM response_cache').fetchone()[0] - self.max_entries
+        if excess > 0:
+            conn.execute(
+                'DELETE FROM response_cache WHERE key IN '
+                '(SELECT key FROM response_cache ORDER BY used_at LIMIT ?)',
+                (excess,)
+            )
+            self.evictions += excess
+
+    def __len__(self):
+        return self._conn().execute('SELECT COUNT(*) FROM response_cache').fetchone()[0]
+
+
+class RedisError(Exception):
+    """Error reply from a Redis-protocol server."""
+
+
+class RedisBackend:
+    """
+    Cache in a Redis-protocol server, via a minimal RESP client.
+
+    Uses only GET, SET (PX/NX), DEL and SCAN, so any compatible server
+    works. Keys are prefixed so clear() only removes this cache's keys.
+    """
+
+    shared = True
+
+    def __init__(self, host='localhost', port=6379, db=0, prefix='alpha:', timeout=1.0):
+        self.host = host
+        self.port = port
+        self.db = db
+        self.prefix = prefix
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _connection(self):
+        """One connection per thread, reopened after a fork or an error."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+            conn = (sock, sock.makefile('rb'))
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+            if self.db:
+                self._command('SELECT', self.db)
+        return conn
+
+    def _command(self, *args):
+        return self._pipeline([args])[0]
+
+    def _pipeline(self, commands):
+        """Send several commands in one round trip and return their replies."""
+        sock, reader = self._connection()
+        parts = []
+        for args in commands:
+            parts.append(b'*%d\r\n' % len(args))
+            for arg in args:
+                if not isinstance(arg, bytes):
+                    arg = str(arg).encode('utf-8')
+                parts.append(b'$%d\r\n%s\r\n' % (len(arg), arg))
+        try:
+            sock.sendall(b''.join(parts))
+            replies = []
+            error = None
+            for _ in commands:
+                try:
+                    replies.append(self._read_reply(reader))
+                except RedisError as e:
+                    error = error or e
+            if error is not None:
+                raise error
+            return replies
+        except (OSError, ValueError):
+            self._local.conn = None
+            sock.close()
+            raise
+
+    def _read_reply(self, reader):
+        line = reader.readline()
+        if not line.endswith(b'\r\n'):
+            raise ConnectionError('connection closed by server')
+        kind, payload = line[:1], line[1:-2]
+        if kind == b'+':
+            return payload.decode('utf-8')
+        if kind == b'-':
+            raise RedisError(payload.decode('utf-8'))
+        if kind == b':':
+            return int(payload)
+        if kind == b'$':
+            length = int(payload)
+            if length < 0:
+                return None
+            data = reader.read(length + 2)
+            return data[:-2]
+        if kind == b'*':
+            length = int(payload)
+            if length < 0:
+                return None
+            return [self._read_reply(reader) for _ in range(length)]
+        raise ValueError(f'unexpected reply {line!r}')
+
+    def get(self, key):
+        return self._command('GET', self.prefix + key)
+
+    def set(self, key, value, ttl):
+        self._command('SET', self.prefix + key, value, 'PX', int(ttl * 1000))
+
+    def set_many(self, items, ttl):
+        """Set several keys with the same TTL in one round trip."""
+        self._pipeline([
+            ('SET', self.prefix + key, value, 'PX', int(ttl * 1000)) for key, value in items.items()
+        ])
+
+    def add(self, key, value, ttl):
+        """Set key only if it is absent; returns True when stored."""
+        return self._command('SET', self.prefix + key, value, 'PX', int(ttl * 1000), 'NX') is not None
+
+    def delete(self, key):
+        self._command('DEL', self.prefix + key)
+
+    def clear(self):
+        cursor = b'0'
+        while True:
+            cursor, keys = self._command('SCAN', cursor, 'MATCH', self.prefix + '*', 'COUNT', 500)
+            if keys:
+                self._command('DEL', *keys)
+            if cursor in (b'0', '0'):
+                return
+
+
+def backend_from_url(url, max_entries=10000, instance_path=None):
+    """
+    Build a backend from a memory://, sqlite:/// or redis:// URL.
+
+    A sqlite:// URL without a path uses response_cache.db in
+    instance_path (the app's instance folder by default).
+    """
+    parsed = urlparse(url)
+    if parsed.scheme == 'memory':
+        return MemoryBackend(max_entries)
+    if parsed.scheme == 'sqlite':
+        path = parsed.path
+        if not path:
+            instance_path = instance_path or current_app.instance_path
+            os.makedirs(instance_path, mode=0o700, exist_ok=True)
+            path = os.path.join(instance_path, 'response_cache.db')
+        return SQLiteBackend(path, max_entries)
+    if parsed.scheme == 'redis':
+        return RedisBackend(
+            parsed.hostname or 'localhost',
+            parsed.port or 6379,
+            int(parsed.path.lstrip('/') or 0)
+        )
+    raise ValueError(f'unsupported response cache URL: {url}')
+
+
+class ResponseCache:
+    """Response cache with single-flight misses and hit/miss counters."""
+
+    # Backend location, see the module docstring
+    URL = os.getenv('RESPONSE_CACHE_URL', 'sqlite://')
+    # Most entries kept by the memory and SQLite backends
+    MAX_ENTRIES = int(os.getenv('RESPONSE_CACHE_MAX_ENTRIES', '10000'))
+    # Longest a request waits for another one computing the same key
+    FILL_TIMEOUT_SECONDS = 10
+    # How often waiters in other workers poll for the computed entry
+    POLL_INTERVAL_SECONDS = 0.05
+    # Response headers never stored
+    SKIPPED_HEADERS = {'content-length', 'set-cookie', 'x-cache'}
+
+    _backend = None
+    _flights = {}
+    _stats = defaultdict(lambda: defaultdict(int))
+    _lock = threading.Lock()
+
+    @staticmethod
+    def backend():
+        """The configured backend, created on first use."""
+        if ResponseCache._backend is None:
+            with ResponseCache._lock:
+                if ResponseCache._backend is None:
+                    ResponseCache._backend = backend_from_url(ResponseCache.URL, ResponseCache.MAX_ENTRIES)
+        return ResponseCache._backend
+
+    @staticmethod
+    def configure(backend):
+        """Replace the backend (tests, app setup) and reset the counters."""
+        with ResponseCache._lock:
+            ResponseCache._backend = backend
+            ResponseCache._flights.clear()
+            ResponseCache._stats.clear()
+
+    # ------------------------------------------------------------------
+    # Keys and serialization
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def identity():
+        """JWT identity of the current request, or None."""
+        from flask_jwt_extended import verify_jwt_in_request, get_jwt_identity
+        try:
+            verify_jwt_in_request(optional=True)
+            identity = get_jwt_identity()
+        except Exception:
+            return None
+        return None if identity is None else str(identity)
+
+    @staticmethod
+    def make_key(namespace, per_user=True):
+        """Key for the current request."""
+        parts = [
+            request.path,
+            sorted(request.args.items(multi=True)),
+            ResponseCache.identity() if per_user else None
+        ]
+        digest = hashlib.sha256(json.dumps(parts).encode('utf-8')).hexdigest()
+        return f'resp:{namespace}:{digest}'
+
+    @staticmethod
+    def _dump(response, versions):
+        headers = [
+            (name, value) for name, value in response.headers.items()
+            if name.lower() not in ResponseCache.SKIPPED_HEADERS
+        ]
+        head = json.dumps({'status': response.status_code, 'headers': headers, 'tags': versions})
+        return head.encode('utf-8') + b'\n' + response.get_data()
+
+    @staticmethod
+    def _load(namespace, value):
+        """Rebuild a stored response, or None if its tags were bumped."""
+        if value is None:
+            return None
+        head, _, body = value.partition(b'\n')
+        meta = json.loads(head)
+        if not CacheTags.is_current(meta.get('tags')):
+            ResponseCache._record(namespace, 'stale')
+            return None
+        response = make_response(body, meta['status'])
+        response.headers.clear()
+        for name, header in meta['headers']:
+            response.headers.add(name, header)
+        response.headers['X-Cache'] = 'HIT'
+        return response
+
+    @staticmethod
+    def _cacheable(response):
+        return response.status_code == 200 and not response.direct_passthrough \
+            and 'Set-Cookie' not in response.headers
+
+    # ------------------------------------------------------------------
+    # Lookup
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _record(namespace, name, count=1):
+        with ResponseCache._lock:
+            ResponseCache._stats[namespace][name] += count
+
+    @staticmethod
+    def _safe(namespace, operation, *args):
+        """Run a backend call, counting and logging failures."""
+        try:
+            return operation(*args)
+        except Exception:
+            ResponseCache._record(namespace, 'errors')
+            logger.exception('Response cache backend error')
+            return None
+
+    @staticmethod
+    def get_or_compute(namespace, key, ttl, compute, tags=()):
+        """
+        Serve key from the cache or compute, store and return it.
+
+        Args:
+            namespace: Metrics and key namespace
+            key: Full cache key (see make_key)
+            ttl: Entry lifetime in seconds
+            compute: Callable returning a Flask response
+            tags: Cache tags the response depends on
+
+        Returns:
+            Flask response
+        """
+        backend = ResponseCache.backend()
+        response = ResponseCache._load(namespace, ResponseCache._safe(namespace, backend.get, key))
+        if response is not None:
+            ResponseCache._record(namespace, 'hits')
+            return response
+
+        # Single flight within the process
+        with ResponseCache._lock:
+            flight = ResponseCache._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = ResponseCache._flights[key] = threading.Event()
+        if not leader:
+            flight.wait(ResponseCache.FILL_TIMEOUT_SECONDS)
+            response = ResponseCache._load(namespace, ResponseCache._safe(namespace, backend.get, key))
+            if response is not None:
+                ResponseCache._record(namespace, 'coalesced')
+                return response
+            ResponseCache._record(namespace, 'misses')
+            response = make_response(compute())
+            response.headers['X-Cache'] = 'MISS'
+            return response
+
+        lease = None
+        try:
+            # Single flight across workers sharing the backend
+            if backend.shared:
+                lease = key + ':lease'
+                if not ResponseCache._safe(namespace, backend.add, lease, b'1', ResponseCache.FILL_TIMEOUT_SECONDS):
+                    response = ResponseCache._wait_for(namespace, backend, key)
+                    lease = None
+                    if response is not None:
+                        ResponseCache._record(namespace, 'coalesced')
+                        return response
+
+            ResponseCache._record(namespace, 'misses')
+            # Versions are read first: a commit during compute() makes the entry stale
+            versions = CacheTags.versions(tags) if tags else None
+            response = make_response(compute())
+            if ResponseCache._cacheable(response) and (versions is not None or not tags):
+                ResponseCache._safe(namespace, backend.set, key, ResponseCache._dump(response, versions), ttl)
+                ResponseCache._record(namespace, 'stores')
+            response.headers['X-Cache'] = 'MISS'
+            return response
+        finally:
+            if lease is not None:
+                ResponseCache._safe(namespace, backend.delete, lease)
+            with ResponseCache._lock:
+                ResponseCache._flights.pop(key, None)
+            flight.set()
+
+    @staticmethod
+    def _wait_for(namespace, backend, key):
+        """Poll for an entry another worker is computing; returns a response or None."""
+        deadline = time.monotonic() + ResponseCache.FILL_TIMEOUT_SECONDS
+        while time.monotonic() < deadline:
+            time.sleep(ResponseCache.POLL_INTERVAL_SECONDS)
+            response = ResponseCache._load(namespace, ResponseCache._safe(namespace, backend.get, key))
+            if response is not None:
+                return response
+            if ResponseCache._safe(namespace, backend.get, key + ':lease') is None:
+                return None
+        return None
+
+    @staticmethod
+    def cached(namespace, ttl=300, per_user=True, tags=()):
+        """
+        Decorator caching a view's GET responses.
+
+        Place it below the route's authentication decorator so only
+        authorized requests reach the cache.
+
+        Args:
+            namespace: Name for keys and metrics, e.g. 'leaderboard'
+            ttl: Entry lifetime in seconds
+            per_user: Include the JWT identity in the key; False for
+                responses that are the same for every caller
+            tags: Cache tags, formatted with the view's keyword
+                arguments, e.g. 'student:{student_id}'
+        """
+        def decorator(f):
+            @wraps(f)
+            def decorated(*args, **kwargs):
+                if request.method not in ('GET', 'HEAD'):
+                    return f(*args, **kwargs)
+                key = ResponseCache.make_key(namespace, per_user)
+                entry_tags = [tag.format(**kwargs) for tag in tags]
+                return ResponseCache.get_or_compute(
+                    namespace, key, ttl, lambda: f(*args, **kwargs), entry_tags
+                )
+            return decorated
+        return decorator
+
+    # ------------------------------------------------------------------
+    # Maintenance and metrics
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def clear():
+        """Drop every cached response."""
+        ResponseCache._safe('all', ResponseCache.backend().clear)
+
+    @staticmethod
+    def stats():
+        """
+        Hit/miss counters for this process.
+
+        Returns:
+            dict with backend, evictions, totals and per-namespace
+            counters (hits, misses, coalesced, stale, stores, errors) and hit
+            rates
+        """
+        with ResponseCache._lock:
+            namespaces = {name: dict(counters) for name, counters in ResponseCache._stats.items()}
+        totals = defaultdict(int)
+        for counters in namespaces.values():
+            for name, count in counters.items():
+                totals[name] += count
+            served = counters.get('hits', 0) + counters.get('coalesced', 0)
+            lookups = served + counters.get('misses', 0)
+            counters['hit_rate'] = round(served / lookups, 3) if lookups else 0
+        backend = ResponseCache.backend()
+        return {
+            'backend': type(backend).__name__,
+            'evictions': getattr(backend, 'evictions', None),
+            'totals': dict(totals),
+            'namespaces': namespaces
+        }
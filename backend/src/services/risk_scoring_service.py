@@ -0,0 +1,273 @@
+"""
+Risk scoring service for the whole-school at-risk pipeline.
+
+The pipeline builds a feature matrix (engagement, recent accuracy,
+recent practice and overdue assignments) for a chunk of students with
+four grouped queries, scores every row at once with NumPy and stores the
+results in student_risk_scores. Every student is rescored by the
+scheduled refresh_risk_scores.py job, and a student's row is rescored
+when one of their sessions ends or they complete an assignment. A class
+lookup is then a single read of its members' stored rows.
+"""
+from datetime import datetime, timedelta
+import numpy as np
+from sqlalchemy import func
+from src.database import db, upsert
+from src.models.student import Student
+from src.models.student_session import StudentSession
+from src.models.assignment_model import Assignment, AssignmentStudent
+from src.models.class_group import ClassMembership
+from src.models.risk import StudentRiskScore
+from src.services.engagement_service import EngagementService
+
+
+class RiskScoringService:
+    """Service for batch at-risk scoring and stored risk lookups."""
+
+    # Bump when the scoring rules change so stored rows are recomputed
+    MODEL_VERSION = 1
+    # Stored rows older than this are recomputed on read
+    MAX_AGE_HOURS = 24
+    # Students per batch when refreshing
+    REFRESH_CHUNK_SIZE = 1000
+    # Sessions used for the recent accuracy feature
+    RECENT_SESSION_COUNT = 20
+    # Days counted as recent practice
+    RECENT_DAYS = 7
+
+    # ------------------------------------------------------------------
+    # Features
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def build_features(student_ids, now=None):
+        """
+        Build the feature matrix for a set of students.
+
+        Returns:
+            dict of NumPy arrays aligned with student_ids: student_id,
+            engagement, has_sessions, accuracy (over the last
+            RECENT_SESSION_COUNT sessions), recent_sessions, overdue
+        """
+        now = now or datetime.utcnow()
+        student_ids = list(student_ids)
+        index = {student_id: i for i, student_id in enumerate(student_ids)}
+        n = len(student_ids)
+        features = {
+            'student_id': np.array(student_ids, dtype=np.int64),
+            'engagement': np.zeros(n),
+            'has_sessions': np.zeros(n, dtype=bool),
+            'accuracy': np.zeros(n),
+            'recent_sessions': np.zeros(n, dtype=np.int64),
+            'overdue': np.zeros(n, dtype=np.int64)
+        }
+        if not n:
+            return features
+
+        for student_id, result in EngagementService.compute(student_ids, now=now).items():
+            features['engagement'][index[student_id]] = result['score']
+
+        # Accuracy over each student's most recent sessions
+        ranked = db.session.query(
+            StudentSession.student_id,
+            StudentSession.questions_answered,
+            StudentSession.questions_correct,
+            func.row_number().over(
+                partition_by=StudentSession.student_id,
+                order_by=(StudentSession.started_at.desc(), StudentSession.id.desc())
+            ).label('position')
+        ).filter(StudentSession.student_id.in_(student_ids)).subquery()
+        for student_id, questions, correct in db.session.query(
+            ranked.c.student_id,
+            func.sum(ranked.c.questions_answered),
+            func.sum(ranked.c.questions_correct)
+        ).filter(
+            ranked.c.position <= RiskScoringService.RECENT_SESSION_COUNT
+        ).group_by(ranked.c.student_id).all():
+            i = index[student_id]
+            features['has_sessions'][i] = True
+            features['accuracy'][i] = (correct or 0) / questions if questions else 0
+
+        for student_id, count in db.session.query(
+            StudentSession.student_id,
+            func.count(StudentSession.id)
+        ).filter(
+            StudentSession.student_id.in_(student_ids),
+            StudentSession.started_at >= now - timedelta(days=RiskScoringService.RECENT_DAYS)
+        ).group_by(StudentSession.student_id).all():
+            features['recent_sessions'][index[student_id]] = count
+
+        for student_id, count in db.session.query(
+            AssignmentStudent.student_id,
+            func.count(AssignmentStudent.id)
+        ).join(Assignment).filter(
+            AssignmentStudent.student_id.in_(student_ids),
+            AssignmentStudent.status != 'completed',
+            Assignment.due_date < now
+        ).group_by(AssignmentStudent.student_id).all():
+            features['overdue'][index[student_id]] = count
+
+        return features
+
+    # ------------------------------------------------------------------
+    # Scoring
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def score(features):
+        """
+        Score a feature matrix.
+
+        Factor points:
+            engagement below 30 / 50: 30 / 15
+            recent accuracy below 50% / 70%: 30 / 15 (students with sessions)
+            no / fewer than 2 sessions in RECENT_DAYS: 25 / 10
+            more than 2 / any overdue assignments: 15 / 7
+
+        Returns:
+            (risk_scores, risk_levels, risk_factors): score and level
+            arrays plus a list of factor descriptions per student
+        """
+        engagement = features['engagement']
+        accuracy = features['accuracy']
+        has_sessions = features['has_sessions']
+        recent = features['recent_sessions']
+        overdue = features['overdue']
+
+        factors = [
+            (engagement < 30, 30, 'Very low engagement'),
+            ((engagement >= 30) & (engagement < 50), 15, 'Low engagement'),
+            (has_sessions & (accuracy < 0.50), 30, 'Very low accuracy'),
+            (has_sessions & (accuracy >= 0.50) & (accuracy < 0.70), 15, 'Low accuracy'),
+            (recent == 0, 25, 'No practice in 7 days'),
+            ((recent > 0) & (recent < 2), 10, 'Infrequent practice'),
+            (overdue > 2, 15, None),
+            ((overdue > 0) & (overdue <= 2), 7, None)
+        ]
+
+        scores = np.zeros(len(engagement), dtype=np.int64)
+        for mask, points, _ in factors:
+            scores += np.where(mask, points, 0)
+        levels = np.where(scores >= 60, 'high', np.where(scores >= 30, 'medium', 'low'))
+
+        descriptions = [[] for _ in range(len(scores))]
+        for mask, _, label in factors:
+            for i in np.flatnonzero(mask):
+                if label is not None:
+                    descriptions[i].append(label)
+                elif overdue[i] > 2:
+                    descriptions[i].append(f'{overdue[i]} overdue assignments')
+                else:
+                    descriptions[i].append(f'{overdue[i]} overdue assignment(s)')
+
+        return scores, levels, descriptions
+
+    # ------------------------------------------------------------------
+    # Materialized scores
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def refresh(student_ids=None, commit=True):
+        """
+        Recompute and store risk scores.
+
+        Args:
+            student_ids: Students to rescore (default: every student)
+            commit: Commit each chunk (False only flushes, for callers
+                rescoring inside their own transaction)
+
+        Returns:
+            Number of students scored
+        """
+        if student_ids is None:
+            student_ids = [row[0] for row in db.session.query(Student.id).order_by(Student.id).all()]
+
+        student_ids = list(student_ids)
+        now = datetime.utcnow()
+        chunk_size = RiskScoringService.REFRESH_CHUNK_SIZE
+        for start in range(0, len(student_ids), chunk_size):
+            chunk = student_ids[start:start + chunk_size]
+            features = RiskScoringService.build_features(chunk, now=now)
+            scores, levels, factors = RiskScoringService.score(features)
+            RiskScoringService._store([{
+                'student_id': student_id,
+                'risk_score': int(scores[i]),
+                'risk_level': str(levels[i]),
+                'risk_factors': factors[i],
+                'engagement_score': float(features['engagement'][i]),
+                'recent_accuracy': float(features['accuracy'][i]) if features['has_sessions'][i] else None,
+                'recent_sessions': int(features['recent_sessions'][i]),
+                'overdue_assignments': int(features['overdue'][i]),
+                'model_version': RiskScoringService.MODEL_VERSION,
+                'computed_at': now
+            } for i, student_id in enumerate(chunk)])
+            if commit:
+                db.session.commit()
+            else:
+                db.session.flush()
+        return len(student_ids)
+
+    @staticmethod
+    def _store(values):
+        """Insert or replace stored risk rows."""
+        upsert(StudentRiskScore, values, ['student_id'])
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def get_class_risks(class_id, levels=('medium', 'high')):
+        """
+        Get a class's stored risk rows, highest risk first.
+
+        Members without a current row (new students, rows from older
+        rules or older than MAX_AGE_HOURS) are scored in one batch first.
+
+        Returns:
+            list of dicts with student_id, student_name, risk_level,
+            risk_score, risk_factors and engagement_score; ties keep
+            membership order
+        """
+        rows = RiskScoringService._load_class(class_id)
+        cutoff = datetime.utcnow() - timedelta(hours=RiskScoringService.MAX_AGE_HOURS)
+        stale = [
+            row.student_id for row in rows
+            if row.risk_score is None
+            or row.model_version != RiskScoringService.MODEL_VERSION
+            or row.computed_at < cutoff
+        ]
+        if stale:
+            RiskScoringService.refresh(stale)
+            rows = RiskScoringService._load_class(class_id)
+
+        risks = [{
+            'student_id': row.student_id,
+            'student_name': row.name if row.name else 'Unknown',
+            'risk_level': row.risk_level,
+            'risk_score': row.risk_score,
+            'risk_factors': row.risk_factors,
+            'engagement_score': round(row.engagement_score, 1)
+        } for row in rows if row.risk_level in levels]
+        risks.sort(key=lambda x: x['risk_score'], reverse=True)
+        return risks
+
+    @staticmethod
+    def _load_class(class_id):
+        """Load a class's members with their stored risk rows in one query."""
+        return db.session.query(
+            ClassMembership.student_id,
+            Student.name,
+            StudentRiskScore.risk_score,
+            StudentRiskScore.risk_level,
+            StudentRiskScore.risk_factors,
+            StudentRiskScore.engagement_score,
+            StudentRiskScore.model_version,
+            StudentRiskScore.computed_at
+        ).outerjoin(
+            Student, Student.id == ClassMembership.student_id
+        ).outerjoin(
+            StudentRiskScore, StudentRiskScore.student_id == ClassMembership.student_id
+        ).filter(
+            ClassMembership.class_id == class_id
+        ).order_by(ClassMembership.id).all()
@@ -4,6 +4,7 @@ Business logic for shared challenges between students
 """
 
 from datetime import datetime, timedelta
+from sqlalchemy.orm import joinedload
 from src.database import db
 from src.models.shared_challenge import SharedChallenge, ChallengeParticipant
 from src.models.student import Student
@@ -209,6 +210,7 @@ class SharedChallengeService:
         
         participant.status = 'accepted'
         participant.updated_at = datetime.utcnow()
+        SharedChallengeService._bump_version(participant.challenge)
         
         db.session.commit()
         
@@ -230,6 +232,7 @@ class SharedChallengeService:
         
         participant.status = 'declined'
         participant.updated_at = datetime.utcnow()
+        SharedChallengeService._bump_version(participant.challenge)
         
         db.session.commit()
         
@@ -249,9 +252,62 @@ class SharedChallengeService:
         if participant.status != 'accepted':
             return {'error': 'Must accept challenge first'}, 400
         
-        # Update progress
+        challenge_completed = SharedChallengeService._advance(participant, question_result.get('correct'))
+        
+        db.session.commit()
+        
+        return {
+            'success': True,
+            'progress': participant.to_dict(include_student=False),
+            'challenge_completed': challenge_completed
+        }, 200
+    
+    @staticmethod
+    def record_answer(student_id, skill_id, correct, commit=True):
+        """
+        Advance every accepted, active challenge on a skill for one answer.
+        
+        Args:
+            student_id: Student ID
+            skill_id: Skill of the answered question
+            correct: Whether the answer was correct
+            commit: Commit the update (False only flushes it so the caller
+                can batch it with other writes in one transaction)
+        
+        Returns:
+            list of challenges completed by this answer
+        """
+        if skill_id is None:
+            return []
+        
+        participants = ChallengeParticipant.query.join(SharedChallenge).filter(
+            ChallengeParticipant.student_id == student_id,
+            ChallengeParticipant.status == 'accepted',
+            ChallengeParticipant.completed == False,
+            SharedChallenge.skill_id == skill_id,
+            SharedChallenge.status == 'active',
+            SharedChallenge.end_time > datetime.utcnow()
+        ).all()
+        
+        completed = [
+            participant.challenge for participant in participants
+            if SharedChallengeService._advance(participant, correct)
+        ]
+        
+        if commit:
+            db.session.commit()
+        else:
+            db.session.flush()
+        return completed
+    
+    @staticmethod
+    def _advance(participant, correct):
+        """Count one answer for a participant; returns True if it completed the challenge."""
+        challenge = participant.challenge
+        SharedChallengeService._bump_version(challenge)
+        
         participant.questions_answered += 1
-        if question_result.get('correct'):
+        if correct:
             participant.questions_correct += 1
         
         # Recalculate accuracy
@@ -261,59 +317,102 @@ class SharedChallengeService:
         participant.updated_at = datetime.utcnow()
         
         # Check for completion
-        challenge = participant.challenge
-        challenge_completed = False
-        
+        completed = False
         if (participant.questions_answered >= challenge.target_questions and
             participant.accuracy >= challenge.target_accuracy):
             participant.completed = True
             participant.completed_at = datetime.utcnow()
-            challenge_completed = True
             
             # Award XP
-            GamificationService.award_xp(student_id, 'challenge_completion', base_xp=challenge.xp_reward)
-        
-        db.session.commit()
+            GamificationService.award_xp(
+                participant.student_id,
+                'challenge_completion',
+                base_xp=challenge.xp_reward,
+                commit=False
+            )
+            completed = True
         
-        return {
-            'success': True,
-            'progress': participant.to_dict(include_student=False),
-            'challenge_completed': challenge_completed
-        }, 200
+        return completed
+    
+    # ------------------------------------------------------------------
+    # Scoreboard
+    # ------------------------------------------------------------------
+    
+    @staticmethod
+    def _scoreboard_query(challenge_id):
+        """
+        Participants of a challenge in scoreboard order.
+        
+        Completed first, then accuracy, then questions answered; earlier
+        participants win ties. Walks the (challenge_id, completed, accuracy,
+        questions_answered, id) index, so ranks are read in order instead
+        of stored and shifted on every answer.
+        """
+        return ChallengeParticipant.query.filter(
+            ChallengeParticipant.challenge_id == challenge_id
+        ).order_by(
+            ChallengeParticipant.completed.desc(),
+            ChallengeParticipant.accuracy.desc(),
+            ChallengeParticipant.questions_answered.desc(),
+            ChallengeParticipant.id
+        )
     
     @staticmethod
-    def get_challenge_leaderboard(challenge_id):
-        """Get ranked leaderboard for a challenge"""
+    def _bump_version(challenge):
+        """
+        Increment a challenge's scoreboard version.
+        
+        Set as a SQL expression, so concurrent answers never lose an
+        increment, and written by the flush like any other change.
+        """
+        challenge.scoreboard_version = SharedChallenge.scoreboard_version + 1
+    
+    @staticmethod
+    def get_challenge_leaderboard(challenge_id, since_version=None, limit=None):
+        """
+        Get ranked leaderboard for a challenge
+        
+        Reads participants in scoreboard order from the index, so the
+        cost depends on the number of rows returned rather than on a sort
+        of every participant.
+        
+        Args:
+            challenge_id: Challenge ID
+            since_version: Scoreboard version the client already has; if
+                nothing changed since, no rows are returned
+            limit: Number of top positions to return (all if None)
+        """
         challenge = SharedChallenge.query.get(challenge_id)
         if not challenge:
             return {'error': 'Challenge not found'}, 404
         
-        # Get all participants
-        participants = ChallengeParticipant.query.filter_by(
-            challenge_id=challenge_id
-        ).all()
-        
-        # Sort by: completed first, then accuracy, then questions answered (more is better)
-        def sort_key(p):
-            return (
-                not p.completed,  # Completed first (False < True)
-                -p.accuracy,  # Higher accuracy first
-                -p.questions_answered  # More questions first
-            )
-        
-        participants.sort(key=sort_key)
-        
-        # Assign ranks
-        for i, participant in enumerate(participants, 1):
-            participant.rank = i
-        
-        db.session.commit()
+        version = challenge.scoreboard_version
+        if since_version is not None and since_version == version:
+            return {
+                'success': True,
+                'changed': False,
+                'version': version
+            }, 200
+        
+        query = SharedChallengeService._scoreboard_query(challenge_id).options(
+            joinedload(ChallengeParticipant.student).joinedload(Student.user),
+            joinedload(ChallengeParticipant.student).joinedload(Student.progress)
+        )
+        if limit:
+            query = query.limit(limit)
         
         # Build leaderboard
-        leaderboard = [p.to_dict() for p in participants]
+        leaderboard = []
+        for position, participant in enumerate(query.all(), 1):
+            entry = participant.to_dict()
+            if challenge.status != 'completed':
+                entry['rank'] = position
+            leaderboard.append(entry)
         
         return {
             'success': True,
+            'changed': True,
+            'version': version,
             'challenge': challenge.to_dict(),
             'leaderboard': leaderboard
         }, 200
@@ -330,26 +429,26 @@ class SharedChallengeService:
         
         challenge.status = 'completed'
         challenge.updated_at = datetime.utcnow()
+        SharedChallengeService._bump_version(challenge)
         
-        # Get leaderboard
-        participants = ChallengeParticipant.query.filter_by(
-            challenge_id=challenge_id,
-            completed=True
-        ).order_by(
-            ChallengeParticipant.accuracy.desc(),
-            ChallengeParticipant.questions_answered.desc()
-        ).all()
+        # Settle final ranks from the scoreboard order
+        participants = SharedChallengeService._scoreboard_query(challenge_id).all()
+        for position, participant in enumerate(participants, 1):
+            participant.rank = position
         
         # Award bonus XP to top 3 in competitive mode
-        if challenge.mode == 'competitive' and len(participants) > 0:
+        if challenge.mode == 'competitive':
+            top_student_ids = [p.student_id for p in participants if p.completed][:3]
+            
             bonuses = [0.5, 0.25, 0.1]  # 50%, 25%, 10% bonus
             
-            for i, participant in enumerate(participants[:3]):
+            for i, student_id in enumerate(top_student_ids):
                 bonus_xp = int(challenge.xp_reward * bonuses[i])
                 GamificationService.award_xp(
-                    participant.student_id,
+                    student_id,
                     f'challenge_rank_{i+1}',
-                    base_xp=bonus_xp
+                    base_xp=bonus_xp,
+                    commit=False
                 )
         
         db.session.commit()
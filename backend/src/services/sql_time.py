@@ -0,0 +1,61 @@
+"""
+Dialect-aware SQL date and time expressions.
+
+SQLite and PostgreSQL spell date arithmetic and date parts differently
+(julianday() and strftime() versus EXTRACT(...)), so reports that
+aggregate durations or bucket timestamps in SQL build their expressions
+here from the bound session's dialect. Other dialects get the MySQL
+spellings.
+"""
+from datetime import date
+from sqlalchemy import Date, Integer, cast, extract, func, literal_column
+from src.database import db
+
+
+def dialect_name():
+    """Name of the database dialect the session is bound to."""
+    return db.session.get_bind().dialect.name
+
+
+def seconds_between(start, end):
+    """SQL expression for the seconds from start to end (NULL if either is NULL)."""
+    dialect = dialect_name()
+    if dialect == 'sqlite':
+        return (func.julianday(end) - func.julianday(start)) * 86400.0
+    if dialect == 'postgresql':
+        return extract('epoch', end - start)
+    return func.timestampdiff(literal_column('SECOND'), start, end)
+
+
+def weekday(column):
+    """SQL expression for a timestamp's day of week, 0 (Sunday) to 6."""
+    dialect = dialect_name()
+    if dialect == 'sqlite':
+        return cast(func.strftime('%w', column), Integer)
+    if dialect == 'postgresql':
+        return cast(extract('dow', column), Integer)
+    return func.dayofweek(column) - 1
+
+
+def hour(column):
+    """SQL expression for a timestamp's hour, 0 to 23."""
+    dialect = dialect_name()
+    if dialect == 'sqlite':
+        return cast(func.strftime('%H', column), Integer)
+    if dialect == 'postgresql':
+        return cast(extract('hour', column), Integer)
+    return func.hour(column)
+
+
+def day(column):
+    """SQL expression for a timestamp's calendar day."""
+    if dialect_name() == 'postgresql':
+        return cast(column, Date)
+    return func.date(column)
+
+
+def to_date(value):
+    """Normalize a day() result to a date; SQLite returns ISO strings."""
+    if isinstance(value, str):
+        return date.fromisoformat(value)
+    return value
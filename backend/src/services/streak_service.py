@@ -28,13 +28,13 @@ class StreakService:
     }
     
     @staticmethod
-    def get_or_create_streak(student_id):
+    def get_or_create_streak(student_id, commit=True):
         """Get or create streak tracking for a student."""
         streak = StreakTracking.query.filter_by(student_id=student_id).first()
         if not streak:
             streak = StreakTracking(student_id=student_id)
             db.session.add(streak)
-            db.session.commit()
+            StreakService._finish(commit)
         return streak
     
     @staticmethod
@@ -91,9 +91,16 @@ class StreakService:
             return {'streak': 1, 'milestone_reached': False}
     
     @staticmethod
-    def update_practice_streak(student_id):
-        """Update practice streak for a student."""
-        streak = StreakService.get_or_create_streak(student_id)
+    def update_practice_streak(student_id, commit=True):
+        """
+        Update practice streak for a student.
+        
+        Args:
+            student_id: Student ID
+            commit: Commit the update (False only flushes it so the caller
+                can batch it with other writes in one transaction)
+        """
+        streak = StreakService.get_or_create_streak(student_id, commit=commit)
         today = date.today()
         
         # If already practiced today, no update needed
@@ -120,10 +127,11 @@ class StreakService:
                     streak.practice_streak,
                     StreakService.PRACTICE_MILESTONES,
                     student_id,
-                    'practice_streak'
+                    'practice_streak',
+                    commit=commit
                 )
                 
-                db.session.commit()
+                StreakService._finish(commit)
                 return {
                     'streak': streak.practice_streak,
                     'milestone_reached': milestone_xp > 0,
@@ -133,18 +141,26 @@ class StreakService:
                 # Streak breaks
                 streak.practice_streak = 1
                 streak.last_practice_date = today
-                db.session.commit()
+                StreakService._finish(commit)
                 return {'streak': 1, 'milestone_reached': False, 'streak_broken': True}
         else:
             # First practice
             streak.practice_streak = 1
             streak.practice_streak_best = 1
             streak.last_practice_date = today
-            db.session.commit()
+            StreakService._finish(commit)
             return {'streak': 1, 'milestone_reached': False}
     
     @staticmethod
-    def _check_milestone(old_streak, new_streak, milestones, student_id, streak_type):
+    def _finish(commit):
+        """Commit, or only flush when the caller owns the transaction."""
+        if commit:
+            db.session.commit()
+        else:
+            db.session.flush()
+    
+    @staticmethod
+    def _check_milestone(old_streak, new_streak, milestones, student_id, streak_type, commit=True):
         """Check if a milestone was reached and award XP."""
         for milestone, xp in milestones.items():
             if old_streak < milestone <= new_streak:
@@ -152,7 +168,8 @@ class StreakService:
                 GamificationService.award_xp(
                     student_id,
                     f'{streak_type}_milestone',
-                    base_xp=xp
+                    base_xp=xp,
+                    commit=commit
                 )
                 return xp
         return 0
@@ -0,0 +1,59 @@
+"""
+Cheap change watermarks for conditional GET validators.
+
+Each watermark is one aggregate over an index that changes whenever the
+underlying activity does, such as the latest last_activity_at and the
+session count for a student. They are computed before a handler runs,
+so an unchanged dashboard can be answered with 304 Not Modified at the
+cost of that single lookup.
+"""
+from sqlalchemy import func, select
+from src.database import db
+from src.models.student_session import StudentSession
+from src.models.class_group import ClassGroup, ClassMembership
+
+
+class WatermarkService:
+    """Watermark queries used to build ETags."""
+
+    @staticmethod
+    def student_activity(student_id):
+        """
+        Latest practice activity of one student.
+
+        Uses the (student_id, last_activity_at) index. The count moves
+        when a session is added or removed.
+
+        Returns:
+            (latest last_activity_at ISO string or None, session count)
+        """
+        latest, sessions = db.session.query(
+            func.max(StudentSession.last_activity_at),
+            func.count(StudentSession.id)
+        ).filter(StudentSession.student_id == student_id).one()
+        return (latest.isoformat() if latest else None, sessions)
+
+    @staticmethod
+    def teacher_activity(teacher_id):
+        """
+        Latest practice activity across a teacher's classes.
+
+        Each member's latest last_activity_at is a correlated max that the
+        (student_id, last_activity_at) index answers with one seek, so the
+        cost follows the number of memberships rather than their sessions.
+        New sessions and activity move the latest timestamp; other changes
+        bump the teacher tag.
+
+        Returns:
+            (latest last_activity_at ISO string or None, membership count)
+        """
+        member_latest = select(func.max(StudentSession.last_activity_at)).where(
+            StudentSession.student_id == ClassMembership.student_id
+        ).correlate(ClassMembership).scalar_subquery()
+        latest, members = db.session.query(
+            func.max(member_latest),
+            func.count(ClassMembership.id)
+        ).select_from(ClassMembership).join(
+            ClassGroup, ClassGroup.id == ClassMembership.class_id
+        ).filter(ClassGroup.teacher_id == teacher_id).one()
+        return (latest.isoformat() if latest else None, members)
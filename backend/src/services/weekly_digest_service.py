@@ -0,0 +1,144 @@
+"""
+Weekly digest service for bulk parent report generation.
+
+A digest run covers every student with an active parent link, in id
+order and in partitions of PARTITION_SIZE. The parent process loads each
+partition's inputs with ReportService.load_weekly_inputs (a handful of
+set-based queries per partition), and a ProcessPoolExecutor builds the
+reports with ReportService.build_weekly_report, the same code that
+serves live requests. Workers only see plain data, never the database.
+Finished partitions are upserted into report_snapshots in order, and
+each partition is committed together with the run's progress cursor,
+so an interrupted run resumes after the last partition it stored.
+ReportService.generate_weekly_report then serves the stored snapshot.
+"""
+import multiprocessing
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from src.database import db, upsert
+from src.models.parent import ParentChildLink
+from src.models.report_snapshot import ReportSnapshot, DigestRun
+from src.services.report_service import ReportService
+
+
+def _build_partition(partition):
+    """Build one partition's reports; runs in a worker process."""
+    return [(student_id, ReportService.build_weekly_report(inputs)) for student_id, inputs in partition]
+
+
+class WeeklyDigestService:
+    """Service for generating weekly report snapshots in bulk."""
+
+    # Students loaded, built and committed together
+    PARTITION_SIZE = 500
+    # Worker processes (0 builds in this process)
+    WORKERS = int(os.getenv('DIGEST_WORKERS', str(os.cpu_count() or 1)))
+
+    @staticmethod
+    def run(week_offset=1, workers=None, partition_size=None, resume=True, progress=None):
+        """
+        Generate weekly report snapshots for every linked student.
+
+        Args:
+            week_offset: Week to generate (1 is the week that just ended)
+            workers: Worker processes (default WORKERS; 0 builds inline)
+            partition_size: Students per partition (default PARTITION_SIZE)
+            resume: Continue the latest unfinished run for the week
+                instead of starting over
+            progress: Optional callable, called with the DigestRun after
+                each committed partition
+
+        Returns:
+            dict of the finished DigestRun
+        """
+        workers = WeeklyDigestService.WORKERS if workers is None else workers
+        partition_size = partition_size or WeeklyDigestService.PARTITION_SIZE
+        start_date, _ = ReportService._get_date_range('week', week_offset)
+
+        run = None
+        if resume:
+            run = DigestRun.query.filter_by(
+                period='week',
+                period_start=start_date,
+                status='running'
+            ).order_by(DigestRun.id.desc()).first()
+        if run is None:
+            run = DigestRun(period='week', period_start=start_date)
+            db.session.add(run)
+
+        student_ids = WeeklyDigestService._student_ids(after=run.last_student_id)
+        run.total_students = (run.processed_students or 0) + len(student_ids)
+        db.session.commit()
+
+        partitions = [
+            student_ids[start:start + partition_size]
+            for start in range(0, len(student_ids), partition_size)
+        ]
+        for partition, reports in WeeklyDigestService._build(partitions, start_date, workers):
+            generated_at = datetime.utcnow()
+            WeeklyDigestService._store([{
+                'student_id': student_id,
+                'period': 'week',
+                'period_start': start_date,
+                'report': report,
+                'run_id': run.id,
+                'generated_at': generated_at
+            } for student_id, report in reports])
+            run.processed_students += len(partition)
+            run.last_student_id = partition[-1]
+            db.session.commit()
+            if progress:
+                progress(run)
+
+        run.status = 'completed'
+        run.finished_at = datetime.utcnow()
+        db.session.commit()
+        return run.to_dict()
+
+    @staticmethod
+    def _student_ids(after=None):
+        """Ids of students with an active parent link, in id order."""
+        query = db.session.query(ParentChildLink.student_id).filter(
+            ParentChildLink.status == 'active'
+        )
+        if after is not None:
+            query = query.filter(ParentChildLink.student_id > after)
+        return [row[0] for row in query.distinct().order_by(ParentChildLink.student_id).all()]
+
+    @staticmethod
+    def _build(partitions, start_date, workers):
+        """
+        Yield (partition, [(student_id, report), ...]) in partition order.
+
+        The next partitions are loaded while workers build earlier ones;
+        at most two partitions per worker are in flight.
+        """
+        def load(partition):
+            inputs = ReportService.load_weekly_inputs(partition, start_date)
+            return [(student_id, inputs[student_id]) for student_id in partition]
+
+        if not workers:
+            for partition in partitions:
+                yield partition, _build_partition(load(partition))
+            return
+
+        # Spawned workers start clean instead of inheriting the app's
+        # database connections and background threads
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+            pending = deque()
+            for partition in partitions:
+                pending.append((partition, executor.submit(_build_partition, load(partition))))
+                if len(pending) >= workers * 2:
+                    partition, future = pending.popleft()
+                    yield partition, future.result()
+            while pending:
+                partition, future = pending.popleft()
+                yield partition, future.result()
+
+    @staticmethod
+    def _store(values):
+        """Insert or replace report snapshots."""
+        upsert(ReportSnapshot, values, ['student_id', 'period', 'period_start'])
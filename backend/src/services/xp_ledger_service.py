@@ -0,0 +1,399 @@
+"""
+XP ledger service for rollups, compaction and reads over the XP ledger.
+
+Raw XPTransaction rows older than the retention window are folded, one
+day at a time, into per-student daily and weekly XPRollup rows by action
+type and then deleted. Every fold advances the ledger watermark in the
+same transaction, so at any moment XP before the watermark lives only in
+rollups and XP after it only in the raw ledger.
+
+Reads split the requested range at the watermark: the compacted part is
+summed from rollups (whole weeks from weekly rows, ragged edges from
+daily rows) and the rest from raw transactions. The results equal a
+SUM() over the original ledger for ranges on UTC day boundaries; since
+rollups cannot split a day, other bounds that reach into compacted
+history are widened to the whole day there.
+"""
+import os
+from datetime import datetime, date, time, timedelta
+from sqlalchemy import func, or_, and_
+from src.database import db, upsert
+from src.models.gamification import XPTransaction, XPRollup, XPLedgerCompaction
+
+
+def _midnight(day):
+    return datetime.combine(day, time.min)
+
+
+def _week_start(day):
+    """Monday of the week containing day."""
+    return day - timedelta(days=day.weekday())
+
+
+def _as_date(value):
+    """Normalize date() results, which SQLite returns as strings."""
+    if isinstance(value, str):
+        return date.fromisoformat(value)
+    if isinstance(value, datetime):
+        return value.date()
+    return value
+
+
+class XPLedgerService:
+    """Service for compacting the XP ledger and answering XP totals."""
+
+    DAY = 'day'
+    WEEK = 'week'
+    PERIODS = [DAY, WEEK]
+
+    # Raw transactions younger than this are never compacted
+    RETENTION_DAYS = int(os.getenv('XP_LEDGER_RETENTION_DAYS', '90'))
+
+    # ------------------------------------------------------------------
+    # Compaction
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def get_watermark():
+        """Datetime before which the ledger has been compacted, or None."""
+        return db.session.query(func.max(XPLedgerCompaction.compacted_before)).scalar()
+
+    @staticmethod
+    def compact(retention_days=None, max_days=None):
+        """
+        Fold raw transactions older than the retention window into rollups.
+
+        Each day is folded and deleted in its own transaction, so the job
+        can be interrupted and resumed.
+
+        Args:
+            retention_days: Days of raw ledger to keep (default RETENTION_DAYS)
+            max_days: Stop after folding this many days (None for no limit)
+
+        Returns:
+            dict with days folded, transactions folded and the new watermark
+        """
+        if retention_days is None:
+            retention_days = XPLedgerService.RETENTION_DAYS
+        cutoff = _midnight((datetime.utcnow() - timedelta(days=retention_days)).date())
+
+        days = 0
+        folded = 0
+        while max_days is None or days < max_days:
+            oldest = db.session.query(func.min(XPTransaction.created_at)).filter(
+                XPTransaction.created_at < cutoff
+            ).scalar()
+            if oldest is None:
+                break
+            folded += XPLedgerService._fold_day(oldest.date())
+            days += 1
+
+        # Nothing older than the cutoff remains, so the watermark can move up to it
+        watermark = XPLedgerService.get_watermark()
+        if (max_days is None or days < max_days) and (watermark is None or watermark < cutoff):
+            db.session.add(XPLedgerCompaction(compacted_before=cutoff, transactions_folded=0))
+            db.session.commit()
+            watermark = cutoff
+
+        return {'days': days, 'transactions': folded, 'compacted_before': watermark}
+
+    @staticmethod
+    def _fold_day(day):
+        """Fold one day of raw transactions into rollups and delete them."""
+        day_start = _midnight(day)
+        day_end = day_start + timedelta(days=1)
+        in_day = and_(XPTransaction.created_at >= day_start, XPTransaction.created_at < day_end)
+
+        totals = db.session.query(
+            XPTransaction.student_id,
+            XPTransaction.action_type,
+            func.sum(XPTransaction.total_xp),
+            func.count(XPTransaction.id)
+        ).filter(in_day).group_by(XPTransaction.student_id, XPTransaction.action_type).all()
+
+        now = datetime.utcnow()
+        week = _week_start(day)
+        values = []
+        for student_id, action_type, total_xp, count in totals:
+            for period, period_start in ((XPLedgerService.DAY, day), (XPLedgerService.WEEK, week)):
+                values.append({
+                    'student_id': student_id,
+                    'period': period,
+                    'period_start': period_start,
+                    'action_type': action_type,
+                    'total_xp': int(total_xp or 0),
+                    'transaction_count': count,
+                    'updated_at': now
+                })
+
+        if values:
+            XPLedgerService._upsert_rollups(values)
+
+        folded = db.session.query(XPTransaction).filter(in_day).delete(synchronize_session=False)
+        db.session.add(XPLedgerCompaction(compacted_before=day_end, transactions_folded=folded))
+        db.session.commit()
+        return folded
+
+    @staticmethod
+    def _upsert_rollups(values):
+        """Add totals into existing rollup rows, creating missing ones."""
+        upsert(
+            XPRollup, values, ['student_id', 'period', 'period_start', 'action_type'],
+            increment=('total_xp', 'transaction_count')
+        )
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def get_total_xp(student_id, since=None, until=None, action_type=None):
+        """
+        Total XP a student earned in [since, until).
+
+        Equivalent to SUM(total_xp) over the uncompacted ledger. Bounds
+        inside compacted history are widened to whole UTC days.
+        """
+        sums = XPLedgerService._sums((), since, until, student_id=student_id, action_type=action_type)
+        return sums.get((), 0)
+
+    @staticmethod
+    def get_xp_by_action(student_id, since=None, until=None):
+        """
+        XP a student earned in [since, until), keyed by action type.
+
+        Bounds inside compacted history are widened to whole UTC days.
+        """
+        sums = XPLedgerService._sums((XPTransaction.action_type,), since, until, student_id=student_id)
+        return {key[0]: xp for key, xp in sums.items()}
+
+    @staticmethod
+    def get_top_earners(since=None, until=None, limit=10):
+        """
+        Students who earned the most XP in [since, until).
+
+        Bounds inside compacted history are widened to whole UTC days.
+
+        Returns:
+            list of (student_id, xp_earned), highest first
+        """
+        rollup_range, raw_since = XPLedgerService._split(since, until)
+        if rollup_range is None:
+            # Entirely within the raw ledger: let the database sort and limit
+            query = db.session.query(
+                XPTransaction.student_id,
+                func.sum(XPTransaction.total_xp)
+            ).filter(*XPLedgerService._raw_filters(raw_since, until)).group_by(
+                XPTransaction.student_id
+            ).order_by(func.sum(XPTransaction.total_xp).desc())
+            if limit:
+                query = query.limit(limit)
+            return [(student_id, int(xp)) for student_id, xp in query.all()]
+
+        sums = XPLedgerService._sums((XPTransaction.student_id,), since, until)
+        ranked = sorted(((key[0], xp) for key, xp in sums.items()), key=lambda item: item[1], reverse=True)
+        return ranked[:limit] if limit else ranked
+
+    @staticmethod
+    def get_xp_buckets(student_id, period='day', since=None, until=None):
+        """
+        XP a student earned in [since, until), bucketed by day or week.
+
+        Bounds inside compacted history are widened to whole UTC days.
+
+        Returns:
+            list of {'period_start': ISO date, 'total_xp': int}, oldest
+            first, omitting empty buckets
+        """
+        if period not in XPLedgerService.PERIODS:
+            raise ValueError(f"Unknown period '{period}' (expected one of {', '.join(XPLedgerService.PERIODS)})")
+        to_bucket = _week_start if period == XPLedgerService.WEEK else (lambda day: day)
+
+        buckets = {}
+        rollup_range, raw_since = XPLedgerService._split(since, until)
+
+        if rollup_range is not None:
+            if period == XPLedgerService.DAY:
+                coverage = and_(XPRollup.period == XPLedgerService.DAY, *XPLedgerService._date_filters(*rollup_range))
+            else:
+                coverage = XPLedgerService._rollup_coverage(*rollup_range)
+            rows = db.session.query(
+                XPRollup.period_start,
+                func.sum(XPRollup.total_xp)
+            ).filter(
+                XPRollup.student_id == student_id,
+                coverage
+            ).group_by(XPRollup.period_start).all()
+            for period_start, xp in rows:
+                # Weekly rows start on a Monday, so they land in their own bucket
+                bucket = to_bucket(period_start)
+                buckets[bucket] = buckets.get(bucket, 0) + int(xp)
+
+        if until is None or raw_since is None or raw_since < until:
+            day_column = func.date(XPTransaction.created_at)
+            rows = db.session.query(day_column, func.sum(XPTransaction.total_xp)).filter(
+                XPTransaction.student_id == student_id,
+                *XPLedgerService._raw_filters(raw_since, until)
+            ).group_by(day_column).all()
+            for day, xp in rows:
+                bucket = to_bucket(_as_date(day))
+                buckets[bucket] = buckets.get(bucket, 0) + int(xp)
+
+        return [
+            {'period_start': bucket.isoformat(), 'total_xp': xp}
+            for bucket, xp in sorted(buckets.items())
+        ]
+
+    @staticmethod
+    def get_history(student_id, limit=20):
+        """
+        A student's most recent XP entries, newest first.
+
+        Raw transactions are returned as they are. Once the history reaches
+        compacted days, those are filled in from daily rollups: one entry
+        per day and action type, dated at the start of the day, with
+        'compacted' set and the number of transactions it stands for.
+        """
+        transactions = XPTransaction.query.filter_by(student_id=student_id).order_by(
+            XPTransaction.created_at.desc()
+        ).limit(limit).all()
+        history = [t.to_dict() for t in transactions]
+
+        remaining = limit - len(history)
+        if remaining <= 0 or XPLedgerService.get_watermark() is None:
+            return history
+
+        rollups = XPRollup.query.filter_by(
+            student_id=student_id,
+            period=XPLedgerService.DAY
+        ).order_by(
+            XPRollup.period_start.desc(),
+            XPRollup.action_type
+        ).limit(remaining).all()
+        for rollup in rollups:
+            history.append({
+                'id': None,
+                'student_id': rollup.student_id,
+                'action_type': rollup.action_type,
+                'total_xp': rollup.total_xp,
+                'transaction_count': rollup.transaction_count,
+                'compacted': True,
+                'created_at': _midnight(rollup.period_start).isoformat()
+            })
+        return history
+
+    # Internal helpers
+
+    @staticmethod
+    def _split(since, until):
+        """
+        Split [since, until) at the watermark.
+
+        Returns:
+            ((start_date, end_date) or None, raw_since): the compacted day
+            range answered from rollups (start_date None means unbounded)
+            and the lower bound for raw transactions
+        """
+        watermark = XPLedgerService.get_watermark()
+        if watermark is None or (since is not None and since >= watermark):
+            return None, since
+
+        # Rollups cannot split a day, so the compacted part of the range is
+        # widened to whole days: since rounds down and until rounds up
+        start_date = since.date() if since is not None else None
+        end = watermark if until is None or until >= watermark else until
+        end_date = end.date()
+        if end != _midnight(end_date):
+            end_date = min(end_date + timedelta(days=1), watermark.date())
+
+        if start_date is not None and start_date >= end_date:
+            return None, since
+        return (start_date, end_date), watermark
+
+    @staticmethod
+    def _date_filters(start_date, end_date):
+        filters = [XPRollup.period_start < end_date]
+        if start_date is not None:
+            filters.append(XPRollup.period_start >= start_date)
+        return filters
+
+    @staticmethod
+    def _rollup_coverage(start_date, end_date):
+        """
+        Rollup rows that exactly cover [start_date, end_date).
+
+        Whole weeks come from weekly rows; the days before the first and
+        after the last whole week come from daily rows.
+        """
+        first_week = None
+        if start_date is not None:
+            first_week = _week_start(start_date)
+            if first_week < start_date:
+                first_week += timedelta(days=7)
+        last_week_end = _week_start(end_date)
+
+        if first_week is not None and first_week >= last_week_end:
+            return and_(XPRollup.period == XPLedgerService.DAY, *XPLedgerService._date_filters(start_date, end_date))
+
+        parts = [
+            and_(XPRollup.period == XPLedgerService.WEEK, *XPLedgerService._date_filters(first_week, last_week_end)),
+            and_(XPRollup.period == XPLedgerService.DAY, *XPLedgerService._date_filters(last_week_end, end_date)),
+        ]
+        if first_week is not None:
+            parts.append(and_(XPRollup.period == XPLedgerService.DAY, *XPLedgerService._date_filters(start_date, first_week)))
+        return or_(*parts)
+
+    @staticmethod
+    def _raw_filters(since, until):
+        filters = []
+        if since is not None:
+            filters.append(XPTransaction.created_at >= since)
+        if until is not None:
+            filters.append(XPTransaction.created_at < until)
+        return filters
+
+    @staticmethod
+    def _sums(keys, since, until, student_id=None, action_type=None):
+        """
+        SUM(total_xp) over [since, until) grouped by keys.
+
+        Args:
+            keys: XPTransaction columns to group by (student_id and/or action_type)
+
+        Returns:
+            dict mapping key tuples to XP
+        """
+        sums = {}
+        rollup_range, raw_since = XPLedgerService._split(since, until)
+
+        if rollup_range is not None:
+            rollup_keys = [getattr(XPRollup, column.key) for column in keys]
+            query = db.session.query(*rollup_keys, func.sum(XPRollup.total_xp)).filter(
+                XPLedgerService._rollup_coverage(*rollup_range)
+            )
+            if student_id is not None:
+                query = query.filter(XPRollup.student_id == student_id)
+            if action_type is not None:
+                query = query.filter(XPRollup.action_type == action_type)
+            if rollup_keys:
+                query = query.group_by(*rollup_keys)
+            for row in query.all():
+                if row[-1] is not None:
+                    sums[tuple(row[:-1])] = int(row[-1])
+
+        if until is None or raw_since is None or raw_since < until:
+            query = db.session.query(*keys, func.sum(XPTransaction.total_xp)).filter(
+                *XPLedgerService._raw_filters(raw_since, until)
+            )
+            if student_id is not None:
+                query = query.filter(XPTransaction.student_id == student_id)
+            if action_type is not None:
+                query = query.filter(XPTransaction.action_type == action_type)
+            if keys:
+                query = query.group_by(*keys)
+            for row in query.all():
+                if row[-1] is not None:
+                    key = tuple(row[:-1])
+                    sums[key] = sums.get(key, 0) + int(row[-1])
+
+        return sums
@@ -0,0 +1,135 @@
+"""
+Test script for cached achievement snapshots.
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from src.main import app
+from src.database import db
+from src.models.user import User
+from src.models.student import Student
+from src.models.gamification import StudentProgress, XPTransaction
+from src.models.achievement import Achievement, StudentAchievement, AchievementProgressLog
+from src.services.achievement_service import AchievementService
+from src.services.achievement_snapshot_service import AchievementSnapshotService
+from src.services.cache_tags import CacheTags
+from testing_utils import count_statements
+
+
+def _cleanup():
+    """Remove test users and their data."""
+    for user in User.query.filter(User.username.like('snapshot_test_%')).all():
+        if user.student:
+            AchievementProgressLog.query.filter_by(student_id=user.student.id).delete()
+            StudentAchievement.query.filter_by(student_id=user.student.id).delete()
+            XPTransaction.query.filter_by(student_id=user.student.id).delete()
+            StudentProgress.query.filter_by(student_id=user.student.id).delete()
+            AchievementSnapshotService.invalidate(user.student.id)
+            db.session.delete(user.student)
+        db.session.delete(user)
+    db.session.commit()
+
+
+def test_achievement_snapshot():
+    """Test snapshot queries, caching and invalidation."""
+    with app.app_context():
+        print("Testing Achievement Snapshots...")
+        print("=" * 60)
+
+        _cleanup()
+        AchievementService.seed_achievements()
+
+        user = User(username='snapshot_test_user', email='snapshot_test@test.com')
+        user.set_password('test123')
+        db.session.add(user)
+        db.session.flush()
+        student = Student(user_id=user.id, name='Snapshot Student', grade=5)
+        db.session.add(student)
+        db.session.commit()
+        student_id = student.id
+        print(f"✓ Created test student (ID: {student_id})")
+
+        # Test 1: A cold view costs the catalogue plus one query
+        print("\nTest 1: Cold snapshot")
+        AchievementSnapshotService.reset()
+        achievements, statements = count_statements(lambda: AchievementService.get_student_achievements(student_id))
+        active = Achievement.query.filter_by(is_active=True).count()
+        assert len(achievements) == active, "Every active achievement should be listed"
+        assert statements <= 2, f"Cold view should need at most 2 queries, ran {statements}"
+        print(f"  ✓ {len(achievements)} achievements in {statements} queries")
+
+        # Test 2: Warm views hit no database
+        print("\nTest 2: Warm snapshot")
+        _, statements = count_statements(lambda: (
+            AchievementService.get_student_achievements(student_id, category='practice'),
+            AchievementService.get_in_progress_achievements(student_id),
+            AchievementService.get_achievement_stats(student_id)
+        ))
+        assert statements == 0, "Cached views should not query"
+        print("  ✓ Page served from memory")
+
+        # Test 3: Progress changes invalidate on commit
+        print("\nTest 3: Invalidation")
+        for _ in range(10):
+            AchievementService.track_action(student_id, 'question_complete', {'first_try': False, 'time_taken': 40})
+        first_steps = Achievement.query.filter_by(name='First Steps').first()
+        unlocked = AchievementService.get_unlocked_achievements(student_id)
+        assert first_steps.id in [a['achievement_id'] for a in unlocked], "Unlock should be visible immediately"
+        in_progress = AchievementService.get_in_progress_achievements(student_id)
+        percentages = [a['progress_percentage'] for a in in_progress]
+        assert percentages == sorted(percentages, reverse=True), "In-progress should be sorted descending"
+        assert all(not a['is_unlocked'] for a in in_progress), "In-progress excludes unlocked"
+        print("  ✓ Snapshot rebuilt after commit")
+
+        # Test 4: Snapshot entries match the ORM serialization
+        print("\nTest 4: Shape matches to_dict()")
+        sa = StudentAchievement.query.filter_by(student_id=student_id, achievement_id=first_steps.id).first()
+        entry = next(a for a in AchievementService.get_student_achievements(student_id) if a['achievement_id'] == first_steps.id)
+        assert entry == sa.to_dict(), "Snapshot entry should equal StudentAchievement.to_dict()"
+
+        AchievementService.toggle_display(student_id, first_steps.id)
+        stats = AchievementService.get_achievement_stats(student_id)
+        assert stats['displayed_count'] == 1, "Display toggle should invalidate"
+        assert stats['unlocked_count'] == 1, "One achievement unlocked"
+        print("  ✓ Entries and stats match")
+
+        # Test 5: Another worker's commit is caught by the student tag
+        print("\nTest 5: Cross-worker invalidation")
+        AchievementService.get_student_achievements(student_id)
+        CacheTags.bump([CacheTags.student(student_id)])
+        _, statements = count_statements(lambda: AchievementService.get_student_achievements(student_id))
+        assert statements == 1, f"Bumped student tag should rebuild the snapshot, ran {statements}"
+        _, statements = count_statements(lambda: AchievementService.get_student_achievements(student_id))
+        assert statements == 0, "Rebuilt snapshot should be cached again"
+        print("  ✓ Snapshot rebuilt after a tag bump")
+
+        # Test 6: Retired achievements stay in progress views
+        print("\nTest 6: Retired achievements")
+        first_steps.is_active = False
+        db.session.commit()
+        try:
+            listed = [a['achievement_id'] for a in AchievementService.get_student_achievements(student_id)]
+            assert first_steps.id not in listed, "Catalogue view lists active achievements only"
+            displayed = [a['achievement_id'] for a in AchievementService.get_displayed_achievements(student_id)]
+            assert displayed == [first_steps.id], "Displayed view keeps retired achievements"
+            stats = AchievementService.get_achievement_stats(student_id)
+            assert stats['total_achievements'] == active - 1, "Total counts active achievements"
+            assert stats['unlocked_count'] == 1, "Unlocked count keeps retired achievements"
+        finally:
+            first_steps.is_active = True
+            db.session.commit()
+        print("  ✓ Retired achievements kept in displayed and stats views")
+
+        # Clean up
+        print("\nCleaning up test data...")
+        _cleanup()
+        print("✓ Test data cleaned up")
+
+        print("\n" + "=" * 60)
+        print("All tests passed! ✅")
+        print("=" * 60)
+
+
+if __name__ == '__main__':
+    test_achievement_snapshot()
@@ -24,6 +24,7 @@ from src.models.class_group import ClassGroup  # Import before Assignment
 from src.models.assignment_model import Assignment
 from src.models.admin_models import AuditLog, SystemSetting
 from src.services.admin_service import AdminService
+from src.services.platform_metrics_service import PlatformMetricsService
 from src.services.user_management_service import UserManagementService
 from src.services.content_management_service import ContentManagementService
 from src.services.settings_audit_service import SettingsService, AuditService
@@ -71,6 +72,9 @@ def test_admin_dashboard():
         
         admin_id = setup_test_data()
         
+        # Metrics are computed by the scheduled job, never by requests
+        PlatformMetricsService.refresh()
+        
         # Test 1: Get platform metrics
         print("[Test 1] Getting platform metrics...")
         result, status = AdminService.get_platform_metrics()
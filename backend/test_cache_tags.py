@@ -0,0 +1,185 @@
+"""
+Test script for commit-driven cache tag invalidation.
+"""
+import sys
+import os
+import tempfile
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from flask_jwt_extended import create_access_token
+from src.main import app
+from src.database import db
+from src.models.user import User
+from src.models.student import Student
+from src.models.gamification import StudentProgress
+from src.models.class_group import ClassGroup, ClassMembership
+from src.models.leaderboard import LeaderboardRank
+from src.services.cache_tags import CacheTags
+from src.services.class_service import ClassService
+from src.services.leaderboard_table_service import LeaderboardTableService
+from src.services.response_cache import ResponseCache, MemoryBackend, SQLiteBackend
+
+
+def _cleanup():
+    """Remove test users, classes and their data."""
+    users = User.query.filter(User.username.like('cache_tags_test_%')).all()
+    for class_group in ClassGroup.query.filter(ClassGroup.teacher_id.in_([u.id for u in users])).all():
+        ClassMembership.query.filter_by(class_id=class_group.id).delete()
+        db.session.delete(class_group)
+    for user in users:
+        if user.student:
+            LeaderboardRank.query.filter_by(student_id=user.student.id).delete()
+            StudentProgress.query.filter_by(student_id=user.student.id).delete()
+            db.session.delete(user.student)
+        db.session.delete(user)
+    db.session.commit()
+    ResponseCache.configure(MemoryBackend())
+    ClassService.invalidate()
+
+
+def _create_user(name, role='student'):
+    user = User(username=f'cache_tags_test_{name}', email=f'cache_tags_test_{name}@test.com', role=role)
+    user.set_password('test123')
+    db.session.add(user)
+    db.session.flush()
+    return user
+
+
+def test_cache_tags():
+    """Test tag mapping, commit/rollback handling and endpoint invalidation."""
+    with app.app_context():
+        print("Testing Cache Tags...")
+        print("=" * 60)
+
+        _cleanup()
+        teacher = _create_user('teacher', role='teacher')
+        students = []
+        for i in range(3):
+            user = _create_user(f'student_{i}')
+            student = Student(user_id=user.id, name=f'Tag Student {i}', grade=6)
+            db.session.add(student)
+            db.session.flush()
+            db.session.add(StudentProgress(student_id=student.id, total_xp=100 * i, current_level=1))
+            students.append((user, student))
+        class_group = ClassService.create_class(teacher.id, 'Cache Tags Class', '', 6)
+        for _, student in students[:2]:
+            db.session.add(ClassMembership(class_id=class_group.id, student_id=student.id, role='student'))
+        db.session.commit()
+        member, outsider = students[0][1], students[2][1]
+        print("✓ Created a class of 2 students and 1 student outside it")
+
+        # Test 1: A member's XP change bumps the student, class and teacher
+        print("\nTest 1: Tag mapping")
+        tags = [
+            CacheTags.student(member.id), CacheTags.class_(class_group.id),
+            CacheTags.teacher(teacher.id), CacheTags.student(outsider.id)
+        ]
+        before = CacheTags.versions(tags)
+        progress = StudentProgress.query.filter_by(student_id=member.id).first()
+        progress.total_xp += 50
+        db.session.flush()
+        assert CacheTags.is_current(before), "Nothing is bumped before the commit"
+        db.session.commit()
+        after = CacheTags.versions(tags)
+        changed = {tag for tag in tags if before[tag] != after[tag]}
+        assert changed == set(tags[:3]), f"Unexpected tags bumped: {changed}"
+        print(f"  ✓ Bumped {', '.join(sorted(changed))}")
+
+        # Test 2: Rolled back changes bump nothing
+        print("\nTest 2: Rollback")
+        before = CacheTags.versions(tags)
+        progress.total_xp += 50
+        db.session.flush()
+        CacheTags.queue(CacheTags.SKILL_CATALOG)
+        db.session.rollback()
+        assert 'cache_tags' not in db.session.info, "Queued tags dropped with the transaction"
+        assert CacheTags.is_current(before), "Rollback should keep every version"
+        print("  ✓ No versions changed")
+
+        # Test 3: Cached endpoints are never stale after a commit
+        print("\nTest 3: Endpoint invalidation")
+        client = app.test_client()
+        headers = {'Authorization': f'Bearer {create_access_token(identity=str(students[0][0].id))}'}
+        url = f'/api/classes/{class_group.id}/leaderboard'
+        first = client.get(url, headers=headers)
+        cached = client.get(url, headers=headers)
+        assert first.status_code == 200, first.get_json()
+        assert cached.headers['X-Cache'] == 'HIT', "Second read served from cache"
+
+        progress = StudentProgress.query.filter_by(student_id=member.id).first()
+        progress.total_xp += 1000
+        db.session.commit()
+        fresh = client.get(url, headers=headers)
+        assert fresh.headers['X-Cache'] == 'MISS', "Commit should invalidate the class leaderboard"
+        xp = {row['id']: row['xp'] for row in fresh.get_json()['leaderboard']}
+        assert xp[member.id] == progress.total_xp, "Fresh response shows the new XP"
+
+        outsider_progress = StudentProgress.query.filter_by(student_id=outsider.id).first()
+        outsider_progress.total_xp += 1000
+        db.session.commit()
+        assert client.get(url, headers=headers).headers['X-Cache'] == 'HIT', "Other students don't touch the class"
+        stats = ResponseCache.stats()['namespaces']['class_leaderboard']
+        assert stats['stale'] == 1, stats
+        print("  ✓ Stale after a member's change only")
+
+        # Test 4: Board tags are bumped whenever a shown score or level changes
+        print("\nTest 4: Leaderboard tags")
+        grade = 99  # a board of the three test students only
+        for xp, (_, student) in zip((100, 200, 300), students):
+            LeaderboardTableService.record_xp(student.id, xp, grade=grade)
+        db.session.commit()
+        board = [CacheTags.leaderboard(LeaderboardTableService.GRADE_XP, grade)]
+        versions = CacheTags.versions(board)
+        LeaderboardTableService.record_xp(member.id, 100, grade=grade)
+        db.session.commit()
+        assert CacheTags.is_current(versions), "An unchanged score keeps the pages"
+        LeaderboardTableService.record_xp(member.id, 150, grade=grade)
+        db.session.commit()
+        assert not CacheTags.is_current(versions), "A score change between the same neighbours bumps the board"
+        versions = CacheTags.versions(board)
+        LeaderboardTableService.record_xp(member.id, 150, grade=grade, level_changed=True)
+        db.session.commit()
+        assert not CacheTags.is_current(versions), "A level change bumps the board"
+
+        backend = CacheTags._backend()
+        writes = []
+        set_many = backend.set_many
+        backend.set_many = lambda items, ttl: writes.append(len(items)) or set_many(items, ttl)
+        for _, student in students:
+            StudentProgress.query.filter_by(student_id=student.id).first().total_xp += 1
+        db.session.commit()
+        del backend.set_many
+        assert len(writes) == 1 and writes[0] >= 5, "One backend write per commit"
+        print("  ✓ Bumped on score and level changes, one write per commit")
+
+        # Test 5: Versions are shared by workers using the same backend file
+        print("\nTest 5: Cross-worker invalidation")
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'cache.db')
+            ResponseCache.configure(SQLiteBackend(path))
+            roster = ClassService.get_class_members(class_group.id)
+            versions = CacheTags.versions([CacheTags.class_(class_group.id)])
+
+            # Another worker: its own connection to the file
+            ResponseCache.configure(SQLiteBackend(path))
+            db.session.add(ClassMembership(class_id=class_group.id, student_id=outsider.id, role='student'))
+            db.session.commit()
+
+            ResponseCache.configure(SQLiteBackend(path))
+            assert not CacheTags.is_current(versions), "The other worker's commit is visible"
+            assert len(ClassService.get_class_members(class_group.id)) == len(roster) + 1, \
+                "A roster cached before the commit is reloaded"
+        print("  ✓ Commits in one worker invalidate caches in another")
+
+        # Clean up
+        print("\nCleaning up test data...")
+        _cleanup()
+        print("✓ Test data cleaned up")
+
+        print("\n" + "=" * 60)
+        print("All tests passed! ✅")
+        print("=" * 60)
+
+
+if __name__ == '__main__':
+    test_cache_tags()
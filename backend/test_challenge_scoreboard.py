@@ -0,0 +1,137 @@
+"""
+Test script for shared challenge scoreboards ranked at read time.
+"""
+import sys
+import os
+import random
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from src.main import app
+from src.database import db
+from src.models.user import User
+from src.models.student import Student
+from src.models.gamification import StudentProgress, XPTransaction
+from src.models.shared_challenge import SharedChallenge, ChallengeParticipant
+from src.services.shared_challenge_service import SharedChallengeService
+from testing_utils import record_statements
+
+
+def _cleanup():
+    """Remove test users and their data."""
+    users = User.query.filter(User.username.like('scoreboard_test_%')).all()
+    student_ids = [u.student.id for u in users if u.student]
+    for challenge in SharedChallenge.query.filter(SharedChallenge.creator_id.in_(student_ids)).all():
+        db.session.delete(challenge)
+    for user in users:
+        if user.student:
+            XPTransaction.query.filter_by(student_id=user.student.id).delete()
+            StudentProgress.query.filter_by(student_id=user.student.id).delete()
+            db.session.delete(user.student)
+        db.session.delete(user)
+    db.session.commit()
+
+
+def _expected_order(challenge_id):
+    """The original Python sort over every participant."""
+    participants = ChallengeParticipant.query.filter_by(challenge_id=challenge_id).order_by(ChallengeParticipant.id).all()
+    participants.sort(key=lambda p: (not p.completed, -p.accuracy, -p.questions_answered))
+    return [p.student_id for p in participants]
+
+
+def _scoreboard_order(challenge_id):
+    """Participants in the order the scoreboard read returns them."""
+    result, _ = SharedChallengeService.get_challenge_leaderboard(challenge_id)
+    ranks = [entry.get('rank') for entry in result['leaderboard']]
+    if result['challenge']['status'] != 'completed':
+        assert ranks == list(range(1, len(ranks) + 1)), "Ranks should be contiguous"
+    return [entry['student_id'] for entry in result['leaderboard']]
+
+
+def test_challenge_scoreboard():
+    """Test scoreboard order, version polling and settlement."""
+    with app.app_context():
+        print("Testing Shared Challenge Scoreboard...")
+        print("=" * 60)
+
+        _cleanup()
+        rng = random.Random(11)
+
+        student_ids = []
+        for i in range(12):
+            user = User(username=f'scoreboard_test_{i}', email=f'scoreboard_test_{i}@test.com')
+            user.set_password('test123')
+            db.session.add(user)
+            db.session.flush()
+            student = Student(user_id=user.id, name=f'Scoreboard Student {i}', grade=6)
+            db.session.add(student)
+            db.session.flush()
+            student_ids.append(student.id)
+        db.session.commit()
+
+        result, status = SharedChallengeService.create_challenge(student_ids[0], {
+            'title': 'Scoreboard Test',
+            'challenge_type': 'friend',
+            'participant_ids': student_ids[1:],
+            'skill_id': 1,
+            'target_questions': 6,
+            'target_accuracy': 0.6
+        })
+        assert status == 201, result
+        challenge_id = result['challenge']['id']
+        for student_id in student_ids[1:]:
+            SharedChallengeService.accept_challenge(challenge_id, student_id)
+        print(f"✓ Created challenge with {len(student_ids)} participants")
+
+        # Test 1: Read order matches the original sort after every answer
+        print("\nTest 1: Scoreboard order")
+        assert _scoreboard_order(challenge_id) == _expected_order(challenge_id), "Initial order by id"
+        for _ in range(150):
+            student_id = rng.choice(student_ids)
+            _, statements = record_statements(
+                lambda: SharedChallengeService.update_progress(challenge_id, student_id, {'correct': rng.random() < 0.7})
+            )
+            participant_writes = [s for s in statements if s.startswith('UPDATE challenge_participants')]
+            assert len(participant_writes) <= 1, "An answer writes only the participant's own row"
+            assert _scoreboard_order(challenge_id) == _expected_order(challenge_id), "Scoreboard differs from sort"
+        print("  ✓ 150 answers, scoreboard matches a full sort each time")
+
+        # Test 2: Reads return the top k and honour the version
+        print("\nTest 2: Reads and polling")
+        result, _ = SharedChallengeService.get_challenge_leaderboard(challenge_id, limit=5)
+        assert [e['student_id'] for e in result['leaderboard']] == _expected_order(challenge_id)[:5], "Top 5"
+        assert [e['rank'] for e in result['leaderboard']] == [1, 2, 3, 4, 5], "Live ranks follow the read order"
+        version = result['version']
+        unchanged, _ = SharedChallengeService.get_challenge_leaderboard(challenge_id, since_version=version)
+        assert unchanged['changed'] is False and 'leaderboard' not in unchanged, "Unchanged poll is cheap"
+        SharedChallengeService.update_progress(challenge_id, student_ids[3], {'correct': True})
+        changed, _ = SharedChallengeService.get_challenge_leaderboard(challenge_id, since_version=version)
+        assert changed['changed'] is True and changed['version'] > version, "Answer bumps the version"
+        print("  ✓ Top-k read, unchanged and changed polls")
+
+        # Test 3: Completion settles final ranks
+        print("\nTest 3: Settle final ranks")
+        expected = _expected_order(challenge_id)
+        result, status = SharedChallengeService.complete_challenge(challenge_id)
+        assert status == 200, result
+        db.session.expire_all()
+        ranks = dict(db.session.query(ChallengeParticipant.student_id, ChallengeParticipant.rank).filter_by(
+            challenge_id=challenge_id
+        ).all())
+        assert [ranks[student_id] for student_id in expected] == list(range(1, len(expected) + 1)), \
+            "Final ranks follow the scoreboard"
+        print("  ✓ Final ranks written")
+
+        assert _scoreboard_order(challenge_id) == expected, "Completed challenges keep their order"
+
+        # Clean up
+        print("\nCleaning up test data...")
+        _cleanup()
+        print("✓ Test data cleaned up")
+
+        print("\n" + "=" * 60)
+        print("All tests passed! ✅")
+        print("=" * 60)
+
+
+if __name__ == '__main__':
+    test_challenge_scoreboard()
@@ -257,6 +257,7 @@ def run_tests():
                 print(f"  - Skills mastered: {metrics['skills_mastered']}/{metrics['total_skills']}")
                 print(f"  - Streak: {metrics['current_streak']} days")
                 print(f"  - Assignments: {metrics['assignments_completed']}/{metrics['total_assignments']}")
+                print(f"  - Last practice: {result['quick_stats']['last_practice']}")
             else:
                 print(f"✗ Error: {result.get('error')}")
         except Exception as e:
@@ -0,0 +1,209 @@
+"""
+Test script for the vectorized class analytics engine.
+
+Also prints a small benchmark of SQL statements per class report for
+growing class sizes; the count should not depend on the number of members.
+"""
+import sys
+import os
+import random
+from datetime import datetime, timedelta
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from src.main import app
+from src.database import db
+from src.models.user import User
+from src.models.student import Student
+from src.models.student_session import StudentSession
+from src.models.learning_path import LearningPath
+from src.models.assessment import Skill
+from src.models.class_group import ClassGroup, ClassMembership
+from src.services.analytics_service import AnalyticsService
+from src.services.class_service import ClassService
+from testing_utils import count_statements
+
+CLASS_SIZES = [10, 60]
+
+
+def _cleanup():
+    """Remove test users, classes and their data."""
+    users = User.query.filter(User.username.like('class_analytics_test_%')).all()
+    for class_group in ClassGroup.query.filter(ClassGroup.teacher_id.in_([u.id for u in users])).all():
+        db.session.delete(class_group)
+    for user in users:
+        if user.student:
+            StudentSession.query.filter_by(student_id=user.student.id).delete()
+            LearningPath.query.filter_by(student_id=user.student.id).delete()
+            db.session.delete(user.student)
+        db.session.delete(user)
+    db.session.commit()
+    ClassService.invalidate()
+
+
+def _create_class(teacher, size, offset, skills, rng):
+    """Create a class whose students have paths and recent sessions."""
+    class_group = ClassService.create_class(teacher.id, f'Analytics Test {size}', '', 6)
+    now = datetime.utcnow()
+    for i in range(size):
+        user = User(username=f'class_analytics_test_s{offset + i}', email=f'class_analytics_test_s{offset + i}@test.com')
+        user.set_password('test123')
+        db.session.add(user)
+        db.session.flush()
+        student = Student(user_id=user.id, name=f'Analytics Student {offset + i}', grade=6)
+        db.session.add(student)
+        db.session.flush()
+        db.session.add(ClassMembership(class_id=class_group.id, student_id=student.id, role='student'))
+
+        # Every fifth student has no paths yet
+        if i % 5 != 4:
+            for skill in rng.sample(skills, rng.randint(1, len(skills))):
+                db.session.add(LearningPath(
+                    student_id=student.id,
+                    skill_id=skill.id,
+                    current_accuracy=rng.choice([0.55, 0.7, 0.75, 0.8, 0.85, 0.9, 0.95])
+                ))
+        for _ in range(rng.randint(0, 6)):
+            started_at = now - timedelta(days=rng.randint(0, 40), minutes=rng.randint(0, 600))
+            answered = rng.randint(0, 20)
+            db.session.add(StudentSession(
+                student_id=student.id,
+                skill_id=rng.choice(skills).id,
+                started_at=started_at,
+                last_activity_at=started_at,
+                ended_at=started_at + timedelta(minutes=rng.randint(1, 45)) if rng.random() < 0.8 else None,
+                questions_answered=answered,
+                questions_correct=rng.randint(0, answered),
+                is_active=False
+            ))
+    db.session.commit()
+    return class_group
+
+
+def _reference_accuracies(student_ids):
+    """The original per-student mean path accuracy, students with paths only."""
+    accuracies = {}
+    for student_id in student_ids:
+        paths = LearningPath.query.filter_by(student_id=student_id).all()
+        if paths:
+            accuracies[student_id] = sum(p.current_accuracy for p in paths) / len(paths)
+    return accuracies
+
+
+def _reference_trend(student_ids, days):
+    """The original per-day bucketing of raw sessions."""
+    start_date = datetime.utcnow() - timedelta(days=days)
+    sessions = StudentSession.query.filter(
+        StudentSession.student_id.in_(student_ids),
+        StudentSession.started_at >= start_date
+    ).all()
+    daily = {}
+    for s in sessions:
+        data = daily.setdefault(s.started_at.date().isoformat(), {'q': 0, 'c': 0, 't': 0, 'n': 0, 'students': set()})
+        data['q'] += s.questions_answered
+        data['c'] += s.questions_correct
+        data['n'] += 1
+        data['students'].add(s.student_id)
+        if s.ended_at:
+            data['t'] += (s.ended_at - s.started_at).total_seconds()
+    return [{
+        'date': day,
+        'accuracy': round(data['c'] / data['q'] if data['q'] > 0 else 0, 2),
+        'questions': data['q'],
+        'time_hours': round(data['t'] / 3600, 1),
+        'sessions': data['n'],
+        'active_students': len(data['students'])
+    } for day, data in sorted(daily.items())]
+
+
+def test_class_analytics():
+    """Test report contents against the per-student computation and query counts."""
+    with app.app_context():
+        print("Testing Class Analytics Engine...")
+        print("=" * 60)
+
+        _cleanup()
+        skills = Skill.query.limit(5).all()
+        assert skills, "Seed skills before running this test"
+        rng = random.Random(11)
+
+        teacher = User(username='class_analytics_test_teacher', email='class_analytics_test_teacher@test.com', role='teacher')
+        teacher.set_password('test123')
+        db.session.add(teacher)
+        db.session.commit()
+
+        classes = []
+        offset = 0
+        for size in CLASS_SIZES:
+            classes.append(_create_class(teacher, size, offset, skills, rng))
+            offset += size
+        print(f"✓ Created classes of {', '.join(str(s) for s in CLASS_SIZES)} students")
+
+        # Test 1: Query count is constant in class size
+        print("\nTest 1: Statements per class report")
+        counts = []
+        for size, class_group in zip(CLASS_SIZES, classes):
+            _, statements = count_statements(lambda: AnalyticsService.get_class_performance_report(class_group.id, 30))
+            counts.append(statements)
+            print(f"  {size:>8} students: {statements} statements")
+        assert len(set(counts)) == 1, "Statement count should not grow with class size"
+        print("  ✓ Constant number of queries")
+
+        # Test 2: Results match the per-student computation
+        print("\nTest 2: Report values")
+        class_group = classes[1]
+        student_ids = [m.student_id for m in ClassMembership.query.filter_by(class_id=class_group.id).all()]
+        report = AnalyticsService.get_class_performance_report(class_group.id, 30)
+        accuracies = _reference_accuracies(student_ids)
+        values = list(accuracies.values())
+
+        assert report['distribution'] == {
+            'excellent': sum(1 for a in values if a >= 0.9),
+            'good': sum(1 for a in values if 0.8 <= a < 0.9),
+            'fair': sum(1 for a in values if 0.7 <= a < 0.8),
+            'needs_improvement': sum(1 for a in values if a < 0.7)
+        }, "Distribution should match"
+        rankings = sorted([{
+            'student_id': sid,
+            'accuracy': round(accuracies.get(sid, 0), 2)
+        } for sid in student_ids], key=lambda x: x['accuracy'], reverse=True)
+        assert [(r['student_id'], r['accuracy']) for r in report['top_performers']] == \
+            [(r['student_id'], r['accuracy']) for r in rankings[:5]], "Top performers should match"
+        assert len(report['struggling_students']) == sum(1 for r in rankings if r['accuracy'] < 0.7), \
+            "Struggling students should match"
+        assert report['trends'] == _reference_trend(student_ids, 30), "Daily trend should match"
+        print("  ✓ Distribution, rankings and trends match")
+
+        # Test 3: Skill heatmap and comparison
+        print("\nTest 3: Heatmap and comparison")
+        heatmap = report['skill_heatmap']
+        assert [h['avg_accuracy'] for h in heatmap] == sorted(h['avg_accuracy'] for h in heatmap), \
+            "Struggling skills first"
+        for entry in heatmap:
+            paths = LearningPath.query.filter(
+                LearningPath.student_id.in_(student_ids),
+                LearningPath.skill_id == entry['skill_id']
+            ).all()
+            assert entry['student_count'] == len(paths), "Skill student count should match"
+            assert entry['avg_accuracy'] == round(sum(p.current_accuracy for p in paths) / len(paths), 2), \
+                "Skill average should match"
+
+        student_id = next(iter(accuracies))
+        comparison = AnalyticsService.get_student_comparison(student_id)
+        below = sum(1 for a in values if a < accuracies[student_id])
+        assert comparison['rank'] == below + 1, "Rank should match"
+        assert comparison['total_students'] == len(values), "Only students with paths are compared"
+        assert comparison['class_average'] == round(sum(values) / len(values), 2), "Class average should match"
+        print("  ✓ Heatmap and comparison match")
+
+        # Clean up
+        print("\nCleaning up test data...")
+        _cleanup()
+        print("✓ Test data cleaned up")
+
+        print("\n" + "=" * 60)
+        print("All tests passed! ✅")
+        print("=" * 60)
+
+
+if __name__ == '__main__':
+    test_class_analytics()
@@ -0,0 +1,140 @@
+"""
+Test script for class roster queries and caching.
+
+Also prints a small benchmark of SQL statements per call for growing
+class sizes; the count should not depend on the number of members.
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from src.main import app
+from src.database import db
+from src.models.user import User
+from src.models.student import Student
+from src.models.gamification import StudentProgress, XPTransaction
+from src.models.class_group import ClassGroup, ClassMembership
+from src.services.class_service import ClassService
+from src.services.gamification_service import GamificationService
+from testing_utils import count_statements
+
+CLASS_SIZES = [5, 20, 60]
+
+
+def _cleanup():
+    """Remove test users, classes and their data."""
+    users = User.query.filter(User.username.like('roster_test_%')).all()
+    for class_group in ClassGroup.query.filter(ClassGroup.teacher_id.in_([u.id for u in users])).all():
+        db.session.delete(class_group)
+    for user in users:
+        if user.student:
+            XPTransaction.query.filter_by(student_id=user.student.id).delete()
+            StudentProgress.query.filter_by(student_id=user.student.id).delete()
+            db.session.delete(user.student)
+        db.session.delete(user)
+    db.session.commit()
+    ClassService.invalidate()
+
+
+def _create_class(teacher, size, offset):
+    """Create a class with `size` students who each have some XP."""
+    class_group = ClassService.create_class(teacher.id, f'Roster Test {size}', '', 6)
+    for i in range(size):
+        user = User(username=f'roster_test_s{offset + i}', email=f'roster_test_s{offset + i}@test.com')
+        user.set_password('test123')
+        db.session.add(user)
+        db.session.flush()
+        student = Student(user_id=user.id, name=f'Roster Student {offset + i}', grade=6)
+        db.session.add(student)
+        db.session.flush()
+        db.session.add(StudentProgress(student_id=student.id, total_xp=(i * 37) % 500, current_level=1 + i % 4))
+        db.session.add(ClassMembership(class_id=class_group.id, student_id=student.id, role='student'))
+    db.session.commit()
+    return class_group
+
+
+def test_class_roster():
+    """Test roster contents, query counts and invalidation."""
+    with app.app_context():
+        print("Testing Class Rosters...")
+        print("=" * 60)
+
+        _cleanup()
+        teacher = User(username='roster_test_teacher', email='roster_test_teacher@test.com', role='teacher')
+        teacher.set_password('test123')
+        db.session.add(teacher)
+        db.session.commit()
+
+        classes = []
+        offset = 0
+        for size in CLASS_SIZES:
+            classes.append(_create_class(teacher, size, offset))
+            offset += size
+        print(f"✓ Created classes of {', '.join(str(s) for s in CLASS_SIZES)} students")
+
+        # Test 1: Query count is constant in class size
+        print("\nTest 1: Statements per call (cold cache)")
+        print(f"  {'members':>8} {'members()':>10} {'leaderboard()':>14} {'stats()':>8}")
+        counts = []
+        class_ids = [class_group.id for class_group in classes]
+        for size, class_id in zip(CLASS_SIZES, class_ids):
+            row = []
+            for call in (ClassService.get_class_members, ClassService.get_class_leaderboard, ClassService.get_class_stats):
+                ClassService.invalidate()
+                _, statements = count_statements(lambda: call(class_id))
+                row.append(statements)
+            counts.append(row)
+            print(f"  {size:>8} {row[0]:>10} {row[1]:>14} {row[2]:>8}")
+        assert all(row == counts[0] for row in counts), "Statement count should not grow with class size"
+        assert counts[0] == [1, 1, 1], "Each call should be one query"
+        print("  ✓ One query per call regardless of size")
+
+        # Test 2: Warm calls hit no database
+        print("\nTest 2: Warm cache")
+        class_id = class_ids[1]
+        ClassService.get_class_members(class_id)
+        _, statements = count_statements(lambda: (
+            ClassService.get_class_members(class_id),
+            ClassService.get_class_leaderboard(class_id),
+            ClassService.get_class_stats(class_id)
+        ))
+        assert statements == 0, "Cached roster should not query"
+        leaderboard = ClassService.get_class_leaderboard(class_id)
+        assert [m['xp'] for m in leaderboard] == sorted([m['xp'] for m in leaderboard], reverse=True), "Sorted by XP"
+        assert 'rank' not in ClassService.get_class_members(class_id)[0], "Leaderboard must not leak into roster"
+        print("  ✓ Served from memory")
+
+        # Test 3: XP and membership changes invalidate on commit
+        print("\nTest 3: Invalidation")
+        last = leaderboard[-1]
+        GamificationService.award_xp(last['id'], 'assessment_complete', base_xp=5000)
+        assert ClassService.get_class_leaderboard(class_id)[0]['id'] == last['id'], "XP change should reorder"
+
+        ClassService.leave_class(class_id, last['id'])
+        assert ClassService.get_class_stats(class_id)['member_count'] == CLASS_SIZES[1] - 1, "Leave should invalidate"
+        ClassService.join_class(last['id'], classes[1].invite_code)
+        assert ClassService.get_class_stats(class_id)['member_count'] == CLASS_SIZES[1], "Join should invalidate"
+        print("  ✓ XP, leave and join reflected immediately")
+
+        # Test 4: Student classes in one query
+        print("\nTest 4: Student classes")
+        ClassService.join_class(last['id'], classes[0].invite_code)
+        student_classes, statements = count_statements(lambda: ClassService.get_student_classes(last['id']))
+        assert statements == 1, "Student classes should be one query"
+        counts = {c['id']: c['member_count'] for c in student_classes}
+        assert counts == {classes[0].id: CLASS_SIZES[0] + 1, classes[1].id: CLASS_SIZES[1]}, \
+            "Both classes listed with member counts"
+        print("  ✓ Classes with member counts in one query")
+
+        # Clean up
+        print("\nCleaning up test data...")
+        _cleanup()
+        print("✓ Test data cleaned up")
+
+        print("\n" + "=" * 60)
+        print("All tests passed! ✅")
+        print("=" * 60)
+
+
+if __name__ == '__main__':
+    test_class_roster()
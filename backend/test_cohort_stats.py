@@ -0,0 +1,186 @@
+"""
+Test script for cohort quantile sketches and comparative analytics.
+"""
+import sys
+import os
+import random
+from datetime import datetime, timedelta
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from src.main import app
+from src.database import db
+from src.models.user import User
+from src.models.student import Student
+from src.models.student_session import StudentSession, StudentDailyStats
+from src.models.learning_path import LearningPath
+from src.models.assessment import Skill
+from src.models.class_group import ClassGroup, ClassMembership
+from src.models.cohort_stats import CohortSketch
+from src.services.analytics_dashboard_service import AnalyticsDashboardService
+from src.services.class_service import ClassService
+from src.services.cohort_stats_service import CohortStatsService
+from src.services.daily_stats_service import DailyStatsService
+from src.services.quantile_sketch import TDigest
+from testing_utils import count_statements
+
+
+def _cleanup():
+    """Remove test users, classes and their data."""
+    users = User.query.filter(User.username.like('cohort_test_%')).all()
+    for class_group in ClassGroup.query.filter(ClassGroup.teacher_id.in_([u.id for u in users])).all():
+        db.session.delete(class_group)
+    for user in users:
+        if user.student:
+            StudentDailyStats.query.filter_by(student_id=user.student.id).delete()
+            StudentSession.query.filter_by(student_id=user.student.id).delete()
+            LearningPath.query.filter_by(student_id=user.student.id).delete()
+            db.session.delete(user.student)
+        db.session.delete(user)
+    db.session.commit()
+    ClassService.invalidate()
+    CohortStatsService.invalidate()
+
+
+def _create_students(teacher, count, offset, skills, rng):
+    """Create a class of students with sessions and learning paths."""
+    class_group = ClassService.create_class(teacher.id, f'Cohort Test {offset}', '', 7)
+    now = datetime.utcnow()
+    student_ids = []
+    for i in range(count):
+        user = User(username=f'cohort_test_s{offset + i}', email=f'cohort_test_s{offset + i}@test.com')
+        user.set_password('test123')
+        db.session.add(user)
+        db.session.flush()
+        student = Student(user_id=user.id, name=f'Cohort Student {offset + i}', grade=7)
+        db.session.add(student)
+        db.session.flush()
+        student_ids.append(student.id)
+        db.session.add(ClassMembership(class_id=class_group.id, student_id=student.id, role='student'))
+
+        for skill in skills:
+            db.session.add(LearningPath(student_id=student.id, skill_id=skill.id, mastery_achieved=rng.random() < 0.4))
+        for _ in range(rng.randint(0, 8)):
+            started_at = now - timedelta(days=rng.randint(0, 60), minutes=rng.randint(0, 600))
+            answered = rng.randint(1, 25)
+            db.session.add(StudentSession(
+                student_id=student.id,
+                started_at=started_at,
+                last_activity_at=started_at,
+                ended_at=started_at + timedelta(minutes=rng.randint(1, 40)),
+                questions_answered=answered,
+                questions_correct=rng.randint(0, answered),
+                is_active=False
+            ))
+    db.session.commit()
+    DailyStatsService.rebuild(student_ids)
+    return class_group, student_ids
+
+
+def _mid_rank(values, value):
+    """Exact mid-rank percentile of value within values."""
+    below = sum(1 for v in values if v < value)
+    equal = sum(1 for v in values if v == value)
+    return (below + equal / 2) / len(values) * 100
+
+
+def test_cohort_stats():
+    """Test sketch accuracy, refresh and comparisons."""
+    with app.app_context():
+        print("Testing Cohort Statistics...")
+        print("=" * 60)
+
+        _cleanup()
+        rng = random.Random(12)
+
+        # Test 1: Merged sketches track exact quantiles
+        print("\nTest 1: Quantile sketch")
+        values = [rng.gauss(70, 15) for _ in range(20000)]
+        parts = [TDigest(200) for _ in range(4)]
+        for i, value in enumerate(values):
+            parts[i % 4].add(value)
+        digest = TDigest(200)
+        for part in parts:
+            digest.merge(part)
+        digest = TDigest.from_dict(digest.to_dict())
+        ordered = sorted(values)
+        for q in (0.01, 0.25, 0.5, 0.75, 0.99):
+            exact = ordered[int(q * len(ordered))]
+            assert abs(digest.quantile(q) - exact) < 1.0, f"Quantile {q} should be close"
+            assert abs(digest.cdf(exact) - q) < 0.005, f"CDF at quantile {q} should be close"
+        assert abs(digest.mean - sum(values) / len(values)) < 1e-6, "Mean should be exact"
+        assert len(digest.centroids) < 200, "Sketch should stay bounded"
+        print(f"  ✓ 20000 values in {len(digest.centroids)} centroids")
+
+        skills = Skill.query.limit(4).all()
+        assert skills, "Seed skills before running this test"
+        teacher = User(username='cohort_test_teacher', email='cohort_test_teacher@test.com', role='teacher')
+        teacher.set_password('test123')
+        db.session.add(teacher)
+        db.session.commit()
+        class_group, student_ids = _create_students(teacher, 40, 0, skills, rng)
+        print(f"\n✓ Created a class of {len(student_ids)} students")
+
+        # Test 2: Bulk metrics match the per-student computation
+        print("\nTest 2: Bulk student metrics")
+        metrics = CohortStatsService.compute_student_metrics(student_ids)
+        for student_id in student_ids[:10]:
+            sessions = StudentSession.query.filter_by(student_id=student_id).all()
+            questions = sum(s.questions_answered for s in sessions)
+            correct = sum(s.questions_correct for s in sessions)
+            minutes = sum((s.ended_at - s.started_at).total_seconds() / 60 for s in sessions)
+            mastered = LearningPath.query.filter_by(student_id=student_id, mastery_achieved=True).count()
+            assert metrics[student_id]['accuracy'] == round(correct / questions * 100 if questions else 0, 1), "Accuracy"
+            assert metrics[student_id]['practice_time'] == round(minutes, 1), "Practice time"
+            assert metrics[student_id]['skills_mastered'] == mastered, "Skills mastered"
+        print("  ✓ Accuracy, practice time and mastery match")
+
+        # Test 3: Refreshed sketches give exact means and percentiles
+        print("\nTest 3: Refresh and compare")
+        result = CohortStatsService.refresh()
+        assert result['students'] >= len(student_ids), "Every student should be folded"
+        assert CohortSketch.query.filter_by(scope='class', scope_id=class_group.id).count() == len(CohortStatsService.METRICS), \
+            "One sketch per metric"
+
+        student_id = student_ids[0]
+        (response, status), statements = count_statements(
+            lambda: AnalyticsDashboardService.get_comparative_analytics(student_id, 'class')
+        )
+        assert status == 200, response
+        comparison = response['comparison']
+        assert comparison['cohort_size'] == len(student_ids), "Whole class compared"
+        for metric, places in CohortStatsService.METRICS.items():
+            population = [metrics[sid][metric] for sid in student_ids]
+            others = population[1:]
+            assert abs(comparison['comparison_group'][metric] - round(sum(others) / len(others), places)) <= 10 ** -places, \
+                f"{metric} average should leave the student out"
+            assert abs(comparison['percentiles'][metric] - _mid_rank(population, metrics[student_id][metric])) <= 1, \
+                f"{metric} percentile should match the exact rank"
+        print(f"  ✓ Class comparison in {statements} statements")
+
+        response, status = AnalyticsDashboardService.get_comparative_analytics(student_id, 'grade')
+        assert status == 200, response
+        assert response['comparison']['cohort_size'] == Student.query.filter_by(grade=7).count(), \
+            "Whole grade compared, not a sample"
+        print("  ✓ Grade comparison covers every grade-mate")
+
+        # Test 4: Cohorts without stored sketches are built on demand
+        print("\nTest 4: New class before next refresh")
+        new_class, new_ids = _create_students(teacher, 5, 40, skills, rng)
+        response, status = AnalyticsDashboardService.get_comparative_analytics(new_ids[0], 'class')
+        assert status == 200, response
+        assert response['comparison']['cohort_size'] == len(new_ids), "Built from current members"
+        print("  ✓ Built from members")
+
+        # Clean up
+        print("\nCleaning up test data...")
+        _cleanup()
+        CohortStatsService.refresh()
+        print("✓ Test data cleaned up")
+
+        print("\n" + "=" * 60)
+        print("All tests passed! ✅")
+        print("=" * 60)
+
+
+if __name__ == '__main__':
+    test_cohort_stats()
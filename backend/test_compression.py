@@ -0,0 +1,148 @@
+"""
+Test script for negotiated, streaming response compression.
+"""
+import sys
+import os
+import gzip
+import json
+import zlib
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from flask import Flask, Response, jsonify
+from src.main import app
+from src.middleware.compression import Compression, configure_compression
+
+ASSETS_DIR = os.path.join(app.static_folder, 'assets')
+CHUNKS = [f'row {i},'.encode() + b'x' * 200 + b'\n' for i in range(5)]
+
+
+def _make_test_app():
+    """Small app with buffered, streamed and incompressible responses."""
+    test_app = Flask(__name__)
+    configure_compression(test_app)
+
+    @test_app.route('/json')
+    def large_json():
+        return jsonify({'rows': [{'id': i, 'name': f'Student {i}', 'xp': i * 10} for i in range(200)]})
+
+    @test_app.route('/small')
+    def small_json():
+        return jsonify({'ok': True})
+
+    @test_app.route('/image')
+    def image():
+        return Response(b'\x89PNG' + b'\x00' * 2000, mimetype='image/png')
+
+    @test_app.route('/stream')
+    def stream():
+        return Response((chunk for chunk in CHUNKS), mimetype='text/csv')
+
+    return test_app
+
+
+def _asset(extension):
+    """Name of a built asset with the given extension."""
+    return next(name for name in sorted(os.listdir(ASSETS_DIR)) if name.endswith(extension))
+
+
+def test_compression():
+    """Test negotiation, buffered and streamed compression, assets and metrics."""
+    print("Testing Response Compression...")
+    print("=" * 60)
+    Compression.reset_stats()
+    test_app = _make_test_app()
+    client = test_app.test_client()
+    print(f"✓ Encodings available: {', '.join(Compression.ENCODERS)}")
+
+    # Test 1: Negotiation follows q-values
+    print("\nTest 1: Negotiation")
+    cases = {
+        'gzip, deflate, br, zstd': 'br',
+        'gzip;q=0.5, br;q=0.8': 'br',
+        'br;q=0.8, gzip': 'gzip',
+        'gzip;q=0, *': 'br',
+        'gzip;q=0': None,
+        '*;q=0': None,
+        '': None
+    }
+    for header, expected in cases.items():
+        with test_app.test_request_context(headers={'Accept-Encoding': header}):
+            assert Compression.negotiate(['br', 'gzip']) == expected, f"{header!r} should pick {expected}"
+    print("  ✓ Preferences, refusals and wildcards honoured")
+
+    # Test 2: Buffered responses
+    print("\nTest 2: Buffered responses")
+    plain = client.get('/json')
+    compressed = client.get('/json', headers={'Accept-Encoding': 'gzip'})
+    assert 'Content-Encoding' not in plain.headers, "No Accept-Encoding, no compression"
+    assert 'Accept-Encoding' in plain.headers['Vary'], "Uncompressed variant still varies"
+    assert compressed.headers['Content-Encoding'] == 'gzip', "JSON is compressed"
+    assert int(compressed.headers['Content-Length']) == len(compressed.data) < len(plain.data), "Length matches"
+    assert json.loads(gzip.decompress(compressed.data)) == plain.get_json(), "Round trip"
+
+    small = client.get('/small', headers={'Accept-Encoding': 'gzip'})
+    image = client.get('/image', headers={'Accept-Encoding': 'gzip'})
+    assert 'Content-Encoding' not in small.headers, "Small bodies are sent as they are"
+    assert 'Content-Encoding' not in image.headers and 'Vary' not in image.headers, "PNG is not compressed"
+    print(f"  ✓ JSON {len(plain.data)} → {len(compressed.data)} bytes; small and PNG bodies skipped")
+
+    # Test 3: Streamed responses are compressed chunk by chunk
+    print("\nTest 3: Streamed responses")
+    streamed = client.get('/stream', headers={'Accept-Encoding': 'gzip'}, buffered=False)
+    assert streamed.headers['Content-Encoding'] == 'gzip', "Generator is compressed"
+    assert 'Content-Length' not in streamed.headers, "Streamed body has no length"
+    decompressor = zlib.decompressobj(31)
+    pieces = [decompressor.decompress(chunk) for chunk in streamed.response if chunk]
+    streamed.close()
+    assert pieces[:len(CHUNKS)] == CHUNKS, "Each chunk decompresses as soon as it arrives"
+    assert b''.join(pieces) + decompressor.flush() == b''.join(CHUNKS), "Whole stream round trips"
+    print(f"  ✓ {len(CHUNKS)} chunks flushed individually")
+
+    # Test 4: Static assets
+    print("\nTest 4: Static assets")
+    app_client = app.test_client()
+    css = _asset('.css')
+    with open(os.path.join(ASSETS_DIR, css), 'rb') as f:
+        original = f.read()
+    sibling = os.path.join(ASSETS_DIR, css + '.gz')
+    created = not os.path.exists(sibling)
+    if created:
+        with open(sibling, 'wb') as f:
+            f.write(gzip.compress(original, compresslevel=9))
+    try:
+        response = app_client.get(f'/static/assets/{css}', headers={'Accept-Encoding': 'gzip'})
+        assert response.status_code == 200 and response.headers['Content-Encoding'] == 'gzip', "Sibling served"
+        assert response.mimetype == 'text/css', "Served with the original type"
+        assert gzip.decompress(response.data) == original, "Sibling holds the asset"
+        response.close()
+        identity = app_client.get(f'/static/assets/{css}')
+        assert 'Content-Encoding' not in identity.headers and identity.data == original, "Plain asset otherwise"
+        identity.close()
+    finally:
+        if created:
+            os.remove(sibling)
+
+    js = _asset('.js')
+    response = app_client.get(f'/static/assets/{js}', headers={'Accept-Encoding': 'gzip'})
+    with open(os.path.join(ASSETS_DIR, js), 'rb') as f:
+        assert gzip.decompress(response.data) == f.read(), "Assets without siblings stream compressed"
+    response.close()
+    print("  ✓ Precompressed sibling, identity and on-the-fly variants")
+
+    # Test 5: Metrics
+    print("\nTest 5: Metrics")
+    stats = Compression.stats()
+    gzip_stats = stats['by_encoding']['gzip']
+    assert gzip_stats['responses'] >= 3 and gzip_stats['streamed'] >= 2, gzip_stats
+    assert gzip_stats['bytes_saved'] > 0 and gzip_stats['cpu_seconds'] >= 0, gzip_stats
+    assert stats['by_encoding']['precompressed_gzip']['responses'] == 1, stats
+    assert stats['skipped']['small'] == 1 and stats['skipped']['type'] == 1, stats['skipped']
+    print(f"  ✓ {stats['totals']}")
+
+    print("\n" + "=" * 60)
+    print("All tests passed! ✅")
+    print("=" * 60)
+
+
+if __name__ == '__main__':
+    test_compression()
@@ -0,0 +1,150 @@
+"""
+Test script for ETag validators and 304 Not Modified responses.
+"""
+import sys
+import os
+from datetime import datetime, timedelta
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from src.main import app
+from src.database import db
+from src.models.user import User
+from src.models.student import Student
+from src.models.student_session import StudentSession
+from src.models.learning_path import LearningPath
+from src.models.assessment import Skill
+from src.models.class_group import ClassGroup, ClassMembership
+from src.services.response_cache import ResponseCache, MemoryBackend
+from testing_utils import count_statements
+
+
+def _cleanup():
+    """Remove test users and their data."""
+    users = User.query.filter(User.username.like('conditional_test_%')).all()
+    for class_group in ClassGroup.query.filter(ClassGroup.teacher_id.in_([u.id for u in users])).all():
+        ClassMembership.query.filter_by(class_id=class_group.id).delete()
+        db.session.delete(class_group)
+    for user in users:
+        if user.student:
+            StudentSession.query.filter_by(student_id=user.student.id).delete()
+            LearningPath.query.filter_by(student_id=user.student.id).delete()
+            db.session.delete(user.student)
+        db.session.delete(user)
+    Skill.query.filter_by(name='Conditional Test Skill').delete()
+    db.session.commit()
+    ResponseCache.configure(MemoryBackend())
+
+
+def test_conditional_get():
+    """Test ETags, 304 responses, revalidation after changes and cache headers."""
+    with app.app_context():
+        print("Testing Conditional GET...")
+        print("=" * 60)
+
+        _cleanup()
+        user = User(username='conditional_test_student', email='conditional_test_student@test.com')
+        user.set_password('test123')
+        db.session.add(user)
+        db.session.flush()
+        student = Student(user_id=user.id, name='Conditional Student', grade=5)
+        skill = Skill(name='Conditional Test Skill', subject_area='arithmetic', grade_level=5)
+        db.session.add_all([student, skill])
+        db.session.flush()
+        started_at = datetime.utcnow() - timedelta(hours=2)
+        db.session.add(StudentSession(
+            student_id=student.id,
+            started_at=started_at,
+            last_activity_at=started_at + timedelta(minutes=20),
+            ended_at=started_at + timedelta(minutes=20),
+            questions_answered=10,
+            questions_correct=8,
+            is_active=False
+        ))
+        db.session.commit()
+        student_id = student.id
+        print("✓ Created a student with one session")
+
+        client = app.test_client()
+        url = f'/api/analytics-dashboard/student/{student_id}/dashboard'
+
+        # Test 1: First response carries a validator and private headers
+        print("\nTest 1: ETag and cache headers")
+        first = client.get(url)
+        assert first.status_code == 200, first.get_json()
+        etag, _ = first.get_etag()
+        assert etag, "Response should carry an ETag"
+        assert first.cache_control.private and first.cache_control.no_cache, "Per-user data is private"
+        print(f"  ✓ ETag {etag[:12]}..., Cache-Control: {first.headers['Cache-Control']}")
+
+        # Test 2: Unchanged data is answered with 304 after one lookup
+        print("\nTest 2: Not Modified")
+        response, statements = count_statements(lambda: client.get(url, headers={'If-None-Match': first.headers['ETag']}))
+        assert response.status_code == 304 and response.data == b'', "Unchanged dashboard should be 304"
+        assert response.get_etag()[0] == etag, "304 repeats the ETag"
+        assert statements == 1, f"Only the watermark lookup should run, saw {statements}"
+        print("  ✓ 304 with a single indexed lookup")
+
+        # Test 3: New activity and other committed changes produce a new ETag
+        print("\nTest 3: Revalidation after changes")
+        session = StudentSession.query.filter_by(student_id=student_id).first()
+        session.last_activity_at = datetime.utcnow()
+        session.questions_answered += 5
+        db.session.commit()
+        changed = client.get(url, headers={'If-None-Match': first.headers['ETag']})
+        assert changed.status_code == 200 and changed.get_etag()[0] != etag, "New activity changes the ETag"
+
+        etag = changed.get_etag()[0]
+        db.session.add(LearningPath(student_id=student_id, skill_id=skill.id, status='mastered', mastery_achieved=True))
+        db.session.commit()
+        after_mastery = client.get(url, headers={'If-None-Match': changed.headers['ETag']})
+        assert after_mastery.status_code == 200 and after_mastery.get_etag()[0] != etag, \
+            "Committed changes without session activity change the ETag too"
+        print("  ✓ Full responses after activity and after other commits")
+
+        # Test 4: Shared resources are public
+        print("\nTest 4: Shared resources")
+        catalog = client.get('/api/assessments/skills')
+        assert catalog.status_code == 200 and catalog.cache_control.public, "Anonymous catalogue is public"
+        again = client.get('/api/assessments/skills', headers={'If-None-Match': catalog.headers['ETag']})
+        assert again.status_code == 304, "Catalogue revalidates"
+        print("  ✓ Public catalogue revalidates with 304")
+
+        # Test 5: Teacher dashboards revalidate on class activity
+        print("\nTest 5: Teacher watermark")
+        teacher = User(username='conditional_test_teacher', email='conditional_test_teacher@test.com', role='teacher')
+        teacher.set_password('test123')
+        db.session.add(teacher)
+        db.session.flush()
+        class_group = ClassGroup(teacher_id=teacher.id, name='Conditional Class', grade_level=5, invite_code='CONDGET1')
+        db.session.add(class_group)
+        db.session.flush()
+        db.session.add(ClassMembership(class_id=class_group.id, student_id=student_id, role='student'))
+        db.session.commit()
+        teacher_url = f'/api/analytics-dashboard/teacher/{teacher.id}/dashboard'
+        teacher_first = client.get(teacher_url)
+        assert teacher_first.status_code == 200, teacher_first.get_json()
+        response, statements = count_statements(
+            lambda: client.get(teacher_url, headers={'If-None-Match': teacher_first.headers['ETag']})
+        )
+        assert response.status_code == 304, "Unchanged teacher dashboard should be 304"
+        assert statements == 1, f"Only the watermark lookup should run, saw {statements}"
+        db.session.query(StudentSession).filter_by(student_id=student_id).update(
+            {'last_activity_at': datetime.utcnow() + timedelta(minutes=1)}, synchronize_session=False
+        )
+        db.session.commit()
+        teacher_changed = client.get(teacher_url, headers={'If-None-Match': teacher_first.headers['ETag']})
+        assert teacher_changed.status_code == 200, "Member activity changes the teacher ETag"
+        print("  ✓ 304 with a single lookup, new ETag after member activity")
+
+        # Clean up
+        print("\nCleaning up test data...")
+        _cleanup()
+        print("✓ Test data cleaned up")
+
+        print("\n" + "=" * 60)
+        print("All tests passed! ✅")
+        print("=" * 60)
+
+
+if __name__ == '__main__':
+    test_conditional_get()
@@ -0,0 +1,114 @@
+"""
+Test script for nightly bulk daily challenge generation.
+"""
+import sys
+import os
+from datetime import datetime, timedelta
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from src.main import app
+from src.database import db
+from src.models.user import User
+from src.models.student import Student
+from src.models.daily_challenge import DailyChallenge
+from src.models.assessment import Skill
+from src.services.challenge_service import ChallengeService
+from testing_utils import record_statements
+
+
+def _cleanup():
+    """Remove test users and their data."""
+    for user in User.query.filter(User.username.like('challenge_batch_test_%')).all():
+        if user.student:
+            DailyChallenge.query.filter_by(student_id=user.student.id).delete()
+            db.session.delete(user.student)
+        db.session.delete(user)
+    Skill.query.filter_by(name='Challenge Batch Test Skill').delete()
+    db.session.commit()
+
+
+def test_daily_challenge_batch():
+    """Test bulk generation, expiry and the lazy fallback."""
+    with app.app_context():
+        print("Testing Nightly Daily Challenge Generation...")
+        print("=" * 60)
+
+        _cleanup()
+        db.session.add(Skill(name='Challenge Batch Test Skill', subject_area='arithmetic', grade_level=7))
+
+        students = []
+        for i in range(5):
+            user = User(username=f'challenge_batch_test_{i}', email=f'challenge_batch_test_{i}@test.com')
+            user.set_password('test123')
+            # The last student has not logged in recently
+            user.last_login = datetime.utcnow() - timedelta(days=1 if i < 4 else 60)
+            db.session.add(user)
+            db.session.flush()
+            student = Student(user_id=user.id, name=f'Batch Student {i}', grade=7)
+            db.session.add(student)
+            db.session.flush()
+            students.append(student.id)
+
+        # Yesterday's challenge for the first student
+        db.session.add(DailyChallenge(
+            student_id=students[0], challenge_type='question_marathon', difficulty='easy',
+            description='Old challenge', target_value=5, bonus_xp=50, status='active',
+            created_at=datetime.utcnow() - timedelta(days=1),
+            expires_at=datetime.utcnow() - timedelta(minutes=5)
+        ))
+        db.session.commit()
+        ChallengeService._skill_pool = None
+        print(f"✓ Created {len(students)} test students")
+
+        # Test 1: Bulk run expires and generates for active students only
+        print("\nTest 1: Bulk generation")
+        result, statements = record_statements(lambda: ChallengeService.generate_all_daily_challenges(chunk_size=2))
+        assert result['expired'] >= 1, "Yesterday's challenge should be expired"
+        assert not any('random()' in s.lower() for s in statements), "Skills should be sampled in memory"
+        for student_id in students[:4]:
+            active = DailyChallenge.query.filter_by(student_id=student_id, status='active').all()
+            assert len(active) == 3, "Active students get 3 challenges"
+            assert len({c.challenge_type for c in active}) == 3, "Challenge types should not repeat"
+        assert DailyChallenge.query.filter_by(student_id=students[4]).count() == 0, \
+            "Inactive students are left to the lazy fallback"
+        old = DailyChallenge.query.filter_by(student_id=students[0], description='Old challenge').first()
+        assert old.status == 'expired', "Old challenge should be expired"
+        print(f"  ✓ {result['challenges']} challenges for {result['students']} students")
+
+        # Test 2: Skill focus challenges use cached grade skills
+        print("\nTest 2: Skill sampling")
+        focus = DailyChallenge.query.filter(
+            DailyChallenge.student_id.in_(students),
+            DailyChallenge.challenge_type == 'skill_focus'
+        ).all()
+        grades = {s.id: s.grade_level for s in Skill.query.all()}
+        assert all(grades[c.target_skill_id] == 7 for c in focus if c.target_skill_id), \
+            "Skill focus should target a grade 7 skill"
+        print("  ✓ Skill focus targets the student's grade")
+
+        # Test 3: A second run is a no-op
+        print("\nTest 3: Idempotent re-run")
+        ChallengeService.generate_all_daily_challenges()
+        assert all(
+            DailyChallenge.query.filter_by(student_id=sid, status='active').count() == 3 for sid in students[:4]
+        ), "Re-running should not add challenges"
+        print("  ✓ Students with active challenges are skipped")
+
+        # Test 4: Lazy generation still covers students the run missed
+        print("\nTest 4: Lazy fallback")
+        challenges = ChallengeService.get_active_challenges(students[4])
+        assert len(challenges) == 3, "Lazy path should generate on first request"
+        print("  ✓ Inactive student generated on demand")
+
+        # Clean up
+        print("\nCleaning up test data...")
+        _cleanup()
+        print("✓ Test data cleaned up")
+
+        print("\n" + "=" * 60)
+        print("All tests passed! ✅")
+        print("=" * 60)
+
+
+if __name__ == '__main__':
+    test_daily_challenge_batch()
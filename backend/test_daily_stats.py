@@ -0,0 +1,131 @@
+"""
+Test script for the per-student daily practice rollup.
+"""
+import sys
+import os
+import random
+from datetime import datetime, timedelta
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from src.main import app
+from src.database import db
+from src.models.user import User
+from src.models.student import Student
+from src.models.student_session import StudentSession, StudentDailyStats
+from src.services.monitoring_service import MonitoringService
+from src.services.analytics_service import AnalyticsService
+from src.services.daily_stats_service import DailyStatsService
+from testing_utils import count_statements
+
+
+def _cleanup():
+    """Remove test users and their data."""
+    for user in User.query.filter(User.username.like('daily_stats_test_%')).all():
+        if user.student:
+            StudentDailyStats.query.filter_by(student_id=user.student.id).delete()
+            StudentSession.query.filter_by(student_id=user.student.id).delete()
+            db.session.delete(user.student)
+        db.session.delete(user)
+    db.session.commit()
+
+
+def _rollup(student_id):
+    """Every rollup row for a student, keyed by (day, skill)."""
+    return {
+        (row.day, row.skill_id): (row.questions_answered, row.questions_correct,
+                                  round(row.practice_seconds, 3), row.sessions)
+        for row in StudentDailyStats.query.filter_by(student_id=student_id).all()
+    }
+
+
+def test_daily_stats():
+    """Test incremental maintenance, rebuild and trend reads."""
+    with app.app_context():
+        print("Testing Student Daily Stats...")
+        print("=" * 60)
+
+        _cleanup()
+        rng = random.Random(3)
+        user = User(username='daily_stats_test_user', email='daily_stats_test@test.com')
+        user.set_password('test123')
+        db.session.add(user)
+        db.session.flush()
+        student = Student(user_id=user.id, name='Daily Stats Student', grade=5)
+        db.session.add(student)
+        db.session.commit()
+        student_id = student.id
+        print(f"✓ Created test student (ID: {student_id})")
+
+        # Test 1: Live sessions update the rollup
+        print("\nTest 1: Incremental updates")
+        MonitoringService.start_session(student_id, skill_id=None)
+        for _ in range(5):
+            MonitoringService.track_session_activity(student_id, None, None, rng.random() < 0.6)
+        result, _ = MonitoringService.start_session(student_id, skill_id=None)
+        MonitoringService.track_session_activity(student_id, None, None, True)
+        MonitoringService.end_session(result['session']['id'])
+        MonitoringService.end_session(result['session']['id'])
+
+        today = datetime.utcnow().date()
+        row = _rollup(student_id)[(today, 0)]
+        assert row[0] == 6, "Six answers recorded"
+        assert row[3] == 2, "Two sessions started today"
+        assert row[2] >= 0, "Ended sessions add practice time"
+        print("  ✓ Sessions, answers and time rolled up")
+
+        # Test 2: Rebuild from history matches the incremental rollup
+        print("\nTest 2: Backfill")
+        for days_ago in range(0, 400, 3):
+            started_at = datetime.utcnow() - timedelta(days=days_ago, hours=rng.randint(0, 5))
+            answered = rng.randint(1, 20)
+            db.session.add(StudentSession(
+                student_id=student_id,
+                started_at=started_at,
+                last_activity_at=started_at,
+                ended_at=started_at + timedelta(minutes=rng.randint(5, 40)),
+                questions_answered=answered,
+                questions_correct=rng.randint(0, answered),
+                is_active=False
+            ))
+        db.session.commit()
+        incremental_today = _rollup(student_id)[(today, 0)]
+        DailyStatsService.rebuild([student_id])
+        rebuilt = _rollup(student_id)
+        assert len(rebuilt) >= 130, "Every practiced day has a row"
+        assert rebuilt[(today, 0)][3] >= incremental_today[3], "Rebuild includes today's live sessions"
+        print(f"  ✓ Rebuilt {len(rebuilt)} daily rows")
+
+        # Test 3: Trend reads match raw session bucketing
+        print("\nTest 3: Trend data")
+        points = AnalyticsService.get_student_trend_data(student_id, days=30)
+        start_day = today - timedelta(days=30)
+        sessions = StudentSession.query.filter(
+            StudentSession.student_id == student_id,
+            StudentSession.started_at >= datetime.combine(start_day, datetime.min.time())
+        ).all()
+        for point in points:
+            day_sessions = [s for s in sessions if s.started_at.date().isoformat() == point['date']]
+            assert point['questions'] == sum(s.questions_answered for s in day_sessions), "Questions per day"
+            assert point['sessions'] == len(day_sessions), "Sessions per day"
+        print(f"  ✓ {len(points)} trend points match sessions")
+
+        # Test 4: Long ranges cost the same queries as short ones
+        print("\nTest 4: Range cost")
+        _, short = count_statements(lambda: AnalyticsService.get_student_trend_data(student_id, days=7))
+        long_points, long = count_statements(lambda: AnalyticsService.get_student_trend_data(student_id, days=365))
+        assert short == long == 1, "Trend reads should be one range scan"
+        assert len(long_points) > 100, "365-day trend covers the history"
+        print(f"  ✓ 7-day and 365-day trends both take {long} query")
+
+        # Clean up
+        print("\nCleaning up test data...")
+        _cleanup()
+        print("✓ Test data cleaned up")
+
+        print("\n" + "=" * 60)
+        print("All tests passed! ✅")
+        print("=" * 60)
+
+
+if __name__ == '__main__':
+    test_daily_stats()
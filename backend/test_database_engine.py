@@ -0,0 +1,135 @@
+"""
+Test script for engine pool sizing, statement timeouts and pool metrics.
+
+Runs against a temporary SQLite file; set TEST_DATABASE_URL to a local
+PostgreSQL database to also check statement timeouts.
+"""
+import sys
+import os
+import tempfile
+import threading
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from flask import Flask, Blueprint
+from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import create_engine, exc, text
+from src.database_engine import EngineConfig, PoolMetrics, InstrumentedQueuePool
+
+
+def _make_test_app(database_url):
+    """App with an OLTP route and an analytics blueprint route."""
+    test_app = Flask(__name__)
+    test_app.config['SQLALCHEMY_DATABASE_URI'] = database_url
+    test_app.config['SQLALCHEMY_ENGINE_OPTIONS'] = EngineConfig.engine_options(database_url)
+    test_db = SQLAlchemy(test_app)
+    EngineConfig.init_app(test_app, test_db)
+
+    def statement_timeout():
+        if test_db.engine.dialect.name != 'postgresql':
+            return 'n/a'
+        return test_db.session.execute(text("SELECT setting FROM pg_settings WHERE name = 'statement_timeout'")).scalar()
+
+    analytics = Blueprint('analytics', __name__)
+    analytics.route('/analytics/timeout')(statement_timeout)
+    test_app.register_blueprint(analytics)
+    test_app.route('/timeout')(statement_timeout)
+    return test_app, test_db
+
+
+def test_database_engine():
+    """Test sizing, engine options, checkout metrics, timeouts and fork handling."""
+    print("Testing Database Engine Configuration...")
+    print("=" * 60)
+    temp_dir = tempfile.mkdtemp()
+    database_url = os.environ.get('TEST_DATABASE_URL', f"sqlite:///{os.path.join(temp_dir, 'pool.db')}")
+    print(f"✓ Using {database_url.split('@')[-1]}")
+
+    # Test 1: Pool sizing stays within the connection budget
+    print("\nTest 1: Pool sizing")
+    settings = EngineConfig.pool_settings(workers=4, threads=2, background_threads=3,
+                                          max_connections=100, reserved_connections=10)
+    assert settings == {'pool_size': 5, 'max_overflow': 5}, settings
+    tight = EngineConfig.pool_settings(workers=8, threads=4, background_threads=3,
+                                       max_connections=30, reserved_connections=6)
+    assert tight == {'pool_size': 3, 'max_overflow': 0}, tight
+    for workers in (1, 2, 4, 8, 16):
+        sized = EngineConfig.pool_settings(workers=workers, max_connections=100, reserved_connections=10)
+        assert workers * (sized['pool_size'] + sized['max_overflow']) <= 90, (workers, sized)
+    print(f"  ✓ 4 workers x 2 threads: {settings}; tight budget: {tight}")
+
+    # Test 2: Engine options per backend
+    print("\nTest 2: Engine options")
+    assert EngineConfig.engine_options('sqlite://') == {}, "In-memory SQLite keeps its single connection"
+    postgres = EngineConfig.engine_options('postgresql://user@localhost/alpha')
+    assert postgres['poolclass'] is InstrumentedQueuePool and postgres['pool_pre_ping'], postgres
+    assert postgres['connect_args']['options'] == f'-c statement_timeout={EngineConfig.STATEMENT_TIMEOUT_MS}'
+    sqlite_file = EngineConfig.engine_options(database_url)
+    assert sqlite_file['pool_recycle'] == EngineConfig.POOL_RECYCLE_SECONDS, sqlite_file
+    print("  ✓ PostgreSQL pre-pings with a default statement timeout; SQLite files are pooled")
+
+    # Test 3: Checkout latency, saturation and timeouts
+    print("\nTest 3: Pool metrics")
+    PoolMetrics.reset()
+    engine = create_engine(database_url, poolclass=InstrumentedQueuePool,
+                           pool_size=1, max_overflow=0, pool_timeout=0.2)
+    held = engine.connect()
+    stats = PoolMetrics.stats(engine)
+    assert stats['in_use'] == 1 and stats['saturation'] == 1.0, stats
+
+    errors = []
+
+    def checkout():
+        try:
+            engine.connect()
+        except exc.TimeoutError as e:
+            errors.append(e)
+
+    waiter = threading.Thread(target=checkout)
+    waiter.start()
+    waiter.join()
+    held.close()
+    with engine.connect() as conn:
+        conn.execute(text('SELECT 1'))
+    stats = PoolMetrics.stats(engine)
+    assert errors and stats['timeouts'] == 1, "Exhausted pool times out"
+    assert stats['checkouts'] == 2 and stats['peak_in_use'] == 1, stats
+    assert stats['in_use'] == 0 and stats['max_checkout_ms'] >= 0, stats
+    print(f"  ✓ {stats['checkouts']} checkouts, avg {stats['avg_checkout_ms']} ms, {stats['timeouts']} timeout")
+
+    # Test 4: A forked child gets a fresh pool
+    print("\nTest 4: Fork safety")
+    test_app, test_db = _make_test_app(database_url)
+    with test_app.app_context():
+        with test_db.engine.connect() as conn:
+            conn.execute(text('SELECT 1'))
+        parent_pool = id(test_db.engine.pool)
+        pid = os.fork()
+        if pid == 0:
+            os._exit(0 if id(test_db.engine.pool) != parent_pool and test_db.engine.pool.checkedin() == 0 else 1)
+        _, status = os.waitpid(pid, 0)
+        assert os.waitstatus_to_exitcode(status) == 0, "Child replaced the inherited pool"
+        assert id(test_db.engine.pool) == parent_pool, "Parent keeps its pool"
+    print("  ✓ Child discards inherited connections, parent's pool untouched")
+
+    # Test 5: Statement timeouts by blueprint
+    print("\nTest 5: Statement timeouts")
+    client = test_app.test_client()
+    oltp = client.get('/timeout').get_data(as_text=True)
+    analytics = client.get('/analytics/timeout').get_data(as_text=True)
+    with test_app.test_request_context('/analytics/timeout'):
+        assert EngineConfig.statement_timeout() == EngineConfig.ANALYTICS_STATEMENT_TIMEOUT_MS
+    with test_app.test_request_context('/timeout'):
+        assert EngineConfig.statement_timeout() is None, "OLTP keeps the connection default"
+    assert EngineConfig.statement_timeout() == EngineConfig.BACKGROUND_STATEMENT_TIMEOUT_MS
+    if oltp != 'n/a':
+        assert oltp == str(EngineConfig.STATEMENT_TIMEOUT_MS), oltp
+        assert analytics == str(EngineConfig.ANALYTICS_STATEMENT_TIMEOUT_MS), analytics
+    print(f"  ✓ OLTP {oltp}, analytics {analytics}")
+
+    print("\n" + "=" * 60)
+    print("All tests passed! ✅")
+    print("=" * 60)
+
+
+if __name__ == '__main__':
+    test_database_engine()
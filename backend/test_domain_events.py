@@ -0,0 +1,203 @@
+"""
+Test script for the domain event outbox and background side effects.
+"""
+import sys
+import os
+import tempfile
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from flask_jwt_extended import create_access_token
+from src.main import app
+from src.database import db
+from src.models.user import User
+from src.models.student import Student
+from src.models.assessment import Assessment, AssessmentResponse, Question, Skill
+from src.models.gamification import StudentProgress, XPTransaction
+from src.models.achievement import Achievement, StudentAchievement, AchievementProgressLog
+from src.models.student_session import StudentSession
+from src.models.streak import StreakTracking
+from src.models.activity_feed import ActivityFeed
+from src.models.domain_event import ProcessedEvent
+from src.services.achievement_service import AchievementService
+from src.services.domain_event_service import DomainEventService
+from src.services.event_outbox import EventOutbox
+
+
+def _cleanup():
+    """Remove test users and their data."""
+    for user in User.query.filter(User.username.like('domain_event_test_%')).all():
+        if user.student:
+            student_id = user.student.id
+            for assessment in Assessment.query.filter_by(student_id=student_id).all():
+                AssessmentResponse.query.filter_by(assessment_id=assessment.id).delete()
+                db.session.delete(assessment)
+            ProcessedEvent.query.filter_by(student_id=student_id).delete()
+            ActivityFeed.query.filter_by(student_id=student_id).delete()
+            StreakTracking.query.filter_by(student_id=student_id).delete()
+            StudentSession.query.filter_by(student_id=student_id).delete()
+            AchievementProgressLog.query.filter_by(student_id=student_id).delete()
+            StudentAchievement.query.filter_by(student_id=student_id).delete()
+            XPTransaction.query.filter_by(student_id=student_id).delete()
+            StudentProgress.query.filter_by(student_id=student_id).delete()
+            db.session.delete(user.student)
+        db.session.delete(user)
+    for skill in Skill.query.filter_by(name='Domain Event Test Skill').all():
+        Question.query.filter_by(skill_id=skill.id).delete()
+        db.session.delete(skill)
+    db.session.commit()
+
+
+def test_outbox_ordering():
+    """Events for one student are claimed one at a time and in order."""
+    print("Testing EventOutbox ordering...")
+    with tempfile.TemporaryDirectory() as directory:
+        outbox = EventOutbox(os.path.join(directory, 'outbox.db'))
+
+        first = outbox.stage('a:1', 'answer_submitted', 1, {'n': 1})
+        second = outbox.stage('a:2', 'answer_submitted', 1, {'n': 2})
+        other = outbox.stage('b:1', 'answer_submitted', 2, {'n': 1})
+        assert outbox.stage('a:1', 'answer_submitted', 1, {'n': 1}) is None, "Duplicate key should be ignored"
+        assert outbox.claim() is None, "Staged events should not be claimable"
+
+        outbox.release([second, other])
+        claimed = outbox.claim()
+        assert claimed['event_key'] == 'b:1', "Student 1 is blocked behind its staged first event"
+        assert outbox.claim() is None, "Nothing else should be ready"
+
+        outbox.release([first])
+        claimed = outbox.claim()
+        assert claimed['event_key'] == 'a:1', "Oldest event for the student comes first"
+        assert outbox.claim() is None, "Second event waits while the first is in flight"
+
+        outbox.retry(claimed['id'], 'boom', 0)
+        claimed = outbox.claim()
+        assert claimed['event_key'] == 'a:1' and claimed['attempts'] == 2, "Retried event keeps its place"
+        outbox.complete(claimed['id'])
+        assert outbox.claim()['event_key'] == 'a:2', "Next event is released after completion"
+
+        outbox.discard([outbox.stage('a:3', 'answer_submitted', 1, {})])
+        assert outbox.counts().get(EventOutbox.STAGED) is None, "Discarded events are removed"
+    print("  ✓ Per-student order, dedupe, retry and discard")
+
+
+def test_answer_side_effects():
+    """Submitting an answer applies side effects in the background."""
+    with app.app_context():
+        print("\nTesting answer_submitted side effects...")
+        print("=" * 60)
+
+        _cleanup()
+        AchievementService.seed_achievements()
+
+        user = User(username='domain_event_test_user', email='domain_event_test@test.com')
+        user.set_password('test123')
+        db.session.add(user)
+        db.session.flush()
+        student = Student(user_id=user.id, name='Domain Event Student', grade=5)
+        skill = Skill(name='Domain Event Test Skill', subject_area='arithmetic', grade_level=5)
+        db.session.add_all([student, skill])
+        db.session.flush()
+        questions = [
+            Question(skill_id=skill.id, question_text=f'{i} + {i}?', question_type='numeric',
+                     correct_answer=str(i * 2), difficulty='easy', grade_level=5)
+            for i in range(10)
+        ]
+        assessment = Assessment(student_id=student.id, assessment_type='skill_check',
+                                grade_level=5, total_questions=len(questions))
+        db.session.add_all(questions + [assessment])
+        db.session.commit()
+        print(f"✓ Created test student (ID: {student.id})")
+
+        client = app.test_client()
+        headers = {'Authorization': f'Bearer {create_access_token(identity=str(user.id))}'}
+
+        # Test 1: The request only writes the answer and the event
+        # (ten answers, enough for First Steps; the last one is wrong)
+        print("\nTest 1: Submit answers")
+        answers = [question.correct_answer for question in questions[:-1]] + ['wrong']
+        for question, answer in zip(questions, answers):
+            response = client.post(f'/api/assessments/{assessment.id}/submit', headers=headers, json={
+                'question_id': question.id,
+                'student_answer': answer,
+                'time_spent_seconds': 12
+            })
+            assert response.status_code == 201, response.get_json()
+        print("  ✓ Answers accepted")
+
+        # Test 2: Workers apply every side effect once
+        print("\nTest 2: Drain the outbox")
+        DomainEventService.drain()
+        db.session.expire_all()
+        assert ProcessedEvent.query.filter_by(student_id=student.id).count() == 10, "Each answer processed once"
+        assert XPTransaction.query.filter_by(student_id=student.id, action_type='question_complete').count() == 10, \
+            "Each answer should award XP"
+        session = StudentSession.query.filter_by(student_id=student.id, is_active=True).first()
+        assert session.questions_answered == 10 and session.questions_correct == 9, "Session counters updated"
+        assert StreakTracking.query.filter_by(student_id=student.id).first().practice_streak == 1, \
+            "Practice streak started"
+        first_steps = StudentAchievement.query.join(Achievement).filter(
+            StudentAchievement.student_id == student.id,
+            Achievement.name == 'First Steps'
+        ).first()
+        assert first_steps and first_steps.unlocked_at, "First Steps unlocks on the tenth answer"
+        assert ActivityFeed.query.filter_by(student_id=student.id, activity_type='achievement_unlock').count() >= 1, \
+            "First Steps unlock should reach the feed"
+        print("  ✓ XP, session, streak, achievements and feed applied")
+
+        # Test 3: Redelivery is a no-op
+        print("\nTest 3: Idempotent redelivery")
+        xp_before = StudentProgress.query.filter_by(student_id=student.id).first().total_xp
+        response_id = AssessmentResponse.query.filter_by(assessment_id=assessment.id).first().id
+        DomainEventService._apply({
+            'event_key': f'answer:{response_id}',
+            'event_type': 'answer_submitted',
+            'student_id': student.id,
+            'payload': {'response_id': response_id, 'correct': True}
+        })
+        db.session.expire_all()
+        assert StudentProgress.query.filter_by(student_id=student.id).first().total_xp == xp_before, \
+            "Redelivered event should not award XP again"
+        print("  ✓ Duplicate event skipped")
+
+        # Test 4: Rolled back requests publish nothing
+        print("\nTest 4: Rollback discards the event")
+        staged_before = DomainEventService.get_queue_stats().get(EventOutbox.STAGED, 0)
+        DomainEventService.publish('answer_submitted', student.id, {'response_id': -1}, event_key='answer:rollback-test')
+        db.session.rollback()
+        assert DomainEventService.get_queue_stats().get(EventOutbox.STAGED, 0) == staged_before, \
+            "Rolled back event should be discarded"
+        print("  ✓ Event discarded with its transaction")
+
+        # Test 5: Direct endpoints do not credit a submitted answer again
+        print("\nTest 5: No double counting")
+        xp_before = StudentProgress.query.filter_by(student_id=student.id).first().total_xp
+        award = client.post('/api/gamification/award-xp', headers=headers, json={
+            'action_type': 'question_complete',
+            'metadata': {'question_id': questions[0].id}
+        })
+        assert award.status_code == 409, award.get_json()
+        activity = client.post('/api/monitoring/session/activity', headers=headers, json={
+            'question_id': questions[0].id,
+            'correct': True
+        })
+        assert activity.status_code == 409, activity.get_json()
+        db.session.expire_all()
+        assert StudentProgress.query.filter_by(student_id=student.id).first().total_xp == xp_before, \
+            "Submitted answer should not earn XP twice"
+        assert StudentSession.query.filter_by(student_id=student.id, is_active=True).first().questions_answered == 10, \
+            "Submitted answer should not be tracked twice"
+        print("  ✓ award-xp and session activity refuse submitted answers")
+
+        # Clean up
+        print("\nCleaning up test data...")
+        _cleanup()
+        print("✓ Test data cleaned up")
+
+        print("\n" + "=" * 60)
+        print("All tests passed! ✅")
+        print("=" * 60)
+
+
+if __name__ == '__main__':
+    test_outbox_ordering()
+    test_answer_side_effects()
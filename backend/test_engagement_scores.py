@@ -0,0 +1,152 @@
+"""
+Test script for batch engagement scoring and stored scores.
+"""
+import sys
+import os
+import random
+from datetime import datetime, timedelta
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from src.main import app
+from src.database import db
+from src.models.user import User
+from src.models.student import Student
+from src.models.student_session import StudentSession, StudentDailyStats
+from src.models.engagement import EngagementScore
+from src.services.analytics_dashboard_service import AnalyticsDashboardService
+from src.services.daily_stats_service import DailyStatsService
+from src.services.engagement_service import EngagementService
+from src.services.monitoring_service import MonitoringService
+from testing_utils import count_statements
+
+
+def _cleanup():
+    """Remove test users and their data."""
+    for user in User.query.filter(User.username.like('engagement_test_%')).all():
+        if user.student:
+            EngagementScore.query.filter_by(student_id=user.student.id).delete()
+            StudentDailyStats.query.filter_by(student_id=user.student.id).delete()
+            StudentSession.query.filter_by(student_id=user.student.id).delete()
+            db.session.delete(user.student)
+        db.session.delete(user)
+    db.session.commit()
+
+
+def _reference_score(student_id, days=30):
+    """The original per-student score over raw sessions."""
+    start_date = datetime.utcnow() - timedelta(days=days)
+    sessions = StudentSession.query.filter(
+        StudentSession.student_id == student_id,
+        StudentSession.started_at >= start_date
+    ).all()
+    if not sessions:
+        return 0.0
+    frequency = min(len(sessions) / (days * 0.5) * 100, 100)
+    minutes = sum((s.ended_at - s.started_at).total_seconds() / 60 if s.ended_at else 0 for s in sessions)
+    time_score = min(minutes / (days * 15) * 100, 100)
+    questions = sum(s.questions_answered or 0 for s in sessions)
+    correct = sum(s.questions_correct or 0 for s in sessions)
+    accuracy = correct / questions * 100 if questions else 0
+    consistency = len(set(s.started_at.date() for s in sessions)) / days * 100
+    return frequency * 0.30 + time_score * 0.25 + accuracy * 0.25 + consistency * 0.20
+
+
+def test_engagement_scores():
+    """Test batch scores, bulk reads and refresh on session end."""
+    with app.app_context():
+        print("Testing Engagement Scores...")
+        print("=" * 60)
+
+        _cleanup()
+        rng = random.Random(13)
+        now = datetime.utcnow()
+
+        student_ids = []
+        for i in range(40):
+            user = User(username=f'engagement_test_{i}', email=f'engagement_test_{i}@test.com')
+            user.set_password('test123')
+            db.session.add(user)
+            db.session.flush()
+            student = Student(user_id=user.id, name=f'Engagement Student {i}', grade=5)
+            db.session.add(student)
+            db.session.flush()
+            student_ids.append(student.id)
+
+            # Stay clear of the window's first day, where whole-day and rolling windows differ
+            for _ in range(rng.randint(0, 12)):
+                started_at = now - timedelta(days=rng.randint(0, 28), minutes=rng.randint(0, 300))
+                answered = rng.randint(1, 20)
+                db.session.add(StudentSession(
+                    student_id=student.id,
+                    started_at=started_at,
+                    last_activity_at=started_at,
+                    ended_at=started_at + timedelta(minutes=rng.randint(1, 45)) if rng.random() < 0.9 else None,
+                    questions_answered=answered,
+                    questions_correct=rng.randint(0, answered),
+                    is_active=False
+                ))
+        db.session.commit()
+        DailyStatsService.rebuild(student_ids)
+        print(f"✓ Created {len(student_ids)} students with recent sessions")
+
+        # Test 1: Batch scores match the per-student computation
+        print("\nTest 1: Batch computation")
+        results, statements = count_statements(lambda: EngagementService.compute(student_ids))
+        assert statements == 1, "Scores should come from one aggregate query"
+        for student_id in student_ids:
+            assert abs(results[student_id]['score'] - _reference_score(student_id)) < 1e-6, \
+                "Batch score should match the per-student score"
+        print(f"  ✓ {len(student_ids)} scores in one query")
+
+        # Test 2: Bulk reads store missing scores and then read them back
+        print("\nTest 2: Bulk reads")
+        scores = EngagementService.get_scores(student_ids)
+        assert EngagementScore.query.filter(EngagementScore.student_id.in_(student_ids)).count() == len(student_ids), \
+            "Missing scores should be stored"
+        warm, statements = count_statements(lambda: EngagementService.get_scores(student_ids))
+        assert warm == scores, "Stored scores should be returned"
+        assert statements == 1, "Warm read should be one query"
+        _, small = count_statements(lambda: EngagementService.get_scores(student_ids[:5]))
+        assert small == statements, "Read cost should not depend on the number of students"
+        assert abs(AnalyticsDashboardService.calculate_engagement_score(student_ids[0]) - scores[student_ids[0]]) < 1e-9, \
+            "Dashboard score should come from the stored row"
+        print("  ✓ Scores read in bulk in one query")
+
+        # Test 3: Ending a session refreshes the stored score
+        print("\nTest 3: Refresh on session end")
+        student_id = student_ids[-1]
+        before = EngagementScore.query.filter_by(student_id=student_id).first().to_dict()
+        result, _ = MonitoringService.start_session(student_id)
+        for _ in range(4):
+            MonitoringService.track_session_activity(student_id, None, None, True)
+        MonitoringService.end_session(result['session']['id'])
+        after = EngagementScore.query.filter_by(student_id=student_id).first().to_dict()
+        assert after['sessions'] == before['sessions'] + 1, "Ended session should be counted"
+        assert after['questions_answered'] == before['questions_answered'] + 4, "Answers should be counted"
+        assert after['computed_at'] >= before['computed_at'], "Score should be recomputed"
+        print("  ✓ Stored score updated when the session ended")
+
+        # Test 4: Scheduled refresh covers everyone in the window
+        print("\nTest 4: Scheduled refresh")
+        EngagementScore.query.filter(EngagementScore.student_id.in_(student_ids)).delete(synchronize_session=False)
+        db.session.commit()
+        EngagementService.refresh()
+        stored = EngagementScore.query.filter(EngagementScore.student_id.in_(student_ids)).count()
+        practiced = db.session.query(StudentDailyStats.student_id).filter(
+            StudentDailyStats.student_id.in_(student_ids)
+        ).distinct().count()
+        assert stored == practiced, "Every student with practice in the window should be scored"
+        print(f"  ✓ {stored} scores refreshed")
+
+        # Clean up
+        print("\nCleaning up test data...")
+        _cleanup()
+        print("✓ Test data cleaned up")
+
+        print("\n" + "=" * 60)
+        print("All tests passed! ✅")
+        print("=" * 60)
+
+
+if __name__ == '__main__':
+    test_engagement_scores()
@@ -0,0 +1,147 @@
+"""
+Test script for batch performance forecasting.
+
+Also prints the SQL statements needed to forecast one student and a
+whole class; the count should not depend on the number of series.
+"""
+import sys
+import os
+import random
+from datetime import datetime, timedelta
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+import numpy as np
+from src.main import app
+from src.database import db
+from src.models.user import User
+from src.models.student import Student
+from src.models.student_session import StudentSession, StudentDailyStats
+from src.models.learning_path import LearningPath
+from src.models.assessment import Skill
+from src.services.forecast_service import ForecastService
+from src.services.predictive_analytics_service import PredictiveAnalyticsService
+from testing_utils import count_statements
+
+
+def _cleanup():
+    """Remove test users and their data."""
+    for user in User.query.filter(User.username.like('forecast_test_%')).all():
+        if user.student:
+            StudentDailyStats.query.filter_by(student_id=user.student.id).delete()
+            StudentSession.query.filter_by(student_id=user.student.id).delete()
+            LearningPath.query.filter_by(student_id=user.student.id).delete()
+            db.session.delete(user.student)
+        db.session.delete(user)
+    db.session.commit()
+    ForecastService.reset()
+
+
+def test_forecasting():
+    """Test least-squares fits, batch query counts and caching."""
+    with app.app_context():
+        print("Testing Batch Forecasting...")
+        print("=" * 60)
+
+        _cleanup()
+
+        # Test 1: The padded fit recovers known lines and skips empty weeks
+        print("\nTest 1: Vectorized fit")
+        questions = np.array([[10, 10, 10, 10], [10, 0, 10, 10], [0, 0, 0, 0]], dtype=float)
+        # Weekly accuracy 0.8, 0.7, 0.6, 0.5 (most recent first): +10% per week
+        correct = np.array([[8, 7, 6, 5], [9, 0, 9, 9], [0, 0, 0, 0]], dtype=float)
+        fits = ForecastService.fit(questions, correct)
+        assert abs(fits['slope'][0] - 0.1) < 1e-9, "Slope should be +0.1 per week"
+        assert abs(fits['intercept'][0] - 0.85) < 1e-9, "Line should reach 0.85 now"
+        assert abs(fits['slope'][1]) < 1e-9 and fits['weeks'][1] == 3, "Empty week left out"
+        assert fits['weeks'][2] == 0 and fits['slope'][2] == 0, "No data gives no trend"
+        print("  ✓ Slopes, intercepts and masks correct")
+
+        skill = Skill.query.first()
+        assert skill, "Seed skills before running this test"
+        rng = random.Random(15)
+        now = datetime.utcnow()
+        student_ids = []
+        for i in range(30):
+            user = User(username=f'forecast_test_{i}', email=f'forecast_test_{i}@test.com')
+            user.set_password('test123')
+            db.session.add(user)
+            db.session.flush()
+            student = Student(user_id=user.id, name=f'Forecast Student {i}', grade=5)
+            db.session.add(student)
+            db.session.flush()
+            student_ids.append(student.id)
+            db.session.add(LearningPath(student_id=student.id, skill_id=skill.id, current_accuracy=rng.choice([0.6, 0.75, 0.95])))
+
+            # Even students improve week over week, odd students decline
+            direction = 1 if i % 2 == 0 else -1
+            for week in range(4):
+                for _ in range(2):
+                    started_at = now - timedelta(days=week * 7 + rng.randint(1, 5))
+                    db.session.add(StudentSession(
+                        student_id=student.id,
+                        skill_id=skill.id,
+                        started_at=started_at,
+                        last_activity_at=started_at,
+                        ended_at=started_at + timedelta(minutes=15),
+                        questions_answered=20,
+                        questions_correct=int(20 * (0.65 - direction * 0.08 * week)),
+                        is_active=False
+                    ))
+        db.session.commit()
+        print(f"\n✓ Created {len(student_ids)} students with four weeks of sessions")
+
+        # Test 2: A class costs the same statements as one student
+        print("\nTest 2: Statements per batch")
+        ForecastService.reset()
+        single, one = count_statements(lambda: ForecastService.forecast_batch([(student_ids[0], None)]))
+        ForecastService.reset()
+        pairs = [(sid, None) for sid in student_ids] + [(sid, skill.id) for sid in student_ids]
+        forecasts, many = count_statements(lambda: ForecastService.forecast_batch(pairs))
+        print(f"  {1:>8} series: {one} statements")
+        print(f"  {len(pairs):>8} series: {many} statements")
+        assert one == many == 2, "Signatures plus one history query"
+        assert forecasts[0] == single[0], "Batch and single forecasts should agree"
+        for (student_id, _), forecast in zip(pairs, forecasts):
+            expected = 'improving' if student_ids.index(student_id) % 2 == 0 else 'declining'
+            assert forecast['trend'] == expected, "Trend direction should follow the data"
+            assert forecast['confidence'] == 'high', "Four clean weeks give high confidence"
+        print("  ✓ Constant statements, trends detected")
+
+        # Test 3: Unchanged series come from the cache
+        print("\nTest 3: Cache")
+        cached, statements = count_statements(lambda: ForecastService.forecast_batch(pairs))
+        assert cached == forecasts, "Cached forecasts should match"
+        assert statements == 1, "Only the signature query should run"
+
+        session = StudentSession.query.filter_by(student_id=student_ids[0]).first()
+        session.last_activity_at = datetime.utcnow()
+        session.questions_answered += 10
+        db.session.commit()
+        _, statements = count_statements(lambda: ForecastService.forecast_batch(pairs))
+        assert statements == 2, "A changed series should be refitted"
+        print("  ✓ Served from cache until a series changes")
+
+        # Test 4: Mastery predictions in one batch match single calls
+        print("\nTest 4: Mastery predictions")
+        mastery_pairs = [(sid, skill.id) for sid in student_ids]
+        predictions, statements = count_statements(lambda: ForecastService.predict_mastery_batch(mastery_pairs))
+        assert statements == 2, "Paths plus session counts"
+        for pair, prediction in zip(mastery_pairs[:5], predictions):
+            result, status = PredictiveAnalyticsService.predict_skill_mastery(*pair)
+            assert status == 200 and result['prediction'] == prediction, "Single call should match batch"
+        result, status = PredictiveAnalyticsService.forecast_class(0)
+        assert status == 200 and result['forecasts'] == [], "Unknown class has no forecasts"
+        print("  ✓ Batch and single predictions agree")
+
+        # Clean up
+        print("\nCleaning up test data...")
+        _cleanup()
+        print("✓ Test data cleaned up")
+
+        print("\n" + "=" * 60)
+        print("All tests passed! ✅")
+        print("=" * 60)
+
+
+if __name__ == '__main__':
+    test_forecasting()
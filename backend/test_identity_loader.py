@@ -0,0 +1,104 @@
+"""
+Test script for the request-scoped identity loader.
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from flask import g
+from flask_jwt_extended import create_access_token, verify_jwt_in_request
+from src.main import app
+from src.database import db
+from src.models.user import User
+from src.models.student import Student
+from src.models.teacher import Teacher
+from src.middleware.identity import IdentityLoader, current_identity
+from src.services.response_cache import ResponseCache, MemoryBackend
+from testing_utils import count_statements
+
+
+def _cleanup():
+    """Remove test users and their profiles."""
+    for user in User.query.filter(User.username.like('identity_test_%')).all():
+        Student.query.filter_by(user_id=user.id).delete()
+        Teacher.query.filter_by(user_id=user.id).delete()
+        db.session.delete(user)
+    db.session.commit()
+    ResponseCache.configure(MemoryBackend())
+    IdentityLoader.invalidate()
+
+
+def test_identity_loader():
+    """Test resolution, per-request and per-process caching, invalidation and routes."""
+    with app.app_context():
+        print("Testing Identity Loader...")
+        print("=" * 60)
+
+        _cleanup()
+        user = User(username='identity_test_student', email='identity_test_student@test.com')
+        user.set_password('test123')
+        db.session.add(user)
+        db.session.flush()
+        student = Student(user_id=user.id, name='Identity Student', grade=5)
+        db.session.add(student)
+        db.session.commit()
+        user_id, student_id = user.id, student.id
+        headers = {'Authorization': f'Bearer {create_access_token(identity=str(user_id))}'}
+        print("✓ Created a student user")
+
+        def resolve():
+            with app.test_request_context(headers=headers):
+                g.pop('identity', None)  # the test shares one app context
+                verify_jwt_in_request()
+                return current_identity(), current_identity()
+
+        # Test 1: One query per request, none while cached
+        print("\nTest 1: Resolution")
+        (identity, again), statements = count_statements(resolve)
+        assert statements == 1, f"User and profiles resolved in one query, saw {statements}"
+        assert identity is again, "Resolved once per request"
+        assert (identity.id, identity.role, identity.student_id, identity.teacher_id) == \
+            (user_id, 'student', student_id, None), identity
+        (cached, _), statements = count_statements(resolve)
+        assert statements == 0 and cached == identity, "Next request served from the cache"
+        print(f"  ✓ {identity}")
+
+        # Test 2: Committed profile changes are picked up
+        print("\nTest 2: Invalidation")
+        user = db.session.get(User, user_id)
+        user.role = 'teacher'
+        db.session.add(Teacher(user_id=user_id, name='Identity Teacher', email='identity_test_teacher@test.com'))
+        db.session.commit()
+        (identity, _), statements = count_statements(resolve)
+        assert statements == 1 and identity.role == 'teacher' and identity.teacher_id, identity
+        print("  ✓ Role change and new teacher profile seen on the next request")
+
+        # Test 3: Routes use the resolved identity
+        print("\nTest 3: Routes")
+        client = app.test_client()
+        assert client.get('/api/teachers/stats', headers=headers).status_code == 200, "token_required passes the identity"
+        friends = client.get('/api/friends', headers=headers)
+        assert friends.status_code == 200, friends.get_json()
+        progress = client.get('/api/gamification/progress', headers=headers)
+        assert progress.status_code == 200, progress.get_json()
+
+        # Bulk deletes skip flush events, so nothing bumps the user tag
+        Student.query.filter_by(user_id=user_id).delete()
+        db.session.commit()
+        IdentityLoader.invalidate(user_id)
+        assert client.get('/api/gamification/progress', headers=headers).status_code == 404, \
+            "Users without a student profile are rejected"
+        print("  ✓ token_required and jwt_required routes resolve the same identity")
+
+        # Clean up
+        print("\nCleaning up test data...")
+        _cleanup()
+        print("✓ Test data cleaned up")
+
+        print("\n" + "=" * 60)
+        print("All tests passed! ✅")
+        print("=" * 60)
+
+
+if __name__ == '__main__':
+    test_identity_loader()
@@ -0,0 +1,206 @@
+"""
+Test script for in-process leaderboard rank indexes.
+"""
+import sys
+import os
+import random
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from src.main import app
+from src.database import db
+from src.models.user import User
+from src.models.student import Student
+from src.models.gamification import StudentProgress, XPTransaction
+from src.models.achievement import Achievement, StudentAchievement
+from src.services.achievement_service import AchievementService
+from src.services.gamification_service import GamificationService
+from src.services.leaderboard_service import LeaderboardService
+from src.services.leaderboard_table_service import LeaderboardTableService
+from src.services.leaderboard_index_service import RankIndex, LeaderboardIndexService
+
+
+class SmallRankIndex(RankIndex):
+    """Rank index with tiny sublists so splits and merges are exercised."""
+    LOAD = 4
+
+
+def _cleanup():
+    """Remove test users and their data."""
+    for user in User.query.filter(User.username.like('rank_index_test_%')).all():
+        if user.student:
+            StudentAchievement.query.filter_by(student_id=user.student.id).delete()
+            XPTransaction.query.filter_by(student_id=user.student.id).delete()
+            StudentProgress.query.filter_by(student_id=user.student.id).delete()
+            db.session.delete(user.student)
+        db.session.delete(user)
+    db.session.commit()
+
+
+def test_rank_index_structure():
+    """Compare RankIndex against a brute-force sorted list."""
+    print("Testing RankIndex structure...")
+    rng = random.Random(42)
+    index = SmallRankIndex([(i, rng.randint(0, 20)) for i in range(30)])
+    scores = {i: index.get_score(i) for i in range(30)}
+
+    for step in range(500):
+        student_id = rng.randint(0, 60)
+        if rng.random() < 0.2:
+            index.remove(student_id)
+            scores.pop(student_id, None)
+        else:
+            score = rng.randint(0, 20)
+            index.set_score(student_id, score)
+            scores[student_id] = score
+
+        ordered = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+        assert len(index) == len(ordered)
+
+        for position, (sid, score) in enumerate(ordered, start=1):
+            assert index.position(sid) == position, "Position should match sorted order"
+
+        probe = rng.randint(0, 21)
+        assert index.count_above(probe) == sum(1 for s in scores.values() if s > probe)
+        probe_id = rng.randint(0, 60)
+        assert index.position_of(probe, probe_id) == 1 + sum(
+            1 for sid, s in scores.items() if (-s, sid) < (-probe, probe_id)
+        ), "Position of a key should count the keys ahead of it"
+
+        start = rng.randint(0, len(ordered))
+        stop = start + rng.randint(0, 7)
+        expected = [(p, sid, s) for p, (sid, s) in enumerate(ordered, start=1)][start:stop]
+        assert index.slice(start, stop) == expected, "Slice should match sorted order"
+
+    print("  ✓ Positions, counts and slices match brute force")
+
+
+def test_leaderboard_index():
+    """Test rank lookups and nearby windows through LeaderboardService."""
+    with app.app_context():
+        print("Testing Leaderboard Index...")
+        print("=" * 60)
+
+        _cleanup()
+        AchievementService.seed_achievements()
+
+        students = []
+        for i in range(8):
+            user = User(username=f'rank_index_test_{i}', email=f'rank_index_test_{i}@test.com')
+            user.set_password('test123')
+            db.session.add(user)
+            db.session.flush()
+
+            student = Student(user_id=user.id, name=f'Index Student {i}', grade=4)
+            db.session.add(student)
+            students.append(student)
+        db.session.commit()
+
+        print("✓ Created 8 test students")
+
+        # Test 1: Ranks follow committed XP awards
+        print("\nTest 1: Global XP rank")
+        for i, student in enumerate(students):
+            GamificationService.award_xp(student.id, 'question_complete', base_xp=(i % 4) * 25 + 5)
+
+        for student in students:
+            rank_info = LeaderboardService.get_student_rank(student.id, 'global_xp')
+            progress = StudentProgress.query.filter_by(student_id=student.id).first()
+            expected = StudentProgress.query.filter(db.or_(
+                StudentProgress.total_xp > progress.total_xp,
+                db.and_(StudentProgress.total_xp == progress.total_xp, StudentProgress.student_id < student.id)
+            )).count() + 1
+            assert rank_info['rank'] == expected, "Rank should be the position, ties broken by id"
+            assert rank_info['metric_value'] == progress.total_xp
+        nearby = LeaderboardService.get_nearby_students(students[1].id, 'global_xp', range_size=1)
+        own = next(e for e in nearby if e['student_id'] == students[1].id)
+        assert own['rank'] == LeaderboardService.get_student_rank(students[1].id, 'global_xp')['rank'], \
+            "Rank lookups and nearby windows should agree"
+        print("  ✓ Ranks match positions in the table")
+
+        # Test 2: Achievement ranks are real ranks
+        print("\nTest 2: Achievements rank")
+        achievements = Achievement.query.order_by(Achievement.id).limit(3).all()
+        for i, student in enumerate(students[:3]):
+            for achievement in achievements[:i + 1]:
+                sa = AchievementService.get_or_create_student_achievement(student.id, achievement.id)
+                sa.progress = achievement.requirement_value
+                db.session.commit()
+                AchievementService.unlock_achievement(student.id, achievement.id)
+
+        rank_info = LeaderboardService.get_student_rank(students[2].id, 'achievements')
+        assert rank_info['metric_value'] == 3, "Student 2 should have 3 achievements"
+        with LeaderboardIndexService.reading(LeaderboardTableService.ACHIEVEMENTS) as index:
+            higher = index.count_above(3)
+        assert rank_info['rank'] > higher, "Achievement rank should not be hard-coded"
+        rank_info = LeaderboardService.get_student_rank(students[0].id, 'achievements')
+        assert rank_info['rank'] > 1 or higher == 0, "Fewer achievements should rank lower"
+
+        # Students missing from the index rank with 0
+        LeaderboardTableService.remove_student(LeaderboardTableService.ACHIEVEMENTS, students[7].id)
+        db.session.commit()
+        rank_info = LeaderboardService.get_student_rank(students[7].id, 'achievements')
+        with LeaderboardIndexService.reading(LeaderboardTableService.ACHIEVEMENTS) as index:
+            expected_rank = index.position_of(0, students[7].id)
+            indexed = len(index)
+        assert rank_info is not None and rank_info['metric_value'] == 0, "New students should still rank"
+        assert rank_info['rank'] == expected_rank, "Ranked by position with a score of 0"
+        assert rank_info['total_students'] == indexed + 1, "Counted among the students"
+        print("  ✓ Achievement ranks computed from the index, missing students rank with 0")
+
+        # Test 3: Nearby window is contiguous around the student
+        print("\nTest 3: Nearby students")
+        nearby = LeaderboardService.get_nearby_students(students[3].id, 'global_xp', range_size=2)
+        ranks = [entry['rank'] for entry in nearby]
+        assert ranks == list(range(ranks[0], ranks[0] + len(ranks))), "Window should be contiguous"
+        assert students[3].id in [entry['student_id'] for entry in nearby], "Window should contain student"
+        xp_values = [entry['total_xp'] for entry in nearby]
+        assert xp_values == sorted(xp_values, reverse=True), "Window should be ordered by XP"
+        print(f"  ✓ Window ranks {ranks}")
+
+        # Test 4: Rolled back changes never reach the index
+        print("\nTest 4: Rollback")
+        before = LeaderboardService.get_student_rank(students[0].id, 'global_xp')
+        LeaderboardTableService.record_xp(students[0].id, 10 ** 9)
+        db.session.rollback()
+        after = LeaderboardService.get_student_rank(students[0].id, 'global_xp')
+        assert after == before, "Rolled back score should not be indexed"
+        print("  ✓ Index unchanged after rollback")
+
+        # Test 5: Periodic reseeds load in the background
+        print("\nTest 5: Background reseed")
+        board = LeaderboardTableService.GLOBAL_XP
+        state = LeaderboardIndexService._indexes[(board, 0)]
+        with LeaderboardIndexService.reading(board) as index:
+            old_index = index
+        LeaderboardTableService.update_score(board, students[5].id, 10 ** 6)
+        db.session.commit()
+
+        interval = LeaderboardIndexService.RESEED_INTERVAL_SECONDS
+        LeaderboardIndexService.RESEED_INTERVAL_SECONDS = 0
+        try:
+            with LeaderboardIndexService.reading(board) as index:
+                assert index is old_index, "Readers keep the current index while it reloads"
+            state['reseeder'].join(timeout=10)
+        finally:
+            LeaderboardIndexService.RESEED_INTERVAL_SECONDS = interval
+
+        with LeaderboardIndexService.reading(board) as index:
+            assert index is not old_index, "The reloaded index is swapped in"
+            assert index.position(students[5].id) == 1, "Committed changes survive the swap"
+        print("  ✓ Reseed swapped in without blocking readers")
+
+        # Clean up
+        print("\nCleaning up test data...")
+        _cleanup()
+        LeaderboardTableService.rebuild()
+        LeaderboardIndexService.reset()
+        print("✓ Test data cleaned up")
+
+        print("\n" + "=" * 60)
+        print("All tests passed! ✅")
+        print("=" * 60)
+
+
+if __name__ == '__main__':
+    test_rank_index_structure()
+    test_leaderboard_index()
@@ -0,0 +1,166 @@
+"""
+Test script for materialized leaderboard rank tables.
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from src.main import app
+from src.database import db
+from src.models.user import User
+from src.models.student import Student
+from src.models.gamification import StudentProgress, XPTransaction
+from src.services.gamification_service import GamificationService
+from src.services.leaderboard_table_service import LeaderboardTableService
+from testing_utils import record_statements
+
+
+def _cleanup():
+    """Remove test users and their data."""
+    for user in User.query.filter(User.username.like('rank_table_test_%')).all():
+        if user.student:
+            XPTransaction.query.filter_by(student_id=user.student.id).delete()
+            StudentProgress.query.filter_by(student_id=user.student.id).delete()
+            db.session.delete(user.student)
+        db.session.delete(user)
+    db.session.commit()
+
+
+def _board_snapshot(board, scope=0):
+    """Get (rank, student_id, score) for every entry on a board."""
+    return [
+        (rank, student_id, score)
+        for rank, score, student_id, _, _, _ in LeaderboardTableService.get_page(board, scope=scope, limit=10 ** 6)
+    ]
+
+
+def _expected_order(grade=None):
+    """Compute the board order straight from StudentProgress."""
+    query = db.session.query(StudentProgress.student_id, StudentProgress.total_xp).join(
+        Student, Student.id == StudentProgress.student_id
+    )
+    if grade is not None:
+        query = query.filter(Student.grade == grade)
+    rows = query.order_by(StudentProgress.total_xp.desc(), StudentProgress.student_id).all()
+    return [(i, sid, xp) for i, (sid, xp) in enumerate(rows, start=1)]
+
+
+def test_leaderboard_rank_tables():
+    """Test incremental maintenance of leaderboard rank tables."""
+    with app.app_context():
+        print("Testing Leaderboard Rank Tables...")
+        print("=" * 60)
+
+        _cleanup()
+
+        students = []
+        for i in range(6):
+            user = User(username=f'rank_table_test_{i}', email=f'rank_table_test_{i}@test.com')
+            user.set_password('test123')
+            db.session.add(user)
+            db.session.flush()
+
+            student = Student(user_id=user.id, name=f'Rank Student {i}', grade=7)
+            db.session.add(student)
+            students.append(student)
+        db.session.commit()
+        print("✓ Created 6 test students")
+
+        # Test 1: New students join the count boards with 0
+        print("\nTest 1: New students")
+        for board in (LeaderboardTableService.SKILLS, LeaderboardTableService.ACHIEVEMENTS):
+            for student in students:
+                entry = LeaderboardTableService.get_entry(board, student.id)
+                assert entry is not None and entry.score == 0, f"New students should be on {board} with 0"
+        assert LeaderboardTableService.get_entry(LeaderboardTableService.GLOBAL_XP, students[0].id) is None, \
+            "XP boards list students once they have progress"
+        print("  ✓ Zero-score entries created with the students")
+
+        # Test 2: Awards keep the global and grade boards ordered
+        print("\nTest 2: Incremental XP awards")
+        awards = [(0, 40), (1, 120), (2, 40), (3, 300), (4, 5), (5, 120), (0, 200), (4, 500), (2, 1)]
+        for index, amount in awards:
+            GamificationService.award_xp(students[index].id, 'question_complete', base_xp=amount)
+            assert _board_snapshot(LeaderboardTableService.GRADE_XP, 7) == _expected_order(grade=7), \
+                "Grade board should match source ordering"
+            assert _board_snapshot(LeaderboardTableService.GLOBAL_XP) == _expected_order(), \
+                "Global board should match source ordering"
+
+        # Jumping from last to first rewrites only the student's own rows
+        student_id = students[2].id
+        _, statements = record_statements(
+            lambda: GamificationService.award_xp(student_id, 'question_complete', base_xp=5000)
+        )
+        rank_writes = [s for s in statements if s.startswith('UPDATE leaderboard_ranks')]
+        assert len(rank_writes) == 2, "One row each on the global and grade boards"
+        assert _board_snapshot(LeaderboardTableService.GLOBAL_XP) == _expected_order(), \
+            "Global board should match source ordering"
+        print("  ✓ Boards stay ordered after each award, moves write one row per board")
+
+        # Test 3: Ties are broken by student id
+        print("\nTest 3: Tie-breaking")
+        grade_board = _board_snapshot(LeaderboardTableService.GRADE_XP, 7)
+        tied = [sid for _, sid, xp in grade_board if xp == 120]
+        assert tied == sorted(tied), "Tied students should be ordered by id"
+        print("  ✓ Ties ordered by student id")
+
+        # Test 4: Score decreases move the student down
+        print("\nTest 4: Score decrease")
+        top_student_id = grade_board[0][1]
+        progress = StudentProgress.query.filter_by(student_id=top_student_id).first()
+        progress.total_xp = 0
+        db.session.commit()
+        assert _board_snapshot(LeaderboardTableService.GRADE_XP, 7) == _expected_order(grade=7), \
+            "Board should match after a decrease"
+        print("  ✓ Student moved down after decrease")
+
+        # Test 5: Page reads
+        print("\nTest 5: Page reads")
+        rows, statements = record_statements(
+            lambda: LeaderboardTableService.get_page(LeaderboardTableService.GRADE_XP, scope=7, limit=2, offset=2)
+        )
+        assert [r[0] for r in rows] == [3, 4], "Page should start after the offset"
+        page_read = [s for s in statements if s.startswith('SELECT leaderboard_ranks.score')]
+        assert 'leaderboard_ranks.student_id > ?' in page_read[0], "Deep pages should seek, not skip rows"
+        full = LeaderboardTableService.get_page(LeaderboardTableService.GRADE_XP, scope=7, limit=10)
+        assert [r[2] for r in rows] == [r[2] for r in full[2:4]], "Pages should continue the first page"
+        assert LeaderboardTableService.get_page(LeaderboardTableService.GRADE_XP, scope=7, offset=len(full)) == []
+        assert [LeaderboardTableService.get_rank(LeaderboardTableService.GRADE_XP, r[2], scope=7) for r in rows] == [3, 4], \
+            "Single rank lookups should agree with pages"
+        print("  ✓ Pages read in rank order")
+
+        # Test 6: Grade change removes the old grade entry
+        print("\nTest 6: Grade change")
+        moved = students[1]
+        moved.grade = 6
+        db.session.commit()
+        assert LeaderboardTableService.get_entry(LeaderboardTableService.GRADE_XP, moved.id, scope=7) is None, \
+            "Old grade entry should be removed"
+        assert LeaderboardTableService.get_entry(LeaderboardTableService.GRADE_XP, moved.id, scope=6) is not None, \
+            "New grade entry should exist"
+        assert _board_snapshot(LeaderboardTableService.GRADE_XP, 7) == _expected_order(grade=7), \
+            "Old grade board should close the gap"
+        print("  ✓ Student moved between grade boards")
+
+        # Test 7: Rebuild reproduces the incremental state
+        print("\nTest 7: Rebuild")
+        before = _board_snapshot(LeaderboardTableService.GLOBAL_XP)
+        counts = LeaderboardTableService.rebuild(LeaderboardTableService.GLOBAL_XP)
+        after = _board_snapshot(LeaderboardTableService.GLOBAL_XP)
+        assert counts[LeaderboardTableService.GLOBAL_XP] == len(after), "Rebuild count should match rows"
+        assert before == after, "Rebuild should match incremental maintenance"
+        print("  ✓ Rebuild matches incremental ranks")
+
+        # Clean up
+        print("\nCleaning up test data...")
+        _cleanup()
+        LeaderboardTableService.rebuild()
+        print("✓ Test data cleaned up")
+
+        print("\n" + "=" * 60)
+        print("All tests passed! ✅")
+        print("=" * 60)
+
+
+if __name__ == '__main__':
+    test_leaderboard_rank_tables()
@@ -0,0 +1,193 @@
+"""
+Test script for sketch-backed platform metrics.
+"""
+import sys
+import os
+import random
+from datetime import datetime, timedelta
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from src.main import app
+from src.database import db
+from src.models.user import User
+from src.models.student import Student
+from src.models.student_session import StudentSession
+from src.models.platform_metrics import PlatformDailyActivity, PlatformMetricsSnapshot
+from src.services.admin_service import AdminService
+from src.services.hyperloglog import HyperLogLog
+from src.services.platform_metrics_service import PlatformMetricsService
+from src.services.daily_stats_service import DailyStatsService
+from testing_utils import count_statements, record_statements
+
+
+def _cleanup():
+    """Remove test users and their data."""
+    for user in User.query.filter(User.username.like('platform_test_%')).all():
+        if user.student:
+            StudentSession.query.filter_by(student_id=user.student.id).delete()
+            db.session.delete(user.student)
+        db.session.delete(user)
+    db.session.commit()
+    PlatformMetricsService.reset()
+
+
+def _exact_active(days):
+    """Exact distinct students with a session in the last `days` days."""
+    first_day = datetime.utcnow().date() - timedelta(days=days - 1)
+    return db.session.query(StudentSession.student_id).filter(
+        StudentSession.started_at >= datetime.combine(first_day, datetime.min.time())
+    ).distinct().count()
+
+
+def test_platform_metrics():
+    """Test sketch accuracy, merging, window estimates and snapshots."""
+    with app.app_context():
+        print("Testing Platform Metrics...")
+        print("=" * 60)
+
+        # Test 1: Sketch accuracy and merging
+        print("\nTest 1: HyperLogLog")
+        small = HyperLogLog()
+        for value in range(50):
+            small.add(value)
+            small.add(value)
+        assert small.count() == 50, "Small counts should be exact"
+
+        first, second, union = HyperLogLog(), HyperLogLog(), HyperLogLog()
+        for value in range(60000):
+            (first if value % 2 else second).add(value)
+            union.add(value)
+        for value in range(30000):
+            first.add(value)
+        merged = HyperLogLog.from_bytes(first.to_bytes()).merge(second)
+        assert merged.to_bytes() == union.to_bytes(), "Merge should equal the sketch of the union"
+        error = abs(merged.count() - 60000) / 60000
+        assert error < 0.05, f"Estimate off by {error:.1%}"
+        print(f"  ✓ 60000 distinct values estimated within {error:.1%}")
+
+        # Test 2: Window estimates match exact distinct counts
+        print("\nTest 2: Active user windows")
+        _cleanup()
+        rng = random.Random(19)
+        now = datetime.utcnow()
+        student_ids = []
+        for i in range(40):
+            user = User(username=f'platform_test_{i}', email=f'platform_test_{i}@test.com')
+            user.set_password('test123')
+            db.session.add(user)
+            db.session.flush()
+            student = Student(user_id=user.id, name=f'Platform Student {i}', grade=5)
+            db.session.add(student)
+            db.session.flush()
+            student_ids.append(student.id)
+            for _ in range(rng.randint(0, 5)):
+                started_at = now - timedelta(days=rng.randint(0, 45), minutes=rng.randint(0, 60))
+                db.session.add(StudentSession(
+                    student_id=student.id,
+                    started_at=started_at,
+                    last_activity_at=started_at,
+                    ended_at=started_at + timedelta(minutes=10),
+                    questions_answered=5,
+                    questions_correct=4,
+                    is_active=False
+                ))
+        db.session.commit()
+        # Fixtures bypass the session hooks that maintain the daily rollup
+        DailyStatsService.rebuild(student_ids)
+        PlatformMetricsService.backfill()
+
+        # Without a stored snapshot the request serves zeros and one refresh runs in the background
+        (result, status), statements = record_statements(AdminService.get_platform_metrics)
+        assert status == 200 and result['metrics']['as_of'] is None, "Nothing computed on the request path"
+        assert not any('student_daily_stats' in s or 'count(' in s.lower() for s in statements), \
+            "The request runs no aggregate queries"
+        PlatformMetricsService._refresher.join(timeout=30)
+        PlatformMetricsService._snapshot = None
+        result, status = AdminService.get_platform_metrics()
+        assert status == 200 and result['metrics']['as_of'] is not None, "Background refresh stored"
+        activity = result['metrics']['activity']
+        for key, days in (('active_users_week', 7), ('active_users_month', 30)):
+            exact = _exact_active(days)
+            assert abs(activity[key] - exact) <= max(2, exact * 0.05), f"{key} should be close to {exact}"
+            print(f"  {days:>8} days: {activity[key]} estimated, {exact} exact")
+        today = PlatformDailyActivity.query.filter_by(day=now.date()).first()
+        assert today is not None, "Today's sketch should be stored"
+        sessions = StudentSession.query.filter(StudentSession.student_id.in_(student_ids)).count()
+        assert activity['total_sessions'] >= sessions, "Totals summed from the daily rollup"
+        print("  ✓ Window estimates close to exact counts")
+
+        # Test 3: Endpoints read the snapshot without queries
+        print("\nTest 3: Constant-time endpoints")
+        _, statements = count_statements(AdminService.get_platform_metrics)
+        assert statements == 0, "Metrics should come from the snapshot"
+        (result, status), statements = count_statements(AdminService.get_system_health)
+        assert status == 200 and statements == 0, "Health should come from the snapshot"
+        assert result['health']['database']['table_counts']['users'] >= 40, "Table counts included"
+        print("  ✓ No statements per request")
+
+        # Test 4: A refresh picks up new sessions for today
+        print("\nTest 4: Refresh")
+        user = User(username='platform_test_new', email='platform_test_new@test.com')
+        user.set_password('test123')
+        db.session.add(user)
+        db.session.flush()
+        student = Student(user_id=user.id, name='Platform Student New', grade=5)
+        db.session.add(student)
+        db.session.flush()
+        session = StudentSession(
+            student_id=student.id,
+            started_at=datetime.utcnow(),
+            last_activity_at=datetime.utcnow(),
+            questions_answered=0,
+            questions_correct=0
+        )
+        db.session.add(session)
+        db.session.flush()
+        DailyStatsService.record_session_start(session)
+        db.session.commit()
+        cached = PlatformMetricsService.get_snapshot()['active_users'][7]
+        refreshed = PlatformMetricsService.refresh()['active_users'][7]
+        exact = _exact_active(7)
+        assert abs(refreshed - exact) <= max(2, exact * 0.05), "Refresh should include today's new student"
+        assert refreshed > cached, "Newly active student counted after the refresh"
+        print(f"  ✓ {cached} -> {refreshed} active this week after refresh")
+
+        # Test 5: Other processes read the stored snapshot; one refreshes it
+        print("\nTest 5: Shared snapshot")
+        PlatformMetricsService._snapshot = None
+        stored, statements = count_statements(PlatformMetricsService.get_snapshot)
+        assert statements == 1, "A process without a copy reads the stored row"
+        assert stored['active_users'][7] == refreshed, "Stored windows keyed by days"
+        stale_at = datetime.utcnow() - timedelta(seconds=PlatformMetricsService.REFRESH_INTERVAL_SECONDS + 1)
+        PlatformMetricsSnapshot.query.update({'computed_at': stale_at})
+        db.session.commit()
+        now = datetime.utcnow()
+        assert PlatformMetricsService._claim_refresh(now), "First process claims the refresh"
+        assert not PlatformMetricsService._claim_refresh(now), "Only one process refreshes"
+        PlatformMetricsService._snapshot = None
+        PlatformMetricsService._refresher = None
+        assert PlatformMetricsService.get_snapshot()['computed_at'] == stale_at, "Others serve the stored one"
+        assert PlatformMetricsService._refresher is None, "Only the claiming process refreshes"
+
+        PlatformMetricsSnapshot.query.update({'refreshing_at': None})
+        db.session.commit()
+        PlatformMetricsService._snapshot = None
+        assert PlatformMetricsService.get_snapshot()['computed_at'] == stale_at, "Stale snapshot served meanwhile"
+        PlatformMetricsService._refresher.join(timeout=30)
+        PlatformMetricsService._snapshot = None
+        assert PlatformMetricsService.get_snapshot()['computed_at'] > stale_at, "Refreshed in the background"
+        print("  ✓ One stored snapshot, one background refresher")
+
+        # Clean up
+        print("\nCleaning up test data...")
+        _cleanup()
+        PlatformMetricsService.backfill()
+        print("✓ Test data cleaned up")
+
+        print("\n" + "=" * 60)
+        print("All tests passed! ✅")
+        print("=" * 60)
+
+
+if __name__ == '__main__':
+    test_platform_metrics()
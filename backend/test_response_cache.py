@@ -0,0 +1,237 @@
+"""
+Test script for the shared response cache.
+
+The Redis backend is tested against a small in-process stand-in that
+speaks the subset of the Redis protocol the backend uses.
+"""
+import sys
+import os
+import fnmatch
+import socketserver
+import tempfile
+import threading
+import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from flask import jsonify
+from flask_jwt_extended import create_access_token
+from src.main import app
+from src.database import db
+from src.models.user import User
+from src.models.student import Student
+from src.models.gamification import StudentProgress
+from src.services.response_cache import (
+    ResponseCache, MemoryBackend, SQLiteBackend, RedisBackend, backend_from_url
+)
+
+
+class _StandInRedis(socketserver.ThreadingTCPServer):
+    """In-memory server for GET, SET (PX/NX), DEL, SCAN and SELECT."""
+
+    allow_reuse_address = True
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), _StandInHandler)
+        self.data = {}
+        self.lock = threading.Lock()
+
+
+class _StandInHandler(socketserver.StreamRequestHandler):
+
+    def handle(self):
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            args = []
+            for _ in range(int(line[1:])):
+                length = int(self.rfile.readline()[1:])
+                args.append(self.rfile.read(length + 2)[:-2])
+            self.wfile.write(self._execute(args))
+
+    def _execute(self, args):
+        command, args = args[0].upper(), args[1:]
+        data, now = self.server.data, time.monotonic()
+        with self.server.lock:
+            for key in [k for k, (_, expires) in data.items() if expires and expires <= now]:
+                del data[key]
+            if command == b'GET':
+                value = data.get(args[0])
+                return b'$-1\r\n' if value is None else b'$%d\r\n%s\r\n' % (len(value[0]), value[0])
+            if command == b'SET':
+                options = [arg.upper() for arg in args[2:]]
+                if b'NX' in options and args[0] in data:
+                    return b'$-1\r\n'
+                expires = now + int(args[2 + options.index(b'PX') + 1]) / 1000 if b'PX' in options else None
+                data[args[0]] = (args[1], expires)
+                return b'+OK\r\n'
+            if command == b'DEL':
+                return b':%d\r\n' % sum(data.pop(key, None) is not None for key in args)
+            if command == b'SCAN':
+                pattern = args[args.index(b'MATCH') + 1].decode()
+                keys = [key for key in data if fnmatch.fnmatchcase(key.decode(), pattern)]
+                return b'*2\r\n$1\r\n0\r\n*%d\r\n' % len(keys) + b''.join(
+                    b'$%d\r\n%s\r\n' % (len(key), key) for key in keys
+                )
+            if command == b'SELECT':
+                return b'+OK\r\n'
+            return b'-ERR unknown command\r\n'
+
+
+def _cleanup():
+    """Remove test users and their data."""
+    for user in User.query.filter(User.username.like('response_cache_test_%')).all():
+        if user.student:
+            StudentProgress.query.filter_by(student_id=user.student.id).delete()
+            db.session.delete(user.student)
+        db.session.delete(user)
+    db.session.commit()
+    ResponseCache.configure(MemoryBackend())
+
+
+def _check_backend(backend, label):
+    """Shared get/set/add/delete/clear/TTL checks for one backend."""
+    backend.set('a', b'first', 60)
+    assert backend.get('a') == b'first', f"{label}: value stored"
+    assert backend.get('missing') is None, f"{label}: missing key"
+    assert backend.add('a', b'second', 60) is False, f"{label}: add keeps an existing key"
+    assert backend.add('b', b'second', 60) is True, f"{label}: add stores a new key"
+    backend.set('short', b'x', 0.05)
+    time.sleep(0.1)
+    assert backend.get('short') is None, f"{label}: entries expire"
+    backend.delete('a')
+    assert backend.get('a') is None, f"{label}: delete"
+    backend.clear()
+    assert backend.get('b') is None, f"{label}: clear"
+
+
+def test_response_cache():
+    """Test backends, identity-aware keys, single flight and metrics."""
+    with app.app_context():
+        print("Testing Response Cache...")
+        print("=" * 60)
+
+        # Test 1: Backends
+        print("\nTest 1: Backends")
+        memory = MemoryBackend(max_entries=3)
+        _check_backend(memory, 'memory')
+        for key in 'wxyz':
+            memory.set(key, key.encode(), 60)
+            memory.get('w')
+        assert memory.get('w') == b'w' and memory.get('x') is None, "Least recently used evicted"
+        assert len(memory) == 3 and memory.evictions == 1, "Bounded at max_entries"
+        print("  ✓ Memory backend is a bounded LRU")
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'cache.db')
+            worker_one, worker_two = SQLiteBackend(path, max_entries=5), SQLiteBackend(path, max_entries=5)
+            _check_backend(worker_one, 'sqlite')
+            worker_one.set('shared', b'from worker one', 60)
+            assert worker_two.get('shared') == b'from worker one', "Workers share the file"
+            for i in range(10):
+                worker_two.set(f'key{i}', b'v', 60)
+            worker_two.prune()
+            assert len(worker_two) == 5, "Pruned back to max_entries"
+            assert isinstance(backend_from_url(f'sqlite://{path}'), SQLiteBackend), "URL selects SQLite"
+            default = backend_from_url('sqlite://', instance_path=os.path.join(tmp, 'instance'))
+            assert default.path == os.path.join(tmp, 'instance', 'response_cache.db'), "Default lives in the instance folder"
+            assert os.stat(default.path).st_mode & 0o777 == 0o600, "Cache file readable by its owner only"
+        print("  ✓ SQLite backend shared between workers and bounded, private by default")
+
+        server = _StandInRedis()
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        try:
+            host, port = server.server_address
+            redis = backend_from_url(f'redis://{host}:{port}/0')
+            assert isinstance(redis, RedisBackend), "URL selects Redis"
+            _check_backend(redis, 'redis')
+            redis.set('kept', b'v', 60)
+            server.data[b'other:key'] = (b'v', None)
+            redis.clear()
+            assert b'other:key' in server.data and redis.get('kept') is None, "clear() only touches prefixed keys"
+        finally:
+            server.shutdown()
+            server.server_close()
+        print("  ✓ Redis backend works against a protocol stand-in")
+
+        # Test 2: Keys include the identity and the query string
+        print("\nTest 2: Endpoint caching")
+        _cleanup()
+        headers = []
+        for i in range(2):
+            user = User(username=f'response_cache_test_{i}', email=f'response_cache_test_{i}@test.com')
+            user.set_password('test123')
+            db.session.add(user)
+            db.session.flush()
+            student = Student(user_id=user.id, name=f'Cache Student {i}', grade=5)
+            db.session.add(student)
+            db.session.flush()
+            db.session.add(StudentProgress(student_id=student.id, total_xp=10 ** 9 * (i + 1), current_level=2))
+            headers.append({'Authorization': f'Bearer {create_access_token(identity=str(user.id))}'})
+        db.session.commit()
+
+        client = app.test_client()
+        first = client.get('/api/gamification/leaderboard?limit=100', headers=headers[0])
+        again = client.get('/api/gamification/leaderboard?limit=100', headers=headers[0])
+        other = client.get('/api/gamification/leaderboard?limit=100', headers=headers[1])
+        assert first.status_code == 200, first.get_json()
+        assert first.headers['X-Cache'] == 'MISS' and again.headers['X-Cache'] == 'HIT', "Second call served from cache"
+        assert again.get_json() == first.get_json(), "Cached body unchanged"
+        assert other.headers['X-Cache'] == 'MISS', "Another user gets their own entry"
+        assert other.get_json()['current_user_rank'] != first.get_json()['current_user_rank'], "Per-user flags kept"
+        print("  ✓ Per-user entries for the personalised leaderboard")
+
+        paged = client.get('/api/gamification/leaderboard?limit=1', headers=headers[0])
+        assert paged.headers['X-Cache'] == 'MISS' and len(paged.get_json()['leaderboard']) == 1, \
+            "Query string is part of the key"
+        catalog = [client.get('/api/assessments/skills', headers=h).headers['X-Cache'] for h in headers]
+        assert catalog == ['MISS', 'HIT'], "Skill catalogue shared by every user"
+        assert client.get('/api/gamification/leaderboard').status_code == 401, "Authentication still required"
+        print("  ✓ Query strings keyed; shared catalogue; auth runs first")
+
+        # Test 3: Concurrent misses compute once
+        print("\nTest 3: Single flight")
+        calls = []
+
+        def slow_view():
+            calls.append(1)
+            time.sleep(0.2)
+            return jsonify({'value': 42})
+
+        def request_it(results):
+            with app.test_request_context('/api/test/slow'):
+                response = ResponseCache.get_or_compute('slow', 'resp:slow:1', 60, slow_view)
+                results.append(response.get_json()['value'])
+
+        results = []
+        threads = [threading.Thread(target=request_it, args=(results,)) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert len(calls) == 1 and results == [42] * 8, "One computation for eight concurrent requests"
+        print("  ✓ Eight concurrent misses ran the view once")
+
+        # Test 4: Metrics
+        print("\nTest 4: Metrics")
+        stats = ResponseCache.stats()
+        slow = stats['namespaces']['slow']
+        assert slow['misses'] == 1 and slow['coalesced'] == 7, slow
+        gamification = stats['namespaces']['gamification_leaderboard']
+        assert gamification['hits'] == 1 and gamification['misses'] == 3, gamification
+        assert stats['backend'] == 'MemoryBackend' and 'errors' not in stats['totals'], "No backend errors"
+        print(f"  ✓ {stats['totals']}")
+
+        # Clean up
+        print("\nCleaning up test data...")
+        _cleanup()
+        print("✓ Test data cleaned up")
+
+        print("\n" + "=" * 60)
+        print("All tests passed! ✅")
+        print("=" * 60)
+
+
+if __name__ == '__main__':
+    test_response_cache()
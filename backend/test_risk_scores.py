@@ -0,0 +1,230 @@
+"""
+Test script for the batch at-risk scoring pipeline.
+"""
+import sys
+import os
+import random
+from datetime import datetime, timedelta
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from src.main import app
+from src.database import db
+from src.models.user import User
+from src.models.student import Student
+from src.models.student_session import StudentSession, StudentDailyStats
+from src.models.assignment_model import Assignment, AssignmentStudent
+from src.models.class_group import ClassGroup, ClassMembership
+from src.models.engagement import EngagementScore
+from src.models.risk import StudentRiskScore
+from src.services.class_service import ClassService
+from src.services.daily_stats_service import DailyStatsService
+from src.services.engagement_service import EngagementService
+from src.services.monitoring_service import MonitoringService
+from src.services.predictive_analytics_service import PredictiveAnalyticsService
+from src.services.risk_scoring_service import RiskScoringService
+from testing_utils import count_statements
+
+CLASS_SIZES = [10, 40]
+
+
+def _cleanup():
+    """Remove test users, classes and their data."""
+    users = User.query.filter(User.username.like('risk_test_%')).all()
+    user_ids = [u.id for u in users]
+    for assignment in Assignment.query.filter(Assignment.teacher_id.in_(user_ids)).all():
+        AssignmentStudent.query.filter_by(assignment_id=assignment.id).delete()
+        db.session.delete(assignment)
+    for class_group in ClassGroup.query.filter(ClassGroup.teacher_id.in_(user_ids)).all():
+        db.session.delete(class_group)
+    for user in users:
+        if user.student:
+            StudentRiskScore.query.filter_by(student_id=user.student.id).delete()
+            EngagementScore.query.filter_by(student_id=user.student.id).delete()
+            StudentDailyStats.query.filter_by(student_id=user.student.id).delete()
+            StudentSession.query.filter_by(student_id=user.student.id).delete()
+            db.session.delete(user.student)
+        db.session.delete(user)
+    db.session.commit()
+    ClassService.invalidate()
+
+
+def _create_class(teacher, size, offset, rng):
+    """Create a class with a spread of practice habits and overdue work."""
+    class_group = ClassService.create_class(teacher.id, f'Risk Test {size}', '', 6)
+    assignments = []
+    for days in (-10, -5, -2, 7):
+        assignment = Assignment(
+            teacher_id=teacher.id,
+            class_id=class_group.id,
+            title=f'Risk Test Assignment {days}',
+            skill_ids=[],
+            due_date=datetime.utcnow() + timedelta(days=days)
+        )
+        db.session.add(assignment)
+        assignments.append(assignment)
+    db.session.flush()
+
+    now = datetime.utcnow()
+    student_ids = []
+    for i in range(size):
+        user = User(username=f'risk_test_s{offset + i}', email=f'risk_test_s{offset + i}@test.com')
+        user.set_password('test123')
+        db.session.add(user)
+        db.session.flush()
+        student = Student(user_id=user.id, name=f'Risk Student {offset + i}', grade=6)
+        db.session.add(student)
+        db.session.flush()
+        student_ids.append(student.id)
+        db.session.add(ClassMembership(class_id=class_group.id, student_id=student.id, role='student'))
+
+        for assignment in assignments:
+            db.session.add(AssignmentStudent(
+                assignment_id=assignment.id,
+                student_id=student.id,
+                status='completed' if rng.random() < 0.5 else 'assigned'
+            ))
+        for _ in range(rng.choice([0, 1, 3, 10, 30])):
+            started_at = now - timedelta(days=rng.randint(0, 28), minutes=rng.randint(0, 600))
+            answered = rng.randint(1, 20)
+            db.session.add(StudentSession(
+                student_id=student.id,
+                started_at=started_at,
+                last_activity_at=started_at,
+                ended_at=started_at + timedelta(minutes=rng.randint(1, 30)),
+                questions_answered=answered,
+                questions_correct=rng.randint(0, answered),
+                is_active=False
+            ))
+    db.session.commit()
+    DailyStatsService.rebuild(student_ids)
+    return class_group, student_ids
+
+
+def _reference_risk(student_id):
+    """The original per-student risk rules, over the most recent sessions."""
+    risk_score = 0
+    engagement = EngagementService.compute([student_id])[student_id]['score']
+    if engagement < 30:
+        risk_score += 30
+    elif engagement < 50:
+        risk_score += 15
+
+    sessions = StudentSession.query.filter_by(student_id=student_id).order_by(
+        StudentSession.started_at.desc(), StudentSession.id.desc()
+    ).limit(20).all()
+    if sessions:
+        total_q = sum(s.questions_answered or 0 for s in sessions)
+        total_c = sum(s.questions_correct or 0 for s in sessions)
+        accuracy = (total_c / total_q) if total_q > 0 else 0
+        if accuracy < 0.50:
+            risk_score += 30
+        elif accuracy < 0.70:
+            risk_score += 15
+
+    recent_sessions = StudentSession.query.filter(
+        StudentSession.student_id == student_id,
+        StudentSession.started_at >= datetime.utcnow() - timedelta(days=7)
+    ).count()
+    if recent_sessions == 0:
+        risk_score += 25
+    elif recent_sessions < 2:
+        risk_score += 10
+
+    overdue = AssignmentStudent.query.join(Assignment).filter(
+        AssignmentStudent.student_id == student_id,
+        AssignmentStudent.status != 'completed',
+        Assignment.due_date < datetime.utcnow()
+    ).count()
+    if overdue > 2:
+        risk_score += 15
+    elif overdue > 0:
+        risk_score += 7
+    return risk_score
+
+
+def test_risk_scores():
+    """Test vectorized scores, stored lookups and refreshes."""
+    with app.app_context():
+        print("Testing At-Risk Scoring Pipeline...")
+        print("=" * 60)
+
+        _cleanup()
+        rng = random.Random(14)
+        teacher = User(username='risk_test_teacher', email='risk_test_teacher@test.com', role='teacher')
+        teacher.set_password('test123')
+        db.session.add(teacher)
+        db.session.commit()
+
+        classes = []
+        offset = 0
+        for size in CLASS_SIZES:
+            classes.append(_create_class(teacher, size, offset, rng))
+            offset += size
+        print(f"✓ Created classes of {', '.join(str(s) for s in CLASS_SIZES)} students")
+
+        # Test 1: Vectorized scores match the per-student rules
+        print("\nTest 1: Batch scoring")
+        student_ids = classes[0][1] + classes[1][1]
+        features = RiskScoringService.build_features(student_ids)
+        scores, levels, factors = RiskScoringService.score(features)
+        for i, student_id in enumerate(student_ids):
+            assert scores[i] == _reference_risk(student_id), "Score should match the per-student rules"
+            assert bool(factors[i]) == bool(scores[i]), "Every scored student should have factors"
+        assert set(levels.tolist()) <= {'low', 'medium', 'high'}, "Levels should be valid"
+        print(f"  ✓ {len(student_ids)} students scored")
+
+        # Test 2: Class lookups are one read after a refresh
+        print("\nTest 2: Class lookups")
+        RiskScoringService.refresh(student_ids)
+        counts = []
+        class_ids = [class_group.id for class_group, _ in classes]
+        for size, class_id in zip(CLASS_SIZES, class_ids):
+            (result, status), statements = count_statements(
+                lambda: PredictiveAnalyticsService.detect_at_risk_students(class_id)
+            )
+            assert status == 200, result
+            at_risk = result['at_risk_students']
+            assert all(s['risk_level'] in ('medium', 'high') for s in at_risk), "Only medium and high risk"
+            assert [s['risk_score'] for s in at_risk] == sorted((s['risk_score'] for s in at_risk), reverse=True), \
+                "Highest risk first"
+            counts.append(statements)
+            print(f"  {size:>8} students: {statements} statement(s)")
+        assert counts == [1, 1], "A class lookup should be a single read"
+        print("  ✓ One read per class")
+
+        # Test 3: Missing and outdated rows are scored on read
+        print("\nTest 3: Stale rows")
+        class_group, class_student_ids = classes[0]
+        StudentRiskScore.query.filter_by(student_id=class_student_ids[0]).delete()
+        db.session.query(StudentRiskScore).filter_by(student_id=class_student_ids[1]).update({'model_version': 0})
+        db.session.commit()
+        RiskScoringService.get_class_risks(class_group.id)
+        rows = StudentRiskScore.query.filter(StudentRiskScore.student_id.in_(class_student_ids[:2])).all()
+        assert len(rows) == 2, "Missing row should be stored"
+        assert all(r.model_version == RiskScoringService.MODEL_VERSION for r in rows), "Old rules rescored"
+        print("  ✓ Missing and outdated rows rescored")
+
+        # Test 4: Ending a session rescores the student
+        print("\nTest 4: Refresh on input change")
+        student_id = class_student_ids[2]
+        before = StudentRiskScore.query.filter_by(student_id=student_id).first().to_dict()
+        result, _ = MonitoringService.start_session(student_id)
+        MonitoringService.track_session_activity(student_id, None, None, True)
+        MonitoringService.end_session(result['session']['id'])
+        after = StudentRiskScore.query.filter_by(student_id=student_id).first().to_dict()
+        assert after['recent_sessions'] == before['recent_sessions'] + 1, "New session should be counted"
+        assert after['risk_score'] == _reference_risk(student_id), "Stored score should be current"
+        print("  ✓ Stored score updated when the session ended")
+
+        # Clean up
+        print("\nCleaning up test data...")
+        _cleanup()
+        print("✓ Test data cleaned up")
+
+        print("\n" + "=" * 60)
+        print("All tests passed! ✅")
+        print("=" * 60)
+
+
+if __name__ == '__main__':
+    test_risk_scores()
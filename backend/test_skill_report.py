@@ -0,0 +1,178 @@
+"""
+Test script for the single-pass skill report.
+
+Also prints the SQL statements needed for a student with few and with
+many skills; the count should not depend on the number of skills.
+"""
+import sys
+import os
+import random
+from datetime import datetime, timedelta
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from src.main import app
+from src.database import db
+from src.models.user import User
+from src.models.student import Student
+from src.models.parent import Parent, ParentChildLink
+from src.models.student_session import StudentSession
+from src.models.learning_path import LearningPath
+from src.models.assessment import Skill
+from src.services.report_service import ReportService
+from testing_utils import count_statements
+
+SKILL_COUNTS = [2, 60]
+
+
+def _cleanup():
+    """Remove test users, skills and their data."""
+    for user in User.query.filter(User.username.like('skill_report_test_%')).all():
+        if user.student:
+            ParentChildLink.query.filter_by(student_id=user.student.id).delete()
+            StudentSession.query.filter_by(student_id=user.student.id).delete()
+            LearningPath.query.filter_by(student_id=user.student.id).delete()
+            db.session.delete(user.student)
+        Parent.query.filter_by(user_id=user.id).delete()
+        db.session.delete(user)
+    Skill.query.filter(Skill.name.like('Skill Report Test %')).delete(synchronize_session=False)
+    db.session.commit()
+    ReportService.invalidate_reports()
+
+
+def _reference_skill(student_id, path):
+    """The original per-skill time and trend, from raw sessions."""
+    sessions = StudentSession.query.filter_by(student_id=student_id, skill_id=path.skill_id).all()
+    time_spent = sum((s.ended_at - s.started_at).total_seconds() / 60 if s.ended_at else 0 for s in sessions)
+    recent = [s for s in sessions if s.started_at >= datetime.utcnow() - timedelta(days=14)]
+    if not recent:
+        return round(time_spent, 1), 'no_recent_activity'
+    total = sum(s.questions_answered or 0 for s in recent)
+    accuracy = sum(s.questions_correct or 0 for s in recent) / total if total else 0
+    if accuracy > path.current_accuracy + 0.05:
+        return round(time_spent, 1), 'improving'
+    if accuracy < path.current_accuracy - 0.05:
+        return round(time_spent, 1), 'declining'
+    return round(time_spent, 1), 'stable'
+
+
+def _create_student(parent, index, skills, rng):
+    """Create a linked student practicing the given skills."""
+    user = User(username=f'skill_report_test_{index}', email=f'skill_report_test_{index}@test.com')
+    user.set_password('test123')
+    db.session.add(user)
+    db.session.flush()
+    student = Student(user_id=user.id, name=f'Skill Report Student {index}', grade=5)
+    db.session.add(student)
+    db.session.flush()
+    db.session.add(ParentChildLink(parent_id=parent.id, student_id=student.id, status='active'))
+
+    now = datetime.utcnow()
+    for skill in skills:
+        db.session.add(LearningPath(
+            student_id=student.id,
+            skill_id=skill.id,
+            current_accuracy=rng.choice([0.5, 0.7, 0.9]),
+            questions_answered=rng.randint(0, 50)
+        ))
+        for _ in range(rng.randint(0, 4)):
+            started_at = now - timedelta(days=rng.randint(0, 40), minutes=rng.randint(0, 600))
+            answered = rng.randint(1, 20)
+            db.session.add(StudentSession(
+                student_id=student.id,
+                skill_id=skill.id,
+                started_at=started_at,
+                last_activity_at=started_at,
+                ended_at=started_at + timedelta(minutes=rng.randint(1, 30)) if rng.random() < 0.9 else None,
+                questions_answered=answered,
+                questions_correct=rng.randint(0, answered),
+                is_active=False
+            ))
+    db.session.commit()
+    return student.id
+
+
+def test_skill_report():
+    """Test single-statement loading, report values and memoization."""
+    with app.app_context():
+        print("Testing Single-Pass Skill Report...")
+        print("=" * 60)
+
+        _cleanup()
+        rng = random.Random(17)
+        parent_user = User(username='skill_report_test_parent', email='skill_report_test_parent@test.com', role='parent')
+        parent_user.set_password('test123')
+        db.session.add(parent_user)
+        db.session.flush()
+        parent = Parent(user_id=parent_user.id, name='Skill Report Parent', email='skill_report_test_parent@test.com')
+        db.session.add(parent)
+
+        skills = [
+            Skill(name=f'Skill Report Test {i}', subject_area=['arithmetic', 'fractions'][i % 2], grade_level=5)
+            for i in range(max(SKILL_COUNTS))
+        ]
+        db.session.add_all(skills)
+        db.session.flush()
+        student_ids = [_create_student(parent, i, skills[:count], rng) for i, count in enumerate(SKILL_COUNTS)]
+        print(f"✓ Created students with {', '.join(str(c) for c in SKILL_COUNTS)} skills")
+
+        # Test 1: Statements do not grow with the number of skills
+        print("\nTest 1: Statements per report")
+        counts = []
+        parent_id = parent.id
+        for count, student_id in zip(SKILL_COUNTS, student_ids):
+            (result, status), statements = count_statements(
+                lambda: ReportService.generate_skill_report(parent_id, student_id)
+            )
+            assert status == 200, result
+            assert result['report']['total_skills'] == count, "Every learning path reported"
+            counts.append(statements)
+            print(f"  {count:>8} skills: {statements} statements")
+        assert counts == [3, 3], "Authorization, signature and one report query"
+        print("  ✓ Constant statements")
+
+        # Test 2: Times and trends match the per-skill computation
+        print("\nTest 2: Report values")
+        student_id = student_ids[-1]
+        result, _ = ReportService.generate_skill_report(parent_id, student_id)
+        paths = LearningPath.query.filter_by(student_id=student_id).order_by(LearningPath.id).all()
+        for path, skill in zip(paths, result['report']['skills']):
+            time_spent, trend = _reference_skill(student_id, path)
+            assert abs(skill['time_spent_minutes'] - time_spent) <= 0.1, "Time spent should match"
+            assert skill['trend'] == trend, "Trend should match"
+        print("  ✓ Time spent and trends match")
+
+        # Test 3: Reports are memoized until the student practices
+        print("\nTest 3: Memoization")
+        (cached, _), statements = count_statements(lambda: ReportService.generate_skill_report(parent_id, student_id))
+        assert statements == 2 and cached == result, "Cached report served after the signature check"
+
+        started_at = datetime.utcnow()
+        db.session.add(StudentSession(
+            student_id=student_id,
+            skill_id=skills[0].id,
+            started_at=started_at,
+            last_activity_at=started_at,
+            ended_at=started_at + timedelta(minutes=30),
+            questions_answered=10,
+            questions_correct=10,
+            is_active=False
+        ))
+        db.session.commit()
+        (fresh, _), statements = count_statements(lambda: ReportService.generate_skill_report(parent_id, student_id))
+        assert statements == 3, "New practice should rebuild the report"
+        assert fresh['report']['skills'][0]['time_spent_minutes'] >= result['report']['skills'][0]['time_spent_minutes'] + 30, \
+            "New session time included"
+        print("  ✓ Served from cache until the student practices")
+
+        # Clean up
+        print("\nCleaning up test data...")
+        _cleanup()
+        print("✓ Test data cleaned up")
+
+        print("\n" + "=" * 60)
+        print("All tests passed! ✅")
+        print("=" * 60)
+
+
+if __name__ == '__main__':
+    test_skill_report()
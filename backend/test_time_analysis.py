@@ -0,0 +1,165 @@
+"""
+Test script for SQL-side time analysis histograms.
+
+Also prints the SQL statements needed for 7-day and year-long windows;
+the count should not depend on the window length.
+"""
+import sys
+import os
+import random
+from datetime import datetime, timedelta
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from src.main import app
+from src.database import db
+from src.models.user import User
+from src.models.student import Student
+from src.models.parent import Parent, ParentChildLink
+from src.models.student_session import StudentSession
+from src.services.report_service import ReportService
+from testing_utils import count_statements
+
+WINDOWS = [7, 30, 365]
+
+
+def _cleanup():
+    """Remove test users and their data."""
+    for user in User.query.filter(User.username.like('time_analysis_test_%')).all():
+        if user.student:
+            ParentChildLink.query.filter_by(student_id=user.student.id).delete()
+            StudentSession.query.filter_by(student_id=user.student.id).delete()
+            db.session.delete(user.student)
+        Parent.query.filter_by(user_id=user.id).delete()
+        db.session.delete(user)
+    db.session.commit()
+    ReportService.invalidate_reports()
+
+
+def _reference(student_id, days):
+    """The original Python bucketing over raw sessions."""
+    end = datetime.utcnow()
+    sessions = StudentSession.query.filter(
+        StudentSession.student_id == student_id,
+        StudentSession.started_at >= end - timedelta(days=days - 1),
+        StudentSession.started_at <= end
+    ).all()
+    by_day = {name: 0 for name in ReportService.WEEKDAY_NAMES}
+    by_time = {'morning': 0, 'afternoon': 0, 'evening': 0}
+    durations = []
+    for s in sessions:
+        minutes = (s.ended_at - s.started_at).total_seconds() / 60 if s.ended_at else 0
+        by_day[s.started_at.strftime('%A')] += minutes
+        hour = s.started_at.hour
+        by_time['morning' if 6 <= hour < 12 else 'afternoon' if 12 <= hour < 18 else 'evening'] += minutes
+        if s.ended_at:
+            durations.append(minutes)
+    durations.sort()
+    return {
+        'total_sessions': len(sessions),
+        'by_day_of_week': {k: round(v, 1) for k, v in by_day.items()},
+        'by_time_of_day': {k: round(v, 1) for k, v in by_time.items()},
+        'median': round(durations[len(durations) // 2], 1) if durations else 0,
+        'longest': round(max(durations), 1) if durations else 0,
+        'days': len(set(s.started_at.date() for s in sessions))
+    }
+
+
+def test_time_analysis():
+    """Test histogram values, statement counts and caching."""
+    with app.app_context():
+        print("Testing SQL Time Analysis...")
+        print("=" * 60)
+
+        _cleanup()
+        rng = random.Random(18)
+        parent_user = User(username='time_analysis_test_parent', email='time_analysis_test_parent@test.com', role='parent')
+        parent_user.set_password('test123')
+        db.session.add(parent_user)
+        db.session.flush()
+        parent = Parent(user_id=parent_user.id, name='Time Parent', email='time_analysis_test_parent@test.com')
+        db.session.add(parent)
+        user = User(username='time_analysis_test_student', email='time_analysis_test_student@test.com')
+        user.set_password('test123')
+        db.session.add(user)
+        db.session.flush()
+        student = Student(user_id=user.id, name='Time Student', grade=5)
+        db.session.add(student)
+        db.session.flush()
+        student_id = student.id
+        db.session.add(ParentChildLink(parent_id=parent.id, student_id=student_id, status='active'))
+
+        now = datetime.utcnow()
+        for _ in range(600):
+            started_at = now - timedelta(days=rng.randint(0, 380), minutes=rng.randint(0, 1439))
+            db.session.add(StudentSession(
+                student_id=student_id,
+                started_at=started_at,
+                last_activity_at=started_at,
+                ended_at=started_at + timedelta(minutes=rng.randint(1, 45)) if rng.random() < 0.9 else None,
+                questions_answered=10,
+                questions_correct=7,
+                is_active=False
+            ))
+        db.session.commit()
+        parent_id = parent.id
+        print("✓ Created a student with a year of sessions")
+
+        # Test 1: SQL buckets match the Python bucketing
+        print("\nTest 1: Histogram values")
+        for days in WINDOWS:
+            result, status = ReportService.generate_time_analysis(parent_id, student_id, days)
+            assert status == 200, result
+            report = result['report']
+            expected = _reference(student_id, days)
+            assert report['total_sessions'] == expected['total_sessions'], "Session count should match"
+            for name, minutes in expected['by_day_of_week'].items():
+                assert abs(report['by_day_of_week'][name] - minutes) <= 0.1, f"{name} minutes should match"
+            for name, minutes in expected['by_time_of_day'].items():
+                assert abs(report['by_time_of_day'][name] - minutes) <= 0.1, f"{name} minutes should match"
+            stats = report['session_stats']
+            assert abs(stats['median_session_minutes'] - expected['median']) <= 0.1, "Median should match"
+            assert abs(stats['longest_session_minutes'] - expected['longest']) <= 0.1, "Longest should match"
+            assert round(expected['days'] / days, 2) == report['consistency_score'], "Practice days should match"
+            assert len(report['by_weekday_and_hour']) == 7, "Seven weekday rows"
+        print(f"  ✓ Windows of {', '.join(str(d) for d in WINDOWS)} days match")
+
+        # Test 2: Statements do not grow with the window
+        print("\nTest 2: Statements per window")
+        ReportService.invalidate_reports()
+        counts = []
+        for days in WINDOWS:
+            _, statements = count_statements(lambda: ReportService.generate_time_analysis(parent_id, student_id, days))
+            counts.append(statements)
+            print(f"  {days:>8} days: {statements} statements")
+        assert len(set(counts)) == 1 and counts[0] <= 5, "Statements should not depend on the window"
+        print("  ✓ Constant statements")
+
+        # Test 3: Reports are cached per (student, window) until new practice
+        print("\nTest 3: Caching")
+        _, statements = count_statements(lambda: ReportService.generate_time_analysis(parent_id, student_id, 365))
+        assert statements == 2, "Authorization plus the signature check"
+        db.session.add(StudentSession(
+            student_id=student_id,
+            started_at=datetime.utcnow(),
+            last_activity_at=datetime.utcnow(),
+            questions_answered=0,
+            questions_correct=0
+        ))
+        db.session.commit()
+        (result, _), statements = count_statements(lambda: ReportService.generate_time_analysis(parent_id, student_id, 365))
+        assert statements == counts[-1], "New practice should rebuild the report"
+        assert result['report']['total_sessions'] == _reference(student_id, 365)['total_sessions'], "New session counted"
+        print("  ✓ Served from cache until the student practices")
+
+        # Clean up
+        print("\nCleaning up test data...")
+        _cleanup()
+        print("✓ Test data cleaned up")
+
+        print("\n" + "=" * 60)
+        print("All tests passed! ✅")
+        print("=" * 60)
+
+
+if __name__ == '__main__':
+    test_time_analysis()
@@ -0,0 +1,190 @@
+"""
+Test script for bulk weekly digest generation.
+
+Also prints the SQL statements needed to load weekly report inputs for
+one student and for a batch; the count should not depend on batch size.
+"""
+import sys
+import os
+import random
+from datetime import datetime, timedelta
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from src.database import db
+from src.models.user import User
+from src.models.student import Student
+from src.models.parent import Parent, ParentChildLink
+from src.models.student_session import StudentSession, StudentDailyStats
+from src.models.learning_path import LearningPath
+from src.models.assessment import Skill
+from src.models.streak import StreakTracking
+from src.models.report_snapshot import ReportSnapshot, DigestRun
+from src.services.daily_stats_service import DailyStatsService
+from src.services.report_service import ReportService
+from src.services.weekly_digest_service import WeeklyDigestService
+from testing_utils import count_statements
+
+STUDENT_COUNT = 25
+
+
+def _cleanup(run_ids=()):
+    """Remove test users, their data and the test's digest runs."""
+    for user in User.query.filter(User.username.like('digest_test_%')).all():
+        if user.student:
+            ReportSnapshot.query.filter_by(student_id=user.student.id).delete()
+            ParentChildLink.query.filter_by(student_id=user.student.id).delete()
+            StreakTracking.query.filter_by(student_id=user.student.id).delete()
+            StudentDailyStats.query.filter_by(student_id=user.student.id).delete()
+            StudentSession.query.filter_by(student_id=user.student.id).delete()
+            LearningPath.query.filter_by(student_id=user.student.id).delete()
+            db.session.delete(user.student)
+        Parent.query.filter_by(user_id=user.id).delete()
+        db.session.delete(user)
+    if run_ids:
+        ReportSnapshot.query.filter(ReportSnapshot.run_id.in_(run_ids)).update({'run_id': None})
+        DigestRun.query.filter(DigestRun.id.in_(run_ids)).delete(synchronize_session=False)
+    db.session.commit()
+
+
+def test_weekly_digest():
+    """Test set-based loading, snapshot runs, resume and serving."""
+    # Imported here: the process pool test spawns workers that re-import
+    # this script and must not start the app
+    from src.main import app
+
+    with app.app_context():
+        print("Testing Weekly Digest Generation...")
+        print("=" * 60)
+
+        _cleanup()
+        skills = Skill.query.limit(3).all()
+        assert skills, "Seed skills before running this test"
+        rng = random.Random(16)
+        start_date, _ = ReportService._get_date_range('week', 1)
+
+        parent_user = User(username='digest_test_parent', email='digest_test_parent@test.com', role='parent')
+        parent_user.set_password('test123')
+        db.session.add(parent_user)
+        db.session.flush()
+        parent = Parent(user_id=parent_user.id, name='Digest Parent', email='digest_test_parent@test.com')
+        db.session.add(parent)
+        db.session.flush()
+
+        student_ids = []
+        for i in range(STUDENT_COUNT):
+            user = User(username=f'digest_test_{i}', email=f'digest_test_{i}@test.com')
+            user.set_password('test123')
+            db.session.add(user)
+            db.session.flush()
+            student = Student(user_id=user.id, name=f'Digest Student {i}', grade=4)
+            db.session.add(student)
+            db.session.flush()
+            student_ids.append(student.id)
+            db.session.add(ParentChildLink(parent_id=parent.id, student_id=student.id, status='active'))
+            db.session.add(StreakTracking(student_id=student.id, practice_streak=rng.randint(0, 12)))
+            for skill in skills:
+                db.session.add(LearningPath(student_id=student.id, skill_id=skill.id))
+
+            # Sessions in the report week and the week before it
+            for _ in range(rng.randint(0, 8)):
+                started_at = datetime.combine(start_date, datetime.min.time()) + timedelta(
+                    days=rng.randint(-7, 6), hours=rng.randint(8, 20)
+                )
+                answered = rng.randint(1, 20)
+                db.session.add(StudentSession(
+                    student_id=student.id,
+                    skill_id=rng.choice(skills).id,
+                    started_at=started_at,
+                    last_activity_at=started_at,
+                    ended_at=started_at + timedelta(minutes=rng.randint(5, 40)),
+                    questions_answered=answered,
+                    questions_correct=rng.randint(0, answered),
+                    is_active=False
+                ))
+        db.session.commit()
+        DailyStatsService.rebuild(student_ids)
+        print(f"✓ Created {STUDENT_COUNT} linked students with two weeks of practice")
+
+        # Test 1: Loading inputs costs the same for one student or many
+        print("\nTest 1: Statements per batch")
+        _, one = count_statements(lambda: ReportService.load_weekly_inputs(student_ids[:1], start_date))
+        inputs, many = count_statements(lambda: ReportService.load_weekly_inputs(student_ids, start_date))
+        print(f"  {1:>8} students: {one} statements")
+        print(f"  {STUDENT_COUNT:>8} students: {many} statements")
+        assert one <= many <= 5, "Loading should use a fixed number of queries"
+        live = {student_id: ReportService.build_weekly_report(inputs[student_id]) for student_id in student_ids}
+        result, status = ReportService.generate_weekly_report(parent.id, student_ids[0], 1)
+        assert status == 200 and result['report'] == live[student_ids[0]], "Single and batch reports should agree"
+        print("  ✓ Constant statements, reports agree")
+
+        # Test 2: An inline run stores a snapshot per linked student
+        print("\nTest 2: Inline run")
+        run_ids = []
+        run = WeeklyDigestService.run(1, workers=0, partition_size=7)
+        run_ids.append(run['id'])
+        assert run['status'] == 'completed', "Run should complete"
+        snapshots = {
+            row.student_id: row.report for row in ReportSnapshot.query.filter(
+                ReportSnapshot.student_id.in_(student_ids),
+                ReportSnapshot.period_start == start_date
+            ).all()
+        }
+        assert snapshots == live, "Snapshots should match live reports"
+        print(f"  ✓ {len(snapshots)} snapshots stored")
+
+        # Test 3: Stored snapshots are served
+        print("\nTest 3: Serving snapshots")
+        snapshot = ReportSnapshot.query.filter_by(student_id=student_ids[1], period_start=start_date).first()
+        snapshot.report = dict(snapshot.report, served_from='snapshot')
+        db.session.commit()
+        parent_id = parent.id
+        (result, status), statements = count_statements(
+            lambda: ReportService.generate_weekly_report(parent_id, student_ids[1], 1)
+        )
+        assert status == 200 and result['report'].get('served_from') == 'snapshot', "Snapshot should be served"
+        assert statements == 2, "Authorization plus the snapshot read"
+        print("  ✓ Served with two statements")
+
+        # Test 4: An interrupted run resumes after its last partition
+        print("\nTest 4: Resume")
+        ReportSnapshot.query.filter(ReportSnapshot.student_id.in_(student_ids[10:])).delete(synchronize_session=False)
+        interrupted = DigestRun(period='week', period_start=start_date, processed_students=10,
+                                last_student_id=student_ids[9])
+        db.session.add(interrupted)
+        db.session.commit()
+        run_ids.append(interrupted.id)
+        remaining = len(WeeklyDigestService._student_ids(after=student_ids[9]))
+        run = WeeklyDigestService.run(1, workers=0, partition_size=7)
+        assert run['id'] == interrupted.id, "Unfinished run should be resumed"
+        assert run['processed_students'] == 10 + remaining, "Only remaining students processed"
+        restored = ReportSnapshot.query.filter(ReportSnapshot.student_id.in_(student_ids[10:])).count()
+        assert restored == STUDENT_COUNT - 10, "Remaining snapshots stored"
+        assert ReportSnapshot.query.filter_by(student_id=student_ids[1]).first().report.get('served_from'), \
+            "Processed partitions are not rebuilt"
+        print(f"  ✓ Resumed after student {student_ids[9]}")
+
+        # Test 5: A process pool builds the same reports
+        print("\nTest 5: Process pool")
+        run = WeeklyDigestService.run(1, workers=2, partition_size=7, resume=False)
+        run_ids.append(run['id'])
+        snapshots = {
+            row.student_id: row.report for row in ReportSnapshot.query.filter(
+                ReportSnapshot.student_id.in_(student_ids),
+                ReportSnapshot.period_start == start_date
+            ).all()
+        }
+        assert snapshots == live, "Worker-built snapshots should match live reports"
+        print("  ✓ Worker processes agree with live reports")
+
+        # Clean up
+        print("\nCleaning up test data...")
+        _cleanup(run_ids)
+        print("✓ Test data cleaned up")
+
+        print("\n" + "=" * 60)
+        print("All tests passed! ✅")
+        print("=" * 60)
+
+
+if __name__ == '__main__':
+    test_weekly_digest()
@@ -0,0 +1,167 @@
+"""
+Test script for XP ledger rollups and compaction.
+"""
+import sys
+import os
+import random
+from datetime import datetime, timedelta
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from sqlalchemy import func
+from src.main import app
+from src.database import db
+from src.models.user import User
+from src.models.student import Student
+from src.models.gamification import StudentProgress, XPTransaction, XPRollup
+from src.services.xp_ledger_service import XPLedgerService
+from src.services.gamification_service import GamificationService
+
+
+def _cleanup():
+    """Remove test users and their data."""
+    for user in User.query.filter(User.username.like('xp_ledger_test_%')).all():
+        if user.student:
+            XPRollup.query.filter_by(student_id=user.student.id).delete()
+            XPTransaction.query.filter_by(student_id=user.student.id).delete()
+            StudentProgress.query.filter_by(student_id=user.student.id).delete()
+            db.session.delete(user.student)
+        db.session.delete(user)
+    db.session.commit()
+
+
+def _raw_sum(student_ids, since=None, until=None, action_type=None):
+    """The original SUM() over the raw ledger."""
+    query = db.session.query(func.sum(XPTransaction.total_xp)).filter(XPTransaction.student_id.in_(student_ids))
+    if since is not None:
+        query = query.filter(XPTransaction.created_at >= since)
+    if until is not None:
+        query = query.filter(XPTransaction.created_at < until)
+    if action_type is not None:
+        query = query.filter(XPTransaction.action_type == action_type)
+    return int(query.scalar() or 0)
+
+
+def _snapshot(student_ids, today):
+    """Every read the test compares before and after compaction."""
+    student_id = student_ids[0]
+    week_ago = datetime.utcnow() - timedelta(days=7)
+    ranges = [
+        (None, None),
+        (today - timedelta(days=100), None),
+        (today - timedelta(days=61), today - timedelta(days=19)),
+        (today - timedelta(days=45), today - timedelta(days=44)),
+        (week_ago, None),
+    ]
+    top = dict(XPLedgerService.get_top_earners(since=today - timedelta(days=80), limit=None))
+    return {
+        'totals': [XPLedgerService.get_total_xp(student_id, since, until) for since, until in ranges],
+        'by_action': XPLedgerService.get_xp_by_action(student_id, since=today - timedelta(days=90)),
+        'correct': XPLedgerService.get_total_xp(student_id, action_type='question_correct'),
+        'days': XPLedgerService.get_xp_buckets(student_id, 'day', since=today - timedelta(days=50)),
+        'weeks': XPLedgerService.get_xp_buckets(student_id, 'week', since=today - timedelta(days=110)),
+        'top': {sid: xp for sid, xp in top.items() if sid in student_ids},
+    }
+
+
+def test_xp_ledger():
+    """Test that compacted reads match raw SUM() queries."""
+    with app.app_context():
+        print("Testing XP Ledger Rollups...")
+        print("=" * 60)
+
+        _cleanup()
+        rng = random.Random(7)
+        today = datetime.combine(datetime.utcnow().date(), datetime.min.time())
+
+        student_ids = []
+        for i in range(3):
+            user = User(username=f'xp_ledger_test_{i}', email=f'xp_ledger_test_{i}@test.com')
+            user.set_password('test123')
+            db.session.add(user)
+            db.session.flush()
+            student = Student(user_id=user.id, name=f'Ledger Student {i}', grade=6)
+            db.session.add(student)
+            db.session.flush()
+            student_ids.append(student.id)
+
+            for _ in range(400):
+                created_at = datetime.utcnow() - timedelta(minutes=rng.randint(0, 120 * 24 * 60))
+                db.session.add(XPTransaction(
+                    student_id=student.id,
+                    action_type=rng.choice(['question_complete', 'question_correct', 'daily_challenge']),
+                    base_xp=10,
+                    total_xp=rng.randint(1, 50),
+                    created_at=created_at
+                ))
+        db.session.commit()
+        print(f"✓ Created 3 students with 1200 transactions over 120 days")
+
+        # Test 1: Reads before compaction equal raw SUM()
+        print("\nTest 1: Uncompacted reads")
+        before = _snapshot(student_ids, today)
+        assert before['totals'][0] == _raw_sum(student_ids[:1]), "All-time total should match SUM()"
+        assert before['totals'][2] == _raw_sum(student_ids[:1], today - timedelta(days=61), today - timedelta(days=19)), \
+            "Windowed total should match SUM()"
+        print("  ✓ Raw ledger reads match")
+
+        # Test 2: Compaction folds old rows and keeps the tail
+        print("\nTest 2: Compaction")
+        raw_before = XPTransaction.query.filter(XPTransaction.student_id.in_(student_ids)).count()
+        result = XPLedgerService.compact(retention_days=35)
+        raw_after = XPTransaction.query.filter(XPTransaction.student_id.in_(student_ids)).count()
+        assert result['compacted_before'] == today - timedelta(days=35), "Watermark should be the cutoff"
+        assert raw_after < raw_before, "Old transactions should be folded"
+        assert XPTransaction.query.filter(XPTransaction.created_at < result['compacted_before']).count() == 0, \
+            "No raw rows should remain before the watermark"
+        print(f"  ✓ Folded {raw_before - raw_after} transactions into rollups")
+
+        # Test 3: Reads after compaction are unchanged
+        print("\nTest 3: Compacted reads")
+        after = _snapshot(student_ids, today)
+        for key in before:
+            assert after[key] == before[key], f"{key} should match after compaction"
+        print("  ✓ Totals, per-action, buckets and top earners unchanged")
+
+        # Test 4: Compaction is idempotent and unaligned ranges cover whole days
+        print("\nTest 4: Re-run and range checks")
+        assert XPLedgerService.compact(retention_days=35)['transactions'] == 0, "Nothing left to fold"
+        assert _snapshot(student_ids, today) == before, "Re-running should not change totals"
+        unaligned = XPLedgerService.get_total_xp(student_ids[0], since=today - timedelta(days=60, hours=5))
+        assert unaligned == XPLedgerService.get_total_xp(student_ids[0], since=today - timedelta(days=61)), \
+            "Unaligned since in compacted history should round down to the day"
+        unaligned = XPLedgerService.get_total_xp(
+            student_ids[0], since=today - timedelta(days=61), until=today - timedelta(days=44, hours=-3)
+        )
+        assert unaligned == XPLedgerService.get_total_xp(
+            student_ids[0], since=today - timedelta(days=61), until=today - timedelta(days=43)
+        ), "Unaligned until in compacted history should round up to the day"
+        top = XPLedgerService.get_top_earners(since=datetime.utcnow() - timedelta(days=50), limit=None)
+        assert top, "Rolling windows into compacted history should be answered"
+        print("  ✓ Idempotent, unaligned compacted ranges widened to whole days")
+
+        # Test 5: History reaches into compacted days through the rollups
+        print("\nTest 5: XP history")
+        raw_count = XPTransaction.query.filter_by(student_id=student_ids[0]).count()
+        history = GamificationService.get_xp_history(student_ids[0], limit=raw_count + 5)
+        assert len(history) == raw_count + 5, "History should continue past the raw ledger"
+        assert not any(entry.get('compacted') for entry in history[:raw_count]), "Raw transactions come first"
+        compacted = history[raw_count:]
+        assert all(entry['compacted'] for entry in compacted), "Older entries come from rollups"
+        assert all(entry['created_at'] < result['compacted_before'].isoformat() for entry in compacted), \
+            "Compacted entries predate the watermark"
+        dates = [entry['created_at'] for entry in history]
+        assert dates == sorted(dates, reverse=True), "History should be newest first"
+        print("  ✓ Raw transactions followed by daily rollups")
+
+        # Clean up
+        print("\nCleaning up test data...")
+        _cleanup()
+        print("✓ Test data cleaned up")
+
+        print("\n" + "=" * 60)
+        print("All tests passed! ✅")
+        print("=" * 60)
+
+
+if __name__ == '__main__':
+    test_xp_ledger()
@@ -0,0 +1,32 @@
+"""
+Shared helpers for the test scripts.
+"""
+from sqlalchemy import event
+from src.database import db
+
+
+def record_statements(fn):
+    """
+    Run fn and return (result, list of SQL statements executed).
+
+    Read the ids and other attributes fn needs before calling it: objects
+    expired by an earlier commit reload on first access, and that SELECT
+    would be recorded too.
+    """
+    statements = []
+
+    def record_statement(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', record_statement)
+    try:
+        result = fn()
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', record_statement)
+    return result, statements
+
+
+def count_statements(fn):
+    """Run fn and return (result, number of SQL statements executed)."""
+    result, statements = record_statements(fn)
+    return result, len(statements)